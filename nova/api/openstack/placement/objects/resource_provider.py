@@ -42,6 +42,7 @@ from nova.api.openstack.placement import exception
 from nova.api.openstack.placement.objects import consumer as consumer_obj
 from nova.api.openstack.placement.objects import project as project_obj
 from nova.api.openstack.placement.objects import user as user_obj
+from nova.api.openstack.placement import provider_tree_cache as pt_cache
 from nova.api.openstack.placement import resource_class_cache as rc_cache
 from nova.db.sqlalchemy import api_models as models
 from nova.i18n import _
@@ -60,6 +61,7 @@ _PROJECT_TBL = models.Project.__table__
 _USER_TBL = models.User.__table__
 _CONSUMER_TBL = models.Consumer.__table__
 _RC_CACHE = None
+_PROVIDER_TREE_CACHE = pt_cache.ProviderTreeCache()
 _TRAIT_LOCK = 'trait_sync'
 _TRAITS_SYNCED = False
 
@@ -279,6 +281,7 @@ def _increment_provider_generation(ctx, rp):
     res = ctx.session.execute(upd_stmt)
     if res.rowcount != 1:
         raise exception.ResourceProviderConcurrentUpdateDetected()
+    _PROVIDER_TREE_CACHE.invalidate(rp.id)
     return new_generation
 
 
@@ -1098,6 +1101,7 @@ class ResourceProvider(base.VersionedObject, base.TimestampedObject):
             raise exception.CannotDeleteParentResourceProvider()
         if not result:
             raise exception.NotFound()
+        _PROVIDER_TREE_CACHE.invalidate(_id)
 
     @db_api.placement_context_manager.writer
     def _update_in_db(self, context, id, updates):
@@ -2205,6 +2209,7 @@ class AllocationList(base.ObjectListBase, base.VersionedObject):
             retries -= 1
             try:
                 self._set_allocations(self._context, self.objects)
+                self._invalidate_provider_trees()
                 break
             except exception.ResourceProviderConcurrentUpdateDetected:
                 LOG.debug('Retrying allocations write on resource provider '
@@ -2236,6 +2241,15 @@ class AllocationList(base.ObjectListBase, base.VersionedObject):
         _delete_allocations_by_ids(self._context, alloc_ids)
         consumer_obj.delete_consumers_if_no_allocations(
             self._context, consumer_uuids)
+        # Deleting allocations does not increment the generation of their
+        # providers.
+        self._invalidate_provider_trees()
+
+    def _invalidate_provider_trees(self):
+        """Drop the cached usages of the providers of the allocations."""
+        for alloc in self.objects:
+            if alloc.resource_provider.obj_attr_is_set('id'):
+                _PROVIDER_TREE_CACHE.invalidate(alloc.resource_provider.id)
 
     def __repr__(self):
         strings = [repr(x) for x in self.objects]
@@ -2805,6 +2819,53 @@ def _get_usages_by_provider_tree(ctx, root_ids):
     return ctx.session.execute(query).fetchall()
 
 
+@db_api.placement_context_manager.reader
+def _get_provider_generations_by_tree(ctx, root_ids):
+    """Returns a dict, keyed by root provider ID, of frozensets of tuples of
+    (provider ID, generation) for all resource providers in all trees
+    indicated in the ``root_ids``.
+    """
+    sel = sa.select([
+        _RP_TBL.c.id, _RP_TBL.c.root_provider_id, _RP_TBL.c.generation,
+    ]).where(
+        # TODO(tetsuro): Remove this or condition when all
+        # root_provider_id values are NOT NULL
+        sa.or_(
+            _RP_TBL.c.root_provider_id.in_(root_ids),
+            _RP_TBL.c.id.in_(root_ids)
+        )
+    )
+    res = collections.defaultdict(set)
+    for r in ctx.session.execute(sel):
+        res[r[1] or r[0]].add((r[0], r[2]))
+    return {root_id: frozenset(gens) for root_id, gens in res.items()}
+
+
+def _get_usages_and_traits_by_provider_tree(ctx, root_ids):
+    """Returns a tuple of (usages, traits) for all resource providers in all
+    trees indicated in the ``root_ids``, as returned by
+    _get_usages_by_provider_tree() and _get_traits_by_provider_tree().
+
+    When CONF.placement.provider_tree_cache_max_age is set, the trees none of
+    the providers of which changed since they were last read are served from
+    memory.
+
+    :param ctx: nova.context.RequestContext object
+    :param root_ids: list of root resource provider IDs
+    """
+    max_age = CONF.placement.provider_tree_cache_max_age
+    if not max_age:
+        return (_get_usages_by_provider_tree(ctx, root_ids),
+                _get_traits_by_provider_tree(ctx, root_ids))
+
+    def _load(missing_root_ids):
+        return (_get_usages_by_provider_tree(ctx, missing_root_ids),
+                _get_traits_by_provider_tree(ctx, missing_root_ids))
+
+    generations = _get_provider_generations_by_tree(ctx, root_ids)
+    return _PROVIDER_TREE_CACHE.get(generations, max_age, _load)
+
+
 @db_api.placement_context_manager.reader
 def _get_provider_ids_having_any_trait(ctx, traits):
     """Returns a set of resource provider internal IDs that have ANY of the
@@ -3515,10 +3576,11 @@ def _check_traits_for_alloc_request(res_requests, summaries, prov_traits,
 
 def _alloc_candidates_single_provider(ctx, requested_resources, rp_tuples):
     """Returns a tuple of (allocation requests, provider summaries) for a
-    supplied set of requested resource amounts and resource providers. The
-    supplied resource providers have capacity to satisfy ALL of the resources
-    in the requested resources as well as ALL required traits that were
-    requested by the user.
+    supplied set of requested resource amounts and resource providers, where
+    the allocation requests are an iterator producing AllocationRequest
+    objects as they are consumed. The supplied resource providers have
+    capacity to satisfy ALL of the resources in the requested resources as
+    well as ALL required traits that were requested by the user.
 
     This is used in two circumstances:
     - To get results for a RequestGroup with use_same_provider=True.
@@ -3540,49 +3602,53 @@ def _alloc_candidates_single_provider(ctx, requested_resources, rp_tuples):
     # Get all root resource provider IDs.
     root_ids = set(p[1] for p in rp_tuples)
 
-    # Grab usage summaries for each provider
-    usages = _get_usages_by_provider_tree(ctx, root_ids)
-
-    # Get a dict, keyed by resource provider internal ID, of trait string names
-    # that provider has associated with it
-    prov_traits = _get_traits_by_provider_tree(ctx, root_ids)
+    # Grab usage summaries for each provider, and a dict, keyed by resource
+    # provider internal ID, of trait string names that provider has associated
+    # with it
+    usages, prov_traits = _get_usages_and_traits_by_provider_tree(
+        ctx, root_ids)
 
     # Get a dict, keyed by resource provider internal ID, of ProviderSummary
     # objects for all providers
     summaries = _build_provider_summaries(ctx, usages, prov_traits)
 
-    # Next, build up a list of allocation requests. These allocation requests
-    # are AllocationRequest objects, containing resource provider UUIDs,
-    # resource class names and amounts to consume from that resource provider
-    alloc_requests = []
-    for rp_id, root_id in rp_tuples:
-        rp_summary = summaries[rp_id]
-        req_obj = _allocation_request_for_provider(
-                ctx, requested_resources, rp_summary.resource_provider)
-        alloc_requests.append(req_obj)
-        # If this is a sharing provider, we have to include an extra
-        # AllocationRequest for every possible anchor.
-        traits = [trait.name for trait in rp_summary.traits]
-        if os_traits.MISC_SHARES_VIA_AGGREGATE in traits:
-            anchors = set([p[1] for p in _anchors_for_sharing_providers(
-                ctx, [rp_summary.resource_provider.id])])
-            for anchor in anchors:
-                # We already added self
-                if anchor == rp_summary.resource_provider.root_provider_uuid:
-                    continue
-                req_obj = copy.deepcopy(req_obj)
-                req_obj.anchor_root_provider_uuid = anchor
-                alloc_requests.append(req_obj)
-    return alloc_requests, list(summaries.values())
+    # Next, build up the allocation requests. These allocation requests are
+    # AllocationRequest objects, containing resource provider UUIDs, resource
+    # class names and amounts to consume from that resource provider. They
+    # are only built as the caller consumes them so that a request with a
+    # limit does not build all of them.
+    def _alloc_requests():
+        for rp_id, root_id in rp_tuples:
+            rp_summary = summaries[rp_id]
+            req_obj = _allocation_request_for_provider(
+                    ctx, requested_resources, rp_summary.resource_provider)
+            yield req_obj
+            # If this is a sharing provider, we have to include an extra
+            # AllocationRequest for every possible anchor.
+            traits = [trait.name for trait in rp_summary.traits]
+            if os_traits.MISC_SHARES_VIA_AGGREGATE in traits:
+                anchors = set([p[1] for p in _anchors_for_sharing_providers(
+                    ctx, [rp_summary.resource_provider.id])])
+                for anchor in anchors:
+                    # We already added self
+                    if (anchor ==
+                            rp_summary.resource_provider.root_provider_uuid):
+                        continue
+                    req_obj = copy.deepcopy(req_obj)
+                    req_obj.anchor_root_provider_uuid = anchor
+                    yield req_obj
+    return _alloc_requests(), list(summaries.values())
 
 
 def _alloc_candidates_multiple_providers(ctx, requested_resources,
         required_traits, forbidden_traits, rp_tuples):
     """Returns a tuple of (allocation requests, provider summaries) for a
     supplied set of requested resource amounts and tuples of
-    (rp_id, root_id, rc_id). The supplied resource provider trees have
-    capacity to satisfy ALL of the resources in the requested resources as
-    well as ALL required traits that were requested by the user.
+    (rp_id, root_id, rc_id), where the allocation requests are an iterator
+    producing AllocationRequest objects as they are consumed. The supplied
+    resource provider trees have capacity to satisfy ALL of the resources in
+    the requested resources as well as ALL required traits that were
+    requested by the user.
 
     This is a code path to get results for a RequestGroup with
     use_same_provider=False. In this scenario, we are able to use multiple
@@ -3611,12 +3677,11 @@ def _alloc_candidates_multiple_providers(ctx, requested_resources,
     # they have their "anchor" providers for the second value.
     root_ids = set(p[0] for p in rp_tuples) | set(p[1] for p in rp_tuples)
 
-    # Grab usage summaries for each provider in the trees
-    usages = _get_usages_by_provider_tree(ctx, root_ids)
-
-    # Get a dict, keyed by resource provider internal ID, of trait string names
-    # that provider has associated with it
-    prov_traits = _get_traits_by_provider_tree(ctx, root_ids)
+    # Grab usage summaries for each provider in the trees, and a dict, keyed
+    # by resource provider internal ID, of trait string names that provider has
+    # associated with it
+    usages, prov_traits = _get_usages_and_traits_by_provider_tree(
+        ctx, root_ids)
 
     # Get a dict, keyed by resource provider internal ID, of ProviderSummary
     # objects for all providers
@@ -3634,15 +3699,37 @@ def _alloc_candidates_multiple_providers(ctx, requested_resources,
                 resource_class=_RC_CACHE.string_from_id(rc_id),
                 amount=requested_resources[rc_id]))
 
-    # Next, build up a list of allocation requests. These allocation requests
-    # are AllocationRequest objects, containing resource provider UUIDs,
-    # resource class names and amounts to consume from that resource provider
-    alloc_requests = []
+    # Next, build up the allocation requests. These allocation requests are
+    # AllocationRequest objects, containing resource provider UUIDs, resource
+    # class names and amounts to consume from that resource provider. They
+    # are only built as the caller consumes them.
+    return _alloc_requests_for_trees(ctx, tree_dict, summaries, prov_traits,
+        required_traits, forbidden_traits), list(summaries.values())
+
+
+def _alloc_requests_for_trees(ctx, tree_dict, summaries, prov_traits,
+                              required_traits, forbidden_traits):
+    """Yields the AllocationRequest objects for every combination of
+    providers, within each provider tree, that collectively satisfies the
+    requested resources and traits.
 
-    # Build a list of lists of provider internal IDs that end up in
+    :param ctx: nova.context.RequestContext object
+    :param tree_dict: dict, keyed by root provider internal ID, of a dict,
+                      keyed by resource class internal ID, of lists of
+                      AllocationRequestResource objects
+    :param summaries: dict, keyed by resource provider ID, of ProviderSummary
+                      objects
+    :param prov_traits: A dict, keyed by internal resource provider ID, of
+                        string trait names associated with that provider
+    :param required_traits: A map, keyed by trait string name, of required
+                            trait internal IDs
+    :param forbidden_traits: A map, keyed by trait string name, of forbidden
+                             trait internal IDs
+    """
+    # Build a set of tuples of provider internal IDs that end up in
     # allocation request objects. This is used to ensure we don't end up
     # having allocation requests with duplicate sets of resource providers.
-    alloc_prov_ids = []
+    alloc_prov_ids = set()
 
     # Let's look into each tree
     for root_id, alloc_dict in tree_dict.items():
@@ -3670,20 +3757,18 @@ def _alloc_candidates_multiple_providers(ctx, requested_resources,
         #  (ARR(rc1, ss2), ARR(rc2, ss1), ARR(rc3, ss1)),
         #  (ARR(rc1, ss2), ARR(rc2, ss2), ARR(rc3, ss1))]
         for res_requests in itertools.product(*request_groups):
-            all_prov_ids = _check_traits_for_alloc_request(res_requests,
-                summaries, prov_traits, required_traits, forbidden_traits)
+            all_prov_ids = tuple(_check_traits_for_alloc_request(
+                res_requests, summaries, prov_traits, required_traits,
+                forbidden_traits))
             if (not all_prov_ids) or (all_prov_ids in alloc_prov_ids):
                 # This combination doesn't satisfy trait constraints,
                 # ...or we already have this permutation, which happens
                 # when multiple sharing providers with different resource
                 # classes are in one request.
                 continue
-            alloc_prov_ids.append(all_prov_ids)
-            alloc_requests.append(
-                AllocationRequest(ctx, resource_requests=list(res_requests),
-                                  anchor_root_provider_uuid=root_uuid)
-            )
-    return alloc_requests, list(summaries.values())
+            alloc_prov_ids.add(all_prov_ids)
+            yield AllocationRequest(ctx, resource_requests=list(res_requests),
+                                    anchor_root_provider_uuid=root_uuid)
 
 
 @db_api.placement_context_manager.reader
@@ -3854,7 +3939,8 @@ def _exceeds_capacity(areq, psum_res_by_rp_rc):
     return False
 
 
-def _merge_candidates(candidates, group_policy=None):
+def _merge_candidates(candidates, group_policy=None, limit=None,
+                      randomize=False):
     """Given a dict, keyed by RequestGroup suffix, of tuples of
     (allocation_requests, provider_summaries), produce a single tuple of
     (allocation_requests, provider_summaries) that appropriately incorporates
@@ -3868,13 +3954,88 @@ def _merge_candidates(candidates, group_policy=None):
     produced.
 
     :param candidates: A dict, keyed by integer suffix or '', of tuples of
-            (allocation_requests, provider_summaries) to be merged.
+            (allocation_requests, provider_summaries) to be merged. The
+            allocation_requests may be any iterable; it is only consumed
+            once, and, when there is a single RequestGroup, only as far as
+            needed to satisfy the limit.
     :param group_policy: String indicating how RequestGroups should interact
             with each other.  If the value is "isolate", we will filter out
             candidates where AllocationRequests that came from RequestGroups
             keyed by nonempty suffixes are satisfied by the same provider.
+    :param limit: An integer, N, representing the maximum number of merged
+            allocation requests to return, or None for all of them.
+    :param randomize: If True, the returned allocation requests are a random
+            sampling of N of the merged allocation requests, in random order.
+            If False, the first N merged allocation requests are returned.
     :return: A tuple of (allocation_requests, provider_summaries).
     """
+    # Save off all the provider summaries lists - we'll use 'em later.
+    all_psums = []
+    # Construct a dict, keyed by resource provider + resource class, of
+    # ProviderSummaryResource.  This will be used to do a final capacity
+    # check/filter on each merged AllocationRequest.
+    psum_res_by_rp_rc = {}
+    for suffix, (areqs, psums) in candidates.items():
+        for psum in psums:
+            all_psums.append(psum)
+            for psum_res in psum.resources:
+                key = _rp_rc_key(
+                        psum.resource_provider, psum_res.resource_class)
+                psum_res_by_rp_rc[key] = psum_res
+
+    areqs = _sample_allocation_requests(
+        _iter_merged_allocation_requests(
+            candidates, group_policy, psum_res_by_rp_rc),
+        limit, randomize)
+
+    # It's possible we've filtered out everything.  If so, short out.
+    if not areqs:
+        return [], []
+
+    # Now we have to produce provider summaries.  The provider summaries in
+    # the candidates input contain all the information; we just need to
+    # filter it down to only the providers in trees represented by our merged
+    # list of allocation requests.
+    tree_uuids = set()
+    for areq in areqs:
+        for arr in areq.resource_requests:
+            tree_uuids.add(arr.resource_provider.root_provider_uuid)
+    psums = [psum for psum in all_psums if
+             psum.resource_provider.root_provider_uuid in tree_uuids]
+
+    return areqs, psums
+
+
+def _iter_merged_allocation_requests(candidates, group_policy,
+                                     psum_res_by_rp_rc):
+    """Yields the AllocationRequest objects satisfying *all* the RequestGroups
+    of `candidates`, as described in _merge_candidates().
+
+    :param candidates: A dict, keyed by integer suffix or '', of tuples of
+            (allocation_requests, provider_summaries) to be merged.
+    :param group_policy: String indicating how RequestGroups should interact
+            with each other.
+    :param psum_res_by_rp_rc: A dict, keyed by provider + resource class via
+            _rp_rc_key, of ProviderSummaryResource.
+    """
+    all_suffixes = set(candidates)
+    num_granular_groups = len(all_suffixes - set(['']))
+
+    if len(candidates) == 1:
+        # With a single RequestGroup, there is no combination to build: each
+        # AllocationRequest is a candidate on its own. Stream them so that the
+        # caller can stop consuming once it has enough.
+        areqs, _psums = next(iter(candidates.values()))
+        for areq in areqs:
+            if not _satisfies_group_policy(
+                    [areq], group_policy, num_granular_groups):
+                continue
+            areq = _consolidate_allocation_requests([areq])
+            if _exceeds_capacity(areq, psum_res_by_rp_rc):
+                continue
+            yield areq
+        return
+
     # Build a dict, keyed by anchor root provider UUID, of dicts, keyed by
     # suffix, of nonempty lists of AllocationRequest.  Each inner dict must
     # possess all of the suffix keys to be viable (i.e. contains at least
@@ -3891,28 +4052,13 @@ def _merge_candidates(candidates, group_policy=None):
     #   }
     areq_lists_by_anchor = collections.defaultdict(
             lambda: collections.defaultdict(list))
-    # Save off all the provider summaries lists - we'll use 'em later.
-    all_psums = []
-    # Construct a dict, keyed by resource provider + resource class, of
-    # ProviderSummaryResource.  This will be used to do a final capacity
-    # check/filter on each merged AllocationRequest.
-    psum_res_by_rp_rc = {}
     for suffix, (areqs, psums) in candidates.items():
         for areq in areqs:
             anchor = areq.anchor_root_provider_uuid
             areq_lists_by_anchor[anchor][suffix].append(areq)
-        for psum in psums:
-            all_psums.append(psum)
-            for psum_res in psum.resources:
-                key = _rp_rc_key(
-                        psum.resource_provider, psum_res.resource_class)
-                psum_res_by_rp_rc[key] = psum_res
 
     # Create all combinations picking one AllocationRequest from each list
     # for each anchor.
-    areqs = []
-    all_suffixes = set(candidates)
-    num_granular_groups = len(all_suffixes - set(['']))
     for areq_lists_by_suffix in areq_lists_by_anchor.values():
         # Filter out any entries that don't have allocation requests for
         # *all* suffixes (i.e. all RequestGroups)
@@ -3963,24 +4109,48 @@ def _merge_candidates(candidates, group_policy=None):
             # folded together.  So do a final capacity check/filter.
             if _exceeds_capacity(areq, psum_res_by_rp_rc):
                 continue
-            areqs.append(areq)
+            yield areq
 
-    # It's possible we've filtered out everything.  If so, short out.
-    if not areqs:
-        return [], []
 
-    # Now we have to produce provider summaries.  The provider summaries in
-    # the candidates input contain all the information; we just need to
-    # filter it down to only the providers in trees represented by our merged
-    # list of allocation requests.
-    tree_uuids = set()
-    for areq in areqs:
-        for arr in areq.resource_requests:
-            tree_uuids.add(arr.resource_provider.root_provider_uuid)
-    psums = [psum for psum in all_psums if
-             psum.resource_provider.root_provider_uuid in tree_uuids]
+def _sample_allocation_requests(areqs, limit, randomize):
+    """Returns a list of at most `limit` AllocationRequest objects from the
+    supplied iterable, consuming only what is needed.
 
-    return areqs, psums
+    :param areqs: An iterable of AllocationRequest objects.
+    :param limit: An integer, N, representing the maximum number of allocation
+                  requests to return, or None for all of them.
+    :param randomize: If True, return a random sampling of N allocation
+                      requests, in random order. This has to consume the
+                      whole iterable, but only ever holds N of them.
+    """
+    if not limit:
+        areqs = list(areqs)
+        if randomize:
+            random.shuffle(areqs)
+        return areqs
+    if not randomize:
+        return list(itertools.islice(areqs, limit))
+    # Reservoir sampling: each allocation request ends up in the sample with
+    # the same probability, limit / total.
+    sample = []
+    for idx, areq in enumerate(areqs):
+        if idx < limit:
+            sample.append(areq)
+            continue
+        replace_idx = random.randint(0, idx)
+        if replace_idx < limit:
+            sample[replace_idx] = areq
+    random.shuffle(sample)
+    return sample
+
+
+def _mark_use_same_provider(areqs, use_same_provider):
+    """Yields the supplied AllocationRequest objects after setting their
+    use_same_provider field.
+    """
+    for areq in areqs:
+        areq.use_same_provider = use_same_provider
+        yield areq
 
 
 @base.VersionedObjectRegistry.register_if(False)
@@ -4135,40 +4305,41 @@ class AllocationCandidates(base.VersionedObject):
         for suffix, request in requests.items():
             alloc_reqs, summaries = cls._get_by_one_request(
                 context, request, sharing, has_trees)
-            LOG.debug("%s (suffix '%s') returned %d matches",
-                      str(request), str(suffix), len(alloc_reqs))
-            if not alloc_reqs:
-                # Shortcut: If any one request resulted in no candidates, the
-                # whole operation is shot.
-                return [], []
             # Mark each allocation request according to whether its
             # corresponding RequestGroup required it to be restricted to a
             # single provider.  We'll need this later to evaluate group_policy.
-            for areq in alloc_reqs:
-                areq.use_same_provider = request.use_same_provider
+            alloc_reqs = _mark_use_same_provider(
+                alloc_reqs, request.use_same_provider)
+            if len(requests) > 1:
+                # The allocation requests of every RequestGroup are combined
+                # with each other, so they are all needed.
+                alloc_reqs = list(alloc_reqs)
+                LOG.debug("%s (suffix '%s') returned %d matches",
+                          str(request), str(suffix), len(alloc_reqs))
+                if not alloc_reqs:
+                    # Shortcut: If any one request resulted in no
+                    # candidates, the whole operation is shot.
+                    return [], []
             candidates[suffix] = alloc_reqs, summaries
 
         # At this point, each (alloc_requests, summary_obj) in `candidates` is
         # independent of the others. We need to fold them together such that
-        # each allocation request satisfies *all* the incoming `requests`.  The
-        # `candidates` dict is guaranteed to contain entries for all suffixes,
-        # or we would have short-circuited above.
+        # each allocation request satisfies *all* the incoming `requests`.
+        # The limit is applied while merging so that, with a single
+        # RequestGroup, only the allocation requests returned are built.
         alloc_request_objs, summary_objs = _merge_candidates(
-                candidates, group_policy=group_policy)
-
-        # Limit the number of allocation request objects. We do this after
-        # creating all of them so that we can do a random slice without
-        # needing to mess with the complex sql above or add additional
-        # columns to the DB.
-        if limit and limit <= len(alloc_request_objs):
-            if CONF.placement.randomize_allocation_candidates:
-                alloc_request_objs = random.sample(alloc_request_objs, limit)
-            else:
-                alloc_request_objs = alloc_request_objs[:limit]
-        elif CONF.placement.randomize_allocation_candidates:
-            random.shuffle(alloc_request_objs)
+                candidates, group_policy=group_policy, limit=limit,
+                randomize=CONF.placement.randomize_allocation_candidates)
+        LOG.debug("%s returned %d matches (limit: %s)",
+                  ', '.join(str(request) for request in requests.values()),
+                  len(alloc_request_objs), limit)
+        if CONF.placement.provider_tree_cache_max_age:
+            LOG.debug("Provider tree cache hits: %d, misses: %d",
+                      _PROVIDER_TREE_CACHE.hits, _PROVIDER_TREE_CACHE.misses)
 
         # Limit summaries to only those mentioned in the allocation requests.
+        # The allocation requests were already limited by _merge_candidates,
+        # so there may be more matches than the limit when they are as many.
         if limit and limit <= len(alloc_request_objs):
             kept_summary_objs = []
             alloc_req_rp_uuids = set()
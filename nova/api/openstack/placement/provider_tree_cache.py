@@ -0,0 +1,131 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+
+from oslo_concurrency import lockutils
+from oslo_utils import timeutils
+
+_LOCKNAME = 'provider_tree_cache'
+
+
+class _TreeSnapshot(object):
+    """The usages and traits of the providers of one provider tree, as they
+    were when the providers had the recorded generations.
+    """
+
+    def __init__(self, generations, usages, traits):
+        self.generations = generations
+        self.usages = usages
+        self.traits = traits
+        self.loaded_at = timeutils.utcnow()
+
+
+class ProviderTreeCache(object):
+    """A cache of the inventory usages and traits of resource provider trees,
+    used when building allocation candidates.
+
+    Each tree snapshot is keyed by the generations of all the providers of the
+    tree. Since writing inventories, allocations or traits of a provider
+    increments its generation, a snapshot is only used while none of the
+    providers of its tree changed, no matter which placement process made the
+    change. Removing allocations does not increment the generation of the
+    provider they were against though, so snapshots also expire after a
+    maximum age.
+    """
+
+    def __init__(self):
+        # Snapshots keyed by internal root provider ID
+        self.trees = {}
+        # Internal root provider IDs keyed by internal provider ID, for the
+        # cached trees
+        self.roots = {}
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        with lockutils.lock(_LOCKNAME):
+            self.trees = {}
+            self.roots = {}
+
+    def invalidate(self, rp_id):
+        """Drop the snapshot of the tree the supplied provider belongs to.
+
+        :param rp_id: Internal ID of a resource provider which changed.
+        """
+        with lockutils.lock(_LOCKNAME):
+            root_id = self.roots.get(rp_id)
+            if root_id is not None:
+                self._drop(root_id)
+
+    def _drop(self, root_id):
+        snapshot = self.trees.pop(root_id, None)
+        if snapshot is not None:
+            for rp_id, _gen in snapshot.generations:
+                self.roots.pop(rp_id, None)
+
+    def get(self, generations, max_age, load):
+        """Returns a tuple of (usages, traits) for the requested trees, as
+        _get_usages_by_provider_tree() and _get_traits_by_provider_tree() do.
+
+        :param generations: A dict, keyed by internal root provider ID, of
+                            frozensets of (provider ID, generation) tuples for
+                            all the providers of that tree, as currently
+                            stored in the database.
+        :param max_age: Maximum age, in seconds, of the snapshots to use.
+        :param load: A callable taking a set of internal root provider IDs and
+                     returning the (usages, traits) tuple of those trees from
+                     the database, used for the trees not in the cache.
+        """
+        usages = []
+        traits = collections.defaultdict(list)
+        with lockutils.lock(_LOCKNAME):
+            missing = set()
+            for root_id, tree_gens in generations.items():
+                snapshot = self.trees.get(root_id)
+                if (snapshot is None or snapshot.generations != tree_gens or
+                        timeutils.is_older_than(snapshot.loaded_at, max_age)):
+                    missing.add(root_id)
+                    continue
+                usages.extend(snapshot.usages)
+                traits.update(snapshot.traits)
+            self.hits += len(generations) - len(missing)
+            self.misses += len(missing)
+        if not missing:
+            return usages, traits
+
+        # Query the database outside of the lock, other requests can be served
+        # from the cache meanwhile.
+        root_by_rp = {rp_id: root_id for root_id in missing
+                      for rp_id, _gen in generations[root_id]}
+        new_usages, new_traits = load(missing)
+        snapshots = {root_id: _TreeSnapshot(generations[root_id], [], {})
+                     for root_id in missing}
+        for usage in new_usages:
+            usage = dict(usage)
+            root_id = root_by_rp.get(usage['resource_provider_id'])
+            if root_id is not None:
+                snapshots[root_id].usages.append(usage)
+            usages.append(usage)
+        for rp_id, rp_traits in new_traits.items():
+            root_id = root_by_rp.get(rp_id)
+            if root_id is not None:
+                snapshots[root_id].traits[rp_id] = rp_traits
+            traits[rp_id] = rp_traits
+
+        with lockutils.lock(_LOCKNAME):
+            for root_id, snapshot in snapshots.items():
+                self._drop(root_id)
+                self.trees[root_id] = snapshot
+                for rp_id, _gen in snapshot.generations:
+                    self.roots[rp_id] = root_id
+        return usages, traits
@@ -18,6 +18,7 @@ from oslo_log import log as logging
 from oslo_service import _options as service_opts
 from paste import deploy
 
+from nova.compute import instance_list_cache
 from nova import config
 from nova import context
 from nova import exception
@@ -84,6 +85,7 @@ def init_application(name):
         return error_application(exc, name)
 
     service.setup_profiler(name, CONF.host)
+    instance_list_cache.register_invalidation()
 
     # dump conf at debug (log_options option comes from oslo.service)
     # FIXME(mriedem): This is gross but we don't have a public hook into
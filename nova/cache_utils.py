@@ -103,8 +103,8 @@ class CacheClient(object):
     def __init__(self, region):
         self.region = region
 
-    def get(self, key):
-        value = self.region.get(key)
+    def get(self, key, expiration_time=None):
+        value = self.region.get(key, expiration_time=expiration_time)
         if value == cache.NO_VALUE:
             return None
         return value
@@ -26,6 +26,7 @@ from oslo_log import log as logging
 from oslo_reports import guru_meditation_report as gmr
 from oslo_reports import opts as gmr_opts
 
+from nova.cmd import connection_pools
 import nova.conf
 from nova import config
 from nova import exception
@@ -47,6 +48,7 @@ def main():
         objects.Service.enable_min_version_cache()
     log = logging.getLogger(__name__)
 
+    connection_pools.register_report()
     gmr.TextGuruMeditation.setup_autorun(version, conf=CONF)
 
     launcher = service.process_launcher()
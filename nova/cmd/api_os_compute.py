@@ -22,6 +22,7 @@ from oslo_log import log as logging
 from oslo_reports import guru_meditation_report as gmr
 from oslo_reports import opts as gmr_opts
 
+from nova.cmd import connection_pools
 import nova.conf
 from nova import config
 from nova import objects
@@ -41,6 +42,7 @@ def main():
     # version.
     objects.Service.enable_min_version_cache()
 
+    connection_pools.register_report()
     gmr.TextGuruMeditation.setup_autorun(version, conf=CONF)
 
     should_use_ssl = 'osapi_compute' in CONF.enabled_ssl_apis
@@ -26,6 +26,7 @@ from oslo_reports import guru_meditation_report as gmr
 from oslo_reports import opts as gmr_opts
 
 from nova.cmd import common as cmd_common
+from nova.cmd import connection_pools
 from nova.compute import rpcapi as compute_rpcapi
 from nova.conductor import rpcapi as conductor_rpcapi
 import nova.conf
@@ -48,6 +49,7 @@ def main():
     # Ensure os-vif objects are registered and plugins loaded
     os_vif.initialize()
 
+    connection_pools.register_report()
     gmr.TextGuruMeditation.setup_autorun(version, conf=CONF)
 
     cmd_common.block_db_access('nova-compute')
@@ -0,0 +1,36 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Guru Meditation Report section for the pooled HTTP connections of the
+services talking to glance and neutron.
+"""
+
+from oslo_reports import guru_meditation_report as gmr
+from oslo_reports.models import with_default_views as mwdv
+
+from nova.image import glance
+from nova.network.neutronv2 import api as neutron_api
+
+
+def _connection_pool_report():
+    return mwdv.ModelWithDefaultViews({
+        'glance': glance.get_connection_pool_stats(),
+        'neutron': neutron_api.get_connection_pool_stats(),
+    })
+
+
+def register_report():
+    """Add the usage of the pooled HTTP connections to the services used to
+    the Guru Meditation Report.
+    """
+    gmr.TextGuruMeditation.register_section('HTTP Connection Pools',
+                                            _connection_pool_report)
@@ -12,6 +12,7 @@
 
 import copy
 
+from nova.compute import instance_list_cache
 from nova.compute import multi_cell_list
 import nova.conf
 from nova import context
@@ -141,7 +142,19 @@ def get_instance_objects_sorted(ctx, filters, limit, marker, expected_attrs,
     of any cells that did not respond (or raised an error) are included
     in the list as the second element of the tuple. That list is empty
     if all cells responded.
+
+    The instances are meant to be read only, their fields are only coerced
+    on first access.
     """
+    cache_key = instance_list_cache.get_key(ctx, filters, limit, marker,
+                                            expected_attrs, sort_keys,
+                                            sort_dirs)
+    if cache_key:
+        primitive = instance_list_cache.get_page(cache_key)
+        if primitive is not None:
+            return objects.InstanceList.obj_from_primitive(primitive,
+                                                           context=ctx), []
+
     query_cell_subset = CONF.api.instance_list_per_project_cells
     # NOTE(danms): Replicated in part from instance_get_all_by_sort_filters(),
     # where if we're not admin we're restricted to our context's project
@@ -163,14 +176,14 @@ def get_instance_objects_sorted(ctx, filters, limit, marker, expected_attrs,
         limit, marker, columns_to_join, sort_keys, sort_dirs,
         cell_mappings=cell_mappings, batch_size=batch_size)
 
-    if 'fault' in expected_attrs:
-        # We join fault above, so we need to make sure we don't ask
-        # make_instance_list to do it again for us
-        expected_attrs = copy.copy(expected_attrs)
-        expected_attrs.remove('fault')
-
+    # NOTE: We join fault above, _make_instance_list uses the joined faults
+    # instead of querying them again, and removes 'fault' from the list.
     instance_list = instance_obj._make_instance_list(ctx,
-        objects.InstanceList(), instance_generator, expected_attrs)
+        objects.InstanceList(), instance_generator,
+        copy.copy(expected_attrs), faults_joined=True, lazy_fields=True)
     down_cell_uuids = (instance_lister.cells_failed +
                        instance_lister.cells_timed_out)
+    if cache_key and not down_cell_uuids:
+        instance_list_cache.set_page(cache_key,
+                                     instance_list.obj_to_primitive())
     return instance_list, down_cell_uuids
@@ -0,0 +1,151 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Cache of the pages of instances listed from the cell databases."""
+
+import collections
+import hashlib
+
+from oslo_log import log as logging
+from oslo_serialization import jsonutils
+from oslo_utils import timeutils
+from oslo_utils import uuidutils
+import six
+
+from nova import cache_utils
+import nova.conf
+from nova.objects import instance as instance_obj
+
+CONF = nova.conf.CONF
+LOG = logging.getLogger(__name__)
+
+MC = None
+
+
+class LRUCache(object):
+    """A bounded in-memory cache, evicting the least recently used keys.
+
+    This implements the subset of the cache_utils.CacheClient interface used
+    here, for when no oslo.cache backend is configured.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._entries = collections.OrderedDict()
+
+    def get(self, key, expiration_time=None):
+        try:
+            stored_at, value = self._entries.pop(key)
+        except KeyError:
+            return None
+        if (expiration_time is not None and
+                timeutils.is_older_than(stored_at, expiration_time)):
+            return None
+        self._entries[key] = (stored_at, value)
+        return value
+
+    def set(self, key, value):
+        self._entries.pop(key, None)
+        self._entries[key] = (timeutils.utcnow(), value)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+
+def _get_cache():
+    global MC
+
+    if MC is None:
+        if CONF.cache.enabled:
+            MC = cache_utils.get_client()
+        else:
+            MC = LRUCache(CONF.api.instance_list_cache_size)
+
+    return MC
+
+
+def reset_cache():
+    """Reset the cache, mainly for testing purposes."""
+
+    global MC
+
+    MC = None
+
+
+def _make_generation_key(project_id):
+    return 'instance-list-generation-%s' % project_id
+
+
+def _get_generation(project_id):
+    """Return the current generation of the cached pages of a project.
+
+    The generation is part of the key of every cached page of the project, so
+    changing it invalidates them all at once.
+    """
+    cache = _get_cache()
+    key = _make_generation_key(project_id)
+    generation = cache.get(key)
+    if generation is None:
+        generation = uuidutils.generate_uuid()
+        cache.set(key, generation)
+    return generation
+
+
+def get_key(ctx, filters, limit, marker, expected_attrs, sort_keys,
+            sort_dirs):
+    """Return the cache key of a page of instances, or None if the page should
+    not be cached.
+
+    Only the requests scoped to a single project are cached, since the pages
+    are invalidated by project.
+    """
+    if not CONF.api.instance_list_cache_expiration:
+        return None
+    project_id = filters.get('project_id')
+    if not isinstance(project_id, six.string_types):
+        return None
+    request = jsonutils.dumps([ctx.is_admin, filters, limit, marker,
+                               sorted(expected_attrs or []), sort_keys,
+                               sort_dirs], sort_keys=True)
+    if six.PY3:
+        request = request.encode('utf-8')
+    return 'instance-list-%s-%s-%s' % (project_id,
+                                       _get_generation(project_id),
+                                       hashlib.sha1(request).hexdigest())
+
+
+def get_page(key):
+    """Return the cached primitive of the InstanceList for the key, or None.
+    """
+    value = _get_cache().get(
+        key, expiration_time=CONF.api.instance_list_cache_expiration)
+    if value is not None:
+        LOG.debug('Using the cached instance list %s', key)
+    return value
+
+
+def set_page(key, primitive):
+    _get_cache().set(key, primitive)
+
+
+def invalidate(project_id):
+    """Invalidate the cached pages of instances of a project."""
+    if not CONF.api.instance_list_cache_expiration or not project_id:
+        return
+    _get_cache().set(_make_generation_key(project_id),
+                     uuidutils.generate_uuid())
+
+
+def register_invalidation():
+    """Invalidate the cached pages of a project whenever one of its instances
+    is created, changed or destroyed by this process.
+    """
+    instance_obj.register_change_callback(invalidate)
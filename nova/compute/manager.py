@@ -101,6 +101,16 @@ CONF = nova.conf.CONF
 
 LOG = logging.getLogger(__name__)
 
+# Combinations of vm_state and power_state in which _sync_instance_power_state
+# has nothing to do, keyed by vm_state.
+_STEADY_POWER_STATES = {
+    vm_states.ACTIVE: (power_state.RUNNING,),
+    vm_states.STOPPED: (power_state.NOSTATE, power_state.SHUTDOWN,
+                        power_state.CRASHED),
+    vm_states.PAUSED: (power_state.PAUSED,),
+    vm_states.SUSPENDED: (power_state.SUSPENDED, power_state.SHUTDOWN),
+}
+
 get_notifier = functools.partial(rpc.get_notifier, service='compute')
 wrap_exception = functools.partial(exception_wrapper.wrap_exception,
                                    get_notifier=get_notifier,
@@ -512,7 +522,13 @@ class ComputeManager(manager.Manager):
         self.instance_events = InstanceEvents()
         self._sync_power_pool = eventlet.GreenPool(
             size=CONF.sync_power_state_pool_size)
+        self._update_resources_pool = eventlet.GreenPool(
+            size=CONF.update_resources_pool_size)
         self._syncs_in_progress = {}
+        # Dict, keyed by instance uuid, of the power states last reported by
+        # the driver, when CONF.sync_power_state_mode is 'events'. None until
+        # first populated by _get_vm_power_states.
+        self._vm_power_states = None
         self.send_instance_updates = (
             CONF.filter_scheduler.track_instance_changes)
         if CONF.max_concurrent_builds != 0:
@@ -1088,6 +1104,9 @@ class ComputeManager(manager.Manager):
         else:
             LOG.warning("Unexpected lifecycle event: %d", event_transition)
 
+        if vm_power_state is not None and self._vm_power_states is not None:
+            self._vm_power_states[event.get_instance_uuid()] = vm_power_state
+
         migrate_finish_statuses = {
             # This happens on the source node and indicates live migration
             # entered post-copy mode.
@@ -6964,11 +6983,18 @@ class ComputeManager(manager.Manager):
         list, pull the DB record, and try the call to the network API.
         If anything errors don't fail, as it's possible the instance
         has been deleted, etc.
+
+        If heal_instance_info_cache_bulk is enabled, every call refreshes
+        all the instances on this host instead.
         """
         heal_interval = CONF.heal_instance_info_cache_interval
         if not heal_interval:
             return
 
+        if CONF.heal_instance_info_cache_bulk:
+            self._heal_instance_info_caches_bulk(context)
+            return
+
         instance_uuids = getattr(self, '_instance_uuids_to_heal', [])
         instance = None
 
@@ -7051,6 +7077,32 @@ class ComputeManager(manager.Manager):
             LOG.debug("Didn't find any instances for network info cache "
                       "update.")
 
+    def _heal_instance_info_caches_bulk(self, context):
+        LOG.debug('Starting heal of all instance info caches')
+        db_instances = objects.InstanceList.get_by_host(
+            context, self.host,
+            expected_attrs=['system_metadata', 'info_cache', 'flavor'],
+            use_slave=True)
+        instances = []
+        for inst in db_instances:
+            # Same as for the one by one healing, building instances get
+            # their cache when they are done and deleting ones don't need it.
+            if (inst.vm_state == vm_states.BUILDING or
+                    inst.task_state == task_states.DELETING):
+                continue
+            instances.append(inst)
+
+        if not instances:
+            LOG.debug("Didn't find any instances for network info cache "
+                      "update.")
+            return
+        try:
+            self.network_api.refresh_info_caches_for_host(
+                context, self.host, instances)
+        except Exception:
+            LOG.error('An error occurred while refreshing the network '
+                      'caches of the instances on this host.', exc_info=True)
+
     @periodic_task.periodic_task
     def _poll_rebooting_instances(self, context):
         if CONF.reboot_timeout > 0:
@@ -7430,6 +7482,10 @@ class ComputeManager(manager.Manager):
                         {'num_db_instances': num_db_instances,
                          'num_vm_instances': num_vm_instances})
 
+        vm_power_states = None
+        if CONF.sync_power_state_mode == 'events':
+            vm_power_states = self._get_vm_power_states(num_vm_instances)
+
         def _sync(db_instance):
             # NOTE(melwitt): This must be synchronized as we query state from
             #                two separate sources, the driver and the database.
@@ -7451,6 +7507,16 @@ class ComputeManager(manager.Manager):
             # process syncs asynchronously - don't want instance locking to
             # block entire periodic task thread
             uuid = db_instance.uuid
+            if vm_power_states is not None:
+                # Only sync the instances which look out of sync. Those still
+                # query the driver for their current state, since the tracked
+                # one may be stale by the time we hold the instance lock.
+                vm_power_state = vm_power_states.get(uuid, power_state.NOSTATE)
+                if (db_instance.task_state is None and
+                        db_instance.power_state == vm_power_state and
+                        vm_power_state in _STEADY_POWER_STATES.get(
+                            db_instance.vm_state, ())):
+                    continue
             if uuid in self._syncs_in_progress:
                 LOG.debug('Sync already in progress for %s', uuid)
             else:
@@ -7458,6 +7524,31 @@ class ComputeManager(manager.Manager):
                 self._syncs_in_progress[uuid] = True
                 self._sync_power_pool.spawn_n(_sync, db_instance)
 
+    def _get_vm_power_states(self, num_vm_instances):
+        """Returns a dict, keyed by instance uuid, of the power states of the
+        instances on the hypervisor, or None if the driver can't report them
+        all at once.
+
+        The states tracked from lifecycle events are used, unless they can't
+        be trusted, in which case they are refreshed from the driver.
+        """
+        if (self._vm_power_states is not None and
+                CONF.workarounds.handle_virt_lifecycle_events and
+                len(self._vm_power_states) == num_vm_instances):
+            return dict(self._vm_power_states)
+
+        try:
+            self._vm_power_states = self.driver.get_power_states()
+        except NotImplementedError:
+            LOG.debug("The compute driver can't report all power states at "
+                      "once; querying them per instance instead.")
+            return None
+        except Exception as e:
+            LOG.warning("Failed to get the power states of all instances "
+                        "at once, querying them per instance instead: %s", e)
+            return None
+        return dict(self._vm_power_states)
+
     def _query_driver_power_state_and_sync(self, context, db_instance):
         if db_instance.task_state is not None:
             LOG.info("During sync_power_state the instance has a "
@@ -7470,6 +7561,8 @@ class ComputeManager(manager.Manager):
             vm_power_state = vm_instance.state
         except exception.InstanceNotFound:
             vm_power_state = power_state.NOSTATE
+        if self._vm_power_states is not None:
+            self._vm_power_states[db_instance.uuid] = vm_power_state
         # Note(maoy): the above get_info call might take a long time,
         # for example, because of a broken libvirt driver.
         try:
@@ -7682,8 +7775,13 @@ class ComputeManager(manager.Manager):
                                             startup=False):
 
         rt = self._get_resource_tracker()
+        timer = timeutils.StopWatch()
+        timer.start()
         try:
             rt.update_available_resource(context, nodename, startup=startup)
+            LOG.debug("Updated available resources for node %(node)s in "
+                      "%(secs).2f seconds",
+                      {'node': nodename, 'secs': timer.elapsed()})
         except exception.ComputeHostNotFound:
             # NOTE(comstud): We can get to this case if a node was
             # marked 'deleted' in the DB and then re-added with a
@@ -7766,9 +7864,42 @@ class ComputeManager(manager.Manager):
                 self.scheduler_client.reportclient.delete_resource_provider(
                     context, cn, cascade=True)
 
-        for nodename in nodenames:
-            self._update_available_resource_for_node(context, nodename,
-                                                     startup=startup)
+        timer = timeutils.StopWatch()
+        timer.start()
+        if CONF.update_resources_pool_size > 1 and len(nodenames) > 1:
+            self._update_available_resource_for_nodes(context, nodenames,
+                                                      startup=startup)
+        else:
+            for nodename in nodenames:
+                self._update_available_resource_for_node(context, nodename,
+                                                         startup=startup)
+
+        stats = rt.pop_placement_update_stats()
+        LOG.debug("Updated available resources for %(count)d nodes in "
+                  "%(secs).2f seconds. Resource providers flushed to "
+                  "placement: %(pushed)d, unchanged and skipped: %(skipped)d",
+                  {'count': len(nodenames), 'secs': timer.elapsed(),
+                   'pushed': stats['pushed'], 'skipped': stats['skipped']})
+
+    def _update_available_resource_for_nodes(self, context, nodenames,
+                                             startup=False):
+        """Update the available resources of the given nodes concurrently,
+        using up to CONF.update_resources_pool_size greenthreads.
+        """
+        threads = [self._update_resources_pool.spawn(
+                       self._update_available_resource_for_node,
+                       context, nodename, startup=startup)
+                   for nodename in nodenames]
+        # Let all the nodes finish before raising the first error, if any.
+        exc_info = None
+        for thread in threads:
+            try:
+                thread.wait()
+            except Exception:
+                if exc_info is None:
+                    exc_info = sys.exc_info()
+        if exc_info is not None:
+            six.reraise(*exc_info)
 
     def _get_compute_nodes_in_db(self, context, use_slave=False,
                                  startup=False):
@@ -12,12 +12,14 @@
 
 import abc
 import copy
+import datetime
 import heapq
 
 import eventlet
 import six
 
 from oslo_log import log as logging
+from oslo_utils import timeutils
 
 import nova.conf
 from nova import context
@@ -29,23 +31,80 @@ LOG = logging.getLogger(__name__)
 CONF = nova.conf.CONF
 
 
+_EPOCH = datetime.datetime(1970, 1, 1)
+_NUMBER_TYPES = six.integer_types + (float,)
+
+
+class _Descending(object):
+    """Invert the ordering of a sort key value which cannot be negated."""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __ne__(self, other):
+        return self.value != other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+def _negate(value):
+    """Return a value which sorts in the reverse order of the given one."""
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = timeutils.normalize_time(value)
+        delta = value - _EPOCH
+        return -((delta.days * 86400 + delta.seconds) * 1000000 +
+                 delta.microseconds)
+    if isinstance(value, _NUMBER_TYPES):
+        return -value
+    return _Descending(value)
+
+
 class RecordSortContext(object):
     def __init__(self, sort_keys, sort_dirs):
         self.sort_keys = sort_keys
         self.sort_dirs = sort_dirs
 
+    def get_sort_key(self, rec):
+        """Return a tuple which sorts like the record does.
+
+        Each sort key contributes a flag, which makes None sort lower than
+        any other value like the databases do, followed by the value itself,
+        negated for the descending sort keys. This lets records be ordered by
+        comparing tuples of native values, with the sort keys of each record
+        looked up only once.
+        """
+        key = []
+        for skey, sdir in zip(self.sort_keys, self.sort_dirs):
+            value = rec[skey]
+            if sdir == 'desc':
+                if value is None:
+                    key.extend((1, None))
+                else:
+                    key.extend((0, _negate(value)))
+            elif value is None:
+                key.extend((0, None))
+            else:
+                key.extend((1, value))
+        return tuple(key)
+
     def compare_records(self, rec1, rec2):
         """Implements cmp(rec1, rec2) for the first key that is different.
 
         Adjusts for the requested sort direction by inverting the result
         as needed.
         """
-        for skey, sdir in zip(self.sort_keys, self.sort_dirs):
-            resultflag = 1 if sdir == 'desc' else -1
-            if rec1[skey] < rec2[skey]:
-                return resultflag
-            elif rec1[skey] > rec2[skey]:
-                return resultflag * -1
+        key1 = self.get_sort_key(rec1)
+        key2 = self.get_sort_key(rec2)
+        if key1 < key2:
+            return -1
+        elif key2 < key1:
+            return 1
         return 0
 
 
@@ -216,14 +275,34 @@ class CrossCellLister(object):
         """
         pass
 
+    def _sortable(self, index, wrappers):
+        """Generate (rank, sort key, index, RecordWrapper) tuples.
+
+        heapq.merge() can then order the records of all the cells by
+        comparing these tuples natively, instead of calling
+        RecordWrapper.__lt__() and comparing every sort key of both records
+        each time. Like RecordWrapper does, failure sentinels rank ahead of
+        any record. The index of the cell the record comes from breaks the
+        ties between records which sort equally, so that the wrappers
+        themselves are never compared.
+        """
+        for wrapper in wrappers:
+            if context.is_cell_failure_sentinel(wrapper._db_record):
+                yield (0, (), index, wrapper)
+            else:
+                yield (1, self.sort_ctx.get_sort_key(wrapper._db_record),
+                       index, wrapper)
+
     def get_records_sorted(self, ctx, filters, limit, marker, **kwargs):
         """Get a cross-cell list of records matching filters.
 
         This iterates cells in parallel generating a unified and sorted
         list of records as efficiently as possible. It takes care to
         iterate the list as infrequently as possible. We wrap the results
-        in RecordWrapper objects so that they are sortable by
-        heapq.merge(), which requires that the '<' operator just works.
+        in RecordWrapper objects, decorated with their sort key, so that they
+        are sortable by heapq.merge(), which requires that the '<' operator
+        just works. Records are fetched from each cell lazily, in batches of
+        batch_size records, as the merge consumes them.
 
         Our sorting requirements are encapsulated into the
         RecordSortContext provided to the constructor for this object.
@@ -394,10 +473,12 @@ class CrossCellLister(object):
         # Generate results from heapq so we can return the inner
         # instance instead of the wrapper. This is basically free
         # as it works as our caller iterates the results.
-        feeder = heapq.merge(*results.values())
+        feeder = heapq.merge(*[self._sortable(index, wrappers)
+                               for index, wrappers in enumerate(
+                                   results.values())])
         while True:
             try:
-                item = next(feeder)
+                item = next(feeder)[-1]
             except StopIteration:
                 return
 
@@ -20,8 +20,10 @@ model.
 """
 import collections
 import copy
+import time
 
 from keystoneauth1 import exceptions as ks_exc
+from oslo_concurrency import lockutils
 from oslo_log import log as logging
 from oslo_serialization import jsonutils
 import retrying
@@ -51,6 +53,14 @@ CONF = nova.conf.CONF
 
 LOG = logging.getLogger(__name__)
 COMPUTE_RESOURCE_SEMAPHORE = "compute_resources"
+PROVIDER_TREE_SEMAPHORE = "compute_resource_providers"
+
+
+def _node_lock(nodename):
+    """Returns a lock serializing the flushing of the specified node's compute
+    node record and provider tree.
+    """
+    return lockutils.lock('%s-%s' % (COMPUTE_RESOURCE_SEMAPHORE, nodename))
 
 
 def _instance_in_resize_state(instance):
@@ -126,6 +136,21 @@ def _normalize_inventory_from_cn_obj(inv_data, cn):
             disk_inv['reserved'] = reserved_gb
 
 
+def _get_provider_data(prov_tree, root_uuid):
+    """Returns a dict, keyed by provider UUID, of the parent, name, inventory,
+    traits and aggregates of the provider with UUID root_uuid and all its
+    descendants in prov_tree.  Two such dicts compare equal if and only if
+    nothing would need to be flushed to placement to get from one to the
+    other.
+    """
+    provider_data = {}
+    for uuid in prov_tree.get_provider_uuids(root_uuid):
+        pd = prov_tree.data(uuid)
+        provider_data[uuid] = (pd.parent_uuid, pd.name, pd.inventory,
+                               pd.traits, pd.aggregates)
+    return provider_data
+
+
 class ResourceTracker(object):
     """Compute helper class for keeping track of resource usage as instances
     are built and destroyed.
@@ -146,6 +171,12 @@ class ResourceTracker(object):
         monitor_handler = monitors.MonitorHandler(self)
         self.monitors = monitor_handler.monitors
         self.old_resources = collections.defaultdict(objects.ComputeNode)
+        # Dict, keyed by nodename, of (timestamp, provider data) tuples
+        # describing the provider tree last successfully flushed to placement
+        self.old_provider_data = {}
+        # Count of providers flushed to placement vs skipped because they
+        # did not change, since the last pop_placement_update_stats()
+        self.placement_update_stats = collections.Counter()
         self.scheduler_client = scheduler_client.SchedulerClient()
         self.reportclient = self.scheduler_client.reportclient
         self.ram_allocation_ratio = CONF.ram_allocation_ratio
@@ -669,6 +700,7 @@ class ResourceTracker(object):
         self.stats.pop(nodename, None)
         self.compute_nodes.pop(nodename, None)
         self.old_resources.pop(nodename, None)
+        self.old_provider_data.pop(nodename, None)
 
     def _get_host_metrics(self, context, nodename):
         """Get the metrics from monitors and
@@ -735,7 +767,29 @@ class ResourceTracker(object):
 
         self._report_hypervisor_resource_view(resources)
 
-        self._update_available_resource(context, resources, startup=startup)
+        if CONF.update_resources_pool_size <= 1:
+            self._update_available_resource(context, resources,
+                                            startup=startup)
+            return
+
+        # NOTE: Multiple nodes are being updated concurrently, so only hold
+        # COMPUTE_RESOURCE_SEMAPHORE for the usage accounting, and flush a
+        # copy of the result under a per-node lock once it's released.
+        cn = self._update_available_resource(context, resources,
+                                             startup=startup, flush=False)
+        if cn is None:
+            return
+        nodename = cn.hypervisor_hostname
+        with _node_lock(nodename):
+            current = self.compute_nodes.get(nodename)
+            if current is None or not obj_base.obj_equal_prims(
+                    cn, current, ['updated_at']):
+                # A claim has changed the node since we copied it, and will
+                # flush (or has flushed) it itself.
+                LOG.debug("Compute node %s changed while updating available "
+                          "resources; not flushing the stale copy.", nodename)
+                return
+            self._flush_compute_node(context, cn, startup)
 
     def _pair_instances_to_migrations(self, migrations, instance_by_uuid):
         for migration in migrations:
@@ -754,7 +808,14 @@ class ResourceTracker(object):
                           {'uuid': migration.instance_uuid})
 
     @utils.synchronized(COMPUTE_RESOURCE_SEMAPHORE)
-    def _update_available_resource(self, context, resources, startup=False):
+    def _update_available_resource(self, context, resources, startup=False,
+                                   flush=True):
+        """Recalculates the usage of the node described by resources.
+
+        :param flush: If True, the compute node is flushed to the database and
+                      placement before returning.  If False, a copy of it is
+                      returned for the caller to flush instead.
+        """
 
         # initialize the compute node object, creating it
         # if it does not already exist.
@@ -815,6 +876,11 @@ class ResourceTracker(object):
         # but it is. This should be changed in ComputeNode
         cn.metrics = jsonutils.dumps(metrics)
 
+        if not flush:
+            if self.pci_tracker:
+                self.pci_tracker.save(context)
+            return cn.obj_clone()
+
         # update the compute_node
         self._update(context, cn, startup=startup)
         LOG.debug('Compute_service record updated for %(host)s:%(node)s',
@@ -912,6 +978,33 @@ class ResourceTracker(object):
             return True
         return False
 
+    def _get_old_provider_data(self, nodename):
+        """Returns the provider data last flushed to placement for the
+        specified node, or None if there is none or it is older than
+        CONF.compute.resource_provider_association_refresh seconds, in which
+        case the provider tree should be refreshed from placement in full.
+        """
+        if nodename not in self.old_provider_data:
+            return None
+        flushed_at, provider_data = self.old_provider_data[nodename]
+        rpar = CONF.compute.resource_provider_association_refresh
+        if rpar and time.time() - flushed_at > rpar:
+            return None
+        return provider_data
+
+    def pop_placement_update_stats(self):
+        """Returns and resets the counts of providers which were flushed to
+        placement ('pushed') or found unchanged since the last flush
+        ('skipped').
+        """
+        stats = self.placement_update_stats
+        self.placement_update_stats = collections.Counter()
+        return stats
+
+    # NOTE: The report client's provider tree cache is shared by all nodes, and
+    # update_from_provider_tree deletes any cached provider which is missing
+    # from the tree it's given, so never flush two nodes' trees at once.
+    @utils.synchronized(PROVIDER_TREE_SEMAPHORE)
     def _update_to_placement(self, context, compute_node, startup):
         """Send resource and inventory changes to placement."""
         # NOTE(jianghuaw): Some resources(e.g. VGPU) are not saved in the
@@ -928,9 +1021,14 @@ class ResourceTracker(object):
         # Retrieve the provider tree associated with this compute node.  If
         # it doesn't exist yet, this will create it with a (single, root)
         # provider corresponding to the compute node.
+        # If the tree was successfully flushed recently, the report client's
+        # cache is in sync with placement and there is no need to fetch the
+        # whole tree again.
         reportclient = self.scheduler_client.reportclient
+        old_provider_data = self._get_old_provider_data(nodename)
         prov_tree = reportclient.get_provider_tree_and_ensure_root(
-            context, compute_node.uuid, name=compute_node.hypervisor_hostname)
+            context, compute_node.uuid, name=compute_node.hypervisor_hostname,
+            use_cache=old_provider_data is not None)
         # Let the virt driver rearrange the provider tree and set/update
         # the inventory, traits, and aggregates throughout.
         try:
@@ -950,10 +1048,29 @@ class ResourceTracker(object):
                 self.driver.update_provider_tree(prov_tree, nodename,
                                                  allocations=allocs)
 
+            # Only flush if something changed since the last successful flush
+            # for this node.
+            provider_data = _get_provider_data(prov_tree, compute_node.uuid)
+            if allocs is None and provider_data == old_provider_data:
+                LOG.debug("Provider tree for node %s is unchanged; not "
+                          "flushing to placement.", nodename)
+                self.placement_update_stats['skipped'] += len(provider_data)
+                return
+            old_provider_data = old_provider_data or {}
+            pushed = len([uuid for uuid, data in provider_data.items()
+                          if old_provider_data.get(uuid) != data])
+
+            # Forget the old data until the flush succeeds, so that a failure
+            # makes the next update refresh the whole tree from placement.
+            self.old_provider_data.pop(nodename, None)
             # Flush any changes. If we processed ReshapeNeeded above, allocs is
             # not None, and this will hit placement's POST /reshaper route.
             reportclient.update_from_provider_tree(context, prov_tree,
                                                    allocations=allocs)
+            self.old_provider_data[nodename] = (time.time(), provider_data)
+            self.placement_update_stats['pushed'] += pushed
+            self.placement_update_stats['skipped'] += (
+                len(provider_data) - pushed)
         except NotImplementedError:
             # update_provider_tree isn't implemented yet - try get_inventory
             try:
@@ -972,11 +1089,18 @@ class ResourceTracker(object):
                 self.scheduler_client.update_compute_node(context,
                                                           compute_node)
 
+    def _update(self, context, compute_node, startup=False):
+        """Update partial stats locally and populate them to Scheduler."""
+        with _node_lock(compute_node.hypervisor_hostname):
+            self._flush_compute_node(context, compute_node, startup)
+
+        if self.pci_tracker:
+            self.pci_tracker.save(context)
+
     @retrying.retry(stop_max_attempt_number=4,
                     retry_on_exception=lambda e: isinstance(
                         e, exception.ResourceProviderUpdateConflict))
-    def _update(self, context, compute_node, startup=False):
-        """Update partial stats locally and populate them to Scheduler."""
+    def _flush_compute_node(self, context, compute_node, startup):
         if self._resource_change(compute_node):
             # If the compute_node's resource changed, update to DB.
             # NOTE(jianghuaw): Once we completely move to use get_inventory()
@@ -986,9 +1110,6 @@ class ResourceTracker(object):
 
         self._update_to_placement(context, compute_node, startup)
 
-        if self.pci_tracker:
-            self.pci_tracker.save(context)
-
     def _update_usage(self, usage, nodename, sign=1):
         mem_usage = usage['memory_mb']
         disk_usage = usage.get('root_gb', 0)
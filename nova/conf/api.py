@@ -324,6 +324,50 @@ Related options:
 
 * instance_list_cells_batch_strategy
 * max_limit
+"""),
+    cfg.IntOpt("instance_list_cache_expiration",
+        min=0,
+        default=0,
+        help="""
+Number of seconds the pages of instances returned by the cell databases for
+``GET /servers`` requests are cached by the API.
+
+When set, the instances listed from the cell databases for a request scoped to
+a single project are cached, keyed by the project, filters, sort keys and
+directions, limit and marker of the request, so that repeated requests, like
+the polling done by dashboards, do not query every cell database again.
+Creating, updating or deleting an instance invalidates the cached pages of its
+project.
+
+If ``[cache] enabled`` is set, the configured oslo.cache backend is used,
+otherwise each API worker keeps the pages in a bounded in-memory LRU cache of
+``instance_list_cache_size`` entries. Note that with an in-memory cache, or
+when the other services do not use the same oslo.cache backend as the API,
+changes done outside of the API worker, for example by the compute services,
+are only reflected once the cached page expires, so this should be kept
+short.
+
+Possible values:
+
+* 0 (default): disabled, the cell databases are queried for every request.
+* A positive integer, the number of seconds pages are cached.
+
+Related options:
+
+* instance_list_cache_size
+* ``[cache]`` options
+"""),
+    cfg.IntOpt("instance_list_cache_size",
+        min=1,
+        default=1000,
+        help="""
+Maximum number of pages of instances kept in the in-memory cache of each API
+worker when ``instance_list_cache_expiration`` is set and ``[cache] enabled``
+is not. The least recently used pages are evicted first.
+
+Related options:
+
+* instance_list_cache_expiration
 """),
     cfg.BoolOpt("list_records_by_skipping_down_cells",
         default=True,
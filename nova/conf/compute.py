@@ -232,6 +232,8 @@ Possible values:
 Related options:
 
 * ``compute_driver``: Only the libvirt driver uses this option.
+* ``[libvirt]/images_type``: The ``lvm`` image backend ignores this option,
+  as it converts images to raw as it copies them into logical volumes.
 """),
 # NOTE(yamahata): ListOpt won't work because the command may include a comma.
 # For example:
@@ -277,6 +279,35 @@ For per-compute-host cached images, set to '_base_$my_ip'
         default=(24 * 3600),
         help="""
 Unused unresized base images younger than this will not be removed.
+"""),
+    cfg.ListOpt('precache_images',
+        default=[],
+        help="""
+List of image IDs to pre-populate in the local image cache.
+
+The image cache manager downloads each of these images into the image cache
+directory (see ``image_cache_subdirectory_name``) on every pass, unless it is
+already there, so that the first instance booted from one of these images on
+a new compute host does not have to wait for it to be fetched from the image
+service. Pre-cached images are considered in use and are never removed by the
+image cache manager. The images are downloaded in the background, and a pass
+does not start new downloads while those of a previous pass are still
+running. Downloads are serialized with instance builds using the same image,
+so an image is only ever fetched once per host.
+
+This option is only used by the libvirt driver, with image backends that keep
+a copy of the image in the image cache (``flat``, ``qcow2``, ``lvm`` and
+``ploop``), and requires the image cache manager to be enabled. It is ignored
+with the ``rbd`` image backend.
+
+Possible values:
+
+* A list of image IDs. An empty list disables pre-caching.
+
+Related options:
+
+* ``image_cache_manager_interval``
+* ``[libvirt]/images_type``
 """),
     cfg.StrOpt('pointer_model',
         default='usbtablet',
@@ -670,6 +701,56 @@ for performance reasons, for example, with Ironic.
 Possible values:
 
 * Any positive integer representing greenthreads count.
+"""),
+    cfg.StrOpt('sync_power_state_mode',
+        default='poll',
+        choices=[
+            ('poll', 'Query the power state of each instance from the '
+             'hypervisor every time power states are synchronized'),
+            ('events', 'Track power states from the lifecycle events of the '
+             'hypervisor, and only query them all at once when the tracked '
+             'states may be out of date'),
+        ],
+        help="""
+How the ``_sync_power_states`` periodic task finds out the power states of the
+instances on the hypervisor.
+
+In ``events`` mode, the compute service keeps the power state of each instance
+in memory. Lifecycle events from the compute driver update these states. The
+periodic task then only synchronizes the instances whose state differs from
+the database. The states are refreshed in a single call to the driver when
+they cannot be trusted. This happens on the first run, whenever the number of
+instances on the hypervisor changes, and on every run if lifecycle events are
+disabled. This saves many hypervisor and database calls on hosts with many
+instances. Compute drivers that cannot report all power states at once fall
+back to ``poll`` mode.
+
+Related options:
+
+* ``sync_power_state_interval``
+* ``handle_virt_lifecycle_events`` in the ``workarounds`` group
+"""),
+    cfg.IntOpt('update_resources_pool_size',
+        default=1,
+        min=1,
+        help="""
+Number of greenthreads available for use to update the resources of the nodes
+managed by this compute service.
+
+With the default of 1, the update_available_resource periodic task audits the
+nodes one after another. Compute drivers which manage many nodes, such as
+Ironic or VMware, can set a larger value to audit several nodes concurrently,
+so that the task does not overrun its own interval. The usage of each node is
+still recalculated under the resource tracker's lock, but the node is then
+saved to the database without holding it.
+
+Possible values:
+
+* Any positive integer representing greenthreads count.
+
+Related options:
+
+* ``update_resources_interval``
 """)
 ]
 
@@ -723,6 +804,11 @@ This option specifies the number of seconds between attempts to update a
 provider's aggregates and traits information in the local cache of the compute
 node.
 
+The resource tracker also uses this interval to decide how long it trusts the
+cache. Within the interval, it only flushes a provider tree to placement when
+the virt driver changed its inventory, traits or aggregates. After that, it
+refreshes the tree from placement and flushes it again in full.
+
 A value of zero disables cache refresh completely.
 
 The cache can be cleared manually at any time by sending SIGHUP to the compute
@@ -873,6 +959,32 @@ Possible values:
 
 * Any positive integer in seconds.
 * Any value <=0 will disable the sync. This is not recommended.
+
+Related options:
+
+* ``heal_instance_info_cache_bulk``
+"""),
+    cfg.BoolOpt('heal_instance_info_cache_bulk',
+        default=False,
+        help="""
+Refresh the network information cache of all instances at once.
+
+By default every run of the periodic task controlled by
+``heal_instance_info_cache_interval`` refreshes the cache of a single
+instance, so the caches of a host with N instances are refreshed once every
+N intervals, and each refresh queries Neutron for the ports, networks,
+subnets and floating IPs of that instance separately.
+
+When enabled, every run refreshes the caches of all the instances on the
+host, fetching the ports bound to the host and the resources they reference
+with a few bulk requests. This keeps the caches fresher for a fraction of
+the Neutron API requests, at the cost of a larger burst of requests per run.
+It is recommended to raise ``heal_instance_info_cache_interval``
+accordingly.
+
+Related options:
+
+* ``heal_instance_info_cache_interval``
 """),
     cfg.IntOpt('reclaim_instance_interval',
         default=0,
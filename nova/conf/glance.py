@@ -142,7 +142,48 @@ Related options:
 """),
     cfg.BoolOpt('debug',
          default=False,
-         help='Enable or disable debug logging with glanceclient.')
+         help='Enable or disable debug logging with glanceclient.'),
+    cfg.IntOpt('download_concurrency',
+        default=1,
+        min=1,
+        help="""
+Number of parallel HTTP range requests used to download an image.
+
+When set to more than 1, images larger than 64 MiB are downloaded into the
+image cache as byte ranges, this many at a time, each over its own
+connection to the image service. This can make downloading large images
+several times faster on fast networks, where a single connection cannot
+saturate the link. The image checksum and, if enabled, the image signature
+are verified while the download is in progress.
+
+The image service must support range requests on image downloads. If it does
+not, the image is downloaded over a single connection.
+
+Possible values:
+
+* 1: Download images over a single connection.
+* Any integer greater than 1.
+
+Related options:
+
+* ``[glance]/verify_glance_signatures``
+* ``[glance]/num_retries``
+* ``[glance]/connection_pool_size``
+"""),
+    cfg.IntOpt('connection_pool_size',
+        default=10,
+        min=1,
+        help="""
+Number of connections to each image service endpoint kept open for reuse.
+
+All requests to the image service made by a process share a pool of HTTP
+connections, which are kept alive and reused across requests instead of
+setting up a new TCP and TLS connection for each of them. Requests made
+while all pooled connections are in use still open a new connection, which
+is then closed when the request completes. Raise this on services making
+many concurrent requests to the image service, such as a nova-compute with
+``[glance]/download_concurrency`` set, or a busy nova-api.
+"""),
 ]
 
 deprecated_ksa_opts = {
@@ -890,6 +890,29 @@ going on, or LOGDROP in order to record the blocked traffic before DROPping.
 Possible values:
 
 * A string representing an iptables chain. The default is DROP.
+"""),
+    cfg.BoolOpt("iptables_incremental_apply",
+        default=False,
+        deprecated_for_removal=True,
+        deprecated_since="19.0.0",
+        deprecated_reason="""
+nova-network is deprecated, as are any related configuration options.
+""",
+        help="""
+When enabled, changes to the iptables rules of a service only rewrite the
+chains owned by that service which changed since the previous apply, using
+``iptables-restore --noflush``, instead of saving, rewriting and restoring
+every table.
+
+This considerably reduces the cost of firewall updates on hosts with a large
+number of rules. A full apply is still done the first time the rules are
+applied by the service, whenever chains or rules shared between nova services
+change, and if an incremental apply fails. Changes made outside of nova to the
+chains owned by nova are only reverted by the next full apply.
+
+Related options:
+
+* ``firewall_driver``
 """),
     cfg.IntOpt("ovs_vsctl_timeout",
         default=120,
@@ -1181,6 +1204,59 @@ Related options:
 * ``firewall_driver``: This must be set to
   ``nova.virt.libvirt.firewall.IptablesFirewallDriver`` to ensure the
   libvirt firewall driver is enabled.
+"""),
+    cfg.BoolOpt('firewall_use_ipset',
+        default=False,
+        deprecated_for_removal=True,
+        deprecated_since='19.0.0',
+        deprecated_reason="""
+nova-network is deprecated, as are any related configuration options.
+""",
+        help="""
+Use ipsets to match the members of security groups referenced by security
+group rules.
+
+By default, the iptables firewall drivers add one rule per address of every
+instance in a source security group to the chain of each instance using that
+group. When enabled, the addresses are kept in one ipset per source group and
+a single rule matching that set is used, so that changing the membership of a
+group only updates the set. This requires the ``ipset`` utility to be
+installed on the compute hosts.
+
+Related options:
+
+* ``firewall_driver``: This must be set to an iptables based driver, such as
+  ``nova.virt.firewall.IptablesFirewallDriver``
+* ``iptables_incremental_apply``
+"""),
+    cfg.FloatOpt('firewall_refresh_delay',
+        default=0.0,
+        min=0.0,
+        deprecated_for_removal=True,
+        deprecated_since='19.0.0',
+        deprecated_reason="""
+nova-network is deprecated, as are any related configuration options.
+""",
+        help="""
+Number of seconds to wait before refreshing the security group rules of an
+instance, so that refreshes requested during that time are batched.
+
+A change to the members or rules of a security group triggers a refresh for
+every instance on the host using the group. When this option is greater than
+zero, the iptables firewall drivers queue the instances to refresh and, once
+the delay expires, rebuild their rules in one go, looking up the members of
+each referenced security group only once, and apply the result with a single
+iptables update.
+
+Possible values:
+
+* 0: Refresh the rules of each instance immediately (default)
+* A positive number of seconds to batch refreshes over
+
+Related options:
+
+* ``firewall_driver``: This must be set to an iptables based driver, such as
+  ``nova.virt.firewall.IptablesFirewallDriver``
 """),
 ]
 
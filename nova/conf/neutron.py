@@ -76,6 +76,34 @@ Neutron for extensions.  After this number of seconds the next time Nova
 needs to create a resource in Neutron it will requery Neutron for the
 extensions that it has loaded.  Setting value to 0 will refresh the
 extensions with no wait.
+"""),
+    cfg.IntOpt('connection_pool_size',
+        default=10,
+        min=1,
+        help="""
+Number of connections to each Neutron endpoint kept open for reuse.
+
+All requests to Neutron made by a process share a pool of HTTP connections,
+which are kept alive and reused across requests instead of setting up a new
+TCP and TLS connection for each of them. Requests made while all pooled
+connections are in use still open a new connection, which is then closed
+when the request completes. Raise this on services making many concurrent
+requests to Neutron, such as a busy nova-api or a nova-compute with
+``[neutron]/port_concurrency`` set.
+"""),
+    cfg.IntOpt('port_concurrency',
+        default=1,
+        min=1,
+        help="""
+Maximum number of ports created or updated at the same time for an instance.
+
+When allocating the network of an instance, Nova creates a port on each
+requested network which does not specify a port, then updates every port to
+bind it to the instance and compute host. By default these requests are made
+to Neutron one after the other, so instances with many network interfaces
+take proportionally longer to allocate. Setting a value greater than 1 makes
+up to that many of these requests in parallel. If any of them fails, the
+others are waited for and all the ports are rolled back as usual.
 """),
     cfg.ListOpt('physnets',
         default=[],
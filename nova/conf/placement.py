@@ -64,6 +64,31 @@ a project or user identifier for the consumer. In cleaning up the data
 modeling, we no longer allow missing project and user information. If an older
 client makes an allocation, we'll use this in place of the information it
 doesn't provide.
+"""),
+    cfg.IntOpt(
+        'provider_tree_cache_max_age',
+        default=0,
+        min=0,
+        help="""
+Maximum age, in seconds, of the provider tree usages cached in memory.
+
+When set, the placement service keeps the inventory usages and traits of the
+resource provider trees it read while building allocation candidates in
+memory, and reuses them for later ``GET /allocation_candidates`` requests as
+long as the generation of every provider of the tree is unchanged. Writing
+inventories, allocations or traits increments the generation of a provider,
+so the cached data is not used past such a change, whichever placement
+process made it. Removing allocations does not increment the generation of
+their provider, so the usage of that provider may look higher than it is,
+and fewer candidates be returned, until the cached data reaches this age.
+
+The cache hit and miss counts are logged at DEBUG level for every allocation
+candidates request.
+
+Possible values:
+
+* 0 (default): disabled, the usages and traits are read for every request.
+* A positive integer, the maximum age in seconds.
 """),
 ]
 
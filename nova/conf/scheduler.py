@@ -58,8 +58,9 @@ Periodic task interval.
 
 This value controls how often (in seconds) to run periodic tasks in the
 scheduler. The specific tasks that are run for each period are determined by
-the particular scheduler being used. Currently there are no in-tree scheduler
-driver that use this option.
+the particular scheduler being used. The FilterScheduler uses it to reload the
+compute nodes it caches when ``[filter_scheduler] host_state_cache_max_age``
+is set.
 
 If this is larger than the nova-service 'service_down_time' setting, the
 ComputeFilter (if enabled) may think the compute service is down. As each
@@ -536,6 +537,111 @@ In such case enabling this option will reduce contention and chances for
 rescheduling events.
 At the same time it will make the instance packing (even in unweighed case)
 less dense.
+"""),
+    cfg.BoolOpt(
+        "vectorized_filters",
+        default=False,
+        help="""
+Evaluate simple resource filters over all candidate hosts at once.
+
+When enabled, the enabled filters which have a batched implementation (e.g.
+RamFilter, DiskFilter, CoreFilter, NumInstancesFilter, IoOpsFilter and their
+aggregate variants) are evaluated as a single NumPy operation over a columnar
+view of every candidate host, instead of one Python call per host. The
+remaining filters then run one host at a time, as usual, on the hosts which
+passed. This reduces filtering time for deployments with many thousands of
+compute nodes.
+
+This option requires the ``numpy`` package; if it is not installed, the
+option is ignored and a warning is logged.
+
+This option is only used by the FilterScheduler and its subclasses; if you use
+a different scheduler, this option has no effect.
+"""),
+    cfg.BoolOpt(
+        "vectorized_weighers",
+        default=False,
+        help="""
+Weigh all candidate hosts at once.
+
+When enabled, each enabled weigher returns the weights of every candidate host
+as a single NumPy array, and the normalization, multipliers and final ordering
+of the hosts are computed as array operations instead of one Python call per
+host and weigher. The built-in RAM, CPU, disk, I/O ops, build failure and
+server group soft (anti-)affinity weighers have a batched implementation;
+other weighers are still called once per host but their results are combined
+in the same way. Weights and host ordering are the same as when this option is
+disabled.
+
+This option requires the ``numpy`` package; if it is not installed, the
+option is ignored and a warning is logged.
+
+This option is only used by the FilterScheduler and its subclasses; if you use
+a different scheduler, this option has no effect.
+
+Related options:
+
+* vectorized_filters
+"""),
+    cfg.IntOpt(
+        "host_state_cache_max_age",
+        default=0,
+        min=0,
+        help="""
+Maximum age, in seconds, of the scheduler copy of the compute nodes.
+
+When set, the scheduler keeps the compute nodes of each cell and the host
+states built from them in memory between requests. Each request then only
+reads the compute nodes created, updated or deleted since the previous one
+from the cell databases, instead of all of them, and the host states of
+unchanged compute nodes are reused as they are. Every compute node of a cell is
+read again once its copy gets older than this value, either by a request or by
+the scheduler periodic task, to recover from any missed change. The compute
+services are still read on each request since their status is needed by the
+filters.
+
+This reduces the database load and the time spent building host states in
+deployments with many compute nodes.
+
+This option is only used by the FilterScheduler and its subclasses; if you use
+a different scheduler, this option has no effect.
+
+Possible values:
+
+* 0 (default): disabled, every compute node is read on each request.
+* A positive integer, the maximum age in seconds.
+
+Related options:
+
+* ``[scheduler] periodic_task_interval``: should be lower than this value so
+  that the full reload happens in the periodic task rather than in a request.
+"""),
+    cfg.IntOpt(
+        "claim_batch_size",
+        default=0,
+        min=0,
+        help="""
+Maximum number of instances claimed in a single placement API request.
+
+When set, the scheduler first selects a host for each instance of a multiple
+create request and then claims the resources of up to this number of instances
+at once using the placement ``POST /allocations`` API, instead of making one
+``PUT /allocations/{consumer_uuid}`` request per instance. Instances which
+cannot be claimed on their selected host, for example because another
+scheduler took the last resources of that host meanwhile, are then claimed one
+at a time on the other candidate hosts, as usual.
+
+This reduces the number of placement API requests, and the time needed to
+schedule, large multiple create requests.
+
+This option is only used by the FilterScheduler and its subclasses; if you use
+a different scheduler, this option has no effect.
+
+Possible values:
+
+* 0 (default): disabled, the resources of each instance are claimed
+  separately.
+* A positive integer, the maximum number of instances claimed per request.
 """),
     cfg.StrOpt(
         "image_properties_default_architecture",
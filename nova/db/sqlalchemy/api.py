@@ -1899,11 +1899,17 @@ def _instances_fill_metadata(context, instances, manual_joins=None):
     """Selectively fill instances with manually-joined metadata. Note that
     instance will be converted to a dict.
 
+    Each manually joined table is loaded for the whole list of instances with
+    a single query, rather than with a join producing one row per combination
+    of the joined rows of an instance.
+
     :param context: security context
     :param instances: list of instances to fill
     :param manual_joins: list of tables to manually join (can be any
-                         combination of 'metadata' and 'system_metadata' or
-                         None to take the default of both)
+                         combination of 'metadata', 'system_metadata',
+                         'pci_devices', 'fault', 'security_groups' and 'tags'
+                         or None to take the default of 'metadata' and
+                         'system_metadata')
     """
     uuids = [inst['uuid'] for inst in instances]
 
@@ -1925,6 +1931,21 @@ def _instances_fill_metadata(context, instances, manual_joins=None):
         for row in _instance_pcidevs_get_multi(context, uuids):
             pcidevs[row['instance_uuid']].append(row)
 
+    # NOTE: Like the relationships they replace, security groups and tags
+    # are only joined to the instances which are not deleted.
+    live_uuids = [inst['uuid'] for inst in instances if not inst['deleted']]
+
+    secgroups = collections.defaultdict(list)
+    if 'security_groups' in manual_joins:
+        for instance_uuid, secgroup in _instance_secgroups_get_multi(
+                context, live_uuids):
+            secgroups[instance_uuid].append(secgroup)
+
+    tags = collections.defaultdict(list)
+    if 'tags' in manual_joins:
+        for row in _instance_tags_get_multi(context, live_uuids):
+            tags[row['resource_id']].append(row)
+
     if 'fault' in manual_joins:
         faults = instance_fault_get_by_instance_uuids(context, uuids,
                                                       latest=True)
@@ -1938,6 +1959,10 @@ def _instances_fill_metadata(context, instances, manual_joins=None):
         inst['metadata'] = meta[inst['uuid']]
         if 'pci_devices' in manual_joins:
             inst['pci_devices'] = pcidevs[inst['uuid']]
+        if 'security_groups' in manual_joins:
+            inst['security_groups'] = secgroups[inst['uuid']]
+        if 'tags' in manual_joins:
+            inst['tags'] = tags[inst['uuid']]
         inst_faults = faults.get(inst['uuid'])
         inst['fault'] = inst_faults and inst_faults[0] or None
         filled_instances.append(inst)
@@ -1948,9 +1973,10 @@ def _instances_fill_metadata(context, instances, manual_joins=None):
 def _manual_join_columns(columns_to_join):
     """Separate manually joined columns from columns_to_join
 
-    If columns_to_join contains 'metadata', 'system_metadata', 'fault', or
-    'pci_devices' those columns are removed from columns_to_join and added
-    to a manual_joins list to be used with the _instances_fill_metadata method.
+    If columns_to_join contains 'metadata', 'system_metadata', 'fault',
+    'pci_devices', 'security_groups' or 'tags' those columns are removed from
+    columns_to_join and added to a manual_joins list to be used with the
+    _instances_fill_metadata method.
 
     The columns_to_join formal parameter is copied and not modified, the return
     tuple has the modified columns_to_join list to be used with joinedload in
@@ -1961,7 +1987,8 @@ def _manual_join_columns(columns_to_join):
     """
     manual_joins = []
     columns_to_join_new = copy.copy(columns_to_join)
-    for column in ('metadata', 'system_metadata', 'pci_devices', 'fault'):
+    for column in ('metadata', 'system_metadata', 'pci_devices', 'fault',
+                   'security_groups', 'tags'):
         if column in columns_to_join_new:
             columns_to_join_new.remove(column)
             manual_joins.append(column)
@@ -1972,8 +1999,8 @@ def _manual_join_columns(columns_to_join):
 @pick_context_manager_reader
 def instance_get_all(context, columns_to_join=None):
     if columns_to_join is None:
-        columns_to_join_new = ['info_cache', 'security_groups']
-        manual_joins = ['metadata', 'system_metadata']
+        columns_to_join_new = ['info_cache']
+        manual_joins = ['metadata', 'system_metadata', 'security_groups']
     else:
         manual_joins, columns_to_join_new = (
             _manual_join_columns(columns_to_join))
@@ -2108,8 +2135,8 @@ def instance_get_all_by_filters_sort(context, filters, limit=None, marker=None,
                                                default_dir='desc')
 
     if columns_to_join is None:
-        columns_to_join_new = ['info_cache', 'security_groups']
-        manual_joins = ['metadata', 'system_metadata']
+        columns_to_join_new = ['info_cache']
+        manual_joins = ['metadata', 'system_metadata', 'security_groups']
     else:
         manual_joins, columns_to_join_new = (
             _manual_join_columns(columns_to_join))
@@ -2550,8 +2577,8 @@ def instance_get_active_by_window_joined(context, begin, end=None,
     query = context.session.query(models.Instance)
 
     if columns_to_join is None:
-        columns_to_join_new = ['info_cache', 'security_groups']
-        manual_joins = ['metadata', 'system_metadata']
+        columns_to_join_new = ['info_cache']
+        manual_joins = ['metadata', 'system_metadata', 'security_groups']
     else:
         manual_joins, columns_to_join_new = (
             _manual_join_columns(columns_to_join))
@@ -2601,10 +2628,14 @@ def _instance_get_all_query(context, project_only=False, joins=None):
 
 @pick_context_manager_reader_allow_async
 def instance_get_all_by_host(context, host, columns_to_join=None):
+    if columns_to_join is None:
+        manual_joins = None
+    else:
+        manual_joins, columns_to_join = _manual_join_columns(columns_to_join)
     query = _instance_get_all_query(context, joins=columns_to_join)
     return _instances_fill_metadata(context,
                                     query.filter_by(host=host).all(),
-                                    manual_joins=columns_to_join)
+                                    manual_joins=manual_joins)
 
 
 def _instance_get_all_uuids_by_host(context, host):
@@ -3979,6 +4010,22 @@ def security_group_get_by_instance(context, instance_uuid):
                    all()
 
 
+def _instance_secgroups_get_multi(context, instance_uuids):
+    """Return (instance_uuid, security group) tuples for the security groups
+    of the instances.
+    """
+    if not instance_uuids:
+        return []
+    assoc = models.SecurityGroupInstanceAssociation
+    return model_query(context, assoc, (assoc.instance_uuid,
+                                        models.SecurityGroup),
+                       read_deleted="no").\
+        join(models.SecurityGroup,
+             models.SecurityGroup.id == assoc.security_group_id).\
+        filter(models.SecurityGroup.deleted == 0).\
+        filter(assoc.instance_uuid.in_(instance_uuids))
+
+
 @require_context
 @pick_context_manager_reader
 def security_group_in_use(context, group_id):
@@ -4639,11 +4686,20 @@ def cell_get_all(context):
 ########################
 # User-provided metadata
 
+
+def _metadata_multi_columns(model):
+    # NOTE: Only load the columns needed to build the metadata dicts of the
+    # instances, which avoids building an ORM object per row when listing them.
+    return (model.instance_uuid, model.key, model.value, model.deleted)
+
+
 def _instance_metadata_get_multi(context, instance_uuids):
     if not instance_uuids:
         return []
-    return model_query(context, models.InstanceMetadata).filter(
-        models.InstanceMetadata.instance_uuid.in_(instance_uuids))
+    query = model_query(context, models.InstanceMetadata,
+                        _metadata_multi_columns(models.InstanceMetadata))
+    return (row._asdict() for row in query.filter(
+        models.InstanceMetadata.instance_uuid.in_(instance_uuids)))
 
 
 def _instance_metadata_get_query(context, instance_uuid):
@@ -4703,9 +4759,11 @@ def instance_metadata_update(context, instance_uuid, metadata, delete):
 def _instance_system_metadata_get_multi(context, instance_uuids):
     if not instance_uuids:
         return []
-    return model_query(context, models.InstanceSystemMetadata,
-                       read_deleted='yes').filter(
-        models.InstanceSystemMetadata.instance_uuid.in_(instance_uuids))
+    query = model_query(context, models.InstanceSystemMetadata,
+                        _metadata_multi_columns(models.InstanceSystemMetadata),
+                        read_deleted='yes')
+    return (row._asdict() for row in query.filter(
+        models.InstanceSystemMetadata.instance_uuid.in_(instance_uuids)))
 
 
 def _instance_system_metadata_get_query(context, instance_uuid):
@@ -5827,6 +5885,14 @@ def instance_tag_set(context, instance_uuid, tags):
         resource_id=instance_uuid).all()
 
 
+def _instance_tags_get_multi(context, instance_uuids):
+    if not instance_uuids:
+        return []
+    query = context.session.query(models.Tag.resource_id, models.Tag.tag)
+    return (row._asdict() for row in query.filter(
+        models.Tag.resource_id.in_(instance_uuids)))
+
+
 @pick_context_manager_reader
 def instance_tag_get_by_instance_uuid(context, instance_uuid):
     _check_instance_exists_in_project(context, instance_uuid)
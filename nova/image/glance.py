@@ -17,7 +17,9 @@
 
 from __future__ import absolute_import
 
+import collections
 import copy
+import hashlib
 import inspect
 import itertools
 import os
@@ -31,6 +33,7 @@ import cryptography
 from cursive import certificate_utils
 from cursive import exception as cursive_exception
 from cursive import signature_utils
+import eventlet
 import glanceclient
 import glanceclient.exc
 from glanceclient.v2 import schemas
@@ -39,12 +42,14 @@ from oslo_log import log as logging
 from oslo_serialization import jsonutils
 from oslo_utils import excutils
 from oslo_utils import timeutils
+from oslo_utils import units
 import six
 from six.moves import range
 import six.moves.urllib.parse as urlparse
 
 import nova.conf
 from nova import exception
+from nova.i18n import _
 import nova.image.download as image_xfers
 from nova import objects
 from nova.objects import fields
@@ -57,6 +62,10 @@ CONF = nova.conf.CONF
 
 _SESSION = None
 
+# Size of the byte ranges an image is split into when it is downloaded with
+# parallel range requests.
+DOWNLOAD_RANGE_SIZE = 64 * units.Mi
+
 
 def _session_and_auth(context):
     # Session is cached, but auth needs to be pulled from context each time.
@@ -65,12 +74,19 @@ def _session_and_auth(context):
     if not _SESSION:
         _SESSION = ks_loading.load_session_from_conf_options(
             CONF, nova.conf.glance.glance_group.name)
+        utils.set_connection_pool_size(_SESSION,
+                                       CONF.glance.connection_pool_size)
 
     auth = service_auth.get_auth_plugin(context)
 
     return _SESSION, auth
 
 
+def get_connection_pool_stats():
+    """Return the usage of the pooled connections to Glance, by host."""
+    return utils.get_connection_pool_stats(_SESSION)
+
+
 def _glanceclient_from_endpoint(context, endpoint, version):
     sess, auth = _session_and_auth(context)
 
@@ -333,6 +349,20 @@ class GlanceImageServiceV2(object):
                     except Exception:
                         LOG.exception("Download image error")
 
+        if (CONF.glance.download_concurrency > 1 and data is None and
+                dst_path is not None):
+            image = self.show(context, image_id)
+            if (image.get('size') or 0) > DOWNLOAD_RANGE_SIZE:
+                verifier = self._get_verifier(context, image_id,
+                                              trusted_certs)
+                try:
+                    self._download_ranges(context, image, dst_path, verifier)
+                    return
+                except _RangeNotSupported:
+                    LOG.info('The image service does not support range '
+                             'requests, downloading image %s over a single '
+                             'connection', image_id)
+
         try:
             image_chunks = self._client.call(
                 context, 2, 'data', args=(image_id,))
@@ -399,6 +429,110 @@ class GlanceImageServiceV2(object):
                     self._safe_fsync(data)
                     data.close()
 
+    def _download_range(self, context, image_id, dst_path, byte_range):
+        """Download a single byte range of an image into dst_path."""
+        start, end = byte_range
+        try:
+            resp, body = self._client.call(
+                context, 2, 'get', controller='http_client',
+                args=('/v2/images/%s/file' % image_id,),
+                kwargs={'headers': {'Range': 'bytes=%d-%d' % (start, end)}})
+        except Exception:
+            _reraise_translated_image_exception(image_id)
+
+        # NOTE: An image service which ignores the Range header sends the
+        # whole image with a 200 response.
+        if resp.status_code != 206:
+            resp.close()
+            raise _RangeNotSupported()
+
+        with open(dst_path, 'r+b') as data:
+            data.seek(start)
+            for chunk in body:
+                data.write(chunk)
+            if data.tell() != end + 1:
+                raise exception.ImageUnacceptable(
+                    image_id=image_id,
+                    reason=_('Incomplete download of bytes %(start)d-%(end)d')
+                           % {'start': start, 'end': end})
+        return byte_range
+
+    def _download_ranges(self, context, image, dst_path, verifier):
+        """Download an image with parallel range requests.
+
+        The image is written into a sparse file of its final size by up to
+        CONF.glance.download_concurrency greenthreads, each downloading one
+        byte range. The byte ranges are read back and checked against the
+        image checksum and signature in order as soon as they complete,
+        while later ranges are still being downloaded.
+        """
+        image_id = image['id']
+        size = image['size']
+        ranges = [(start, min(start + DOWNLOAD_RANGE_SIZE, size) - 1)
+                  for start in range(0, size, DOWNLOAD_RANGE_SIZE)]
+        checksum = hashlib.md5() if image.get('checksum') else None
+
+        def verify_range(byte_range):
+            start, end = byte_range
+            downloaded.seek(start)
+            remaining = end + 1 - start
+            while remaining:
+                chunk = downloaded.read(min(remaining, 64 * units.Ki))
+                if not chunk:
+                    raise exception.ImageUnacceptable(
+                        image_id=image_id,
+                        reason=_('Downloaded image is truncated'))
+                remaining -= len(chunk)
+                if checksum:
+                    checksum.update(chunk)
+                if verifier:
+                    verifier.update(chunk)
+
+        pool = eventlet.GreenPool(CONF.glance.download_concurrency)
+        pending = collections.deque()
+        with open(dst_path, 'wb') as data:
+            data.truncate(size)
+            try:
+                # NOTE: This must not be buffered, as a buffered read would
+                # read ahead into ranges which have not been downloaded yet.
+                with open(dst_path, 'rb', 0) as downloaded:
+                    for byte_range in ranges:
+                        # This waits for a free slot in the pool
+                        pending.append(pool.spawn(
+                            self._download_range, context, image_id,
+                            dst_path, byte_range))
+                        while pending and pending[0].dead:
+                            verify_range(pending.popleft().wait())
+                    while pending:
+                        verify_range(pending.popleft().wait())
+
+                if checksum and checksum.hexdigest() != image['checksum']:
+                    raise exception.ImageUnacceptable(
+                        image_id=image_id,
+                        reason=_('Checksum mismatch for downloaded image'))
+                if verifier:
+                    verifier.verify()
+                    LOG.info('Image signature verification succeeded '
+                             'for image %s', image_id)
+            except Exception as ex:
+                with excutils.save_and_reraise_exception():
+                    # Stop the downloads still in progress, so that they do
+                    # not write into the file once we have truncated it.
+                    for greenthread in pending:
+                        greenthread.kill()
+                    data.truncate(0)
+                    if isinstance(ex,
+                                  cryptography.exceptions.InvalidSignature):
+                        LOG.error('Image signature verification failed '
+                                  'for image: %s', image_id)
+                    elif not isinstance(ex, _RangeNotSupported):
+                        LOG.error("Error writing to %(path)s: %(exception)s",
+                                  {'path': dst_path, 'exception': ex})
+            finally:
+                # See the serial download for why this is needed
+                data.flush()
+                self._safe_fsync(data)
+
     def _get_verifier(self, context, image_id, trusted_certs):
         verifier = None
 
@@ -724,6 +858,10 @@ def _is_image_available(context, image):
     return str(user_id) == str(context.user_id)
 
 
+class _RangeNotSupported(Exception):
+    """The image service ignored a range request."""
+
+
 def _translate_to_glance(image_meta):
     image_meta = _convert_to_string(image_meta)
     image_meta = _remove_read_only(image_meta)
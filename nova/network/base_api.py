@@ -20,6 +20,7 @@ from oslo_log import log as logging
 from oslo_utils import excutils
 
 from nova.db import base
+from nova import exception
 from nova import hooks
 from nova.i18n import _
 from nova.network import model as network_model
@@ -264,6 +265,50 @@ class NetworkAPI(base.Base):
         """Template method, so a subclass can implement for neutron/network."""
         raise NotImplementedError()
 
+    def refresh_info_caches_for_host(self, context, host, instances):
+        """Refresh the network info cache of instances running on host.
+
+        Errors refreshing an instance are logged and do not prevent the
+        others from being refreshed.
+
+        :param context: The request context.
+        :param host: The compute host the instances are on.
+        :param instances: List of instances, with their info_cache loaded.
+        """
+        host_data = self._prefetch_host_network_info(context, host, instances)
+        for instance in instances:
+            try:
+                if host_data is None:
+                    self.get_instance_nw_info(context, instance)
+                else:
+                    self._refresh_info_cache_from_host_data(
+                        context, instance, host_data)
+                LOG.debug('Updated the network info_cache for instance',
+                          instance=instance)
+            except exception.InstanceNotFound:
+                LOG.debug('Instance no longer exists. Unable to refresh',
+                          instance=instance)
+            except exception.InstanceInfoCacheNotFound:
+                LOG.debug('InstanceInfoCache no longer exists. '
+                          'Unable to refresh', instance=instance)
+            except Exception:
+                LOG.error('An error occurred while refreshing the network '
+                          'cache.', instance=instance, exc_info=True)
+
+    def _prefetch_host_network_info(self, context, host, instances):
+        """Template method, so a subclass can fetch the network info of all
+        the instances on a host at once. Returning None refreshes each
+        instance with get_instance_nw_info().
+        """
+        return None
+
+    def _refresh_info_cache_from_host_data(self, context, instance,
+                                           host_data):
+        """Template method, refreshing the info cache of an instance from
+        the data returned by _prefetch_host_network_info().
+        """
+        raise NotImplementedError()
+
     def validate_networks(self, context, requested_networks, num_instances):
         """validate the networks passed at the time of creating
         the server.
@@ -102,6 +102,8 @@ class IptablesTable(object):
         self.unwrapped_chains = set()
         self.remove_chains = set()
         self.dirty = True
+        # Snapshot of the rules as they were last applied, see _snapshot().
+        self.applied = None
 
     def has_chain(self, name, wrap=True):
         if wrap:
@@ -236,6 +238,23 @@ class IptablesTable(object):
         for rule in chained_rules:
             self.rules.remove(rule)
 
+    def _snapshot(self):
+        """Return the rules of the table as they would be applied.
+
+        The result is a tuple of the shared (unwrapped) chains and rules,
+        and a dict mapping each wrapped chain name to the rules it contains,
+        in the order they end up in the chain.
+        """
+        unwrapped = (frozenset(self.unwrapped_chains),
+                     tuple((str(r), r.top) for r in self.rules if not r.wrap))
+        chain_rules = {name: [] for name in self.chains}
+        wrapped_rules = ([r for r in self.rules if r.wrap and r.top] +
+                         [r for r in self.rules if r.wrap and not r.top])
+        for rule in wrapped_rules:
+            chain_rules.setdefault(rule.chain, []).append(str(rule))
+        return unwrapped, {name: tuple(rules)
+                           for name, rules in chain_rules.items()}
+
 
 class IptablesManager(object):
     """Wrapper for iptables.
@@ -362,20 +381,89 @@ class IptablesManager(object):
             s += [('ip6tables', self.ipv6)]
 
         for cmd, tables in s:
+            if (CONF.iptables_incremental_apply and
+                    self._apply_incremental(cmd, tables)):
+                continue
             all_tables, _err = self.execute('%s-save' % (cmd,), '-c',
                                                 run_as_root=True,
                                                 attempts=5)
             all_lines = all_tables.split('\n')
+            snapshots = {}
             for table_name, table in tables.items():
                 start, end = self._find_table(all_lines, table_name)
                 all_lines[start:end] = self._modify_rules(
                         all_lines[start:end], table, table_name)
+                snapshots[table_name] = table._snapshot()
                 table.dirty = False
             self.execute('%s-restore' % (cmd,), '-c', run_as_root=True,
                          process_input=six.b('\n'.join(all_lines)),
                          attempts=5)
+            for table_name, table in tables.items():
+                table.applied = snapshots[table_name]
         LOG.debug("IPTablesManager.apply completed with success")
 
+    def _apply_incremental(self, cmd, tables):
+        """Apply only the wrapped chains which changed since the last apply.
+
+        Returns False if a full apply is needed instead, in which case
+        nothing has been changed.
+        """
+        lines = self._incremental_lines(tables)
+        if lines is None:
+            return False
+        if lines:
+            try:
+                self.execute('%s-restore' % (cmd,), '-c', '--noflush',
+                             run_as_root=True,
+                             process_input=six.b('\n'.join(lines)),
+                             attempts=5)
+            except processutils.ProcessExecutionError:
+                LOG.warning('Incremental %s-restore failed, falling back to '
+                            'a full apply', cmd, exc_info=True)
+                return False
+        for table in tables.values():
+            table.applied = table._snapshot()
+            table.dirty = False
+        return True
+
+    @staticmethod
+    def _incremental_lines(tables):
+        """Build the iptables-restore --noflush input for changed chains.
+
+        The wrapped chains belong to this binary alone, so each chain which
+        changed is flushed (by declaring it) and filled again, and chains
+        which went away are deleted. Nothing else in the tables is touched.
+
+        Returns None if that is not enough, i.e. if the tables have never
+        been applied or the shared (unwrapped) chains and rules changed.
+        """
+        lines = []
+        for table_name, table in sorted(tables.items()):
+            if not table.dirty:
+                continue
+            if (table.applied is None or table.remove_rules or
+                    table.remove_chains):
+                return None
+            unwrapped, chain_rules = table._snapshot()
+            applied_unwrapped, applied_chain_rules = table.applied
+            if unwrapped != applied_unwrapped:
+                return None
+
+            changed = sorted(name for name, rules in chain_rules.items()
+                             if applied_chain_rules.get(name) != rules)
+            removed = sorted(set(applied_chain_rules) - set(chain_rules))
+            if not changed and not removed:
+                continue
+
+            lines.append('*%s' % table_name)
+            lines += [':%s-%s - [0:0]' % (binary_name, name)
+                      for name in changed + removed]
+            for name in changed:
+                lines += chain_rules[name]
+            lines += ['-X %s-%s' % (binary_name, name) for name in removed]
+            lines.append('COMMIT')
+        return lines
+
     def _find_table(self, lines, table_name):
         if len(lines) < 3:
             # length only <2 when fake iptables
@@ -542,6 +630,69 @@ class IptablesManager(object):
         return new_filter
 
 
+class IpsetManager(object):
+    """Wrapper for ipset.
+
+    Keeps track of the members of the sets it manages, so that updating a
+    set only adds and deletes the addresses which changed.
+
+    """
+
+    def __init__(self, execute=None):
+        if not execute:
+            self.execute = _execute
+        else:
+            self.execute = execute
+
+        self.sets = {}
+
+    def set_members(self, name, version, members):
+        """Make members the content of the named set, creating it if needed.
+
+        A set which is not known yet is populated under a temporary name and
+        swapped in, so that a set left over from a previous run of the service
+        is replaced atomically.
+        """
+        members = set(members)
+        current = self.sets.get(name)
+        family = 'inet6' if version == 6 else 'inet'
+        if current is None:
+            tmp_name = '%s-new' % name
+            lines = ['create %s hash:ip family %s -exist' % (name, family),
+                     'create %s hash:ip family %s -exist' % (tmp_name,
+                                                             family),
+                     'flush %s' % tmp_name]
+            lines += ['add %s %s' % (tmp_name, member)
+                      for member in sorted(members)]
+            lines += ['swap %s %s' % (tmp_name, name),
+                      'destroy %s' % tmp_name]
+        else:
+            lines = ['add %s %s -exist' % (name, member)
+                     for member in sorted(members - current)]
+            lines += ['del %s %s -exist' % (name, member)
+                      for member in sorted(current - members)]
+
+        if lines:
+            self.execute('ipset', 'restore', run_as_root=True,
+                         process_input=six.b('\n'.join(lines) + '\n'))
+        self.sets[name] = members
+
+    def destroy_set(self, name):
+        """Destroy the named set.
+
+        Sets still referenced by iptables rules cannot be destroyed, in which
+        case the set is kept and False is returned.
+        """
+        try:
+            self.execute('ipset', 'destroy', name, run_as_root=True)
+        except processutils.ProcessExecutionError:
+            LOG.debug('Unable to destroy ipset %s, it is probably still in '
+                      'use', name, exc_info=True)
+            return False
+        self.sets.pop(name, None)
+        return True
+
+
 # NOTE(jkoelker) This is just a nice little stub point since mocking
 #                builtins with mox is a nightmare
 def write_to_file(file, data, mode='w'):
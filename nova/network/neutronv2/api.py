@@ -15,12 +15,16 @@
 #    under the License.
 #
 
+import collections
 import copy
+import sys
 import time
 
+import eventlet
 from keystoneauth1 import loading as ks_loading
 from neutronclient.common import exceptions as neutron_client_exc
 from neutronclient.v2_0 import client as clientv20
+from oslo_concurrency import lockutils
 from oslo_log import log as logging
 from oslo_utils import excutils
 from oslo_utils import strutils
@@ -56,6 +60,10 @@ DEFAULT_SECGROUP = 'default'
 BINDING_PROFILE = 'binding:profile'
 BINDING_HOST_ID = 'binding:host_id'
 MIGRATING_ATTR = 'migrating_to'
+# Maximum number of IDs passed as a filter in a single Neutron list request
+# when refreshing the network info of a whole host, so the query string
+# stays well within the URL length Neutron accepts.
+BULK_QUERY_SIZE = 100
 L3_NETWORK_TYPES = ['vxlan', 'gre', 'geneve']
 
 
@@ -170,9 +178,16 @@ def _get_session():
     if not _SESSION:
         _SESSION = ks_loading.load_session_from_conf_options(
             CONF, nova.conf.neutron.NEUTRON_GROUP)
+        utils.set_connection_pool_size(_SESSION,
+                                       CONF.neutron.connection_pool_size)
     return _SESSION
 
 
+def get_connection_pool_stats():
+    """Return the usage of the pooled connections to Neutron, by host."""
+    return utils.get_connection_pool_stats(_SESSION)
+
+
 def get_client(context, admin=False):
     auth_plugin = _get_auth_plugin(context, admin=admin)
     session = _get_session()
@@ -249,6 +264,37 @@ def _ensure_no_port_binding_failure(port):
         raise exception.PortBindingFailed(port_id=port['id'])
 
 
+def _run_port_operations(func, items):
+    """Call func for each of items, running up to
+    [neutron]/port_concurrency of the calls at the same time.
+
+    Once a call fails no further calls are started, but those already
+    running are waited for so the caller can roll back everything that was
+    done. The first failure is then re-raised.
+    """
+    failures = []
+
+    def _run(item):
+        if failures:
+            return
+        try:
+            func(item)
+        except Exception:
+            failures.append(sys.exc_info())
+
+    if CONF.neutron.port_concurrency > 1 and len(items) > 1:
+        pool = eventlet.GreenPool(CONF.neutron.port_concurrency)
+        for item in items:
+            pool.spawn_n(_run, item)
+        pool.waitall()
+    else:
+        for item in items:
+            _run(item)
+
+    if failures:
+        six.reraise(*failures[0])
+
+
 def _filter_hypervisor_macs(instance, requested_ports_dict, hypervisor_macs):
     """Removes macs from set if used by existing ports
 
@@ -917,56 +963,55 @@ class API(base_api.NetworkAPI):
             created_port_uuid will be None for the pair where a pre-existing
             port was part of the user request
         """
+        # if network_id did not pass validate_networks() and not available
+        # here then skip it safely not continuing with a None Network
+        requests = [request for request in ordered_networks
+                    if nets.get(request.network_id)]
         created_port_ids = []
-        requests_and_created_ports = []
-        for request in ordered_networks:
-            network = nets.get(request.network_id)
-            # if network_id did not pass validate_networks() and not available
-            # here then skip it safely not continuing with a None Network
-            if not network:
-                continue
-
-            try:
-                port_security_enabled = network.get(
-                    'port_security_enabled', True)
-                if port_security_enabled:
-                    if not network.get('subnets'):
-                        # Neutron can't apply security groups to a port
-                        # for a network without L3 assignments.
-                        LOG.debug('Network with port security enabled does '
-                                  'not have subnets so security groups '
-                                  'cannot be applied: %s',
-                                  network, instance=instance)
-                        raise exception.SecurityGroupCannotBeApplied()
-                else:
-                    if security_group_ids:
-                        # We don't want to apply security groups on port
-                        # for a network defined with
-                        # 'port_security_enabled=False'.
-                        LOG.debug('Network has port security disabled so '
-                                  'security groups cannot be applied: %s',
-                                  network, instance=instance)
-                        raise exception.SecurityGroupCannotBeApplied()
-
-                created_port_id = None
-                if not request.port_id:
-                    # create minimal port, if port not already created by user
-                    created_port = self._create_port_minimal(
-                            neutron, instance, request.network_id,
-                            request.address, security_group_ids)
-                    created_port_id = created_port['id']
-                    created_port_ids.append(created_port_id)
-
-                requests_and_created_ports.append((
-                    request, created_port_id))
+        # the ID of the port created for each request, if any
+        created_ports = [None] * len(requests)
+
+        def _create_port(index):
+            request = requests[index]
+            network = nets[request.network_id]
+            port_security_enabled = network.get(
+                'port_security_enabled', True)
+            if port_security_enabled:
+                if not network.get('subnets'):
+                    # Neutron can't apply security groups to a port
+                    # for a network without L3 assignments.
+                    LOG.debug('Network with port security enabled does '
+                              'not have subnets so security groups '
+                              'cannot be applied: %s',
+                              network, instance=instance)
+                    raise exception.SecurityGroupCannotBeApplied()
+            else:
+                if security_group_ids:
+                    # We don't want to apply security groups on port
+                    # for a network defined with
+                    # 'port_security_enabled=False'.
+                    LOG.debug('Network has port security disabled so '
+                              'security groups cannot be applied: %s',
+                              network, instance=instance)
+                    raise exception.SecurityGroupCannotBeApplied()
+
+            if not request.port_id:
+                # create minimal port, if port not already created by user
+                created_port = self._create_port_minimal(
+                        neutron, instance, request.network_id,
+                        request.address, security_group_ids)
+                created_port_ids.append(created_port['id'])
+                created_ports[index] = created_port['id']
 
-            except Exception:
-                with excutils.save_and_reraise_exception():
-                    if created_port_ids:
-                        self._delete_ports(
-                            neutron, instance, created_port_ids)
+        try:
+            _run_port_operations(_create_port, range(len(requests)))
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                if created_port_ids:
+                    self._delete_ports(
+                        neutron, instance, created_port_ids)
 
-        return requests_and_created_ports
+        return list(zip(requests, created_ports))
 
     def allocate_for_instance(self, context, instance, vpn,
                               requested_networks, macs=None,
@@ -1113,28 +1158,62 @@ class API(base_api.NetworkAPI):
         ports_in_requested_order = []
         nets_in_requested_order = []
         created_vifs = []   # this list is for cleanups if we fail
-        for request, created_port_id in requests_and_created_ports:
+        port_updates = []
+
+        def _update_port(port_update):
+            request, network, port_id, created, port_req_body = port_update
             vifobj = objects.VirtualInterface(context)
             vifobj.instance_uuid = instance.uuid
             vifobj.tag = request.tag if 'tag' in request else None
 
-            network = nets.get(request.network_id)
-            # if network_id did not pass validate_networks() and not available
-            # here then skip it safely not continuing with a None Network
-            if not network:
-                continue
-
-            nets_in_requested_order.append(network)
+            # After port is created, update other bits
+            updated_port = self._update_port(
+                port_client, instance, port_id, port_req_body)
+
+            # NOTE(danms): The virtual_interfaces table enforces global
+            # uniqueness on MAC addresses, which clearly does not match
+            # with neutron's view of the world. Since address is a 255-char
+            # string we can namespace it with our port id. Using '/' should
+            # be safely excluded from MAC address notations as well as
+            # UUIDs. We could stop doing this when we remove
+            # nova-network, but we'd need to leave the read translation in
+            # for longer than that of course.
+            vifobj.address = '%s/%s' % (updated_port['mac_address'],
+                                        updated_port['id'])
+            vifobj.uuid = port_id
+            vifobj.create()
+            created_vifs.append(vifobj)
+
+            if not created:
+                # only add if update worked and port create not called
+                preexisting_port_ids.append(port_id)
+
+            self._update_port_dns_name(context, instance, network, port_id,
+                                       neutron)
 
-            zone = 'compute:%s' % instance.availability_zone
-            port_req_body = {'port': {'device_id': instance.uuid,
-                                      'device_owner': zone}}
-            if (requested_ports_dict and
-                request.port_id in requested_ports_dict and
-                requested_ports_dict[request.port_id].get(BINDING_PROFILE)):
-                port_req_body['port'][BINDING_PROFILE] = (
-                    requested_ports_dict[request.port_id][BINDING_PROFILE])
-            try:
+        try:
+            # The request bodies are built in the requested order, the MAC
+            # addresses are handed out in it.
+            for request, created_port_id in requests_and_created_ports:
+                network = nets.get(request.network_id)
+                # if network_id did not pass validate_networks() and not
+                # available here then skip it safely not continuing with a
+                # None Network
+                if not network:
+                    continue
+
+                nets_in_requested_order.append(network)
+
+                zone = 'compute:%s' % instance.availability_zone
+                port_req_body = {'port': {'device_id': instance.uuid,
+                                          'device_owner': zone}}
+                if (requested_ports_dict and
+                    request.port_id in requested_ports_dict and
+                    requested_ports_dict[request.port_id].get(
+                        BINDING_PROFILE)):
+                    port_req_body['port'][BINDING_PROFILE] = (
+                        requested_ports_dict[request.port_id][
+                            BINDING_PROFILE])
                 self._populate_neutron_extension_values(
                     context, instance, request.pci_request_id, port_req_body,
                     network=network, neutron=neutron,
@@ -1150,41 +1229,22 @@ class API(base_api.NetworkAPI):
                 else:
                     port_id = request.port_id
                 ports_in_requested_order.append(port_id)
+                port_updates.append((request, network, port_id,
+                                     bool(created_port_id), port_req_body))
 
-                # After port is created, update other bits
-                updated_port = self._update_port(
-                    port_client, instance, port_id, port_req_body)
-
-                # NOTE(danms): The virtual_interfaces table enforces global
-                # uniqueness on MAC addresses, which clearly does not match
-                # with neutron's view of the world. Since address is a 255-char
-                # string we can namespace it with our port id. Using '/' should
-                # be safely excluded from MAC address notations as well as
-                # UUIDs. We could stop doing this when we remove
-                # nova-network, but we'd need to leave the read translation in
-                # for longer than that of course.
-                vifobj.address = '%s/%s' % (updated_port['mac_address'],
-                                            updated_port['id'])
-                vifobj.uuid = port_id
-                vifobj.create()
-                created_vifs.append(vifobj)
-
-                if not created_port_id:
-                    # only add if update worked and port create not called
-                    preexisting_port_ids.append(port_id)
-
-                self._update_port_dns_name(context, instance, network,
-                                           ports_in_requested_order[-1],
-                                           neutron)
-            except Exception:
-                with excutils.save_and_reraise_exception():
-                    self._unbind_ports(context,
-                                       preexisting_port_ids,
-                                       neutron, port_client)
-                    self._delete_ports(neutron, instance, created_port_ids)
-                    for vif in created_vifs:
-                        vif.destroy()
-
+            _run_port_operations(_update_port, port_updates)
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                self._unbind_ports(context,
+                                   preexisting_port_ids,
+                                   neutron, port_client)
+                self._delete_ports(neutron, instance, created_port_ids)
+                for vif in created_vifs:
+                    vif.destroy()
+
+        # The updates may have completed in any order
+        preexisting_port_ids = [port_id for port_id in ports_in_requested_order
+                                if port_id in preexisting_port_ids]
         return (nets_in_requested_order, ports_in_requested_order,
             preexisting_port_ids, created_port_ids)
 
@@ -1789,12 +1849,15 @@ class API(base_api.NetworkAPI):
         raise exception.FixedIpNotFoundForSpecificInstance(
                 instance_uuid=instance.uuid, ip=address)
 
-    def _get_physnet_tunneled_info(self, context, neutron, net_id):
+    def _get_physnet_tunneled_info(self, context, neutron, net_id,
+                                   network=None):
         """Retrieve detailed network info.
 
         :param context: The request context.
         :param neutron: The neutron client object.
         :param net_id: The ID of the network to retrieve information for.
+        :param network: Optional network dict, as returned to an admin by
+            list_networks, to use instead of querying the network again.
 
         :return: A tuple containing the physnet name, if defined, and the
             tunneled status of the network. If the network uses multiple
@@ -1802,9 +1865,12 @@ class API(base_api.NetworkAPI):
             used for the physnet name.
         """
         if self._has_multi_provider_extension(context, neutron=neutron):
-            network = neutron.show_network(net_id,
+            if network is None:
+                net = neutron.show_network(net_id,
                                            fields='segments').get('network')
-            segments = network.get('segments', {})
+            else:
+                net = network
+            segments = net.get('segments', {})
             for net in segments:
                 # NOTE(vladikr): In general, "multi-segments" network is a
                 # combination of L2 segments. The current implementation
@@ -1826,9 +1892,12 @@ class API(base_api.NetworkAPI):
                          "physical_network") % net_id)
                 raise exception.NovaException(message=msg)
 
-        net = neutron.show_network(
-            net_id, fields=['provider:physical_network',
-                            'provider:network_type']).get('network')
+        if network is None:
+            net = neutron.show_network(
+                net_id, fields=['provider:physical_network',
+                                'provider:network_type']).get('network')
+        else:
+            net = network
         return (net.get('provider:physical_network'),
                 net.get('provider:network_type') in L3_NETWORK_TYPES)
 
@@ -2615,12 +2684,17 @@ class API(base_api.NetworkAPI):
         """Force add a network to the project."""
         raise NotImplementedError()
 
-    def _nw_info_get_ips(self, client, port):
+    def _nw_info_get_ips(self, client, port, floating_ips=None):
         network_IPs = []
         for fixed_ip in port['fixed_ips']:
             fixed = network_model.FixedIP(address=fixed_ip['ip_address'])
-            floats = self._get_floating_ips_by_fixed_and_port(
-                client, fixed_ip['ip_address'], port['id'])
+            if floating_ips is None:
+                floats = self._get_floating_ips_by_fixed_and_port(
+                    client, fixed_ip['ip_address'], port['id'])
+            else:
+                floats = [fip for fip in floating_ips
+                          if fip['fixed_ip_address'] ==
+                          fixed_ip['ip_address']]
             for ip in floats:
                 fip = network_model.IP(address=ip['floating_ip_address'],
                                        type='floating')
@@ -2628,16 +2702,17 @@ class API(base_api.NetworkAPI):
             network_IPs.append(fixed)
         return network_IPs
 
-    def _nw_info_get_subnets(self, context, port, network_IPs, client=None):
-        subnets = self._get_subnets_from_port(context, port, client)
+    def _nw_info_get_subnets(self, context, port, network_IPs, client=None,
+                             subnets=None):
+        if subnets is None:
+            subnets = self._get_subnets_from_port(context, port, client)
         for subnet in subnets:
             subnet['ips'] = [fixed_ip for fixed_ip in network_IPs
                              if fixed_ip.is_in_subnet(subnet)]
         return subnets
 
-    def _nw_info_build_network(self, context, port, networks, subnets):
-        # TODO(stephenfin): Pass in an existing admin client if available.
-        neutron = get_client(context, admin=True)
+    def _nw_info_build_network(self, context, port, networks, subnets,
+                               physnet_info=None):
         network_name = None
         network_mtu = None
         for net in networks:
@@ -2689,8 +2764,12 @@ class API(base_api.NetworkAPI):
         if bridge is not None and vif_type != network_model.VIF_TYPE_DVS:
             bridge = bridge[:network_model.NIC_NAME_LEN]
 
-        physnet, tunneled = self._get_physnet_tunneled_info(
-            context, neutron, port['network_id'])
+        if physnet_info is None:
+            # TODO(stephenfin): Pass in an existing admin client if available.
+            neutron = get_client(context, admin=True)
+            physnet_info = self._get_physnet_tunneled_info(
+                context, neutron, port['network_id'])
+        physnet, tunneled = physnet_info
         network = network_model.Network(
             id=port['network_id'],
             bridge=bridge,
@@ -2720,7 +2799,7 @@ class API(base_api.NetworkAPI):
                 if vif.get('preserve_on_delete')]
 
     def _build_vif_model(self, context, client, current_neutron_port,
-                         networks, preexisting_port_ids):
+                         networks, preexisting_port_ids, prefetched=None):
         """Builds a ``nova.network.model.VIF`` object based on the parameters
         and current state of the port in Neutron.
 
@@ -2734,6 +2813,9 @@ class API(base_api.NetworkAPI):
         :param preexisting_port_ids: List of IDs of ports attached to a
             given server instance which Nova did not create and therefore
             should not delete when the port is detached from the server.
+        :param prefetched: Optional _PrefetchedNetworkData holding the
+            floating IPs, subnets and networks of the port, in which case
+            Neutron is not queried for them.
         :return: nova.network.model.VIF object which represents a port in the
             instance network info cache.
         """
@@ -2742,18 +2824,26 @@ class API(base_api.NetworkAPI):
             or current_neutron_port['status'] == 'ACTIVE'):
             vif_active = True
 
+        floating_ips = subnets = physnet_info = None
+        if prefetched is not None:
+            floating_ips = prefetched.get_floating_ips(current_neutron_port)
+            subnets = prefetched.get_subnets(current_neutron_port)
+            physnet_info = prefetched.physnet_info[
+                current_neutron_port['network_id']]
+
         network_IPs = self._nw_info_get_ips(client,
-                                            current_neutron_port)
+                                            current_neutron_port,
+                                            floating_ips)
         subnets = self._nw_info_get_subnets(context,
                                             current_neutron_port,
-                                            network_IPs, client)
+                                            network_IPs, client, subnets)
 
         devname = "tap" + current_neutron_port['id']
         devname = devname[:network_model.NIC_NAME_LEN]
 
         network, ovs_interfaceid = (
             self._nw_info_build_network(context, current_neutron_port,
-                                        networks, subnets))
+                                        networks, subnets, physnet_info))
         preserve_on_delete = (current_neutron_port['id'] in
                               preexisting_port_ids)
 
@@ -2887,6 +2977,52 @@ class API(base_api.NetworkAPI):
 
         return nw_info
 
+    def _prefetch_host_network_info(self, context, host, instances):
+        """Fetch the Neutron resources of all ports bound to host.
+
+        The ports, and their networks, subnets, DHCP ports and floating IPs,
+        are each fetched with a few list requests for all of the instances
+        at once instead of per instance and per port.
+        """
+        client = get_client(context, admin=True)
+        instances_by_uuid = {inst.uuid: inst for inst in instances}
+        ports = client.list_ports(
+            **{BINDING_HOST_ID: host}).get('ports', [])
+        port_map = {}
+        for port in ports:
+            instance = instances_by_uuid.get(port['device_id'])
+            if instance and port['tenant_id'] == instance.project_id:
+                port_map[port['id']] = port
+        return _PrefetchedNetworkData.fetch(context, self, client, port_map)
+
+    def _refresh_info_cache_from_host_data(self, context, instance,
+                                           host_data):
+        port_ids = [vif['id'] for vif in instance.get_network_info()]
+        # A cached port which is not bound to the host, e.g. during a
+        # migration, needs the per instance lookup.
+        if not all(port_id in host_data.ports for port_id in port_ids):
+            self.get_instance_nw_info(context, instance)
+            return
+
+        with lockutils.lock('refresh_cache-%s' % instance.uuid):
+            compute_utils.refresh_info_cache_for_instance(context, instance)
+            # Leave an instance which had an interface attached or detached
+            # since the ports were listed to the next run.
+            if port_ids != [vif['id'] for vif in instance.get_network_info()]:
+                LOG.debug('Network info cache changed while refreshing, '
+                          'skipping.', instance=instance)
+                return
+            networks = list(host_data.networks.values())
+            preexisting_port_ids = set(
+                self._get_preexisting_port_ids(instance))
+            nw_info = network_model.NetworkInfo(
+                [self._build_vif_model(context, host_data.client,
+                                       host_data.ports[port_id], networks,
+                                       preexisting_port_ids, host_data)
+                 for port_id in port_ids])
+            base_api.update_instance_cache_with_nw_info(
+                self, context, instance, nw_info=nw_info, update_cells=False)
+
     def _get_subnets_from_port(self, context, port, client=None):
         """Return the subnets for a given port."""
 
@@ -2906,40 +3042,49 @@ class API(base_api.NetworkAPI):
         subnets = []
 
         for subnet in ipam_subnets:
-            subnet_dict = {'cidr': subnet['cidr'],
-                           'gateway': network_model.IP(
-                                address=subnet['gateway_ip'],
-                                type='gateway'),
-            }
-            if subnet.get('ipv6_address_mode'):
-                subnet_dict['ipv6_address_mode'] = subnet['ipv6_address_mode']
-
             # attempt to populate DHCP server field
             search_opts = {'network_id': subnet['network_id'],
                            'device_owner': 'network:dhcp'}
             data = client.list_ports(**search_opts)
             dhcp_ports = data.get('ports', [])
-            for p in dhcp_ports:
-                for ip_pair in p['fixed_ips']:
-                    if ip_pair['subnet_id'] == subnet['id']:
-                        subnet_dict['dhcp_server'] = ip_pair['ip_address']
-                        break
-
-            subnet_object = network_model.Subnet(**subnet_dict)
-            for dns in subnet.get('dns_nameservers', []):
-                subnet_object.add_dns(
-                    network_model.IP(address=dns, type='dns'))
-
-            for route in subnet.get('host_routes', []):
-                subnet_object.add_route(
-                    network_model.Route(cidr=route['destination'],
-                                        gateway=network_model.IP(
-                                            address=route['nexthop'],
-                                            type='gateway')))
-
-            subnets.append(subnet_object)
+            subnets.append(self._build_subnet_model(subnet, dhcp_ports))
         return subnets
 
+    @staticmethod
+    def _build_subnet_model(subnet, dhcp_ports):
+        """Build a ``nova.network.model.Subnet`` from a Neutron subnet.
+
+        :param subnet: The subnet dict as returned by Neutron.
+        :param dhcp_ports: The DHCP ports of the subnet's network, used to
+            populate the DHCP server address.
+        """
+        subnet_dict = {'cidr': subnet['cidr'],
+                       'gateway': network_model.IP(
+                            address=subnet['gateway_ip'],
+                            type='gateway'),
+        }
+        if subnet.get('ipv6_address_mode'):
+            subnet_dict['ipv6_address_mode'] = subnet['ipv6_address_mode']
+
+        for p in dhcp_ports:
+            for ip_pair in p['fixed_ips']:
+                if ip_pair['subnet_id'] == subnet['id']:
+                    subnet_dict['dhcp_server'] = ip_pair['ip_address']
+                    break
+
+        subnet_object = network_model.Subnet(**subnet_dict)
+        for dns in subnet.get('dns_nameservers', []):
+            subnet_object.add_dns(
+                network_model.IP(address=dns, type='dns'))
+
+        for route in subnet.get('host_routes', []):
+            subnet_object.add_route(
+                network_model.Route(cidr=route['destination'],
+                                    gateway=network_model.IP(
+                                        address=route['nexthop'],
+                                        type='gateway')))
+        return subnet_object
+
     def get_dns_domains(self, context):
         """Return a list of available dns domains.
 
@@ -3124,6 +3269,92 @@ class API(base_api.NetworkAPI):
                                   vif['id'], instance=instance)
 
 
+def _chunked(values):
+    values = list(values)
+    for i in range(0, len(values), BULK_QUERY_SIZE):
+        yield values[i:i + BULK_QUERY_SIZE]
+
+
+class _PrefetchedNetworkData(object):
+    """The Neutron resources needed to build the VIFs of a set of ports."""
+
+    def __init__(self, client, ports, networks, physnet_info, subnets,
+                 dhcp_ports, floating_ips):
+        # the admin client the resources were fetched with
+        self.client = client
+        # port id -> port dict
+        self.ports = ports
+        # network id -> network dict
+        self.networks = networks
+        # network id -> (physnet, tunneled)
+        self.physnet_info = physnet_info
+        # subnet id -> subnet dict
+        self.subnets = subnets
+        # network id -> list of DHCP port dicts
+        self.dhcp_ports = dhcp_ports
+        # port id -> list of floating IP dicts
+        self.floating_ips = floating_ips
+
+    @classmethod
+    def fetch(cls, context, api, client, ports):
+        """Fetch the resources referenced by ports with a few list requests.
+
+        :param context: The request context.
+        :param api: The neutronv2 API instance.
+        :param client: An admin neutron client.
+        :param ports: Dict of port dicts, keyed by port id.
+        """
+        port_list = list(ports.values())
+        net_ids = set(port['network_id'] for port in port_list)
+        subnet_ids = set(fixed_ip['subnet_id'] for port in port_list
+                         for fixed_ip in port['fixed_ips'])
+
+        networks = {}
+        for chunk in _chunked(net_ids):
+            for net in client.list_networks(id=chunk).get('networks', []):
+                networks[net['id']] = net
+        physnet_info = {}
+        for net_id in net_ids:
+            physnet_info[net_id] = api._get_physnet_tunneled_info(
+                context, client, net_id, network=networks.get(net_id))
+
+        subnets = {}
+        for chunk in _chunked(subnet_ids):
+            for subnet in client.list_subnets(id=chunk).get('subnets', []):
+                subnets[subnet['id']] = subnet
+        dhcp_ports = collections.defaultdict(list)
+        subnet_net_ids = set(subnet['network_id']
+                             for subnet in subnets.values())
+        for chunk in _chunked(subnet_net_ids):
+            data = client.list_ports(network_id=chunk,
+                                     device_owner='network:dhcp')
+            for port in data.get('ports', []):
+                dhcp_ports[port['network_id']].append(port)
+
+        floating_ips = collections.defaultdict(list)
+        for chunk in _chunked(ports):
+            for fip in api._safe_get_floating_ips(client, port_id=chunk):
+                floating_ips[fip['port_id']].append(fip)
+
+        return cls(client, ports, networks, physnet_info, subnets,
+                   dhcp_ports, floating_ips)
+
+    def get_floating_ips(self, port):
+        return self.floating_ips.get(port['id'], [])
+
+    def get_subnets(self, port):
+        """Return the subnet models of port, like _get_subnets_from_port."""
+        subnet_ids = []
+        for fixed_ip in port['fixed_ips']:
+            if fixed_ip['subnet_id'] not in subnet_ids:
+                subnet_ids.append(fixed_ip['subnet_id'])
+        return [API._build_subnet_model(
+                    self.subnets[subnet_id],
+                    self.dhcp_ports.get(self.subnets[subnet_id]['network_id'],
+                                        []))
+                for subnet_id in subnet_ids if subnet_id in self.subnets]
+
+
 def _ensure_requested_network_ordering(accessor, unordered, preferred):
     """Sort a list with respect to the preferred network ordering."""
     if preferred:
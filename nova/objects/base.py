@@ -153,6 +153,95 @@ class NovaPersistentObject(object):
         }
 
 
+_LOADED = object()
+
+
+class LazyFields(object):
+    """Compact container of the raw values of some fields of an object.
+
+    :param indexes: A dict of the index of each field in values, which can be
+                    shared by the containers of all the objects loaded from
+                    the same kind of database rows.
+    :param values: A list of the raw values of the fields.
+    """
+    __slots__ = ('indexes', 'values')
+
+    def __init__(self, indexes, values):
+        self.indexes = indexes
+        self.values = values
+
+    def is_pending(self, name):
+        index = self.indexes.get(name)
+        return index is not None and self.values[index] is not _LOADED
+
+    def pop(self, name):
+        """Return the raw value of a pending field and forget it.
+
+        :raises: KeyError if the field is not pending.
+        """
+        index = self.indexes.get(name)
+        if index is None or self.values[index] is _LOADED:
+            raise KeyError(name)
+        value = self.values[index]
+        self.values[index] = _LOADED
+        return value
+
+
+class NovaLazyObject(object):
+    """Mixin class for objects which can coerce their fields lazily.
+
+    An object given the raw values of some of its fields with
+    obj_set_lazy_fields() only coerces each of them into the field on first
+    access, so that listing many objects does not pay for the fields which
+    are never read. Those fields are reported as set, but not as changed.
+    This is meant for objects which are only read, like those rendered by
+    the API: deleting one of those fields before it was read is not
+    supported.
+
+    Objects overriding obj_load_attr() must call _obj_load_lazy_field() first.
+    """
+    _lazy_fields = None
+
+    def obj_set_lazy_fields(self, lazy_fields):
+        """Set the LazyFields of the object, or None to clear them."""
+        self._lazy_fields = lazy_fields
+
+    def _obj_load_lazy_field(self, attrname):
+        """Coerce the raw value of a pending field into it.
+
+        :returns: True if the field was pending and is now loaded.
+        """
+        if self._lazy_fields is None:
+            return False
+        try:
+            value = self._lazy_fields.pop(attrname)
+        except KeyError:
+            return False
+        setattr(self, attrname, value)
+        self._changed_fields.discard(attrname)
+        return True
+
+    def obj_load_attr(self, attrname):
+        if not self._obj_load_lazy_field(attrname):
+            super(NovaLazyObject, self).obj_load_attr(attrname)
+
+    def obj_attr_is_set(self, attrname):
+        if super(NovaLazyObject, self).obj_attr_is_set(attrname):
+            return True
+        return (self._lazy_fields is not None and
+                self._lazy_fields.is_pending(attrname))
+
+    def obj_what_changed(self):
+        # NOTE: The pending fields did not change and do not hold objects
+        # which could have, so hide them instead of coercing them just to
+        # check that.
+        lazy_fields, self._lazy_fields = self._lazy_fields, None
+        try:
+            return super(NovaLazyObject, self).obj_what_changed()
+        finally:
+            self._lazy_fields = lazy_fields
+
+
 class ObjectListBase(ovoo_base.ObjectListBase):
     # NOTE(danms): These are for transition to using the oslo
     # base object and can be removed when we move to it.
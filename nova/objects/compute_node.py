@@ -386,7 +386,8 @@ class ComputeNodeList(base.ObjectListBase, base.NovaObject):
     # Version 1.15 Added get_by_pagination()
     # Version 1.16: Added get_all_by_uuids()
     # Version 1.17: Added get_all_by_not_mapped()
-    VERSION = '1.17'
+    # Version 1.18: Added get_all_changed_since()
+    VERSION = '1.18'
     fields = {
         'objects': fields.ListOfObjectsField('ComputeNode'),
         }
@@ -459,6 +460,29 @@ class ComputeNodeList(base.ObjectListBase, base.NovaObject):
         return base.obj_make_list(context, cls(context), objects.ComputeNode,
                                   db_computes)
 
+    @staticmethod
+    @db.select_db_reader_mode
+    def _db_compute_node_get_all_changed_since(context, changes_since):
+        changes_since = changes_since.replace(tzinfo=None)
+        db_computes = sa_api.model_query(
+            context, models.ComputeNode, read_deleted='yes').filter(
+                or_(models.ComputeNode.created_at >= changes_since,
+                    models.ComputeNode.updated_at >= changes_since,
+                    models.ComputeNode.deleted_at >= changes_since)).all()
+        return db_computes
+
+    @base.remotable_classmethod
+    def get_all_changed_since(cls, context, changes_since):
+        """Return the compute nodes created, updated or deleted since a time.
+
+        Deleted compute nodes are included, so that callers keeping a copy of
+        the compute nodes can drop them.
+        """
+        db_computes = cls._db_compute_node_get_all_changed_since(
+            context, changes_since)
+        return base.obj_make_list(context, cls(context), objects.ComputeNode,
+                                  db_computes)
+
     @staticmethod
     @db.select_db_reader_mode
     def _db_compute_node_get_by_hv_type(context, hv_type):
@@ -74,6 +74,22 @@ INSTANCE_DEFAULT_FIELDS = ['metadata', 'system_metadata',
 # Maximum count of tags to one instance
 MAX_TAG_COUNT = 50
 
+# Callables called with the project ID of every instance created, changed or
+# destroyed by this process, see register_change_callback().
+_CHANGE_CALLBACKS = []
+
+
+def register_change_callback(callback):
+    """Register a callable to be called with the project ID of every instance
+    created, saved with changes or destroyed by this process.
+
+    This lets the layers above objects, like the cache of instance lists of
+    the compute API, react to the changes of instances without the objects
+    depending on them.
+    """
+    if callback not in _CHANGE_CALLBACKS:
+        _CHANGE_CALLBACKS.append(callback)
+
 
 def _expected_cols(expected_attrs):
     """Return expected_attrs that are columns needing joining.
@@ -107,8 +123,8 @@ _NO_DATA_SENTINEL = object()
 
 # TODO(berrange): Remove NovaObjectDictCompat
 @base.NovaObjectRegistry.register
-class Instance(base.NovaPersistentObject, base.NovaObject,
-               base.NovaObjectDictCompat):
+class Instance(base.NovaLazyObject, base.NovaPersistentObject,
+               base.NovaObject, base.NovaObjectDictCompat):
     # Version 2.0: Initial version
     # Version 2.1: Added services
     # Version 2.2: Added keypairs
@@ -357,14 +373,24 @@ class Instance(base.NovaPersistentObject, base.NovaObject,
         self.obj_reset_changes(['flavor', 'old_flavor', 'new_flavor'])
 
     @staticmethod
-    def _from_db_object(context, instance, db_inst, expected_attrs=None):
+    def _from_db_object(context, instance, db_inst, expected_attrs=None,
+                        lazy_fields=False):
         """Method to help with migration to objects.
 
         Converts a database entity to a formal object.
+
+        If lazy_fields is True, the columns of the instance are only coerced
+        into its fields on first access, see base.NovaLazyObject.
         """
         instance._context = context
         if expected_attrs is None:
             expected_attrs = []
+        if lazy_fields:
+            instance.obj_set_lazy_fields(base.LazyFields(
+                _LAZY_FIELD_INDEXES,
+                [db_inst[field] for field in _LAZY_FIELDS]))
+        else:
+            instance.obj_set_lazy_fields(None)
         # Most of the field names match right now, so be quick
         for field in instance.fields:
             if field in INSTANCE_OPTIONAL_ATTRS:
@@ -373,7 +399,7 @@ class Instance(base.NovaPersistentObject, base.NovaObject,
                 instance.deleted = db_inst['deleted'] == db_inst['id']
             elif field == 'cleaned':
                 instance.cleaned = db_inst['cleaned'] == 1
-            else:
+            elif not lazy_fields:
                 instance[field] = db_inst[field]
 
         if 'metadata' in expected_attrs:
@@ -606,6 +632,7 @@ class Instance(base.NovaPersistentObject, base.NovaObject,
         # created.
         self._load_ec2_ids()
         self.obj_reset_changes(['ec2_ids'])
+        self._notify_changed()
 
     @base.remotable
     def destroy(self):
@@ -636,6 +663,13 @@ class Instance(base.NovaPersistentObject, base.NovaObject,
             cells_api = cells_rpcapi.CellsAPI()
             cells_api.instance_destroy_at_top(self._context, stale_instance)
         delattr(self, base.get_attrname('id'))
+        self._notify_changed()
+
+    def _notify_changed(self):
+        # NOTE: Avoid lazy-loading the project just to notify the change.
+        if self.obj_attr_is_set('project_id'):
+            for callback in _CHANGE_CALLBACKS:
+                callback(self.project_id)
 
     def _save_info_cache(self, context):
         if self.info_cache:
@@ -813,6 +847,8 @@ class Instance(base.NovaPersistentObject, base.NovaObject,
         if not updates:
             if cells_update_from_api:
                 _handle_cell_update_from_api()
+            if changes:
+                self._notify_changed()
             return
 
         # Cleaned needs to be turned back into an int here
@@ -868,6 +904,7 @@ class Instance(base.NovaPersistentObject, base.NovaObject,
         _notify()
 
         self.obj_reset_changes()
+        self._notify_changed()
 
     @base.remotable
     def refresh(self, use_slave=False):
@@ -1095,6 +1132,8 @@ class Instance(base.NovaPersistentObject, base.NovaObject,
             self.numa_topology = numa_topology.clear_host_pinning()
 
     def obj_load_attr(self, attrname):
+        if self._obj_load_lazy_field(attrname):
+            return
         # NOTE(danms): We can't lazy-load anything without a context and a uuid
         if not self._context:
             raise exception.OrphanedObjectError(method='obj_load_attr',
@@ -1268,12 +1307,26 @@ class Instance(base.NovaPersistentObject, base.NovaObject,
             self._context, self.uuid)
 
 
-def _make_instance_list(context, inst_list, db_inst_list, expected_attrs):
+# The columns of the instances which can be coerced lazily into their fields
+_LAZY_FIELDS = tuple(field for field in Instance.fields
+                     if field not in INSTANCE_OPTIONAL_ATTRS and
+                     field not in ('deleted', 'cleaned'))
+_LAZY_FIELD_INDEXES = {field: index
+                       for index, field in enumerate(_LAZY_FIELDS)}
+
+
+def _make_instance_list(context, inst_list, db_inst_list, expected_attrs,
+                        faults_joined=False, lazy_fields=False):
+    # NOTE: faults_joined tells that the database API already joined the
+    # latest fault of each instance to db_inst_list, as it does when 'fault'
+    # is part of the columns_to_join of the listing. lazy_fields is passed to
+    # Instance._from_db_object, for instances which are only read.
     get_fault = expected_attrs and 'fault' in expected_attrs
     inst_faults = {}
     if get_fault:
-        # Build an instance_uuid:latest-fault mapping
         expected_attrs.remove('fault')
+    if get_fault and not faults_joined:
+        # Build an instance_uuid:latest-fault mapping
         instance_uuids = [inst['uuid'] for inst in db_inst_list]
         faults = objects.InstanceFaultList.get_by_instance_uuids(
             context, instance_uuids)
@@ -1287,8 +1340,12 @@ def _make_instance_list(context, inst_list, db_inst_list, expected_attrs):
     for db_inst in db_inst_list:
         inst_obj = inst_cls._from_db_object(
                 context, inst_cls(context), db_inst,
-                expected_attrs=expected_attrs)
-        if get_fault:
+                expected_attrs=expected_attrs, lazy_fields=lazy_fields)
+        if get_fault and faults_joined:
+            inst_obj.fault = db_inst['fault'] and (
+                objects.InstanceFault._from_db_object(
+                    context, objects.InstanceFault(), db_inst['fault']))
+        elif get_fault:
             inst_obj.fault = inst_faults.get(inst_obj.uuid, None)
         inst_list.objects.append(inst_obj)
     inst_list.obj_reset_changes()
@@ -1357,7 +1414,7 @@ class InstanceList(base.ObjectListBase, base.NovaObject):
         # database writes. So, we call this outside of _get_by_filters_impl to
         # avoid being nested inside a 'reader' database transaction context.
         return _make_instance_list(context, cls(), db_inst_list,
-                                   expected_attrs)
+                                   expected_attrs, faults_joined=True)
 
     @staticmethod
     @db.select_db_reader_mode
@@ -1372,7 +1429,7 @@ class InstanceList(base.ObjectListBase, base.NovaObject):
             context, host, columns_to_join=_expected_cols(expected_attrs),
             use_slave=use_slave)
         return _make_instance_list(context, cls(), db_inst_list,
-                                   expected_attrs)
+                                   expected_attrs, faults_joined=True)
 
     @base.remotable_classmethod
     def get_by_host_and_node(cls, context, host, node, expected_attrs=None):
@@ -1396,7 +1453,7 @@ class InstanceList(base.ObjectListBase, base.NovaObject):
         db_instances = db.instance_get_all(
                 context, columns_to_join=_expected_cols(expected_attrs))
         return _make_instance_list(context, cls(), db_instances,
-                                   expected_attrs)
+                                   expected_attrs, faults_joined=True)
 
     @base.remotable_classmethod
     def get_hung_in_rebooting(cls, context, reboot_window,
@@ -1429,7 +1486,7 @@ class InstanceList(base.ObjectListBase, base.NovaObject):
             columns_to_join=_expected_cols(expected_attrs),
             use_slave=use_slave, limit=limit, marker=marker)
         return _make_instance_list(context, cls(), db_inst_list,
-                                   expected_attrs)
+                                   expected_attrs, faults_joined=True)
 
     @classmethod
     def get_active_by_window_joined(cls, context, begin, end=None,
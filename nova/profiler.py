@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import contextlib
+
 from oslo_utils import importutils
 import webob.dec
 
@@ -71,3 +73,22 @@ def trace_cls(name, **kwargs):
         return cls
 
     return decorator
+
+
+@contextlib.contextmanager
+def _noop_trace():
+    yield
+
+
+def trace(name, info=None):
+    """Return a context manager recording an OSProfiler trace point
+
+    The trace point is only recorded if OSProfiler is present and enabled in
+    the config, otherwise the context manager does nothing.
+
+    :param name: The name of the trace point
+    :param info: A dict of additional information to record
+    """
+    if profiler and 'profiler' in CONF and CONF.profiler.enabled:
+        return profiler.Trace(name, info=info)
+    return _noop_trace()
@@ -46,6 +46,7 @@ MEMORY_MB = fields.ResourceClass.MEMORY_MB
 DISK_GB = fields.ResourceClass.DISK_GB
 _RE_INV_IN_USE = re.compile("Inventory for (.+) on resource provider "
                             "(.+) in use")
+_RE_ALLOC_RP = re.compile("resource provider '([^']+)'")
 WARN_EVERY = 10
 RESHAPER_VERSION = '1.30'
 CONSUMER_GENERATION_VERSION = '1.28'
@@ -1008,7 +1009,8 @@ class SchedulerReportClient(object):
         return False
 
     def get_provider_tree_and_ensure_root(self, context, rp_uuid, name=None,
-                                          parent_provider_uuid=None):
+                                          parent_provider_uuid=None,
+                                          use_cache=False):
         """Returns a fresh ProviderTree representing all providers which are in
         the same tree or in the same aggregate as the specified provider,
         including their aggregates, traits, and inventories.
@@ -1024,8 +1026,22 @@ class SchedulerReportClient(object):
                      value
         :param parent_provider_uuid: Optional UUID of the immediate parent,
                                      which must have been previously _ensured.
+        :param use_cache: If True and the provider is already in the local
+                          cache, only the inventories of the provider and its
+                          descendants are refreshed (to pick up their current
+                          generations), and their aggregates and traits only
+                          if stale.  Callers should only pass True when they
+                          know the cache is in sync with placement, e.g.
+                          because the last update_from_provider_tree for this
+                          provider succeeded.
         :return: A new ProviderTree object.
         """
+        if use_cache and self._provider_tree.exists(rp_uuid):
+            for uuid in self._provider_tree.get_provider_uuids(rp_uuid):
+                self._refresh_and_get_inventory(context, uuid)
+                self._refresh_associations(context, uuid, force=False)
+            return copy.deepcopy(self._provider_tree)
+
         # TODO(efried): We would like to have the caller handle create-and/or-
         # cache-if-not-already, but the resource tracker is currently
         # structured to handle initialization and update in a single path.  At
@@ -1892,6 +1908,99 @@ class SchedulerReportClient(object):
                 raise Retry('claim_resources', reason)
         return r.status_code == 204
 
+    @retries
+    def _post_claim_allocations(self, context, payload, version):
+        r = self.post('/allocations', payload, version=version,
+                      global_request_id=context.global_id)
+        if r.status_code == 409:
+            err = r.json()['errors'][0]
+            if (err['code'] == 'placement.concurrent_update' and
+                    'consumer generation conflict' not in err['detail']):
+                # Like in claim_resources(), this is a placement internal race
+                # on the resource provider generations so we can blindly
+                # retry locally.
+                reason = ('another process changed the resource providers '
+                          'involved in our attempt to post allocations for '
+                          'consumers %s' % ', '.join(payload))
+                raise Retry('claim_resources_bulk', reason)
+        return r
+
+    @safe_connect
+    def claim_resources_bulk(self, context, claims,
+                             allocation_request_version):
+        """Creates allocation records for several new consumers at once, using
+        as few calls to the placement's POST /allocations API as possible.
+
+        The POST /allocations API writes the allocations of every consumer in
+        the request or none of them. When placement rejects the request
+        because some resource providers do not have enough capacity left, the
+        consumers with allocations against these providers are set aside and
+        the request is made again for the other consumers only.
+
+        Unlike claim_resources(), this does not handle move operations: every
+        consumer is expected to be new.
+
+        :param context: The security context
+        :param claims: A dict, keyed by consumer UUID, of dicts containing the
+                       'allocations' of the allocation_request to claim, along
+                       with the 'project_id' and 'user_id' of the consumer.
+        :param allocation_request_version: The microversion used to request the
+                                           allocations, at least
+                                           POST_ALLOCATIONS_API_VERSION.
+        :returns: The set of the consumer UUIDs which could not be claimed.
+                  No allocations were created for these consumers so the caller
+                  can try to claim resources for them again, for example
+                  against other resource providers.
+        """
+        with_generation = (
+            versionutils.convert_version_to_tuple(
+                allocation_request_version) >=
+            versionutils.convert_version_to_tuple(
+                CONSUMER_GENERATION_VERSION))
+        payload = {}
+        for consumer_uuid, claim in claims.items():
+            payload[consumer_uuid] = {
+                'allocations': claim['allocations'],
+                'project_id': claim['project_id'],
+                'user_id': claim['user_id'],
+            }
+            if with_generation:
+                payload[consumer_uuid]['consumer_generation'] = None
+
+        unclaimed = set()
+        while payload:
+            r = self._post_claim_allocations(
+                context, payload, allocation_request_version)
+            if r is not False and r.status_code == 204:
+                break
+            conflicting = set()
+            if r is not False and r.status_code == 409:
+                err = r.json()['errors'][0]
+                rp_uuids = set(_RE_ALLOC_RP.findall(err['detail']))
+                conflicting = set(
+                    consumer_uuid for consumer_uuid, alloc in payload.items()
+                    if rp_uuids.intersection(alloc['allocations']))
+            if not conflicting:
+                # We don't know which of the consumers is the culprit so let
+                # the caller claim for each of them separately.
+                if r is not False:
+                    LOG.warning(
+                        'Unable to post allocations for consumers %(uuids)s '
+                        '(%(code)i %(text)s)',
+                        {'uuids': ', '.join(payload),
+                         'code': r.status_code,
+                         'text': r.text})
+                unclaimed.update(payload)
+                break
+            LOG.debug('Unable to claim resources for consumers %(uuids)s: '
+                      '%(error)s', {'uuids': ', '.join(conflicting),
+                                    'error': err['detail']})
+            unclaimed.update(conflicting)
+            payload = {consumer_uuid: alloc
+                       for consumer_uuid, alloc in payload.items()
+                       if consumer_uuid not in conflicting}
+        return unclaimed
+
     def remove_provider_tree_from_instance_allocation(self, context,
                                                       consumer_uuid,
                                                       root_rp_uuid):
@@ -19,9 +19,11 @@ You can customize this scheduler by specifying your own Host Filters and
 Weighing Functions.
 """
 
+import collections
 import random
 
 from oslo_log import log as logging
+from oslo_utils import versionutils
 from six.moves import range
 
 from nova.compute import utils as compute_utils
@@ -32,6 +34,7 @@ from nova import objects
 from nova.objects import fields as fields_obj
 from nova import rpc
 from nova.scheduler import client
+from nova.scheduler.client import report
 from nova.scheduler import driver
 from nova.scheduler import utils
 
@@ -47,6 +50,10 @@ class FilterScheduler(driver.Scheduler):
         scheduler_client = client.SchedulerClient()
         self.placement_client = scheduler_client.reportclient
 
+    def run_periodic_tasks(self, context):
+        """Reload the compute nodes cached by the host manager, if expired."""
+        self.host_manager.reconcile_cell_compute_caches(context)
+
     def select_destinations(self, context, spec_obj, instance_uuids,
             alloc_reqs_by_rp_uuid, provider_summaries,
             allocation_request_version=None, return_alternates=False):
@@ -196,6 +203,12 @@ class FilterScheduler(driver.Scheduler):
         # The list of hosts that have been selected (and claimed).
         claimed_hosts = []
 
+        # When claiming in bulk, the hosts selected for each instance, to be
+        # claimed once a host has been selected for all of them.
+        claim_in_bulk = self._can_claim_in_bulk(spec_obj, instance_uuids,
+                                                allocation_request_version)
+        selected_hosts = []
+
         for num, instance_uuid in enumerate(instance_uuids):
             # In a multi-create request, the first request spec from the list
             # is passed to the scheduler and that request spec's instance_uuid
@@ -216,33 +229,20 @@ class FilterScheduler(driver.Scheduler):
                 # _ensure_sufficient_hosts() call.
                 break
 
-            # Attempt to claim the resources against one or more resource
-            # providers, looping over the sorted list of possible hosts
-            # looking for an allocation_request that contains that host's
-            # resource provider UUID
-            claimed_host = None
-            for host in hosts:
-                cn_uuid = host.uuid
-                if cn_uuid not in alloc_reqs_by_rp_uuid:
-                    msg = ("A host state with uuid = '%s' that did not have a "
-                           "matching allocation_request was encountered while "
-                           "scheduling. This host was skipped.")
-                    LOG.debug(msg, cn_uuid)
-                    continue
-
-                alloc_reqs = alloc_reqs_by_rp_uuid[cn_uuid]
-                # TODO(jaypipes): Loop through all allocation_requests instead
-                # of just trying the first one. For now, since we'll likely
-                # want to order the allocation_requests in the future based on
-                # information in the provider summaries, we'll just try to
-                # claim resources using the first allocation_request
-                alloc_req = alloc_reqs[0]
-                if utils.claim_resources(elevated, self.placement_client,
-                        spec_obj, instance_uuid, alloc_req,
-                        allocation_request_version=allocation_request_version):
-                    claimed_host = host
+            if claim_in_bulk:
+                selected_host = self._select_claimable_host(
+                    hosts, alloc_reqs_by_rp_uuid)
+                if selected_host is None:
+                    LOG.debug("Unable to find a claimable host.")
                     break
-
+                selected_hosts.append(selected_host)
+                self._consume_selected_host(selected_host, spec_obj,
+                                            instance_uuid=instance_uuid)
+                continue
+
+            claimed_host = self._claim_on_sorted_hosts(
+                elevated, spec_obj, instance_uuid, hosts,
+                alloc_reqs_by_rp_uuid, allocation_request_version)
             if claimed_host is None:
                 # We weren't able to claim resources in the placement API
                 # for any of the sorted hosts identified. So, clean up any
@@ -260,6 +260,11 @@ class FilterScheduler(driver.Scheduler):
             self._consume_selected_host(claimed_host, spec_obj,
                                         instance_uuid=instance_uuid)
 
+        if claim_in_bulk and len(selected_hosts) == num_instances:
+            claimed_instance_uuids, claimed_hosts = self._claim_in_bulk(
+                elevated, spec_obj, instance_uuids, selected_hosts, hosts,
+                alloc_reqs_by_rp_uuid, allocation_request_version)
+
         # Check if we were able to fulfill the request. If not, this call will
         # raise a NoValidHost exception.
         self._ensure_sufficient_hosts(context, claimed_hosts, num_instances,
@@ -272,6 +277,115 @@ class FilterScheduler(driver.Scheduler):
             alloc_reqs_by_rp_uuid, allocation_request_version)
         return selections_to_return
 
+    @staticmethod
+    def _can_claim_in_bulk(spec_obj, instance_uuids,
+                           allocation_request_version):
+        """Returns True if the resources of the supplied instances should be
+        claimed using the bulk claim path of the placement client.
+        """
+        return (CONF.filter_scheduler.claim_batch_size > 0 and
+                len(instance_uuids) > 1 and
+                allocation_request_version is not None and
+                versionutils.convert_version_to_tuple(
+                    allocation_request_version) >=
+                versionutils.convert_version_to_tuple(
+                    report.POST_ALLOCATIONS_API_VERSION) and
+                not utils.request_is_rebuild(spec_obj))
+
+    @staticmethod
+    def _select_claimable_host(hosts, alloc_reqs_by_rp_uuid):
+        """Returns the first of the sorted hosts which has an
+        allocation_request to claim resources against, or None.
+        """
+        for host in hosts:
+            if host.uuid in alloc_reqs_by_rp_uuid:
+                return host
+            msg = ("A host state with uuid = '%s' that did not have a "
+                   "matching allocation_request was encountered while "
+                   "scheduling. This host was skipped.")
+            LOG.debug(msg, host.uuid)
+
+    def _claim_on_sorted_hosts(self, context, spec_obj, instance_uuid, hosts,
+                               alloc_reqs_by_rp_uuid,
+                               allocation_request_version):
+        """Attempts to claim the resources of an instance against one or more
+        resource providers, looping over the sorted list of possible hosts
+        looking for an allocation_request that contains that host's resource
+        provider UUID. Returns the claimed host, or None.
+        """
+        for host in hosts:
+            cn_uuid = host.uuid
+            if cn_uuid not in alloc_reqs_by_rp_uuid:
+                msg = ("A host state with uuid = '%s' that did not have a "
+                       "matching allocation_request was encountered while "
+                       "scheduling. This host was skipped.")
+                LOG.debug(msg, cn_uuid)
+                continue
+
+            alloc_reqs = alloc_reqs_by_rp_uuid[cn_uuid]
+            # TODO(jaypipes): Loop through all allocation_requests instead
+            # of just trying the first one. For now, since we'll likely
+            # want to order the allocation_requests in the future based on
+            # information in the provider summaries, we'll just try to
+            # claim resources using the first allocation_request
+            alloc_req = alloc_reqs[0]
+            if utils.claim_resources(context, self.placement_client,
+                    spec_obj, instance_uuid, alloc_req,
+                    allocation_request_version=allocation_request_version):
+                return host
+
+    def _claim_in_bulk(self, context, spec_obj, instance_uuids,
+                       selected_hosts, hosts, alloc_reqs_by_rp_uuid,
+                       allocation_request_version):
+        """Claims the resources of every instance against the host selected
+        for it, with as few placement API requests as possible. The instances
+        which could not be claimed against their selected host are then
+        claimed one at a time against the sorted hosts.
+
+        Returns a tuple of (claimed instance UUIDs, claimed hosts). If an
+        instance could not be claimed at all, the claimed hosts stop before
+        it while the claimed instance UUIDs include every claimed instance, so
+        that the caller cleans up their allocations.
+        """
+        alloc_reqs_by_instance_uuid = collections.OrderedDict(
+            (instance_uuid, alloc_reqs_by_rp_uuid[host.uuid][0])
+            for instance_uuid, host in zip(instance_uuids, selected_hosts))
+        unclaimed = utils.claim_resources_bulk(
+            context, self.placement_client, spec_obj,
+            alloc_reqs_by_instance_uuid,
+            allocation_request_version=allocation_request_version)
+
+        claimed_instance_uuids = [instance_uuid
+                                  for instance_uuid in instance_uuids
+                                  if instance_uuid not in unclaimed]
+        claimed_hosts = []
+        for num, (instance_uuid, selected_host) in enumerate(
+                zip(instance_uuids, selected_hosts)):
+            if instance_uuid not in unclaimed:
+                claimed_hosts.append(selected_host)
+                continue
+
+            LOG.debug("Unable to claim resources for instance %(uuid)s "
+                      "against host %(host)s, retrying against any host.",
+                      {'uuid': instance_uuid, 'host': selected_host})
+            # The resources consumed on the selected host are left as they
+            # are, placement just told us that this host is fuller than we
+            # thought.
+            spec_obj.instance_uuid = instance_uuid
+            spec_obj.obj_reset_changes(['instance_uuid'])
+            hosts = self._get_sorted_hosts(spec_obj, hosts, num)
+            claimed_host = self._claim_on_sorted_hosts(
+                context, spec_obj, instance_uuid, hosts,
+                alloc_reqs_by_rp_uuid, allocation_request_version)
+            if claimed_host is None:
+                LOG.debug("Unable to successfully claim against any host.")
+                break
+            claimed_instance_uuids.append(instance_uuid)
+            claimed_hosts.append(claimed_host)
+            self._consume_selected_host(claimed_host, spec_obj,
+                                        instance_uuid=instance_uuid)
+        return claimed_instance_uuids, claimed_hosts
+
     def _ensure_sufficient_hosts(self, context, hosts, required_count,
             claimed_uuids=None):
         """Checks that we have selected a host for each requested instance. If
@@ -16,7 +16,15 @@
 """
 Scheduler host filters
 """
+from oslo_log import log as logging
+
+import nova.conf
 from nova import filters
+from nova.scheduler import host_columns
+
+LOG = logging.getLogger(__name__)
+
+CONF = nova.conf.CONF
 
 
 class BaseHostFilter(filters.BaseFilter):
@@ -30,6 +38,11 @@ class BaseHostFilter(filters.BaseFilter):
     # existing compute node, etc.
     RUN_ON_REBUILD = False
 
+    # This is set to True if the filter implements hosts_pass(), a batched
+    # equivalent of host_passes() which evaluates every candidate host at
+    # once. It is only used if [filter_scheduler]/vectorized_filters is set.
+    VECTORIZED = False
+
     def _filter_one(self, obj, spec):
         """Return True if the object passes the filter, otherwise False."""
         # Do this here so we don't get scheduler.filters.utils
@@ -49,10 +62,84 @@ class BaseHostFilter(filters.BaseFilter):
         """
         raise NotImplementedError()
 
+    def filter_all_vectorized(self, columns, spec_obj):
+        """Return a boolean mask of the hosts in columns passing the filter.
+
+        None is returned when the filter does not apply to the request, in
+        which case every host passes.
+        """
+        from nova.scheduler import utils
+        if not self.RUN_ON_REBUILD and utils.request_is_rebuild(spec_obj):
+            return None
+        return self.hosts_pass(columns, spec_obj)
+
+    def hosts_pass(self, columns, spec_obj):
+        """Return a boolean mask of the hosts passing the filter.
+
+        :param columns: nova.scheduler.host_columns.HostStateColumns
+        :param spec_obj: filter options
+        :return: a NumPy boolean array with one entry per host in columns
+
+        Override this in a subclass setting VECTORIZED to True.
+        """
+        raise NotImplementedError()
+
 
 class HostFilterHandler(filters.BaseFilterHandler):
     def __init__(self):
         super(HostFilterHandler, self).__init__(BaseHostFilter)
+        if (CONF.filter_scheduler.vectorized_filters and
+                not host_columns.is_available()):
+            LOG.warning('[filter_scheduler]/vectorized_filters is enabled '
+                        'but NumPy is not installed, filters will be run '
+                        'one host at a time.')
+
+    def get_filtered_objects(self, filters, objs, spec_obj, index=0):
+        if (CONF.filter_scheduler.vectorized_filters and
+                host_columns.is_available()):
+            vectorized = [filter_ for filter_ in filters
+                          if filter_.VECTORIZED and
+                          filter_.run_filter_for_index(index)]
+            if vectorized:
+                objs = self._get_filtered_objects_vectorized(
+                    vectorized, objs, spec_obj)
+                if not objs:
+                    return []
+                filters = [filter_ for filter_ in filters
+                           if filter_ not in vectorized]
+        return super(HostFilterHandler, self).get_filtered_objects(
+            filters, objs, spec_obj, index)
+
+    def _get_filtered_objects_vectorized(self, filters, objs, spec_obj):
+        """Run the filters over a columnar view of all the hosts at once.
+
+        The filters are simple predicates on host resource usage, so their
+        individual masks are combined and the hosts are only materialized
+        once at the end.
+        """
+        columns = host_columns.HostStateColumns(objs)
+        LOG.debug("Starting vectorized filtering with %d host(s)",
+                  len(columns))
+        mask = None
+        for filter_ in filters:
+            cls_name = filter_.__class__.__name__
+            filter_mask = filter_.filter_all_vectorized(columns, spec_obj)
+            if filter_mask is None:
+                continue
+            mask = filter_mask if mask is None else mask & filter_mask
+            passed = int(mask.sum())
+            LOG.debug("Filter %(cls_name)s returned %(obj_len)d host(s)",
+                      {'cls_name': cls_name, 'obj_len': passed})
+            if not passed:
+                LOG.info("Filtering removed all hosts for the request with "
+                         "instance ID '%(inst_uuid)s'. Filter %(cls_name)s "
+                         "returned 0 hosts",
+                         {'inst_uuid': spec_obj.instance_uuid,
+                          'cls_name': cls_name})
+                return []
+        if mask is None:
+            return columns.host_states
+        return columns.select(mask)
 
 
 def all_filters():
@@ -26,10 +26,16 @@ LOG = logging.getLogger(__name__)
 class BaseCoreFilter(filters.BaseHostFilter):
 
     RUN_ON_REBUILD = False
+    VECTORIZED = True
 
     def _get_cpu_allocation_ratio(self, host_state, spec_obj):
         raise NotImplementedError
 
+    def _get_cpu_allocation_ratios(self, columns, spec_obj):
+        return columns.gather(
+            lambda host_state: self._get_cpu_allocation_ratio(host_state,
+                                                              spec_obj))
+
     def host_passes(self, host_state, spec_obj):
         """Return True if host has sufficient CPU cores.
 
@@ -74,6 +80,29 @@ class BaseCoreFilter(filters.BaseHostFilter):
 
         return True
 
+    def hosts_pass(self, columns, spec_obj):
+        """Return a mask of the hosts having sufficient CPU cores.
+
+        :param columns: nova.scheduler.host_columns.HostStateColumns
+        :param spec_obj: filter options
+        :return: boolean array
+        """
+        instance_vcpus = spec_obj.vcpus
+        host_vcpus_total = columns.column('vcpus_total')
+        vcpus_used = columns.column('vcpus_used')
+        cpu_allocation_ratio = self._get_cpu_allocation_ratios(columns,
+                                                               spec_obj)
+        vcpus_total = host_vcpus_total * cpu_allocation_ratio
+
+        # Fail safe for hosts where VCPUs are not set, see host_passes().
+        unset = ~(host_vcpus_total > 0) & ~(host_vcpus_total < 0)
+        limited = ~unset & (vcpus_total > 0)
+        columns.set_limits('vcpu', vcpus_total, limited)
+
+        passes = (~(limited & (instance_vcpus > host_vcpus_total)) &
+                  (vcpus_total - vcpus_used >= instance_vcpus))
+        return unset | passes
+
 
 class CoreFilter(BaseCoreFilter):
     """DEPRECATED: CoreFilter filters based on CPU core utilization."""
@@ -90,6 +119,9 @@ class CoreFilter(BaseCoreFilter):
     def _get_cpu_allocation_ratio(self, host_state, spec_obj):
         return host_state.cpu_allocation_ratio
 
+    def _get_cpu_allocation_ratios(self, columns, spec_obj):
+        return columns.column('cpu_allocation_ratio')
+
 
 class AggregateCoreFilter(BaseCoreFilter):
     """AggregateCoreFilter with per-aggregate CPU subscription flag.
@@ -28,10 +28,14 @@ class IoOpsFilter(filters.BaseHostFilter):
     """Filter out hosts with too many concurrent I/O operations."""
 
     RUN_ON_REBUILD = False
+    VECTORIZED = True
 
     def _get_max_io_ops_per_host(self, host_state, spec_obj):
         return CONF.filter_scheduler.max_io_ops_per_host
 
+    def _get_max_io_ops_per_hosts(self, columns, spec_obj):
+        return columns.constant(CONF.filter_scheduler.max_io_ops_per_host)
+
     def host_passes(self, host_state, spec_obj):
         """Use information about current vm and task states collected from
         compute node statistics to decide whether to filter.
@@ -47,6 +51,11 @@ class IoOpsFilter(filters.BaseHostFilter):
                        'max_io_ops': max_io_ops})
         return passes
 
+    def hosts_pass(self, columns, spec_obj):
+        """Batched equivalent of host_passes()."""
+        max_io_ops = self._get_max_io_ops_per_hosts(columns, spec_obj)
+        return columns.column('num_io_ops') < max_io_ops
+
 
 class AggregateIoOpsFilter(IoOpsFilter):
     """AggregateIoOpsFilter with per-aggregate the max io operations.
@@ -68,3 +77,8 @@ class AggregateIoOpsFilter(IoOpsFilter):
             value = max_io_ops_per_host
 
         return value
+
+    def _get_max_io_ops_per_hosts(self, columns, spec_obj):
+        return columns.gather(
+            lambda host_state: self._get_max_io_ops_per_host(host_state,
+                                                             spec_obj))
@@ -28,10 +28,14 @@ class NumInstancesFilter(filters.BaseHostFilter):
     """Filter out hosts with too many instances."""
 
     RUN_ON_REBUILD = False
+    VECTORIZED = True
 
     def _get_max_instances_per_host(self, host_state, spec_obj):
         return CONF.filter_scheduler.max_instances_per_host
 
+    def _get_max_instances_per_hosts(self, columns, spec_obj):
+        return columns.constant(CONF.filter_scheduler.max_instances_per_host)
+
     def host_passes(self, host_state, spec_obj):
         num_instances = host_state.num_instances
         max_instances = self._get_max_instances_per_host(
@@ -44,6 +48,10 @@ class NumInstancesFilter(filters.BaseHostFilter):
                        'max_instances': max_instances})
         return passes
 
+    def hosts_pass(self, columns, spec_obj):
+        max_instances = self._get_max_instances_per_hosts(columns, spec_obj)
+        return columns.column('num_instances') < max_instances
+
 
 class AggregateNumInstancesFilter(NumInstancesFilter):
     """AggregateNumInstancesFilter with per-aggregate the max num instances.
@@ -66,3 +74,8 @@ class AggregateNumInstancesFilter(NumInstancesFilter):
             value = max_instances_per_host
 
         return value
+
+    def _get_max_instances_per_hosts(self, columns, spec_obj):
+        return columns.gather(
+            lambda host_state: self._get_max_instances_per_host(host_state,
+                                                                spec_obj))
@@ -25,10 +25,16 @@ LOG = logging.getLogger(__name__)
 class BaseRamFilter(filters.BaseHostFilter):
 
     RUN_ON_REBUILD = False
+    VECTORIZED = True
 
     def _get_ram_allocation_ratio(self, host_state, spec_obj):
         raise NotImplementedError
 
+    def _get_ram_allocation_ratios(self, columns, spec_obj):
+        return columns.gather(
+            lambda host_state: self._get_ram_allocation_ratio(host_state,
+                                                              spec_obj))
+
     def host_passes(self, host_state, spec_obj):
         """Only return hosts with sufficient available RAM."""
         requested_ram = spec_obj.memory_mb
@@ -64,6 +70,22 @@ class BaseRamFilter(filters.BaseHostFilter):
         host_state.limits['memory_mb'] = memory_mb_limit
         return True
 
+    def hosts_pass(self, columns, spec_obj):
+        """Only return hosts with sufficient available RAM."""
+        requested_ram = spec_obj.memory_mb
+        free_ram_mb = columns.column('free_ram_mb')
+        total_usable_ram_mb = columns.column('total_usable_ram_mb')
+        ram_allocation_ratio = self._get_ram_allocation_ratios(columns,
+                                                               spec_obj)
+
+        memory_mb_limit = total_usable_ram_mb * ram_allocation_ratio
+        usable_ram = memory_mb_limit - (total_usable_ram_mb - free_ram_mb)
+        passes = ((total_usable_ram_mb >= requested_ram) &
+                  (usable_ram >= requested_ram))
+
+        columns.set_limits('memory_mb', memory_mb_limit, passes)
+        return passes
+
 
 class RamFilter(BaseRamFilter):
     """Ram Filter with over subscription flag."""
@@ -80,6 +102,9 @@ class RamFilter(BaseRamFilter):
     def _get_ram_allocation_ratio(self, host_state, spec_obj):
         return host_state.ram_allocation_ratio
 
+    def _get_ram_allocation_ratios(self, columns, spec_obj):
+        return columns.column('ram_allocation_ratio')
+
 
 class AggregateRamFilter(BaseRamFilter):
     """AggregateRamFilter with per-aggregate ram subscription flag.
@@ -0,0 +1,76 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Columnar representation of a list of HostStates.
+
+This is used by the scheduler filters and weighers which have a batched
+implementation so that simple arithmetic over every candidate host can be
+evaluated as array operations instead of one Python call per host.
+"""
+
+from oslo_utils import importutils
+
+numpy = importutils.try_import('numpy')
+
+
+def is_available():
+    """Return True if the batched (NumPy based) code paths can be used."""
+    return numpy is not None
+
+
+class HostStateColumns(object):
+    """A read-only, column oriented view over a list of HostState objects.
+
+    Columns are built lazily from the HostState attribute of the same name
+    the first time they are requested, and cached for the lifetime of the
+    view. Missing values (None) are represented as NaN so that any comparison
+    made against them evaluates to False.
+    """
+
+    def __init__(self, host_states):
+        self.host_states = list(host_states)
+        self._columns = {}
+
+    def __len__(self):
+        return len(self.host_states)
+
+    def column(self, name):
+        """Return a float array of the ``name`` attribute of every host."""
+        values = self._columns.get(name)
+        if values is None:
+            values = self.gather(lambda host_state: getattr(host_state, name))
+            self._columns[name] = values
+        return values
+
+    def gather(self, func):
+        """Return a float array of ``func(host_state)`` for every host.
+
+        This is the escape hatch for values which cannot be read directly off
+        the HostState, e.g. allocation ratios overridden by aggregate metadata.
+        """
+        return numpy.array([func(host_state)
+                            for host_state in self.host_states], dtype=float)
+
+    def constant(self, value):
+        """Return a float array filled with ``value`` for every host."""
+        return numpy.full(len(self.host_states), value, dtype=float)
+
+    def set_limits(self, key, values, mask):
+        """Record ``values`` as the ``key`` limit of hosts selected by mask."""
+        for idx in numpy.flatnonzero(mask):
+            self.host_states[idx].limits[key] = float(values[idx])
+
+    def select(self, mask):
+        """Return the list of HostStates selected by a boolean mask."""
+        host_states = self.host_states
+        return [host_states[idx] for idx in numpy.flatnonzero(mask)]
@@ -335,6 +335,69 @@ class HostState(object):
                  'num_instances': self.num_instances})
 
 
+class CellComputeCache(object):
+    """In-memory copy of the compute nodes of a cell.
+
+    The compute nodes are fully loaded once, then only the records created,
+    updated (e.g. by the resource tracker of their compute service) or
+    deleted since the last refresh are read from the cell database. The
+    cache is fully reloaded again once it gets older than
+    [filter_scheduler]/host_state_cache_max_age, to pick up any change missed
+    because of clock differences between the services writing the records.
+    """
+
+    def __init__(self):
+        self.compute_nodes = {}
+        self.loaded_at = None
+        self.changes_since = None
+
+    def is_expired(self):
+        return (self.loaded_at is None or timeutils.is_older_than(
+            self.loaded_at, CONF.filter_scheduler.host_state_cache_max_age))
+
+    @staticmethod
+    def _last_change(compute_nodes, default):
+        """Return the most recent change time of the compute nodes."""
+        changes = [
+            getattr(cn, field) for cn in compute_nodes
+            for field in ('created_at', 'updated_at', 'deleted_at')
+            if cn.obj_attr_is_set(field) and getattr(cn, field) is not None]
+        return max(changes) if changes else default
+
+    def load(self, context):
+        """Load all the compute nodes of the cell targeted by the context."""
+        now = timeutils.utcnow(with_timezone=True)
+        compute_nodes = objects.ComputeNodeList.get_all(context)
+        self.changes_since = self._last_change(compute_nodes, now)
+        self.compute_nodes = {cn.uuid: cn for cn in compute_nodes}
+        self.loaded_at = now
+        LOG.debug('Loaded %d compute nodes in cell %s',
+                  len(self.compute_nodes), context.cell_uuid)
+
+    def refresh(self, context):
+        """Apply the compute node changes since the last load or refresh."""
+        if self.is_expired():
+            self.load(context)
+            return
+        compute_nodes = objects.ComputeNodeList.get_all_changed_since(
+            context, self.changes_since)
+        for compute in compute_nodes:
+            if compute.deleted:
+                self.compute_nodes.pop(compute.uuid, None)
+            else:
+                self.compute_nodes[compute.uuid] = compute
+        self.changes_since = self._last_change(compute_nodes,
+                                               self.changes_since)
+        LOG.debug('Refreshed %d changed compute nodes in cell %s',
+                  len(compute_nodes), context.cell_uuid)
+
+    def get_compute_nodes(self, compute_uuids=None):
+        if compute_uuids is None:
+            return list(self.compute_nodes.values())
+        return [self.compute_nodes[uuid] for uuid in compute_uuids
+                if uuid in self.compute_nodes]
+
+
 class HostManager(object):
     """Base HostManager class."""
 
@@ -360,6 +423,13 @@ class HostManager(object):
         # to those aggregates
         self.host_aggregates_map = collections.defaultdict(set)
         self._init_aggregates()
+        # CellComputeCache objects keyed by cell UUID, plus the HostStates
+        # built from them and the ComputeNode each HostState was last updated
+        # from, keyed by (host, node), when
+        # [filter_scheduler]/host_state_cache_max_age is set.
+        self.cell_compute_caches = {}
+        self.host_state_map = {}
+        self.host_state_computes = {}
         self.track_instance_changes = (
                 CONF.filter_scheduler.track_instance_changes)
         # Dict of instances and status, keyed by host
@@ -641,6 +711,67 @@ class HostManager(object):
                                  for service in _services})
         return compute_nodes, services
 
+    def _get_cached_computes_for_cells(self, context, cells,
+                                       compute_uuids=None):
+        """Get a tuple of compute node and service information.
+
+        This is the same as _get_computes_for_cells() except that the compute
+        nodes come from the cell compute caches, which are refreshed with the
+        compute nodes changed since the previous call. Services are always
+        read from the cells as their heartbeat is checked by the filters.
+
+        The HostStates of a cell whose compute cache gets fully reloaded are
+        dropped, so that they are rebuilt without the resources consumed by
+        previous requests which the compute node records do not account for
+        (e.g. builds which failed or were rescheduled).
+        """
+
+        def targeted_operation(cctxt):
+            services = objects.ServiceList.get_by_binary(
+                cctxt, 'nova-compute', include_disabled=True)
+            cache = self.cell_compute_caches.setdefault(
+                cctxt.cell_uuid, CellComputeCache())
+            reloaded = cache.is_expired()
+            cache.refresh(cctxt)
+            return services, cache.get_compute_nodes(compute_uuids), reloaded
+
+        timeout = context_module.CELL_TIMEOUT
+        results = context_module.scatter_gather_cells(context, cells, timeout,
+                                                      targeted_operation)
+        compute_nodes = collections.defaultdict(list)
+        services = {}
+        for cell_uuid, result in results.items():
+            if isinstance(result, Exception):
+                LOG.warning('Failed to get computes for cell %s', cell_uuid)
+            elif result is context_module.did_not_respond_sentinel:
+                LOG.warning('Timeout getting computes for cell %s', cell_uuid)
+            else:
+                _services, _compute_nodes, reloaded = result
+                if reloaded:
+                    self._drop_cell_host_states(cell_uuid)
+                compute_nodes[cell_uuid].extend(_compute_nodes)
+                services.update({service.host: service
+                                 for service in _services})
+        return compute_nodes, services
+
+    def _drop_cell_host_states(self, cell_uuid):
+        """Forget the HostStates kept for the compute nodes of a cell."""
+        for state_key, host_state in list(self.host_state_map.items()):
+            if host_state.cell_uuid == cell_uuid:
+                del self.host_state_map[state_key]
+                self.host_state_computes.pop(state_key, None)
+
+    def reconcile_cell_compute_caches(self, context):
+        """Reload the cell compute caches older than their maximum age."""
+        if not CONF.filter_scheduler.host_state_cache_max_age:
+            return
+        cells = [cell for cell in self.enabled_cells
+                 if cell.uuid not in self.cell_compute_caches or
+                 self.cell_compute_caches[cell.uuid].is_expired()]
+        if cells:
+            self._get_cached_computes_for_cells(context, cells,
+                                                compute_uuids=[])
+
     def refresh_cells_caches(self):
         # NOTE(tssurya): This function is called from the scheduler manager's
         # reset signal handler and also upon startup of the scheduler.
@@ -665,6 +796,11 @@ class HostManager(object):
         # or when a new cell is created as long as a SIGHUP signal is sent
         # to the scheduler.
         self.enabled_cells = [c for c in self.cells if not c.disabled]
+        # Drop the cached compute nodes and HostStates, they will be reloaded
+        # on the next request.
+        self.cell_compute_caches = {}
+        self.host_state_map = {}
+        self.host_state_computes = {}
         # Filtering the disabled cells only for logging purposes.
         disabled_cells = [c for c in self.cells if c.disabled]
         LOG.debug('Found %(count)i disabled cells: %(cells)s',
@@ -688,6 +824,11 @@ class HostManager(object):
         else:
             cells = self.enabled_cells
 
+        if CONF.filter_scheduler.host_state_cache_max_age:
+            compute_nodes, services = self._get_cached_computes_for_cells(
+                context, cells, compute_uuids=compute_uuids)
+            return self._get_host_states(context, compute_nodes, services,
+                                         host_state_map=self.host_state_map)
         compute_nodes, services = self._get_computes_for_cells(
             context, cells, compute_uuids=compute_uuids)
         return self._get_host_states(context, compute_nodes, services)
@@ -701,13 +842,20 @@ class HostManager(object):
                                                                self.cells)
         return self._get_host_states(context, compute_nodes, services)
 
-    def _get_host_states(self, context, compute_nodes, services):
+    def _get_host_states(self, context, compute_nodes, services,
+                         host_state_map=None):
         """Returns a generator over HostStates given a list of computes.
 
-        Also updates the HostStates internal mapping for the HostManager.
+        :param host_state_map: HostStates from previous requests keyed by
+            (host, node). When given, a HostState is only updated from a
+            compute node object it was not already updated with, so that the
+            resources consumed by previous requests are kept until the compute
+            node record changes.
         """
         # Get resource usage across the available compute nodes:
-        host_state_map = {}
+        reuse_host_states = host_state_map is not None
+        if host_state_map is None:
+            host_state_map = {}
         seen_nodes = set()
         for cell_uuid, computes in compute_nodes.items():
             for compute in computes:
@@ -727,11 +875,23 @@ class HostManager(object):
                                                      cell_uuid,
                                                      compute=compute)
                     host_state_map[state_key] = host_state
+                # When reusing the HostStates of previous requests, only
+                # update them from a compute node which changed since, so
+                # that the resources consumed by those requests are kept.
+                updated_compute = compute
+                if reuse_host_states:
+                    # The limits are set by the filters of each request.
+                    host_state.limits = {}
+                    if (host_state.updated is not None and
+                            self.host_state_computes.get(state_key) is
+                            compute):
+                        updated_compute = None
+                    self.host_state_computes[state_key] = compute
                 # We force to update the aggregates info each time a
                 # new request comes in, because some changes on the
                 # aggregates could have been happening after setting
                 # this field for the first time
-                host_state.update(compute,
+                host_state.update(updated_compute,
                                   dict(service),
                                   self._get_aggregates_info(host),
                                   self._get_instance_info(context, compute))
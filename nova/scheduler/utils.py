@@ -950,6 +950,19 @@ def request_is_rebuild(spec_obj):
     return check_type == ['rebuild']
 
 
+def _get_consumer_user_id(ctx, spec_obj):
+    # We didn't start storing the user_id in the RequestSpec until Rocky so
+    # if it's not set on an old RequestSpec, use the user_id from the context.
+    if 'user_id' in spec_obj and spec_obj.user_id:
+        return spec_obj.user_id
+    # FIXME(mriedem): This would actually break accounting if we relied on
+    # the allocations for something like counting quota usage because in
+    # the case of migrating or evacuating an instance, the user here is
+    # likely the admin, not the owner of the instance, so the allocation
+    # would be tracked against the wrong user.
+    return ctx.user_id
+
+
 def claim_resources(ctx, client, spec_obj, instance_uuid, alloc_req,
         allocation_request_version=None):
     """Given an instance UUID (representing the consumer of resources) and the
@@ -983,18 +996,7 @@ def claim_resources(ctx, client, spec_obj, instance_uuid, alloc_req,
               "instance %s", instance_uuid)
 
     project_id = spec_obj.project_id
-
-    # We didn't start storing the user_id in the RequestSpec until Rocky so
-    # if it's not set on an old RequestSpec, use the user_id from the context.
-    if 'user_id' in spec_obj and spec_obj.user_id:
-        user_id = spec_obj.user_id
-    else:
-        # FIXME(mriedem): This would actually break accounting if we relied on
-        # the allocations for something like counting quota usage because in
-        # the case of migrating or evacuating an instance, the user here is
-        # likely the admin, not the owner of the instance, so the allocation
-        # would be tracked against the wrong user.
-        user_id = ctx.user_id
+    user_id = _get_consumer_user_id(ctx, spec_obj)
 
     # NOTE(gibi): this could raise AllocationUpdateFailed which means there is
     # a serious issue with the instance_uuid as a consumer. Every caller of
@@ -1007,3 +1009,49 @@ def claim_resources(ctx, client, spec_obj, instance_uuid, alloc_req,
     return client.claim_resources(ctx, instance_uuid, alloc_req, project_id,
             user_id, allocation_request_version=allocation_request_version,
             consumer_generation=None)
+
+
+def claim_resources_bulk(ctx, client, spec_obj, alloc_reqs_by_instance_uuid,
+        allocation_request_version=None):
+    """Given a dict of allocation_request JSON objects returned from Placement,
+    keyed by the UUID of new instances (representing the consumers of
+    resources), attempt to claim resources for all the instances in the
+    placement API, in batches of [filter_scheduler]/claim_batch_size
+    instances. Returns the set of the instance UUIDs which could not be
+    claimed, for which no allocations were created.
+
+    :param ctx: The RequestContext object
+    :param client: The scheduler client to use for making the claim call
+    :param spec_obj: The RequestSpec object - needed to get the project_id
+    :param alloc_reqs_by_instance_uuid: A dict, keyed by instance UUID, of the
+                                        allocation_request received from
+                                        placement for the resources we want to
+                                        claim against the host chosen for that
+                                        instance.
+    :param allocation_request_version: The microversion used to request the
+                                       allocations.
+    """
+    LOG.debug("Attempting to claim resources in the placement API for "
+              "instances %s", ', '.join(alloc_reqs_by_instance_uuid))
+
+    project_id = spec_obj.project_id
+    user_id = _get_consumer_user_id(ctx, spec_obj)
+    batch_size = CONF.filter_scheduler.claim_batch_size
+
+    instance_uuids = list(alloc_reqs_by_instance_uuid)
+    unclaimed = set()
+    for start in range(0, len(instance_uuids), batch_size):
+        batch = instance_uuids[start:start + batch_size]
+        claims = {instance_uuid: {
+                      'allocations': alloc_reqs_by_instance_uuid[
+                          instance_uuid]['allocations'],
+                      'project_id': project_id,
+                      'user_id': user_id}
+                  for instance_uuid in batch}
+        batch_unclaimed = client.claim_resources_bulk(
+            ctx, claims, allocation_request_version)
+        if batch_unclaimed is None:
+            # The placement API could not be reached.
+            batch_unclaimed = batch
+        unclaimed.update(batch_unclaimed)
+    return unclaimed
@@ -17,8 +17,16 @@
 Scheduler host weights
 """
 
+from oslo_log import log as logging
+
+import nova.conf
+from nova.scheduler import host_columns
 from nova import weights
 
+LOG = logging.getLogger(__name__)
+
+CONF = nova.conf.CONF
+
 
 class WeighedHost(weights.WeighedObject):
     def to_dict(self):
@@ -33,7 +41,33 @@ class WeighedHost(weights.WeighedObject):
 
 class BaseHostWeigher(weights.BaseWeigher):
     """Base class for host weights."""
-    pass
+
+    def weigh_hosts(self, columns, weight_properties):
+        """Weigh all the hosts of a HostStateColumns view at once.
+
+        Returns a NumPy array with one weight per host, and records the
+        minval and maxval the same way weigh_objects() does. Override in a
+        subclass if the weights can be computed as array operations; the
+        default implementation goes through weigh_objects().
+        """
+        weighed_objs = [WeighedHost(host_state, 0.0)
+                        for host_state in columns.host_states]
+        return host_columns.numpy.array(
+            self.weigh_objects(weighed_objs, weight_properties), dtype=float)
+
+    def _record_bounds(self, weights):
+        """Record the min and max values of an array of weights.
+
+        As in weigh_objects(), a minval or maxval already set by the weigher
+        is only replaced if the weights go beyond it.
+        """
+        minval = weights.min()
+        maxval = weights.max()
+        if self.minval is None or minval < self.minval:
+            self.minval = minval
+        if self.maxval is None or maxval > self.maxval:
+            self.maxval = maxval
+        return weights
 
 
 class HostWeightHandler(weights.BaseWeightHandler):
@@ -41,6 +75,54 @@ class HostWeightHandler(weights.BaseWeightHandler):
 
     def __init__(self):
         super(HostWeightHandler, self).__init__(BaseHostWeigher)
+        if (CONF.filter_scheduler.vectorized_weighers and
+                not host_columns.is_available()):
+            LOG.warning('[filter_scheduler]/vectorized_weighers is enabled '
+                        'but NumPy is not installed, hosts will be weighed '
+                        'one at a time.')
+
+    def get_weighed_objects(self, weighers, obj_list, weighing_properties):
+        if (CONF.filter_scheduler.vectorized_weighers and
+                host_columns.is_available()):
+            return self._get_weighed_objects_vectorized(
+                weighers, obj_list, weighing_properties)
+        return super(HostWeightHandler, self).get_weighed_objects(
+            weighers, obj_list, weighing_properties)
+
+    def _get_weighed_objects_vectorized(self, weighers, obj_list,
+                                        weighing_properties):
+        """Return a sorted (descending), normalized list of WeighedHosts.
+
+        Each weigher returns the weights of all the hosts as a single array,
+        and normalization, multipliers and sorting are done as array
+        operations.
+        """
+        numpy = host_columns.numpy
+        columns = host_columns.HostStateColumns(obj_list)
+        if len(columns) <= 1:
+            return [self.object_class(obj, 0.0)
+                    for obj in columns.host_states]
+
+        total = columns.constant(0.0)
+        for weigher in weighers:
+            weights = weigher.weigh_hosts(columns, weighing_properties)
+
+            # Normalize the weights, see nova.weights.normalize()
+            minval = float(weigher.minval)
+            maxval = float(weigher.maxval)
+            if minval == maxval:
+                continue
+            total += (weigher.weight_multiplier() *
+                      ((weights - minval) / (maxval - minval)))
+
+        # NOTE: The whole ordering is needed, not only the best hosts, as
+        # the scheduler falls back to the next hosts when claiming resources
+        # fails and picks alternates from the rest of the list. A stable sort
+        # keeps hosts with equal weights in the same order as sorted() does.
+        order = numpy.argsort(-total, kind='stable')
+        host_states = columns.host_states
+        return [self.object_class(host_states[idx], float(total[idx]))
+                for idx in order]
 
 
 def all_weighers():
@@ -51,6 +51,13 @@ class _SoftAffinityWeigherBase(weights.BaseHostWeigher):
 
         return len(member_on_host)
 
+    def weigh_hosts(self, columns, request_spec):
+        if (not request_spec.instance_group or
+                self.policy_name != request_spec.instance_group.policy):
+            return self._record_bounds(columns.constant(0))
+        return super(_SoftAffinityWeigherBase, self).weigh_hosts(
+            columns, request_spec)
+
 
 class ServerGroupSoftAffinityWeigher(_SoftAffinityWeigherBase):
     policy_name = 'soft-affinity'
@@ -31,3 +31,6 @@ class BuildFailureWeigher(weights.BaseHostWeigher):
            weight by number of failed builds.
         """
         return host_state.failed_builds
+
+    def weigh_hosts(self, columns, weight_properties):
+        return self._record_bounds(columns.column('failed_builds'))
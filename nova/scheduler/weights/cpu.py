@@ -39,3 +39,9 @@ class CPUWeigher(weights.BaseHostWeigher):
         vcpus_free = (host_state.vcpus_total * host_state.cpu_allocation_ratio
                       - host_state.vcpus_used)
         return vcpus_free
+
+    def weigh_hosts(self, columns, weight_properties):
+        vcpus_free = (columns.column('vcpus_total') *
+                      columns.column('cpu_allocation_ratio') -
+                      columns.column('vcpus_used'))
+        return self._record_bounds(vcpus_free)
@@ -36,3 +36,6 @@ class DiskWeigher(weights.BaseHostWeigher):
     def _weigh_object(self, host_state, weight_properties):
         """Higher weights win.  We want spreading to be the default."""
         return host_state.free_disk_mb
+
+    def weigh_hosts(self, columns, weight_properties):
+        return self._record_bounds(columns.column('free_disk_mb'))
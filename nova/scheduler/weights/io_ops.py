@@ -39,3 +39,6 @@ class IoOpsWeigher(weights.BaseHostWeigher):
         to be the default.
         """
         return host_state.num_io_ops
+
+    def weigh_hosts(self, columns, weight_properties):
+        return self._record_bounds(columns.column('num_io_ops'))
@@ -29,6 +29,7 @@ from oslo_utils import importutils
 
 from nova.api import wsgi as api_wsgi
 from nova import baserpc
+from nova.compute import instance_list_cache
 from nova import conductor
 import nova.conf
 from nova import context
@@ -137,6 +138,7 @@ class Service(service.Service):
         self.saved_args, self.saved_kwargs = args, kwargs
         self.backdoor_port = None
         setup_profiler(binary, self.host)
+        instance_list_cache.register_invalidation()
 
     def __repr__(self):
         return "<%(cls_name)s: host=%(host)s, binary=%(binary)s, " \
@@ -360,6 +362,7 @@ class WSGIService(service.Service):
         self.port = self.server.port
         self.backdoor_port = None
         setup_profiler(name, self.host)
+        instance_list_cache.register_invalidation()
 
     def reset(self):
         """Reset server greenpool size to default and service version cache.
@@ -281,6 +281,7 @@ class TestCase(testtools.TestCase):
 
         # Reset the global QEMU version flag.
         images.QEMU_VERSION = None
+        images.QEMU_IMG_INFO_CACHE.clear()
 
         mox_fixture = self.useFixture(moxstubout.MoxStubout())
         self.mox = mox_fixture.mox
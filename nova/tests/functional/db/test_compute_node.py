@@ -9,6 +9,9 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+import datetime
+
+from oslo_utils import fixture as utils_fixture
 from oslo_utils.fixture import uuidsentinel
 
 import nova.conf
@@ -151,6 +154,35 @@ class ComputeNodeTestCase(test.TestCase):
                                                         cn3.uuid])
         self.assertEqual(2, len(cns))
 
+    def test_get_all_changed_since(self):
+        now = datetime.datetime(2018, 1, 1, 12, 0, 0)
+        time_fixture = self.useFixture(utils_fixture.TimeFixture(now))
+        cn1 = fake_compute_obj.obj_clone()
+        cn1._context = self.context
+        cn1.create()
+        cn2 = fake_compute_obj.obj_clone()
+        cn2._context = self.context
+        cn2.host = _HOSTNAME + '2'
+        cn2.create()
+        cn3 = fake_compute_obj.obj_clone()
+        cn3._context = self.context
+        cn3.host = _HOSTNAME + '3'
+        cn3.create()
+
+        changes_since = now + datetime.timedelta(seconds=10)
+        cns = objects.ComputeNodeList.get_all_changed_since(self.context,
+                                                            changes_since)
+        self.assertEqual(0, len(cns))
+
+        time_fixture.advance_time_seconds(10)
+        cn2.vcpus_used = 1
+        cn2.save()
+        cn3.destroy()
+        cns = objects.ComputeNodeList.get_all_changed_since(self.context,
+                                                            changes_since)
+        self.assertEqual({cn2.uuid: False, cn3.uuid: True},
+                         {cn.uuid: cn.deleted for cn in cns})
+
     def test_get_by_hypervisor_type(self):
         cn1 = fake_compute_obj.obj_clone()
         cn1._context = self.context
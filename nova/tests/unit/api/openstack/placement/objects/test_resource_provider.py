@@ -0,0 +1,232 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import random
+
+import fixtures
+import mock
+from oslo_utils.fixture import uuidsentinel as uuids
+
+from nova.api.openstack.placement.objects import resource_provider
+from nova import rc_fields as fields
+from nova import test
+
+
+def _provider(uuid, root_uuid=None):
+    return resource_provider.ResourceProvider(
+        uuid=uuid, root_provider_uuid=root_uuid or uuid)
+
+
+def _areq(anchor, rps, amount=1, use_same_provider=False):
+    return resource_provider.AllocationRequest(
+        anchor_root_provider_uuid=anchor,
+        use_same_provider=use_same_provider,
+        resource_requests=[
+            resource_provider.AllocationRequestResource(
+                resource_provider=rp, resource_class=fields.ResourceClass.VCPU,
+                amount=amount)
+            for rp in rps])
+
+
+def _psum(rp, capacity=8, used=0, max_unit=8):
+    return resource_provider.ProviderSummary(
+        resource_provider=rp,
+        resources=[resource_provider.ProviderSummaryResource(
+            resource_class=fields.ResourceClass.VCPU, capacity=capacity,
+            used=used, max_unit=max_unit)],
+        traits=[])
+
+
+def _areq_rp_uuids(areq):
+    return [arr.resource_provider.uuid for arr in areq.resource_requests]
+
+
+class SampleAllocationRequestsTestCase(test.NoDBTestCase):
+
+    def test_no_limit(self):
+        self.assertEqual(
+            list(range(5)),
+            resource_provider._sample_allocation_requests(
+                iter(range(5)), None, False))
+        self.assertEqual(
+            list(range(5)),
+            sorted(resource_provider._sample_allocation_requests(
+                iter(range(5)), None, True)))
+
+    def test_limit_not_randomized(self):
+        areqs = iter(range(10))
+        self.assertEqual(
+            [0, 1, 2],
+            resource_provider._sample_allocation_requests(areqs, 3, False))
+        # Only the allocation requests which are returned are consumed
+        self.assertEqual(3, next(areqs))
+
+    def test_limit_randomized(self):
+        for limit in range(1, 12):
+            sample = resource_provider._sample_allocation_requests(
+                iter(range(10)), limit, True)
+            self.assertEqual(min(limit, 10), len(sample))
+            self.assertEqual(len(sample), len(set(sample)))
+            self.assertTrue(set(sample) <= set(range(10)))
+
+    def test_limit_randomized_uniform(self):
+        # Use a seeded generator so that the test is deterministic
+        self.useFixture(fixtures.MonkeyPatch(
+            'nova.api.openstack.placement.objects.resource_provider.random',
+            random.Random(42)))
+        counts = collections.Counter()
+        for i in range(3000):
+            counts.update(resource_provider._sample_allocation_requests(
+                iter(range(10)), 3, True))
+
+        # Each allocation request is sampled with a probability of 3/10
+        self.assertEqual(set(range(10)), set(counts))
+        for count in counts.values():
+            self.assertTrue(800 < count < 1000, counts)
+
+
+class MergeCandidatesTestCase(test.NoDBTestCase):
+
+    def setUp(self):
+        super(MergeCandidatesTestCase, self).setUp()
+        self.cn1 = _provider(uuids.cn1)
+        self.cn2 = _provider(uuids.cn2)
+        self.pf1 = _provider(uuids.pf1, uuids.cn1)
+        self.pf2 = _provider(uuids.pf2, uuids.cn1)
+
+    def test_single_group_limit(self):
+        rps = [_provider(getattr(uuids, 'cn%d' % i)) for i in range(5)]
+        areqs = [_areq(rp.uuid, [rp]) for rp in rps]
+        candidates = {'': (iter(areqs), [_psum(rp) for rp in rps])}
+
+        merged, psums = resource_provider._merge_candidates(
+            candidates, limit=2, randomize=False)
+
+        # The first allocation requests are returned, in order, together
+        # with the summaries of their providers only.
+        self.assertEqual([[rps[0].uuid], [rps[1].uuid]],
+                         [_areq_rp_uuids(areq) for areq in merged])
+        self.assertEqual([rps[0].uuid, rps[1].uuid],
+                         [psum.resource_provider.uuid for psum in psums])
+
+    def test_single_group_limit_skips_over_capacity(self):
+        areqs = [_areq(uuids.cn1, [self.cn1], amount=4),
+                 _areq(uuids.cn2, [self.cn2], amount=4)]
+        candidates = {'': (areqs, [_psum(self.cn1, used=6),
+                                   _psum(self.cn2)])}
+
+        merged, psums = resource_provider._merge_candidates(
+            candidates, limit=1, randomize=False)
+
+        self.assertEqual([[uuids.cn2]],
+                         [_areq_rp_uuids(areq) for areq in merged])
+
+    @mock.patch('random.shuffle')
+    def test_single_group_randomized(self, mock_shuffle):
+        rps = [_provider(getattr(uuids, 'cn%d' % i)) for i in range(5)]
+        areqs = [_areq(rp.uuid, [rp]) for rp in rps]
+        candidates = {'': (iter(areqs), [_psum(rp) for rp in rps])}
+
+        merged, psums = resource_provider._merge_candidates(
+            candidates, limit=2, randomize=True)
+
+        self.assertEqual(2, len(merged))
+        mock_shuffle.assert_called_once_with(merged)
+        self.assertEqual(
+            set(uuid for areq in merged for uuid in _areq_rp_uuids(areq)),
+            set(psum.resource_provider.uuid for psum in psums))
+
+    def _granular_candidates(self):
+        psums = [_psum(self.cn1), _psum(self.pf1, capacity=1),
+                 _psum(self.pf2, capacity=1)]
+        return {
+            '1': ([_areq(uuids.cn1, [self.pf1], use_same_provider=True),
+                   _areq(uuids.cn1, [self.pf2], use_same_provider=True)],
+                  psums),
+            '2': ([_areq(uuids.cn1, [self.pf1], use_same_provider=True),
+                   _areq(uuids.cn1, [self.pf2], use_same_provider=True)],
+                  psums),
+            # Not satisfiable by the same tree, so never merged
+            '3': ([_areq(uuids.cn2, [self.cn2], use_same_provider=True)],
+                  [_psum(self.cn2)]),
+        }
+
+    @staticmethod
+    def _sorted(rp_uuid_lists):
+        return sorted(sorted(rp_uuids) for rp_uuids in rp_uuid_lists)
+
+    def assertMergedProviders(self, expected, merged):
+        self.assertEqual(self._sorted(expected),
+                         self._sorted(_areq_rp_uuids(areq) for areq in merged))
+
+    def test_multiple_groups_isolate(self):
+        candidates = self._granular_candidates()
+        del candidates['3']
+
+        merged, psums = resource_provider._merge_candidates(
+            candidates, group_policy='isolate')
+
+        # The same provider is never used for both groups. Each combination
+        # is returned, however the providers are consolidated.
+        self.assertMergedProviders(
+            [[uuids.pf1, uuids.pf2], [uuids.pf1, uuids.pf2]], merged)
+        self.assertEqual(
+            set([uuids.cn1, uuids.pf1, uuids.pf2]),
+            set(psum.resource_provider.uuid for psum in psums))
+
+    def test_multiple_groups_none(self):
+        candidates = self._granular_candidates()
+        del candidates['3']
+        # Give the providers room for both groups
+        for psum in candidates['1'][1]:
+            psum.resources[0].capacity = 2
+
+        merged, psums = resource_provider._merge_candidates(
+            candidates, group_policy='none')
+
+        self.assertMergedProviders(
+            [[uuids.pf1], [uuids.pf1, uuids.pf2], [uuids.pf1, uuids.pf2],
+             [uuids.pf2]], merged)
+        # Both groups are consolidated into a single allocation of the
+        # provider they share
+        for areq in merged:
+            if len(areq.resource_requests) == 1:
+                self.assertEqual(2, areq.resource_requests[0].amount)
+
+    def test_multiple_groups_none_exceeds_capacity(self):
+        candidates = self._granular_candidates()
+        del candidates['3']
+
+        merged, psums = resource_provider._merge_candidates(
+            candidates, group_policy='none')
+
+        # Both groups can't be allocated from a provider with a capacity
+        # of 1.
+        self.assertMergedProviders(
+            [[uuids.pf1, uuids.pf2], [uuids.pf1, uuids.pf2]], merged)
+
+    def test_multiple_groups_different_trees(self):
+        merged, psums = resource_provider._merge_candidates(
+            self._granular_candidates(), group_policy='isolate')
+
+        self.assertEqual([], merged)
+        self.assertEqual([], psums)
+
+    def test_multiple_groups_limit(self):
+        candidates = self._granular_candidates()
+        del candidates['3']
+
+        merged, psums = resource_provider._merge_candidates(
+            candidates, group_policy='isolate', limit=1, randomize=False)
+
+        self.assertMergedProviders([[uuids.pf1, uuids.pf2]], merged)
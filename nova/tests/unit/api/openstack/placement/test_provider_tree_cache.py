@@ -0,0 +1,116 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+
+import mock
+from oslo_utils import fixture as utils_fixture
+
+from nova.api.openstack.placement import provider_tree_cache
+from nova import test
+
+# Provider 1 is the root of a tree including provider 2, provider 3 is alone
+# in its tree.
+_TREES = {1: [1, 2], 3: [3]}
+
+
+class TestProviderTreeCache(test.NoDBTestCase):
+
+    def setUp(self):
+        super(TestProviderTreeCache, self).setUp()
+        self.time_fixture = self.useFixture(utils_fixture.TimeFixture(
+            datetime.datetime(2018, 1, 1)))
+        self.cache = provider_tree_cache.ProviderTreeCache()
+        self.generations = {1: frozenset([(1, 0), (2, 0)]),
+                            3: frozenset([(3, 0)])}
+        self.load = mock.Mock(side_effect=self._load)
+
+    @staticmethod
+    def _load(root_ids):
+        usages = []
+        traits = {}
+        for root_id in root_ids:
+            for rp_id in _TREES[root_id]:
+                usages.append({'resource_provider_id': rp_id, 'used': rp_id})
+                traits[rp_id] = ['CUSTOM_TRAIT_%d' % rp_id]
+        return usages, traits
+
+    def _get(self, max_age=60):
+        usages, traits = self.cache.get(self.generations, max_age, self.load)
+        return (sorted(usage['resource_provider_id'] for usage in usages),
+                dict(traits))
+
+    def _assert_loaded(self, *root_ids):
+        self.load.assert_called_once_with(set(root_ids))
+        self.load.reset_mock()
+
+    def test_get_hit(self):
+        expected = ([1, 2, 3], {1: ['CUSTOM_TRAIT_1'], 2: ['CUSTOM_TRAIT_2'],
+                                3: ['CUSTOM_TRAIT_3']})
+        self.assertEqual(expected, self._get())
+        self._assert_loaded(1, 3)
+        self.assertEqual({1: 1, 2: 1, 3: 3}, self.cache.roots)
+
+        self.assertEqual(expected, self._get())
+        self.load.assert_not_called()
+        self.assertEqual(2, self.cache.hits)
+        self.assertEqual(2, self.cache.misses)
+
+    def test_get_generation_mismatch(self):
+        self._get()
+        self._assert_loaded(1, 3)
+
+        # A provider of the first tree changed, so only that tree is loaded
+        # again.
+        self.generations[1] = frozenset([(1, 0), (2, 1)])
+        self.assertEqual([1, 2, 3], self._get()[0])
+        self._assert_loaded(1)
+        self.assertEqual(self.generations[1],
+                         self.cache.trees[1].generations)
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(3, self.cache.misses)
+
+    def test_get_expired(self):
+        self._get()
+        self._assert_loaded(1, 3)
+
+        self.time_fixture.advance_time_seconds(60)
+        self._get()
+        self.load.assert_not_called()
+
+        self.time_fixture.advance_time_seconds(1)
+        self._get()
+        self._assert_loaded(1, 3)
+        self.assertEqual(2, self.cache.hits)
+        self.assertEqual(4, self.cache.misses)
+
+    def test_invalidate(self):
+        self._get()
+        self._assert_loaded(1, 3)
+
+        # Invalidating a child provider drops the snapshot of its whole tree
+        self.cache.invalidate(2)
+        self.assertEqual([3], list(self.cache.trees))
+        self.assertEqual({3: 3}, self.cache.roots)
+        self._get()
+        self._assert_loaded(1)
+
+        # Providers which are not cached are ignored
+        self.cache.invalidate(42)
+        self._get()
+        self.load.assert_not_called()
+
+    def test_clear(self):
+        self._get()
+        self.cache.clear()
+        self.assertEqual({}, self.cache.trees)
+        self.assertEqual({}, self.cache.roots)
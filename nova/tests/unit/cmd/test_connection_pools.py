@@ -0,0 +1,34 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from nova.cmd import connection_pools
+from nova import test
+
+
+class TestConnectionPools(test.NoDBTestCase):
+
+    @mock.patch('nova.network.neutronv2.api.get_connection_pool_stats',
+                return_value={'https://neutron:9696': {'requests': 3}})
+    @mock.patch('nova.image.glance.get_connection_pool_stats',
+                return_value={})
+    def test_register_report(self, mock_glance, mock_neutron):
+        with mock.patch('oslo_reports.guru_meditation_report.'
+                        'TextGuruMeditation.register_section') as register:
+            connection_pools.register_report()
+        title, generator = register.call_args[0]
+
+        self.assertEqual('HTTP Connection Pools', title)
+        expected = {'glance': {},
+                    'neutron': {'https://neutron:9696': {'requests': 3}}}
+        self.assertEqual(expected, generator().data)
@@ -7233,6 +7233,33 @@ class ComputeTestCase(BaseTestCase,
     def test_heal_instance_info_cache_with_info_cache_exception(self):
         self._heal_instance_info_cache(_get_instance_nw_info_raise_cache=True)
 
+    @mock.patch('nova.objects.InstanceList.get_by_host')
+    def test_heal_instance_info_cache_bulk(self, mock_get_by_host):
+        self.flags(heal_instance_info_cache_interval=-1,
+                   heal_instance_info_cache_bulk=True)
+        ctxt = context.get_admin_context()
+        instances = [
+            objects.Instance(uuid=uuids.building, task_state=None,
+                             vm_state=vm_states.BUILDING),
+            objects.Instance(uuid=uuids.deleting, vm_state=vm_states.ACTIVE,
+                             task_state=task_states.DELETING),
+            objects.Instance(uuid=uuids.active, vm_state=vm_states.ACTIVE,
+                             task_state=None)]
+        mock_get_by_host.return_value = instances
+
+        with mock.patch.object(self.compute.network_api,
+                               'refresh_info_caches_for_host') as refresh:
+            self.compute._heal_instance_info_cache(ctxt)
+            refresh.assert_called_once_with(ctxt, self.compute.host,
+                                            [instances[2]])
+            # Errors are logged and don't break the periodic task.
+            refresh.side_effect = test.TestingException
+            self.compute._heal_instance_info_cache(ctxt)
+        mock_get_by_host.assert_called_with(
+            ctxt, self.compute.host,
+            expected_attrs=['system_metadata', 'info_cache', 'flavor'],
+            use_slave=True)
+
     @mock.patch('nova.objects.InstanceList.get_by_filters')
     @mock.patch('nova.compute.api.API.unrescue')
     def test_poll_rescued_instances(self, unrescue, get):
@@ -388,6 +388,34 @@ class ComputeManagerUnitTestCase(test.NoDBTestCase):
         update_mock.assert_not_called()
         del_rp_mock.assert_not_called()
 
+    @mock.patch.object(manager.ComputeManager, '_get_resource_tracker')
+    @mock.patch.object(manager.ComputeManager,
+                       '_update_available_resource_for_node')
+    @mock.patch.object(fake_driver.FakeDriver, 'get_available_nodes')
+    @mock.patch.object(manager.ComputeManager, '_get_compute_nodes_in_db',
+                       return_value=[])
+    def test_update_available_resource_concurrent(self, get_db_nodes,
+                                                  get_avail_nodes,
+                                                  update_mock, mock_get_rt):
+        self.flags(update_resources_pool_size=2)
+        avail_nodes = set(['node1', 'node2', 'node3'])
+        get_avail_nodes.return_value = avail_nodes
+
+        def fake_update(context, nodename, startup=False):
+            if nodename == 'node1':
+                raise exception.ReshapeFailed(error='error')
+
+        update_mock.side_effect = fake_update
+
+        # The first error is raised once all the nodes have been processed.
+        self.assertRaises(exception.ReshapeFailed,
+                          self.compute.update_available_resource,
+                          self.context, startup=True)
+        update_mock.assert_has_calls(
+            [mock.call(self.context, node, startup=True)
+             for node in avail_nodes], any_order=True)
+        self.assertEqual(3, update_mock.call_count)
+
     @mock.patch('nova.context.get_admin_context')
     def test_pre_start_hook(self, get_admin_context):
         """Very simple test just to make sure update_available_resource is
@@ -1789,6 +1817,70 @@ class ComputeManagerUnitTestCase(test.NoDBTestCase):
                                         use_slave=True)
             mock_spawn.assert_called_once_with(mock.ANY, instance)
 
+    @mock.patch.object(objects.InstanceList, 'get_by_host')
+    def test_sync_power_states_events_mode(self, mock_get):
+        self.flags(sync_power_state_mode='events')
+        in_sync = self._get_sync_instance(power_state.RUNNING,
+                                          vm_states.ACTIVE)
+        stopped = self._get_sync_instance(power_state.RUNNING,
+                                          vm_states.ACTIVE)
+        stopped.uuid = uuids.stopped
+        mock_get.return_value = [in_sync, stopped]
+        states = {uuids.instance: power_state.RUNNING,
+                  uuids.stopped: power_state.RUNNING}
+
+        with test.nested(
+            mock.patch.object(self.compute.driver, 'get_num_instances',
+                              return_value=2),
+            mock.patch.object(self.compute.driver, 'get_power_states',
+                              return_value=states),
+            mock.patch.object(self.compute._sync_power_pool, 'spawn_n'),
+        ) as (mock_num, mock_states, mock_spawn):
+            # All states are fetched at once the first time, and match.
+            self.compute._sync_power_states(mock.sentinel.context)
+            mock_states.assert_called_once_with()
+            mock_spawn.assert_not_called()
+
+            # A lifecycle event updates the tracked state, so the next run
+            # only syncs that instance, without asking the driver again.
+            event = virtevent.LifecycleEvent(
+                uuids.stopped, virtevent.EVENT_LIFECYCLE_STOPPED)
+            with mock.patch.object(objects.Instance, 'get_by_uuid',
+                                   side_effect=exception.InstanceNotFound(
+                                       instance_id=uuids.stopped)):
+                self.compute.handle_events(event)
+            self.compute._sync_power_states(mock.sentinel.context)
+            mock_states.assert_called_once_with()
+            mock_spawn.assert_called_once_with(mock.ANY, stopped)
+
+            # The number of instances on the hypervisor changed, so the
+            # tracked states are refreshed.
+            mock_num.return_value = 3
+            self.compute._sync_power_states(mock.sentinel.context)
+            self.assertEqual(2, mock_states.call_count)
+
+    @mock.patch.object(objects.InstanceList, 'get_by_host')
+    def _test_sync_power_states_events_mode_failure(self, exc, mock_get):
+        self.flags(sync_power_state_mode='events')
+        instance = self._get_sync_instance(power_state.RUNNING,
+                                           vm_states.ACTIVE)
+        mock_get.return_value = [instance]
+        with test.nested(
+            mock.patch.object(self.compute.driver, 'get_power_states',
+                              side_effect=exc),
+            mock.patch.object(self.compute._sync_power_pool, 'spawn_n'),
+        ) as (mock_states, mock_spawn):
+            self.compute._sync_power_states(mock.sentinel.context)
+        # The power state of each instance is queried instead
+        mock_spawn.assert_called_once_with(mock.ANY, instance)
+
+    def test_sync_power_states_events_mode_not_implemented(self):
+        self._test_sync_power_states_events_mode_failure(NotImplementedError)
+
+    def test_sync_power_states_events_mode_driver_error(self):
+        self._test_sync_power_states_events_mode_failure(
+            test.TestingException)
+
     @mock.patch('nova.objects.InstanceList.get_by_host', new=mock.Mock())
     @mock.patch('nova.compute.manager.ComputeManager.'
                 '_query_driver_power_state_and_sync',
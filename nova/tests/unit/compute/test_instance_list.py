@@ -15,12 +15,14 @@ from oslo_utils.fixture import uuidsentinel as uuids
 import six
 
 from nova.compute import instance_list
+from nova.compute import instance_list_cache
 from nova.compute import multi_cell_list
 from nova import context as nova_context
 from nova import exception
 from nova import objects
 from nova import test
 from nova.tests import fixtures
+from nova.tests.unit import fake_instance
 
 
 FAKE_CELLS = [objects.CellMapping(), objects.CellMapping()]
@@ -160,6 +162,39 @@ class TestInstanceList(test.NoDBTestCase):
         mock_cm.assert_not_called()
         mock_lc.assert_called_once_with()
 
+    @mock.patch('nova.objects.BuildRequestList.get_by_filters')
+    @mock.patch('nova.compute.instance_list.get_instances_sorted')
+    @mock.patch('nova.objects.CellMappingList.get_by_project_id')
+    def test_cached_pages(self, mock_cm, mock_gi, mock_br):
+        self.flags(instance_list_cache_expiration=10, group='api')
+        instance_list_cache.reset_cache()
+        self.addCleanup(instance_list_cache.reset_cache)
+        mock_gi.side_effect = lambda *a, **k: (
+            instance_list.InstanceLister(None, None),
+            iter([fake_instance.fake_db_instance(uuid=uuids.inst)]))
+        mock_br.return_value = []
+        user_context = nova_context.RequestContext('fake', uuids.project)
+        filters = {'project_id': uuids.project}
+
+        insts, down = instance_list.get_instance_objects_sorted(
+            user_context, filters, None, None, [], ['hostname'], ['asc'])
+        self.assertEqual([uuids.inst], [i.uuid for i in insts])
+        self.assertEqual([], down)
+
+        # The second request is served from the cache
+        insts, down = instance_list.get_instance_objects_sorted(
+            user_context, filters, None, None, [], ['hostname'], ['asc'])
+        self.assertEqual([uuids.inst], [i.uuid for i in insts])
+        self.assertEqual([], down)
+        self.assertEqual(user_context, insts._context)
+        self.assertEqual(1, mock_gi.call_count)
+
+        # Until something changed in the project
+        instance_list_cache.invalidate(uuids.project)
+        instance_list.get_instance_objects_sorted(
+            user_context, filters, None, None, [], ['hostname'], ['asc'])
+        self.assertEqual(2, mock_gi.call_count)
+
     @mock.patch('nova.context.scatter_gather_cells')
     def test_get_instances_with_down_cells(self, mock_sg):
         inst_cell0 = self.insts[uuids.cell0]
@@ -180,7 +215,8 @@ class TestInstanceList(test.NoDBTestCase):
         mock_sg.return_value = ret_val
 
         obj, res = instance_list.get_instances_sorted(self.context, {}, None,
-                                                      None, [], None, None)
+                                                      None, [], ['hostname'],
+                                                      ['asc'])
 
         uuid_final = [inst['uuid'] for inst in res]
 
@@ -210,7 +246,7 @@ class TestInstanceList(test.NoDBTestCase):
         # This would in turn result in an API 500 internal error.
         exp = self.assertRaises(exception.NovaException,
             instance_list.get_instance_objects_sorted, self.context, {}, None,
-            None, [], None, None)
+            None, [], ['hostname'], ['asc'])
         self.assertIn('configuration indicates', six.text_type(exp))
 
     def test_batch_size_fixed(self):
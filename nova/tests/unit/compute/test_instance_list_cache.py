@@ -0,0 +1,116 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+
+import mock
+from oslo_utils.fixture import uuidsentinel as uuids
+from oslo_utils import fixture as utils_fixture
+
+from nova.compute import instance_list_cache
+from nova import context as nova_context
+from nova import test
+
+
+class TestLRUCache(test.NoDBTestCase):
+    def test_evicts_least_recently_used(self):
+        cache = instance_list_cache.LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(1, cache.get('a'))
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(1, cache.get('a'))
+        self.assertEqual(3, cache.get('c'))
+
+    def test_expiration(self):
+        time_fixture = self.useFixture(utils_fixture.TimeFixture(
+            datetime.datetime(2018, 1, 1)))
+        cache = instance_list_cache.LRUCache(2)
+        cache.set('a', 1)
+        time_fixture.advance_time_seconds(10)
+        self.assertEqual(1, cache.get('a', expiration_time=10))
+        self.assertEqual(1, cache.get('a'))
+        time_fixture.advance_time_seconds(1)
+        self.assertIsNone(cache.get('a', expiration_time=10))
+
+
+class TestInstanceListCache(test.NoDBTestCase):
+    def setUp(self):
+        super(TestInstanceListCache, self).setUp()
+        self.flags(instance_list_cache_expiration=10, group='api')
+        instance_list_cache.reset_cache()
+        self.addCleanup(instance_list_cache.reset_cache)
+        self.context = nova_context.RequestContext('fake', uuids.project)
+
+    def _get_key(self, filters, marker=None):
+        return instance_list_cache.get_key(self.context, filters, 1000,
+                                           marker, ['metadata'], ['hostname'],
+                                           ['asc'])
+
+    def test_get_key_disabled(self):
+        self.flags(instance_list_cache_expiration=0, group='api')
+        self.assertIsNone(self._get_key({'project_id': uuids.project}))
+
+    def test_get_key_not_single_project(self):
+        self.assertIsNone(self._get_key({}))
+        self.assertIsNone(self._get_key(
+            {'project_id': [uuids.project, uuids.other]}))
+
+    def test_get_key(self):
+        filters = {'project_id': uuids.project, 'deleted': False,
+                   'changes-since': datetime.datetime(2018, 1, 1)}
+        key = self._get_key(filters)
+        self.assertIn(uuids.project, key)
+        self.assertEqual(key, self._get_key(dict(filters)))
+        self.assertNotEqual(key, self._get_key(filters, marker=uuids.marker))
+        self.assertNotEqual(key, self._get_key(dict(filters, deleted=True)))
+
+    def test_page(self):
+        key = self._get_key({'project_id': uuids.project})
+        self.assertIsNone(instance_list_cache.get_page(key))
+        instance_list_cache.set_page(key, mock_primitive)
+        self.assertEqual(mock_primitive, instance_list_cache.get_page(key))
+
+    def test_invalidate(self):
+        key = self._get_key({'project_id': uuids.project})
+        other_key = self._get_key({'project_id': uuids.other})
+        instance_list_cache.set_page(key, mock_primitive)
+        instance_list_cache.set_page(other_key, mock_primitive)
+
+        instance_list_cache.invalidate(uuids.project)
+
+        # The pages of the project are not found anymore, those of the other
+        # projects are.
+        new_key = self._get_key({'project_id': uuids.project})
+        self.assertNotEqual(key, new_key)
+        self.assertIsNone(instance_list_cache.get_page(new_key))
+        self.assertEqual(other_key,
+                         self._get_key({'project_id': uuids.other}))
+        self.assertEqual(mock_primitive,
+                         instance_list_cache.get_page(other_key))
+
+    @mock.patch('nova.objects.instance.register_change_callback')
+    def test_register_invalidation(self, mock_register):
+        instance_list_cache.register_invalidation()
+        mock_register.assert_called_once_with(instance_list_cache.invalidate)
+
+    def test_expiration(self):
+        time_fixture = self.useFixture(utils_fixture.TimeFixture(
+            datetime.datetime(2018, 1, 1)))
+        key = self._get_key({'project_id': uuids.project})
+        instance_list_cache.set_page(key, mock_primitive)
+        time_fixture.advance_time_seconds(11)
+        self.assertIsNone(instance_list_cache.get_page(key))
+
+
+mock_primitive = {'nova_object.name': 'InstanceList'}
@@ -79,6 +79,50 @@ class TestUtils(test.NoDBTestCase):
                                                 ['asc', 'desc'])
         self.assertEqual(1, ctx.compare_records(inst1, inst2))
 
+    def test_compare_none(self):
+        dt1 = datetime.datetime(2015, 11, 5, 20, 30, 00)
+
+        inst1 = {'key0': None, 'key1': None}
+        inst2 = {'key0': 'foo', 'key1': dt1}
+
+        # None sorts lower than any value, like the databases do
+        ctx = multi_cell_list.RecordSortContext(['key0'], ['asc'])
+        self.assertEqual(-1, ctx.compare_records(inst1, inst2))
+        ctx = multi_cell_list.RecordSortContext(['key1'], ['asc'])
+        self.assertEqual(-1, ctx.compare_records(inst1, inst2))
+        ctx = multi_cell_list.RecordSortContext(['key0'], ['desc'])
+        self.assertEqual(1, ctx.compare_records(inst1, inst2))
+        ctx = multi_cell_list.RecordSortContext(['key1'], ['desc'])
+        self.assertEqual(1, ctx.compare_records(inst1, inst2))
+        ctx = multi_cell_list.RecordSortContext(['key0', 'key1'],
+                                                ['desc', 'asc'])
+        self.assertEqual(0, ctx.compare_records(inst1, inst1))
+
+    def test_get_sort_key(self):
+        dt1 = datetime.datetime(2015, 11, 5, 20, 30, 00)
+        dt2 = datetime.datetime(2015, 11, 5, 20, 30, 00, 1)
+        records = [{'key0': key0, 'key1': key1, 'key2': key2}
+                   for key0 in ('bar', 'foo', None)
+                   for key1 in (dt1, dt2, None)
+                   for key2 in (-1, 2.5, 3, None)]
+
+        def expected(sort_keys, sort_dirs):
+            # Sort by each key, least significant first, with None lower
+            # than any value.
+            result = list(records)
+            for skey, sdir in reversed(list(zip(sort_keys, sort_dirs))):
+                result.sort(key=lambda rec: (rec[skey] is not None,
+                                             rec[skey] or 0),
+                            reverse=sdir == 'desc')
+            return result
+
+        for sort_dirs in (['asc', 'asc', 'asc'], ['desc', 'desc', 'desc'],
+                          ['desc', 'asc', 'desc'], ['asc', 'desc', 'asc']):
+            sort_keys = ['key0', 'key1', 'key2']
+            ctx = multi_cell_list.RecordSortContext(sort_keys, sort_dirs)
+            self.assertEqual(expected(sort_keys, sort_dirs),
+                             sorted(records, key=ctx.get_sort_key))
+
     def test_wrapper(self):
         inst1 = {'key0': 'foo', 'key1': 'd', 'key2': 456}
         inst2 = {'key0': 'foo', 'key1': 's', 'key2': 123}
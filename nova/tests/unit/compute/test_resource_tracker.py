@@ -1053,6 +1053,68 @@ class TestUpdateAvailableResources(BaseTestCase):
                                                  actual_resources))
         update_mock.assert_called_once()
 
+    @mock.patch('nova.objects.InstancePCIRequests.get_by_instance',
+                return_value=objects.InstancePCIRequests(requests=[]))
+    @mock.patch('nova.objects.PciDeviceList.get_by_compute_node',
+                return_value=objects.PciDeviceList())
+    @mock.patch('nova.objects.ComputeNode.get_by_host_and_nodename')
+    @mock.patch('nova.objects.MigrationList.get_in_progress_by_host_and_node',
+                return_value=[])
+    @mock.patch('nova.objects.InstanceList.get_by_host_and_node',
+                return_value=[])
+    def test_concurrent_flushes_copy(self, get_mock, migr_mock, get_cn_mock,
+                                     pci_mock, instance_pci_mock):
+        """With a pool of workers, the node is flushed outside of
+        COMPUTE_RESOURCE_SEMAPHORE, from a copy of the compute node.
+        """
+        self.flags(update_resources_pool_size=2)
+        self._setup_rt()
+        get_cn_mock.return_value = _COMPUTE_NODE_FIXTURES[0]
+        ctx = mock.MagicMock()
+
+        with mock.patch.object(self.rt, '_update') as update_mock, \
+                mock.patch.object(self.rt, '_flush_compute_node') as flush:
+            self.rt.update_available_resource(ctx, _NODENAME)
+
+        update_mock.assert_not_called()
+        flush.assert_called_once_with(ctx, mock.ANY, False)
+        cn = flush.call_args[0][1]
+        self.assertIsNot(cn, self.rt.compute_nodes[_NODENAME])
+        self.assertTrue(obj_base.obj_equal_prims(
+            cn, self.rt.compute_nodes[_NODENAME]))
+
+    @mock.patch('nova.objects.InstancePCIRequests.get_by_instance',
+                return_value=objects.InstancePCIRequests(requests=[]))
+    @mock.patch('nova.objects.PciDeviceList.get_by_compute_node',
+                return_value=objects.PciDeviceList())
+    @mock.patch('nova.objects.ComputeNode.get_by_host_and_nodename')
+    @mock.patch('nova.objects.MigrationList.get_in_progress_by_host_and_node',
+                return_value=[])
+    @mock.patch('nova.objects.InstanceList.get_by_host_and_node',
+                return_value=[])
+    def test_concurrent_skips_stale_copy(self, get_mock, migr_mock,
+                                         get_cn_mock, pci_mock,
+                                         instance_pci_mock):
+        """If a claim changes the node before its copy is flushed, the copy is
+        not flushed.
+        """
+        self.flags(update_resources_pool_size=2)
+        self._setup_rt()
+        get_cn_mock.return_value = _COMPUTE_NODE_FIXTURES[0]
+        orig_update_available_resource = self.rt._update_available_resource
+
+        def fake_update_available_resource(*args, **kwargs):
+            cn = orig_update_available_resource(*args, **kwargs)
+            self.rt.compute_nodes[_NODENAME].memory_mb_used += 512
+            return cn
+
+        with mock.patch.object(self.rt, '_update_available_resource',
+                               side_effect=fake_update_available_resource), \
+                mock.patch.object(self.rt, '_flush_compute_node') as flush:
+            self.rt.update_available_resource(mock.MagicMock(), _NODENAME)
+
+        flush.assert_not_called()
+
 
 class TestInitComputeNode(BaseTestCase):
 
@@ -1471,7 +1533,7 @@ class TestUpdateComputeNode(BaseTestCase):
         save_mock.assert_called_once_with()
         gptaer_mock.assert_called_once_with(
             mock.sentinel.ctx, new_compute.uuid,
-            name=new_compute.hypervisor_hostname)
+            name=new_compute.hypervisor_hostname, use_cache=False)
         self.driver_mock.update_provider_tree.assert_called_once_with(
             ptree, new_compute.hypervisor_hostname)
         rc_mock.update_from_provider_tree.assert_called_once_with(
@@ -1489,6 +1551,106 @@ class TestUpdateComputeNode(BaseTestCase):
         exp_inv[rc_fields.ResourceClass.DISK_GB]['reserved'] = 1
         self.assertEqual(exp_inv, ptree.data(new_compute.uuid).inventory)
 
+    @mock.patch('nova.objects.ComputeNode.save', new=mock.Mock())
+    def test_update_provider_tree_unchanged(self):
+        """After a successful flush, the next update uses the report client's
+        cached tree and, if the virt driver changes nothing, does not flush
+        again.
+        """
+        self._setup_rt()
+        compute = _COMPUTE_NODE_FIXTURES[0].obj_clone()
+        self.rt.compute_nodes[_NODENAME] = compute
+        self.rt.old_resources[_NODENAME] = compute
+
+        inv = {'total': 2}
+
+        def fake_upt(ptree, nodename, allocations=None):
+            ptree.update_inventory(nodename, {'VCPU': dict(inv)})
+
+        self.driver_mock.update_provider_tree.side_effect = fake_upt
+
+        rc_mock = self.rt.reportclient
+        gptaer_mock = rc_mock.get_provider_tree_and_ensure_root
+        gptaer_mock.side_effect = lambda *a, **k: self._new_ptree(compute)
+        ufpt_mock = rc_mock.update_from_provider_tree
+
+        self.rt._update(mock.sentinel.ctx, compute)
+        self.assertEqual(1, ufpt_mock.call_count)
+        self.assertFalse(gptaer_mock.call_args[1]['use_cache'])
+        self.assertEqual({'pushed': 1, 'skipped': 0},
+                         self.rt.pop_placement_update_stats())
+
+        self.rt._update(mock.sentinel.ctx, compute)
+        self.assertEqual(1, ufpt_mock.call_count)
+        self.assertTrue(gptaer_mock.call_args[1]['use_cache'])
+        self.assertEqual({'skipped': 1},
+                         self.rt.pop_placement_update_stats())
+
+        inv['total'] = 4
+        self.rt._update(mock.sentinel.ctx, compute)
+        self.assertEqual(2, ufpt_mock.call_count)
+        self.assertEqual({'pushed': 1, 'skipped': 0},
+                         self.rt.pop_placement_update_stats())
+
+    @mock.patch('nova.objects.ComputeNode.save', new=mock.Mock())
+    def test_update_provider_tree_refresh_after_failure(self):
+        """A failed flush makes the next update refresh the whole tree from
+        placement and flush it again.
+        """
+        self._setup_rt()
+        compute = _COMPUTE_NODE_FIXTURES[0].obj_clone()
+        self.rt.compute_nodes[_NODENAME] = compute
+        self.rt.old_resources[_NODENAME] = compute
+        traits = set()
+        self.driver_mock.update_provider_tree.side_effect = (
+            lambda ptree, nodename: ptree.update_traits(nodename, traits))
+
+        rc_mock = self.rt.reportclient
+        gptaer_mock = rc_mock.get_provider_tree_and_ensure_root
+        gptaer_mock.side_effect = lambda *a, **k: self._new_ptree(compute)
+        ufpt_mock = rc_mock.update_from_provider_tree
+
+        self.rt._update(mock.sentinel.ctx, compute)
+        traits.add('CUSTOM_FOO')
+        ufpt_mock.side_effect = exc.ResourceProviderSyncFailed()
+        self.assertRaises(exc.ResourceProviderSyncFailed,
+                          self.rt._update, mock.sentinel.ctx, compute)
+        self.assertTrue(gptaer_mock.call_args[1]['use_cache'])
+        self.assertNotIn(_NODENAME, self.rt.old_provider_data)
+
+        ufpt_mock.side_effect = None
+        self.rt._update(mock.sentinel.ctx, compute)
+        self.assertFalse(gptaer_mock.call_args[1]['use_cache'])
+        self.assertEqual(3, ufpt_mock.call_count)
+
+    @mock.patch('nova.objects.ComputeNode.save', new=mock.Mock())
+    def test_update_provider_tree_refresh_when_stale(self):
+        self._setup_rt()
+        compute = _COMPUTE_NODE_FIXTURES[0].obj_clone()
+        self.rt.compute_nodes[_NODENAME] = compute
+        self.rt.old_resources[_NODENAME] = compute
+        self.driver_mock.update_provider_tree.side_effect = lambda *a: None
+
+        rc_mock = self.rt.reportclient
+        gptaer_mock = rc_mock.get_provider_tree_and_ensure_root
+        gptaer_mock.side_effect = lambda *a, **k: self._new_ptree(compute)
+
+        self.rt._update(mock.sentinel.ctx, compute)
+        # Pretend the last flush happened long ago
+        self.rt.old_provider_data[_NODENAME] = (
+            0, self.rt.old_provider_data[_NODENAME][1])
+        self.rt._update(mock.sentinel.ctx, compute)
+        # The tree is refreshed from placement and flushed again in full, so
+        # that any changes made behind our back get overwritten.
+        self.assertFalse(gptaer_mock.call_args[1]['use_cache'])
+        self.assertEqual(2, rc_mock.update_from_provider_tree.call_count)
+
+    @staticmethod
+    def _new_ptree(compute):
+        ptree = provider_tree.ProviderTree()
+        ptree.new_root(compute.hypervisor_hostname, compute.uuid)
+        return ptree
+
     @mock.patch('nova.objects.ComputeNode.save', new=mock.Mock())
     def test_update_retry_success(self):
         self._setup_rt()
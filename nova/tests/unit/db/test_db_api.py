@@ -2073,6 +2073,40 @@ class InstanceTestCase(test.TestCase, ModelsObjectComparatorMixin):
         # Make sure we get the latest fault
         self.assertEqual(fault2['id'], result[0]['fault']['id'])
 
+    def test_instance_get_all_by_filters_with_security_groups_and_tags(self):
+        groups = [db.security_group_create(self.ctxt,
+                                           {'name': 'group%d' % i,
+                                            'project_id': self.ctxt.project_id,
+                                            'user_id': self.ctxt.user_id})
+                  for i in range(3)]
+        inst1 = self.create_instance_with_args()
+        inst2 = self.create_instance_with_args()
+        deleted = self.create_instance_with_args()
+        for inst, inst_groups in ((inst1, groups), (inst2, groups[:1]),
+                                  (deleted, groups)):
+            for group in inst_groups:
+                db.instance_add_security_group(self.ctxt, inst['uuid'],
+                                               group['id'])
+        db.instance_remove_security_group(self.ctxt, inst1['uuid'],
+                                          groups[1]['id'])
+        db.security_group_destroy(self.ctxt, groups[2]['id'])
+        db.instance_tag_set(self.ctxt, inst1['uuid'], ['foo', 'bar'])
+        db.instance_tag_set(self.ctxt, deleted['uuid'], ['foo'])
+        db.instance_destroy(self.ctxt, deleted['uuid'])
+
+        result = db.instance_get_all_by_filters_sort(
+            self.ctxt, {}, sort_keys=['id'], sort_dirs=['asc'],
+            columns_to_join=['security_groups', 'tags'])
+
+        self.assertEqual([inst1['uuid'], inst2['uuid'], deleted['uuid']],
+                         [inst['uuid'] for inst in result])
+        self.assertEqual([[groups[0]['id']], [groups[0]['id']], []],
+                         [[group['id'] for group in inst['security_groups']]
+                          for inst in result])
+        self.assertEqual([['bar', 'foo'], [], []],
+                         [sorted(tag['tag'] for tag in inst['tags'])
+                          for inst in result])
+
     def test_instance_get_all_by_filters(self):
         instances = [self.create_instance_with_args() for i in range(3)]
         filtered_instances = db.instance_get_all_by_filters(self.ctxt, {})
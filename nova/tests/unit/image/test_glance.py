@@ -16,10 +16,13 @@
 
 import copy
 import datetime
+import hashlib
+import os
 
 import cryptography
 from cursive import exception as cursive_exception
 import ddt
+import fixtures
 import glanceclient.exc
 from glanceclient.v1 import images
 from glanceclient.v2 import schemas
@@ -351,11 +354,12 @@ class TestGetImageService(test.NoDBTestCase):
 
 class TestCreateGlanceClient(test.NoDBTestCase):
 
+    @mock.patch('nova.utils.set_connection_pool_size')
     @mock.patch.object(service_auth, 'get_auth_plugin')
     @mock.patch.object(ks_loading, 'load_session_from_conf_options')
     @mock.patch('glanceclient.Client')
     def test_glanceclient_with_ks_session(self, mock_client, mock_load,
-                                          mock_get_auth):
+                                          mock_get_auth, mock_pool_size):
         session = "fake_session"
         mock_load.return_value = session
         auth = "fake_auth"
@@ -373,6 +377,8 @@ class TestCreateGlanceClient(test.NoDBTestCase):
         # Ensure that session is only loaded once.
         mock_load.assert_called_once_with(glance.CONF, "glance")
         self.assertEqual(session, glance._SESSION)
+        # The connections of the session are pooled for all clients
+        mock_pool_size.assert_called_once_with(session, 10)
         # Ensure new client created every time
         client_call = mock.call(2, auth="fake_auth",
                 endpoint_override=endpoint, session=session,
@@ -816,6 +822,109 @@ class TestDownloadNoDirectUri(test.NoDBTestCase):
         writer.close.assert_called_once_with()
 
 
+class TestDownloadRanges(test.NoDBTestCase):
+
+    """Tests the download method of the GlanceImageServiceV2 when images
+    are downloaded with parallel range requests.
+    """
+
+    IMAGE_DATA = b''.join(six.int2byte(i) for i in range(35))
+
+    def setUp(self):
+        super(TestDownloadRanges, self).setUp()
+        self.supports_range = True
+        self.flags(download_concurrency=3, group='glance')
+        self.useFixture(fixtures.MonkeyPatch(
+            'nova.image.glance.DOWNLOAD_RANGE_SIZE', 10))
+        self.image = {'id': uuids.image, 'size': len(self.IMAGE_DATA),
+                      'checksum': hashlib.md5(self.IMAGE_DATA).hexdigest()}
+        self.client = mock.MagicMock()
+        self.client.call.side_effect = self._fake_call
+        self.service = glance.GlanceImageServiceV2(self.client)
+        self.dst_path = os.path.join(self.useFixture(
+            fixtures.TempDir()).path, 'image')
+
+    def _fake_call(self, context, version, method, controller=None,
+                   args=None, kwargs=None):
+        """Serve range requests for the image, like the image service."""
+        if method == 'data':
+            return fake_glance_response([self.IMAGE_DATA])
+        self.assertEqual(('get', 'http_client'), (method, controller))
+        self.assertEqual(('/v2/images/%s/file' % uuids.image,), args)
+        resp = mock.Mock(status_code=200)
+        if not self.supports_range:
+            return resp, [self.IMAGE_DATA]
+        start, end = kwargs['headers']['Range'][len('bytes='):].split('-')
+        resp.status_code = 206
+        # Send the range back in small chunks
+        data = self.IMAGE_DATA[int(start):int(end) + 1]
+        return resp, [data[i:i + 4] for i in range(0, len(data), 4)]
+
+    def _download(self):
+        with mock.patch.object(self.service, 'show',
+                               return_value=self.image):
+            self.service.download(mock.sentinel.ctx, uuids.image,
+                                  dst_path=self.dst_path)
+
+    def _get_downloaded(self):
+        with open(self.dst_path, 'rb') as f:
+            return f.read()
+
+    @mock.patch('nova.image.glance.GlanceImageServiceV2._get_verifier')
+    def test_download_ranges(self, mock_get_verifier):
+        verifier = mock_get_verifier.return_value
+        self._download()
+
+        self.assertEqual(self.IMAGE_DATA, self._get_downloaded())
+        ranges = sorted(c[1]['kwargs']['headers']['Range']
+                        for c in self.client.call.call_args_list)
+        self.assertEqual(['bytes=0-9', 'bytes=10-19', 'bytes=20-29',
+                          'bytes=30-34'], ranges)
+        mock_get_verifier.assert_called_once_with(
+            mock.sentinel.ctx, uuids.image, None)
+        # The signature is verified in order, whatever order the ranges
+        # complete in.
+        self.assertEqual(self.IMAGE_DATA, b''.join(
+            c[0][0] for c in verifier.update.call_args_list))
+        verifier.verify.assert_called_once_with()
+
+    def test_download_ranges_checksum_mismatch(self):
+        self.image['checksum'] = hashlib.md5(b'foo').hexdigest()
+        self.assertRaises(exception.ImageUnacceptable, self._download)
+        self.assertEqual(b'', self._get_downloaded())
+
+    @mock.patch('nova.image.glance.GlanceImageServiceV2._get_verifier')
+    def test_download_ranges_signature_failure(self, mock_get_verifier):
+        verifier = mock_get_verifier.return_value
+        verifier.verify.side_effect = (
+            cryptography.exceptions.InvalidSignature)
+        self.assertRaises(cryptography.exceptions.InvalidSignature,
+                          self._download)
+        self.assertEqual(b'', self._get_downloaded())
+
+    def test_download_ranges_not_supported(self):
+        self.supports_range = False
+        self._download()
+
+        self.assertEqual(self.IMAGE_DATA, self._get_downloaded())
+        self.client.call.assert_called_with(
+            mock.sentinel.ctx, 2, 'data', args=(uuids.image,))
+
+    def test_download_small_image(self):
+        self.image['size'] = 10
+        self._download()
+
+        self.client.call.assert_called_once_with(
+            mock.sentinel.ctx, 2, 'data', args=(uuids.image,))
+
+    def test_download_unknown_size(self):
+        self.image['size'] = None
+        self._download()
+
+        self.client.call.assert_called_once_with(
+            mock.sentinel.ctx, 2, 'data', args=(uuids.image,))
+
+
 class TestDownloadSignatureVerification(test.NoDBTestCase):
 
     class MockVerifier(object):
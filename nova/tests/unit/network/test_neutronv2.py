@@ -17,6 +17,7 @@
 import collections
 import copy
 
+import eventlet
 from keystoneauth1.fixture import V2Token
 from keystoneauth1 import loading as ks_loading
 from keystoneauth1 import service_token
@@ -128,6 +129,22 @@ class TestNeutronClient(test.NoDBTestCase):
         neutronapi.reset_state()
         self.addCleanup(service_auth.reset_globals)
 
+    def test_session_shared_connection_pool(self):
+        self.flags(connection_pool_size=32, group='neutron')
+        ctxt1 = context.RequestContext('userid', uuids.my_tenant,
+                                       auth_token='token1')
+        ctxt2 = context.RequestContext('userid', uuids.my_tenant,
+                                       auth_token='token2')
+        cl1 = neutronapi.get_client(ctxt1)
+        cl2 = neutronapi.get_client(ctxt2)
+        # Both clients use the same session, and so connection pool, but
+        # authenticate their requests differently.
+        self.assertIs(cl1.httpclient.session, cl2.httpclient.session)
+        self.assertIsNot(cl1.httpclient.auth, cl2.httpclient.auth)
+        adapter = cl1.httpclient.session.session.adapters['https://']
+        self.assertEqual(32, adapter._pool_maxsize)
+        self.assertEqual({}, neutronapi.get_connection_pool_stats())
+
     def test_ksa_adapter_loading_defaults(self):
         """No 'url' triggers ksa loading path with defaults."""
         my_context = context.RequestContext('userid',
@@ -6244,6 +6261,115 @@ class TestAllocateForInstance(test.NoDBTestCase):
                 neutronapi.BINDING_HOST_ID: bind_host_id,
                 'device_id': self.instance.uuid}})
 
+    def _create_ports(self, client, num_ports, fail_on=None):
+        ordered_networks = [
+            objects.NetworkRequest(network_id=getattr(uuids, 'net%d' % i))
+            for i in range(num_ports)]
+        nets = {req.network_id: {'id': req.network_id,
+                                 'port_security_enabled': False}
+                for req in ordered_networks}
+        client.fail_on = fail_on
+        return neutronapi.API()._create_ports_for_instance(
+            self.context, self.instance, ordered_networks, nets, client,
+            None)
+
+    def test_create_ports_for_instance_concurrency(self):
+        self.flags(port_concurrency=4, group='neutron')
+        client = _SlowNeutronClient()
+
+        result = self._create_ports(client, 8)
+
+        # At most port_concurrency requests were in flight at once, so with
+        # 8 NICs the allocation takes 2 round trips instead of 8.
+        self.assertEqual(4, client.max_in_flight)
+        self.assertEqual(8, len(client.created))
+        self.assertEqual([getattr(uuids, 'net%d' % i) for i in range(8)],
+                         [req.network_id for req, _port_id in result])
+        self.assertEqual(['port-%s' % req.network_id for req, _p in result],
+                         [port_id for _req, port_id in result])
+
+    def test_create_ports_for_instance_serial(self):
+        client = _SlowNeutronClient()
+
+        self._create_ports(client, 4)
+
+        self.assertEqual(1, client.max_in_flight)
+        self.assertEqual(4, len(client.created))
+
+    def test_create_ports_for_instance_concurrency_rollback(self):
+        self.flags(port_concurrency=4, group='neutron')
+        client = _SlowNeutronClient()
+
+        self.assertRaises(exception.PortLimitExceeded, self._create_ports,
+                          client, 8, fail_on=uuids.net1)
+
+        # The requests already in flight completed and everything created
+        # was deleted again, but no further requests were started.
+        self.assertEqual(3, len(client.created))
+        self.assertEqual(sorted(client.created), sorted(client.deleted))
+
+    @mock.patch.object(objects.VirtualInterface, 'create')
+    def test_update_ports_for_instance_concurrency(self, mock_create):
+        self.flags(port_concurrency=4, group='neutron')
+        api = neutronapi.API()
+        self.instance.availability_zone = 'test_az'
+        requests_and_created_ports = [
+            (objects.NetworkRequest(network_id=uuids.net,
+                                    port_id=getattr(uuids, 'port%d' % i)),
+             None if i % 2 else getattr(uuids, 'port%d' % i))
+            for i in range(8)]
+        nets = {uuids.net: {'id': uuids.net}}
+        client = _SlowNeutronClient()
+
+        with mock.patch.object(api, '_populate_neutron_extension_values'):
+            ordered_nets, ordered_ports, preexisting_port_ids, \
+                created_port_ids = api._update_ports_for_instance(
+                    self.context, self.instance, client, client,
+                    requests_and_created_ports, nets, None, None, {})
+
+        self.assertEqual(4, client.max_in_flight)
+        self.assertEqual([getattr(uuids, 'port%d' % i) for i in range(8)],
+                         ordered_ports)
+        self.assertEqual([getattr(uuids, 'port%d' % i) for i in (1, 3, 5, 7)],
+                         preexisting_port_ids)
+        self.assertEqual([getattr(uuids, 'port%d' % i) for i in (0, 2, 4, 6)],
+                         created_port_ids)
+        self.assertEqual(8, mock_create.call_count)
+
+
+class _SlowNeutronClient(object):
+    """A fake neutron client whose port requests take a while to complete,
+    recording how many of them were running at the same time.
+    """
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.created = []
+        self.deleted = []
+        self.fail_on = None
+
+    def _request(self):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        eventlet.sleep(0.01)
+        self.in_flight -= 1
+
+    def create_port(self, body):
+        self._request()
+        network_id = body['port']['network_id']
+        if network_id == self.fail_on:
+            raise exception.PortLimitExceeded()
+        port_id = 'port-%s' % network_id
+        self.created.append(port_id)
+        return {'port': {'id': port_id}}
+
+    def update_port(self, port_id, body):
+        self._request()
+        return {'port': {'id': port_id, 'mac_address': 'fa:16:3e:00:00:01'}}
+
+    def delete_port(self, port_id):
+        self.deleted.append(port_id)
+
 
 class TestNeutronv2NeutronHostnameDNS(TestNeutronv2Base):
     def setUp(self):
@@ -6975,3 +7101,106 @@ class TestGetInstanceNetworkInfo(test.NoDBTestCase):
         self.assertIsNotNone(old_vif)
         removed_vif = self._get_vif_in_cache(nwinfo, uuids.removed_port)
         self.assertIsNone(removed_vif)
+
+
+class TestRefreshInfoCachesForHost(test.NoDBTestCase):
+    """Tests refreshing the network_info cache of all instances on a host."""
+
+    def setUp(self):
+        super(TestRefreshInfoCachesForHost, self).setUp()
+        self.api = neutronapi.API()
+        self.context = context.RequestContext(uuids.user_id, uuids.project_id)
+        client_mock = mock.patch('nova.network.neutronv2.api.get_client')
+        self.client = client_mock.start().return_value
+        self.addCleanup(client_mock.stop)
+        refresh_info_cache_for_instance = mock.patch(
+            'nova.compute.utils.refresh_info_cache_for_instance')
+        self.refresh_info_cache = refresh_info_cache_for_instance.start()
+        self.addCleanup(refresh_info_cache_for_instance.stop)
+        multi_provider = mock.patch.object(
+            self.api, '_has_multi_provider_extension', return_value=False)
+        multi_provider.start()
+        self.addCleanup(multi_provider.stop)
+
+        self.instance = fake_instance.fake_instance_obj(
+            self.context, uuid=uuids.instance, project_id=uuids.project_id)
+        self.instance.info_cache = objects.InstanceInfoCache(
+            network_info=model.NetworkInfo([model.VIF(uuids.port)]))
+        self.port = {
+            'id': uuids.port, 'network_id': uuids.network_id,
+            'device_id': uuids.instance, 'tenant_id': uuids.project_id,
+            'mac_address': 'fa:16:3e:00:00:01', 'admin_state_up': True,
+            'status': 'ACTIVE', 'binding:vif_type': model.VIF_TYPE_OVS,
+            'fixed_ips': [{'ip_address': '10.0.0.2',
+                           'subnet_id': uuids.subnet_id}]}
+        dhcp_port = {'network_id': uuids.network_id,
+                     'fixed_ips': [{'ip_address': '10.0.0.1',
+                                    'subnet_id': uuids.subnet_id}]}
+
+        def list_ports(**search_opts):
+            if search_opts.get('device_owner') == 'network:dhcp':
+                return {'ports': [dhcp_port]}
+            return {'ports': [self.port]}
+
+        self.client.list_ports.side_effect = list_ports
+        self.client.list_networks.return_value = {'networks': [
+            {'id': uuids.network_id, 'name': 'private',
+             'tenant_id': uuids.project_id, 'mtu': 1450,
+             'provider:physical_network': None,
+             'provider:network_type': 'vxlan'}]}
+        self.client.list_subnets.return_value = {'subnets': [
+            {'id': uuids.subnet_id, 'network_id': uuids.network_id,
+             'cidr': '10.0.0.0/24', 'gateway_ip': '10.0.0.254'}]}
+        self.client.list_floatingips.return_value = {'floatingips': [
+            {'port_id': uuids.port, 'fixed_ip_address': '10.0.0.2',
+             'floating_ip_address': '172.24.4.10'}]}
+
+    @mock.patch('nova.network.base_api.update_instance_cache_with_nw_info')
+    def test_refresh_info_caches_for_host(self, mock_update):
+        # This instance has a port which is not bound to the host.
+        other = fake_instance.fake_instance_obj(
+            self.context, uuid=uuids.other, project_id=uuids.project_id)
+        other.info_cache = objects.InstanceInfoCache(
+            network_info=model.NetworkInfo([model.VIF(uuids.other_port)]))
+
+        with mock.patch.object(self.api, 'get_instance_nw_info') as get_nw:
+            self.api.refresh_info_caches_for_host(
+                self.context, 'fake-host', [self.instance, other])
+        get_nw.assert_called_once_with(self.context, other)
+
+        self.client.list_ports.assert_has_calls([
+            mock.call(**{'binding:host_id': 'fake-host'}),
+            mock.call(network_id=[uuids.network_id],
+                      device_owner='network:dhcp')])
+        self.client.list_networks.assert_called_once_with(
+            id=[uuids.network_id])
+        self.client.list_subnets.assert_called_once_with(
+            id=[uuids.subnet_id])
+        self.client.list_floatingips.assert_called_once_with(
+            port_id=[uuids.port])
+        self.client.show_network.assert_not_called()
+
+        mock_update.assert_called_once_with(
+            self.api, self.context, self.instance, nw_info=mock.ANY,
+            update_cells=False)
+        nw_info = mock_update.call_args[1]['nw_info']
+        self.assertEqual([uuids.port], [vif['id'] for vif in nw_info])
+        network = nw_info[0]['network']
+        self.assertEqual('private', network['label'])
+        self.assertTrue(network['meta']['tunneled'])
+        subnet = network['subnets'][0]
+        self.assertEqual('10.0.0.1', subnet['meta']['dhcp_server'])
+        self.assertEqual(['172.24.4.10'],
+                         [ip['address'] for ip in nw_info.floating_ips()])
+
+    @mock.patch('nova.network.base_api.update_instance_cache_with_nw_info')
+    def test_refresh_info_caches_for_host_cache_changed(self, mock_update):
+        def attach_interface(context, instance):
+            instance.info_cache = objects.InstanceInfoCache(
+                network_info=model.NetworkInfo(
+                    [model.VIF(uuids.port), model.VIF(uuids.new_port)]))
+
+        self.refresh_info_cache.side_effect = attach_interface
+        self.api.refresh_info_caches_for_host(
+            self.context, 'fake-host', [self.instance])
+        mock_update.assert_not_called()
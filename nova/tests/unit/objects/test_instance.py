@@ -616,6 +616,49 @@ class _TestInstanceObject(object):
         self.assertNotIn('pci_devices',
                          mock_fdo.call_args_list[0][1]['expected_attrs'])
 
+    def test_from_db_object_lazy_fields(self):
+        db_inst = fake_instance.fake_db_instance(
+            uuid=uuids.instance, host='foo', memory_mb=512, deleted=1,
+            launched_at=datetime.datetime(2018, 1, 1))
+        eager = objects.Instance._from_db_object(
+            self.context, objects.Instance(), db_inst,
+            expected_attrs=['metadata'])
+        lazy = objects.Instance._from_db_object(
+            self.context, objects.Instance(), db_inst,
+            expected_attrs=['metadata'], lazy_fields=True)
+
+        self.assertEqual(set(), lazy.obj_what_changed())
+        self.assertEqual('foo', lazy.host)
+        self.assertEqual(512, lazy.memory_mb)
+        self.assertEqual(base.obj_to_primitive(eager),
+                         base.obj_to_primitive(lazy))
+        self.assertEqual(set(), lazy.obj_what_changed())
+
+        # Loading the instance again coerces all its fields
+        db_inst['host'] = 'bar'
+        objects.Instance._from_db_object(self.context, lazy, db_inst)
+        self.assertIsNone(lazy._lazy_fields)
+        self.assertEqual('bar', lazy.host)
+
+    @mock.patch('nova.db.api.instance_update_and_get_original')
+    @mock.patch.object(instance.Instance, '_from_db_object')
+    def test_save_calls_change_callbacks(self, mock_fdo, mock_update):
+        mock_invalidate = mock.Mock()
+        self.stub_out('nova.objects.instance._CHANGE_CALLBACKS', [])
+        instance.register_change_callback(mock_invalidate)
+        instance.register_change_callback(mock_invalidate)
+        mock_update.return_value = None, None
+        inst = objects.Instance(context=self.context, id=123,
+                                uuid=uuids.instance,
+                                project_id=uuids.project)
+        inst.obj_reset_changes()
+        inst.save()
+        mock_invalidate.assert_not_called()
+
+        inst.display_name = 'foo'
+        inst.save()
+        mock_invalidate.assert_called_once_with(uuids.project)
+
     @mock.patch('nova.db.api.instance_extra_update_by_uuid')
     @mock.patch('nova.db.api.instance_update_and_get_original')
     @mock.patch.object(instance.Instance, '_from_db_object')
@@ -1889,16 +1932,16 @@ class _TestInstanceListObject(object):
     @mock.patch.object(db, 'instance_fault_get_by_instance_uuids')
     @mock.patch.object(db, 'instance_get_all_by_host')
     def test_with_fault(self, mock_get_all, mock_fault_get):
+        fake_faults = test_instance_fault.fake_faults
         fake_insts = [
             fake_instance.fake_db_instance(uuid=uuids.faults_instance,
-                                           host='host'),
+                                           host='host',
+                                           fault=fake_faults['fake-uuid'][0]),
             fake_instance.fake_db_instance(uuid=uuids.faults_instance_nonexist,
-                                           host='host'),
+                                           host='host', fault=None),
             ]
-        fake_faults = test_instance_fault.fake_faults
 
         mock_get_all.return_value = fake_insts
-        mock_fault_get.return_value = fake_faults
 
         instances = objects.InstanceList.get_by_host(self.context, 'host',
                                                      expected_attrs=['fault'],
@@ -1910,6 +1953,30 @@ class _TestInstanceListObject(object):
 
         mock_get_all.assert_called_once_with(self.context, 'host',
             columns_to_join=['fault'])
+        # The faults joined by the database API are used
+        mock_fault_get.assert_not_called()
+
+    @mock.patch.object(db, 'instance_fault_get_by_instance_uuids')
+    @mock.patch.object(db, 'instance_get_all_hung_in_rebooting')
+    def test_with_fault_not_joined(self, mock_get_all, mock_fault_get):
+        fake_insts = [
+            fake_instance.fake_db_instance(uuid=uuids.faults_instance,
+                                           host='host', fault=None),
+            fake_instance.fake_db_instance(uuid=uuids.faults_instance_nonexist,
+                                           host='host', fault=None),
+            ]
+        fake_faults = test_instance_fault.fake_faults
+
+        mock_get_all.return_value = fake_insts
+        mock_fault_get.return_value = fake_faults
+
+        instances = objects.InstanceList.get_hung_in_rebooting(
+            self.context, 10, expected_attrs=['fault'])
+        self.assertEqual(2, len(instances))
+        self.assertEqual(fake_faults['fake-uuid'][0],
+                         dict(instances[0].fault))
+        self.assertIsNone(instances[1].fault)
+
         mock_fault_get.assert_called_once_with(self.context,
             [x['uuid'] for x in fake_insts])
 
@@ -205,6 +205,59 @@ def compare_obj(test, obj, db_obj, subs=None, allow_missing=None,
             test.assertEqual(db_val, obj_val)
 
 
+@base.NovaObjectRegistry.register_if(False)
+class MyLazyObj(base.NovaLazyObject, base.NovaObject):
+    fields = {'foo': fields.IntegerField(),
+              'bar': fields.StringField(nullable=True),
+              'baz': fields.IntegerField()}
+
+
+class TestNovaLazyObject(test.NoDBTestCase):
+    def setUp(self):
+        super(TestNovaLazyObject, self).setUp()
+        self.obj = MyLazyObj(baz=3)
+        self.obj.obj_reset_changes()
+        self.lazy_fields = base.LazyFields({'foo': 0, 'bar': 1}, ['1', None])
+        self.obj.obj_set_lazy_fields(self.lazy_fields)
+
+    def test_coerced_on_access(self):
+        self.assertTrue(self.obj.obj_attr_is_set('foo'))
+        self.assertIn('bar', self.obj)
+        self.assertTrue(self.lazy_fields.is_pending('foo'))
+        self.assertEqual(1, self.obj.foo)
+        self.assertFalse(self.lazy_fields.is_pending('foo'))
+        self.assertTrue(self.lazy_fields.is_pending('bar'))
+        self.assertEqual(1, self.obj.foo)
+        self.assertIsNone(self.obj.bar)
+        self.assertEqual(set(), self.obj.obj_what_changed())
+
+    def test_what_changed_does_not_coerce(self):
+        self.obj.baz = 4
+        self.assertEqual({'baz'}, self.obj.obj_what_changed())
+        self.assertTrue(self.lazy_fields.is_pending('foo'))
+        self.assertTrue(self.lazy_fields.is_pending('bar'))
+
+    def test_set_before_access(self):
+        self.obj.foo = 2
+        self.assertEqual(2, self.obj.foo)
+        self.assertEqual({'foo'}, self.obj.obj_what_changed())
+
+    def test_not_lazy(self):
+        obj = MyLazyObj()
+        obj.obj_set_lazy_fields(self.lazy_fields)
+        self.assertFalse(obj.obj_attr_is_set('baz'))
+        self.assertRaises(NotImplementedError, getattr, obj, 'baz')
+
+    def test_clear(self):
+        self.obj.obj_set_lazy_fields(None)
+        self.assertFalse(self.obj.obj_attr_is_set('foo'))
+        self.assertRaises(NotImplementedError, getattr, self.obj, 'foo')
+
+    def test_obj_to_primitive(self):
+        primitive = self.obj.obj_to_primitive()['nova_object.data']
+        self.assertEqual({'foo': 1, 'bar': None, 'baz': 3}, primitive)
+
+
 class _BaseTestCase(test.TestCase):
     def setUp(self):
         super(_BaseTestCase, self).setUp()
@@ -1066,7 +1119,7 @@ object_data = {
     'CellMapping': '1.1-5d652928000a5bc369d79d5bde7e497d',
     'CellMappingList': '1.1-496ef79bb2ab41041fff8bcb57996352',
     'ComputeNode': '1.18-431fafd8ac4a5f3559bd9b1f1332cc22',
-    'ComputeNodeList': '1.17-52f3b0962b1c86b98590144463ebb192',
+    'ComputeNodeList': '1.18-30ba7625e5cff14d050aa77049f282c6',
     'CpuDiagnostics': '1.0-d256f2e442d1b837735fd17dfe8e3d47',
     'ConsoleAuthToken': '1.0-a61bf7b54517c4013a12289c5a5268ea',
     'DNSDomain': '1.0-7b0b2dab778454b6a7b6c66afe163a1a',
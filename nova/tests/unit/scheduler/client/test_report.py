@@ -1499,6 +1499,148 @@ class TestPutAllocations(SchedulerReportClientTestCase):
         self.assertTrue(res)
 
 
+class TestClaimResourcesBulk(SchedulerReportClientTestCase):
+
+    def setUp(self):
+        super(TestClaimResourcesBulk, self).setUp()
+        self.claims = {
+            uuids.consumer1: {
+                'allocations': {uuids.cn1: {'resources': {'VCPU': 1}}},
+                'project_id': uuids.project_id,
+                'user_id': uuids.user_id},
+            uuids.consumer2: {
+                'allocations': {uuids.cn2: {'resources': {'VCPU': 1}}},
+                'project_id': uuids.project_id,
+                'user_id': uuids.user_id},
+            uuids.consumer3: {
+                'allocations': {uuids.cn2: {'resources': {'VCPU': 1}},
+                                uuids.shared: {'resources': {'DISK_GB': 1}}},
+                'project_id': uuids.project_id,
+                'user_id': uuids.user_id},
+        }
+
+    def _expected_payload(self, *consumer_uuids):
+        payload = {}
+        for consumer_uuid in consumer_uuids:
+            payload[consumer_uuid] = dict(self.claims[consumer_uuid],
+                                          consumer_generation=None)
+        return payload
+
+    def _expected_call(self, *consumer_uuids):
+        return mock.call(
+            '/allocations', microversion='1.28',
+            json=self._expected_payload(*consumer_uuids),
+            headers={'X-Openstack-Request-Id': self.context.global_id})
+
+    def test_claim_resources_bulk_success(self):
+        self.ks_adap_mock.post.return_value = fake_requests.FakeResponse(204)
+
+        res = self.client.claim_resources_bulk(self.context, self.claims,
+                                               '1.28')
+
+        self.assertEqual(set(), res)
+        self.assertEqual(
+            [self._expected_call(uuids.consumer1, uuids.consumer2,
+                                 uuids.consumer3)],
+            self.ks_adap_mock.post.call_args_list)
+
+    def test_claim_resources_bulk_older_alloc_req(self):
+        self.ks_adap_mock.post.return_value = fake_requests.FakeResponse(204)
+        claims = {uuids.consumer1: self.claims[uuids.consumer1]}
+
+        res = self.client.claim_resources_bulk(self.context, claims, '1.13')
+
+        self.assertEqual(set(), res)
+        self.ks_adap_mock.post.assert_called_once_with(
+            '/allocations', microversion='1.13', json=claims,
+            headers={'X-Openstack-Request-Id': self.context.global_id})
+
+    def test_claim_resources_bulk_capacity_exceeded(self):
+        # The consumers with allocations against cn2 are not claimed, the
+        # other one is claimed with a second request.
+        self.ks_adap_mock.post.side_effect = [
+            fake_requests.FakeResponse(
+                409,
+                jsonutils.dumps(
+                    {'errors': [
+                        {'code': 'placement.undefined_code',
+                         'detail': "Unable to allocate inventory: Unable to "
+                                   "create allocation for 'VCPU' on resource "
+                                   "provider '%s'. The requested amount would "
+                                   "exceed the capacity." % uuids.cn2}]})),
+            fake_requests.FakeResponse(204),
+        ]
+
+        res = self.client.claim_resources_bulk(self.context, self.claims,
+                                               '1.28')
+
+        self.assertEqual(set([uuids.consumer2, uuids.consumer3]), res)
+        self.ks_adap_mock.post.assert_has_calls([
+            self._expected_call(uuids.consumer1, uuids.consumer2,
+                                uuids.consumer3),
+            self._expected_call(uuids.consumer1)])
+
+    @mock.patch('time.sleep')
+    def test_claim_resources_bulk_rp_generation_retry_success(self,
+                                                              mock_sleep):
+        self.ks_adap_mock.post.side_effect = [
+            fake_requests.FakeResponse(
+                409,
+                jsonutils.dumps(
+                    {'errors': [
+                        {'code': 'placement.concurrent_update',
+                         'detail': ''}]})),
+            fake_requests.FakeResponse(204),
+        ]
+
+        res = self.client.claim_resources_bulk(self.context, self.claims,
+                                               '1.28')
+
+        self.assertEqual(set(), res)
+        # We're retrying the same HTTP request
+        expected_call = self._expected_call(
+            uuids.consumer1, uuids.consumer2, uuids.consumer3)
+        self.ks_adap_mock.post.assert_has_calls([expected_call] * 2)
+
+    @mock.patch('time.sleep')
+    def test_claim_resources_bulk_rp_generation_out_of_retries(self,
+                                                               mock_sleep):
+        self.ks_adap_mock.post.return_value = fake_requests.FakeResponse(
+            409,
+            jsonutils.dumps(
+                {'errors': [
+                    {'code': 'placement.concurrent_update',
+                     'detail': ''}]}))
+
+        res = self.client.claim_resources_bulk(self.context, self.claims,
+                                               '1.28')
+
+        self.assertEqual(set(self.claims), res)
+        self.assertEqual(4, self.ks_adap_mock.post.call_count)
+
+    @mock.patch.object(report.LOG, 'warning')
+    def test_claim_resources_bulk_consumer_generation_failure(self,
+                                                               mock_log):
+        # We can't tell which consumer is not new so none of them is claimed.
+        self.ks_adap_mock.post.return_value = fake_requests.FakeResponse(
+            409,
+            jsonutils.dumps(
+                {'errors': [
+                    {'code': 'placement.concurrent_update',
+                     'detail': 'consumer generation conflict - expected '
+                               'null but got 1'}]}))
+
+        res = self.client.claim_resources_bulk(self.context, self.claims,
+                                               '1.28')
+
+        self.assertEqual(set(self.claims), res)
+        self.assertEqual(
+            [self._expected_call(uuids.consumer1, uuids.consumer2,
+                                 uuids.consumer3)],
+            self.ks_adap_mock.post.call_args_list)
+        self.assertTrue(mock_log.called)
+
+
 class TestMoveAllocations(SchedulerReportClientTestCase):
 
     def setUp(self):
@@ -1748,6 +1890,44 @@ class TestProviderOperations(SchedulerReportClientTestCase):
         self.assertEqual(43, gen)
         self.assertFalse(create_rp_mock.called)
 
+    @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
+                '_ensure_resource_provider')
+    @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
+                '_refresh_associations')
+    @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
+                '_refresh_and_get_inventory')
+    def test_get_provider_tree_and_ensure_root_use_cache(self, refresh_inv,
+            refresh_assoc, ensure_mock):
+        # The provider's subtree is in the cache, so only its inventories are
+        # refreshed, and its associations only if stale.  Other providers in
+        # the cache are left alone.
+        ptree = self.client._provider_tree
+        ptree.new_root('cn', uuids.compute_node, generation=1)
+        ptree.new_child('child', uuids.compute_node, uuid=uuids.child)
+        ptree.new_root('other', uuids.other, generation=1)
+
+        ret = self.client.get_provider_tree_and_ensure_root(
+            self.context, uuids.compute_node, use_cache=True)
+
+        self.assertEqual(set([uuids.compute_node, uuids.child, uuids.other]),
+                         set(ret.get_provider_uuids()))
+        self.assertIsNot(ptree, ret)
+        ensure_mock.assert_not_called()
+        refresh_inv.assert_has_calls([
+            mock.call(self.context, uuids.compute_node),
+            mock.call(self.context, uuids.child)])
+        self.assertEqual(2, refresh_inv.call_count)
+        refresh_assoc.assert_has_calls([
+            mock.call(self.context, uuids.compute_node, force=False),
+            mock.call(self.context, uuids.child, force=False)])
+
+        # Not in the cache yet, so it is ensured as usual.
+        self.client.get_provider_tree_and_ensure_root(
+            self.context, uuids.new_node, name='new', use_cache=True)
+        ensure_mock.assert_called_once_with(
+            self.context, uuids.new_node, name='new',
+            parent_provider_uuid=None)
+
     @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
                 '_create_resource_provider')
     @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
@@ -14,6 +14,7 @@ import mock
 
 from nova import objects
 from nova.scheduler.filters import core_filter
+from nova.scheduler import host_columns
 from nova import test
 from nova.tests.unit.scheduler import fakes
 
@@ -92,3 +93,23 @@ class TestCoreFilter(test.NoDBTestCase):
         # use the minimum ratio from aggregates
         self.assertFalse(self.filt_cls.host_passes(host, spec_obj))
         self.assertEqual(4 * 2, host.limits['vcpu'])
+
+    def test_core_filter_hosts_pass(self):
+        self.filt_cls = core_filter.CoreFilter()
+        spec_obj = objects.RequestSpec(flavor=objects.Flavor(vcpus=2))
+        hosts = [fakes.FakeHostState('host1', 'node1',
+                    {'vcpus_total': 4, 'vcpus_used': 6,
+                     'cpu_allocation_ratio': 2}),
+                 fakes.FakeHostState('host2', 'node1', {}),
+                 fakes.FakeHostState('host3', 'node1',
+                    {'vcpus_total': 4, 'vcpus_used': 7,
+                     'cpu_allocation_ratio': 2}),
+                 fakes.FakeHostState('host4', 'node1',
+                    {'vcpus_total': 1, 'vcpus_used': 0,
+                     'cpu_allocation_ratio': 2})]
+        columns = host_columns.HostStateColumns(hosts)
+        self.assertEqual([True, True, False, False],
+                         list(self.filt_cls.hosts_pass(columns, spec_obj)))
+        # As with host_passes(), the limit is set before checking usage.
+        self.assertEqual([{'vcpu': 8.0}, {}, {'vcpu': 8.0}, {'vcpu': 2.0}],
+                         [host.limits for host in hosts])
@@ -14,6 +14,7 @@ import mock
 
 from nova import objects
 from nova.scheduler.filters import disk_filter
+from nova.scheduler import host_columns
 from nova import test
 from nova.tests.unit.scheduler import fakes
 
@@ -76,6 +77,23 @@ class TestDiskFilter(test.NoDBTestCase):
                  'disk_allocation_ratio': 10.0})
         self.assertFalse(filt_cls.host_passes(host, spec_obj))
 
+    def test_disk_filter_hosts_pass(self):
+        filt_cls = disk_filter.DiskFilter()
+        spec_obj = objects.RequestSpec(
+            flavor=objects.Flavor(
+                root_gb=3, ephemeral_gb=3, swap=1024))
+        hosts = [fakes.FakeHostState('host%d' % i, 'node1',
+                    {'free_disk_mb': free_disk_mb,
+                     'total_usable_disk_gb': 12,
+                     'disk_allocation_ratio': disk_allocation_ratio})
+                 for i, (free_disk_mb, disk_allocation_ratio) in enumerate(
+                    [(1 * 1024, 10.0), (1 * 1024, 1.0)])]
+        columns = host_columns.HostStateColumns(hosts)
+        self.assertEqual([True, False],
+                         list(filt_cls.hosts_pass(columns, spec_obj)))
+        self.assertEqual([{'disk_gb': 120.0}, {}],
+                         [host.limits for host in hosts])
+
     @mock.patch('nova.scheduler.filters.utils.aggregate_values_from_key')
     def test_aggregate_disk_filter_value_error(self, agg_mock):
         filt_cls = disk_filter.AggregateDiskFilter()
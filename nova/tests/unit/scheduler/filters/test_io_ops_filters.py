@@ -15,6 +15,7 @@ import mock
 
 from nova import objects
 from nova.scheduler.filters import io_ops_filter
+from nova.scheduler import host_columns
 from nova import test
 from nova.tests.unit.scheduler import fakes
 
@@ -37,6 +38,17 @@ class TestIoOpsFilter(test.NoDBTestCase):
         spec_obj = objects.RequestSpec()
         self.assertFalse(self.filt_cls.host_passes(host, spec_obj))
 
+    def test_filter_num_iops_hosts_pass(self):
+        self.flags(max_io_ops_per_host=8, group='filter_scheduler')
+        self.filt_cls = io_ops_filter.IoOpsFilter()
+        hosts = [fakes.FakeHostState('host%d' % i, 'node1',
+                                     {'num_io_ops': value})
+                 for i, value in enumerate([7, 8, 0])]
+        columns = host_columns.HostStateColumns(hosts)
+        spec_obj = objects.RequestSpec()
+        self.assertEqual([True, False, True],
+                         list(self.filt_cls.hosts_pass(columns, spec_obj)))
+
     @mock.patch('nova.scheduler.filters.utils.aggregate_values_from_key')
     def test_aggregate_filter_num_iops_value(self, agg_mock):
         self.flags(max_io_ops_per_host=7, group='filter_scheduler')
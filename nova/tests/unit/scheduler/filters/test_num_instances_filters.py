@@ -14,6 +14,7 @@ import mock
 
 from nova import objects
 from nova.scheduler.filters import num_instances_filter
+from nova.scheduler import host_columns
 from nova import test
 from nova.tests.unit.scheduler import fakes
 
@@ -36,6 +37,17 @@ class TestNumInstancesFilter(test.NoDBTestCase):
         spec_obj = objects.RequestSpec()
         self.assertFalse(self.filt_cls.host_passes(host, spec_obj))
 
+    def test_filter_num_instances_hosts_pass(self):
+        self.flags(max_instances_per_host=8, group='filter_scheduler')
+        self.filt_cls = num_instances_filter.NumInstancesFilter()
+        hosts = [fakes.FakeHostState('host%d' % i, 'node1',
+                                     {'num_instances': value})
+                 for i, value in enumerate([7, 8, 0])]
+        columns = host_columns.HostStateColumns(hosts)
+        spec_obj = objects.RequestSpec()
+        self.assertEqual([True, False, True],
+                         list(self.filt_cls.hosts_pass(columns, spec_obj)))
+
     @mock.patch('nova.scheduler.filters.utils.aggregate_values_from_key')
     def test_filter_aggregate_num_instances_value(self, agg_mock):
         self.flags(max_instances_per_host=4, group='filter_scheduler')
@@ -14,6 +14,7 @@ import mock
 
 from nova import objects
 from nova.scheduler.filters import ram_filter
+from nova.scheduler import host_columns
 from nova import test
 from nova.tests.unit.scheduler import fakes
 
@@ -57,6 +58,23 @@ class TestRamFilter(test.NoDBTestCase):
                  'ram_allocation_ratio': 2.0})
         self.assertFalse(self.filt_cls.host_passes(host, spec_obj))
 
+    def test_ram_filter_hosts_pass(self):
+        spec_obj = objects.RequestSpec(
+            flavor=objects.Flavor(memory_mb=1024))
+        hosts = [fakes.FakeHostState('host%d' % i, 'node1',
+                    {'free_ram_mb': free_ram_mb,
+                     'total_usable_ram_mb': total_usable_ram_mb,
+                     'ram_allocation_ratio': ram_allocation_ratio})
+                 for i, (free_ram_mb, total_usable_ram_mb,
+                         ram_allocation_ratio) in enumerate(
+                    [(1023, 1024, 1.0), (1024, 1024, 1.0),
+                     (-1024, 2048, 2.0), (512, 512, 2.0)])]
+        columns = host_columns.HostStateColumns(hosts)
+        self.assertEqual([False, True, True, False],
+                         list(self.filt_cls.hosts_pass(columns, spec_obj)))
+        self.assertEqual([{}, {'memory_mb': 1024.0}, {'memory_mb': 4096.0},
+                          {}], [host.limits for host in hosts])
+
 
 @mock.patch('nova.scheduler.filters.utils.aggregate_values_from_key')
 class TestAggregateRamFilter(test.NoDBTestCase):
@@ -102,3 +120,16 @@ class TestAggregateRamFilter(test.NoDBTestCase):
         # use the minimum ratio from aggregates
         self.assertTrue(self.filt_cls.host_passes(host, spec_obj))
         self.assertEqual(1024 * 1.5, host.limits['memory_mb'])
+
+    def test_aggregate_ram_filter_hosts_pass(self, agg_mock):
+        spec_obj = objects.RequestSpec(
+            context=mock.sentinel.ctx,
+            flavor=objects.Flavor(memory_mb=1024))
+        hosts = [fakes.FakeHostState('host%d' % i, 'node1',
+                    {'free_ram_mb': 1023, 'total_usable_ram_mb': 1024,
+                     'ram_allocation_ratio': 1.0}) for i in range(2)]
+        agg_mock.side_effect = [set(), set(['2.0'])]
+        columns = host_columns.HostStateColumns(hosts)
+        self.assertEqual([False, True],
+                         list(self.filt_cls.hosts_pass(columns, spec_obj)))
+        self.assertEqual(1024 * 2.0, hosts[1].limits['memory_mb'])
@@ -16,6 +16,8 @@
 Tests For Filter Scheduler.
 """
 
+import collections
+
 import mock
 from oslo_serialization import jsonutils
 from oslo_utils.fixture import uuidsentinel as uuids
@@ -368,6 +370,111 @@ class FilterSchedulerTestCase(test_scheduler.SchedulerTestCase):
         # Ensure we cleaned up the first successfully-claimed instance
         mock_cleanup.assert_called_once_with(ctx, [uuids.instance1])
 
+    def _test_schedule_bulk_claim(self, mock_get_hosts, mock_get_all_states,
+                                  mock_claim, mock_claim_bulk, unclaimed,
+                                  claim_results):
+        self.flags(claim_batch_size=10, group='filter_scheduler')
+        spec_obj = objects.RequestSpec(
+            num_instances=2,
+            flavor=objects.Flavor(memory_mb=512,
+                                  root_gb=512,
+                                  ephemeral_gb=0,
+                                  swap=0,
+                                  vcpus=1),
+            project_id=uuids.project_id,
+            instance_group=None)
+
+        host_state0 = mock.Mock(spec=host_manager.HostState,
+                host="fake_host0", nodename="fake_node0", uuid=uuids.cn0,
+                cell_uuid=uuids.cell, limits={})
+        host_state1 = mock.Mock(spec=host_manager.HostState,
+                host="fake_host1", nodename="fake_node1", uuid=uuids.cn1,
+                cell_uuid=uuids.cell, limits={})
+        mock_get_all_states.return_value = [host_state0, host_state1]
+        mock_get_hosts.side_effect = [
+            [host_state0, host_state1],  # first instance
+            [host_state1, host_state0],  # second instance
+            [host_state0, host_state1],  # second instance, claim retried
+        ]
+        mock_claim.side_effect = claim_results
+        mock_claim_bulk.return_value = unclaimed
+
+        fake_alloc0 = {"allocations": {uuids.cn0: {"resources": {"VCPU": 1}}}}
+        fake_alloc1 = {"allocations": {uuids.cn1: {"resources": {"VCPU": 1}}}}
+        alloc_reqs_by_rp_uuid = {uuids.cn0: [fake_alloc0],
+                                 uuids.cn1: [fake_alloc1]}
+        instance_uuids = [uuids.instance1, uuids.instance2]
+        ctx = mock.Mock()
+        try:
+            return self.driver._schedule(ctx, spec_obj, instance_uuids,
+                alloc_reqs_by_rp_uuid, mock.sentinel.provider_summaries,
+                allocation_request_version='1.29')
+        finally:
+            mock_claim_bulk.assert_called_once_with(
+                ctx.elevated.return_value, self.placement_client, spec_obj,
+                collections.OrderedDict([(uuids.instance1, fake_alloc0),
+                                         (uuids.instance2, fake_alloc1)]),
+                allocation_request_version='1.29')
+            # Only the instance which could not be claimed in bulk is claimed
+            # again, against the hosts in order.
+            self.assertEqual(
+                [mock.call(ctx.elevated.return_value, self.placement_client,
+                           spec_obj, uuids.instance2, fake_alloc,
+                           allocation_request_version='1.29')
+                 for fake_alloc in (fake_alloc0, fake_alloc1)][
+                    :len(claim_results)],
+                mock_claim.call_args_list)
+
+    @mock.patch('nova.scheduler.utils.claim_resources_bulk')
+    @mock.patch('nova.scheduler.utils.claim_resources')
+    @mock.patch('nova.scheduler.filter_scheduler.FilterScheduler.'
+                '_get_all_host_states')
+    @mock.patch('nova.scheduler.filter_scheduler.FilterScheduler.'
+                '_get_sorted_hosts')
+    def test_schedule_bulk_claim(self, mock_get_hosts, mock_get_all_states,
+                                 mock_claim, mock_claim_bulk):
+        selections = self._test_schedule_bulk_claim(
+            mock_get_hosts, mock_get_all_states, mock_claim, mock_claim_bulk,
+            set(), [])
+        self.assertEqual([[uuids.cn0], [uuids.cn1]],
+                         [[sel.compute_node_uuid for sel in selection]
+                          for selection in selections])
+
+    @mock.patch('nova.scheduler.utils.claim_resources_bulk')
+    @mock.patch('nova.scheduler.utils.claim_resources')
+    @mock.patch('nova.scheduler.filter_scheduler.FilterScheduler.'
+                '_get_all_host_states')
+    @mock.patch('nova.scheduler.filter_scheduler.FilterScheduler.'
+                '_get_sorted_hosts')
+    def test_schedule_bulk_claim_retry_conflicting(self, mock_get_hosts,
+            mock_get_all_states, mock_claim, mock_claim_bulk):
+        """Tests that an instance which could not be claimed against its
+        selected host is claimed on its own against the other hosts.
+        """
+        selections = self._test_schedule_bulk_claim(
+            mock_get_hosts, mock_get_all_states, mock_claim, mock_claim_bulk,
+            set([uuids.instance2]), [True])
+        self.assertEqual([[uuids.cn0], [uuids.cn0]],
+                         [[sel.compute_node_uuid for sel in selection]
+                          for selection in selections])
+
+    @mock.patch('nova.scheduler.filter_scheduler.FilterScheduler.'
+                '_cleanup_allocations')
+    @mock.patch('nova.scheduler.utils.claim_resources_bulk')
+    @mock.patch('nova.scheduler.utils.claim_resources')
+    @mock.patch('nova.scheduler.filter_scheduler.FilterScheduler.'
+                '_get_all_host_states')
+    @mock.patch('nova.scheduler.filter_scheduler.FilterScheduler.'
+                '_get_sorted_hosts')
+    def test_schedule_bulk_claim_retry_fails(self, mock_get_hosts,
+            mock_get_all_states, mock_claim, mock_claim_bulk, mock_cleanup):
+        self.assertRaises(exception.NoValidHost,
+                          self._test_schedule_bulk_claim, mock_get_hosts,
+                          mock_get_all_states, mock_claim, mock_claim_bulk,
+                          set([uuids.instance2]), [False, False])
+        # Ensure we cleaned up the instance claimed in bulk
+        mock_cleanup.assert_called_once_with(mock.ANY, [uuids.instance1])
+
     @mock.patch('nova.scheduler.utils.claim_resources')
     @mock.patch('nova.scheduler.filter_scheduler.FilterScheduler.'
                 '_get_all_host_states')
@@ -1125,3 +1232,9 @@ class FilterSchedulerTestCase(test_scheduler.SchedulerTestCase):
         # compute_uuids being [].
         get_host_states.assert_called_once_with(
             mock.sentinel.ctxt, [], mock.sentinel.spec_obj)
+
+    def test_run_periodic_tasks(self):
+        with mock.patch.object(self.driver.host_manager,
+                               'reconcile_cell_compute_caches') as reconcile:
+            self.driver.run_periodic_tasks(mock.sentinel.ctxt)
+        reconcile.assert_called_once_with(mock.sentinel.ctxt)
@@ -0,0 +1,68 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import math
+
+import mock
+
+from nova.scheduler import host_columns
+from nova import test
+from nova.tests.unit.scheduler import fakes
+
+
+class HostStateColumnsTestCase(test.NoDBTestCase):
+
+    def setUp(self):
+        super(HostStateColumnsTestCase, self).setUp()
+        self.hosts = [
+            fakes.FakeHostState('host1', 'node1',
+                                {'free_ram_mb': 512,
+                                 'ram_allocation_ratio': 1.5}),
+            fakes.FakeHostState('host2', 'node2',
+                                {'free_ram_mb': -128}),
+        ]
+        self.columns = host_columns.HostStateColumns(iter(self.hosts))
+
+    def test_len(self):
+        self.assertEqual(2, len(self.columns))
+
+    def test_column(self):
+        self.assertEqual([512.0, -128.0],
+                         list(self.columns.column('free_ram_mb')))
+
+    def test_column_cached(self):
+        first = self.columns.column('free_ram_mb')
+        self.hosts[0].free_ram_mb = 0
+        self.assertIs(first, self.columns.column('free_ram_mb'))
+
+    def test_column_none_is_nan(self):
+        ratios = self.columns.column('ram_allocation_ratio')
+        self.assertEqual(1.5, ratios[0])
+        self.assertTrue(math.isnan(ratios[1]))
+
+    def test_gather(self):
+        func = mock.Mock(side_effect=[1, 2])
+        self.assertEqual([1.0, 2.0], list(self.columns.gather(func)))
+        func.assert_has_calls([mock.call(self.hosts[0]),
+                               mock.call(self.hosts[1])])
+
+    def test_constant(self):
+        self.assertEqual([3.0, 3.0], list(self.columns.constant(3)))
+
+    def test_set_limits(self):
+        self.columns.set_limits('memory_mb', [1024, 2048], [False, True])
+        self.assertEqual({}, self.hosts[0].limits)
+        self.assertEqual({'memory_mb': 2048.0}, self.hosts[1].limits)
+
+    def test_select(self):
+        self.assertEqual([self.hosts[1]],
+                         self.columns.select([False, True]))
@@ -14,9 +14,16 @@
 """
 Tests For Scheduler Host Filters.
 """
+import mock
+from oslo_utils.fixture import uuidsentinel as uuids
+
+from nova import objects
 from nova.scheduler import filters
 from nova.scheduler.filters import all_hosts_filter
 from nova.scheduler.filters import compute_filter
+from nova.scheduler.filters import num_instances_filter
+from nova.scheduler.filters import ram_filter
+from nova.scheduler import host_columns
 from nova import test
 from nova.tests.unit.scheduler import fakes
 
@@ -35,3 +42,74 @@ class HostFiltersTestCase(test.NoDBTestCase):
         filt_cls = all_hosts_filter.AllHostsFilter()
         host = fakes.FakeHostState('host1', 'node1', {})
         self.assertTrue(filt_cls.host_passes(host, {}))
+
+
+class VectorizedHostFilterHandlerTestCase(test.NoDBTestCase):
+
+    def setUp(self):
+        super(VectorizedHostFilterHandlerTestCase, self).setUp()
+        self.flags(vectorized_filters=True, group='filter_scheduler')
+        self.filter_handler = filters.HostFilterHandler()
+        self.spec_obj = objects.RequestSpec(
+            instance_uuid=uuids.instance,
+            flavor=objects.Flavor(memory_mb=1024, vcpus=1, root_gb=1,
+                                  ephemeral_gb=0, swap=0))
+        self.hosts = [
+            fakes.FakeHostState('host%d' % i, 'node',
+                                {'free_ram_mb': free_ram_mb,
+                                 'total_usable_ram_mb': 2048,
+                                 'ram_allocation_ratio': 1.0,
+                                 'num_instances': num_instances})
+            for i, (free_ram_mb, num_instances) in enumerate(
+                [(2048, 0), (512, 0), (1024, 60), (1024, 1)])]
+
+    def _filters(self):
+        return [ram_filter.RamFilter(),
+                num_instances_filter.NumInstancesFilter(),
+                compute_filter.ComputeFilter()]
+
+    @mock.patch('nova.servicegroup.API.service_is_up', return_value=True)
+    def test_get_filtered_objects_vectorized(self, mock_up):
+        for host in self.hosts:
+            host.service = {'disabled': False}
+        filters_ = self._filters()
+        with mock.patch.object(filters_[0], 'host_passes') as mock_passes:
+            result = self.filter_handler.get_filtered_objects(
+                filters_, self.hosts, self.spec_obj)
+        # The batched filters do not go through host_passes() ...
+        mock_passes.assert_not_called()
+        self.assertEqual([self.hosts[0], self.hosts[3]], result)
+        self.assertEqual({'memory_mb': 2048.0}, self.hosts[0].limits)
+        self.assertEqual({}, self.hosts[1].limits)
+        # ... but the others still see the hosts which passed, one by one.
+        self.assertEqual(2, mock_up.call_count)
+
+    def test_get_filtered_objects_vectorized_matches_per_host(self):
+        filters_ = self._filters()[:2]
+        result = self.filter_handler.get_filtered_objects(
+            filters_, self.hosts, self.spec_obj)
+        self.flags(vectorized_filters=False, group='filter_scheduler')
+        expected = self.filter_handler.get_filtered_objects(
+            filters_, self.hosts, self.spec_obj)
+        self.assertEqual(expected, result)
+
+    def test_get_filtered_objects_vectorized_none_pass(self):
+        self.spec_obj.flavor.memory_mb = 4096
+        result = self.filter_handler.get_filtered_objects(
+            self._filters(), self.hosts, self.spec_obj)
+        self.assertEqual([], result)
+
+    @mock.patch('nova.scheduler.utils.request_is_rebuild', return_value=True)
+    def test_get_filtered_objects_vectorized_rebuild(self, mock_rebuild):
+        result = self.filter_handler.get_filtered_objects(
+            self._filters()[:2], self.hosts, self.spec_obj)
+        self.assertEqual(self.hosts, result)
+
+    @mock.patch.object(host_columns, 'numpy', None)
+    def test_get_filtered_objects_no_numpy(self):
+        filters_ = self._filters()[:2]
+        with mock.patch.object(filters_[0], 'hosts_pass') as mock_batched:
+            result = self.filter_handler.get_filtered_objects(
+                filters_, self.hosts, self.spec_obj)
+        mock_batched.assert_not_called()
+        self.assertEqual([self.hosts[0], self.hosts[3]], result)
@@ -18,8 +18,10 @@ Tests For HostManager
 
 import collections
 import contextlib
+import copy
 import datetime
 
+import fixtures as fx
 import mock
 from oslo_serialization import jsonutils
 from oslo_utils.fixture import uuidsentinel as uuids
@@ -1049,6 +1051,211 @@ class HostManagerTestCase(test.NoDBTestCase):
         self.assertEqual(['a', 'b'], sorted(srv.keys()))
 
 
+class CellComputeCacheTestCase(test.NoDBTestCase):
+    """Test case for CellComputeCache class."""
+
+    def setUp(self):
+        super(CellComputeCacheTestCase, self).setUp()
+        self.flags(host_state_cache_max_age=600, group='filter_scheduler')
+        self.context = nova_context.RequestContext('fake', 'fake')
+        self.context.cell_uuid = uuids.cell
+        self.cache = host_manager.CellComputeCache()
+
+    @staticmethod
+    def _compute(uuid, minute, deleted=False):
+        return objects.ComputeNode(
+            uuid=uuid, deleted=deleted,
+            created_at=datetime.datetime(2018, 1, 1, 11, 0, 0),
+            updated_at=datetime.datetime(2018, 1, 1, 12, minute, 0))
+
+    @mock.patch('nova.objects.ComputeNodeList.get_all')
+    def test_load(self, mock_get_all):
+        mock_get_all.return_value = [self._compute(uuids.cn1, 1),
+                                     self._compute(uuids.cn2, 2)]
+        self.assertTrue(self.cache.is_expired())
+        self.cache.load(self.context)
+
+        mock_get_all.assert_called_once_with(self.context)
+        self.assertFalse(self.cache.is_expired())
+        self.assertEqual({uuids.cn1, uuids.cn2},
+                         set(self.cache.compute_nodes))
+        self.assertEqual(datetime.datetime(2018, 1, 1, 12, 2, 0),
+                         self.cache.changes_since.replace(tzinfo=None))
+        self.assertEqual([uuids.cn2], [cn.uuid for cn in
+                         self.cache.get_compute_nodes([uuids.cn2,
+                                                       uuids.cn3])])
+
+    @mock.patch('nova.objects.ComputeNodeList.get_all_changed_since')
+    @mock.patch('nova.objects.ComputeNodeList.get_all')
+    def test_refresh(self, mock_get_all, mock_get_changed):
+        mock_get_all.return_value = [self._compute(uuids.cn1, 1),
+                                     self._compute(uuids.cn2, 2)]
+        self.cache.refresh(self.context)
+        mock_get_all.assert_called_once_with(self.context)
+        mock_get_changed.assert_not_called()
+        changes_since = self.cache.changes_since
+
+        updated = self._compute(uuids.cn1, 3)
+        mock_get_changed.return_value = [
+            updated, self._compute(uuids.cn2, 4, deleted=True),
+            self._compute(uuids.cn3, 5)]
+        self.cache.refresh(self.context)
+
+        mock_get_all.assert_called_once_with(self.context)
+        mock_get_changed.assert_called_once_with(self.context, changes_since)
+        self.assertEqual({uuids.cn1, uuids.cn3},
+                         set(self.cache.compute_nodes))
+        self.assertIs(updated, self.cache.compute_nodes[uuids.cn1])
+        self.assertEqual(datetime.datetime(2018, 1, 1, 12, 5, 0),
+                         self.cache.changes_since.replace(tzinfo=None))
+
+    @mock.patch('nova.objects.ComputeNodeList.get_all_changed_since')
+    @mock.patch('nova.objects.ComputeNodeList.get_all')
+    def test_refresh_expired(self, mock_get_all, mock_get_changed):
+        mock_get_all.return_value = [self._compute(uuids.cn1, 1)]
+        self.cache.load(self.context)
+        self.cache.loaded_at -= datetime.timedelta(seconds=601)
+        self.assertTrue(self.cache.is_expired())
+
+        self.cache.refresh(self.context)
+
+        self.assertEqual(2, mock_get_all.call_count)
+        mock_get_changed.assert_not_called()
+        self.assertFalse(self.cache.is_expired())
+
+
+class HostManagerCachedComputesTestCase(test.NoDBTestCase):
+    """Test case for HostManager with host_state_cache_max_age set."""
+
+    @mock.patch.object(host_manager.HostManager, '_init_instance_info')
+    @mock.patch.object(host_manager.HostManager, '_init_aggregates')
+    def setUp(self, mock_init_agg, mock_init_inst):
+        super(HostManagerCachedComputesTestCase, self).setUp()
+        self.flags(host_state_cache_max_age=600, group='filter_scheduler')
+        self.cell = objects.CellMapping(uuid=uuids.cell, disabled=False,
+                                        database_connection='none://',
+                                        transport_url='none://')
+        with mock.patch('nova.objects.CellMappingList.get_all',
+                        return_value=objects.CellMappingList(
+                            objects=[self.cell])):
+            self.host_manager = host_manager.HostManager()
+        self.context = nova_context.RequestContext('fake', 'fake')
+        self.useFixture(fixtures.SpawnIsSynchronousFixture())
+        # The cell compute caches are keyed by the UUID of the targeted cell.
+        self.useFixture(fx.MonkeyPatch('nova.context.target_cell',
+                                       self._fake_target_cell))
+        self.get_by_binary = self.useFixture(fx.MockPatch(
+            'nova.objects.ServiceList.get_by_binary',
+            return_value=fakes.SERVICES)).mock
+        self.get_all = self.useFixture(fx.MockPatch(
+            'nova.objects.ComputeNodeList.get_all',
+            return_value=fakes.COMPUTE_NODES)).mock
+        self.get_changed = self.useFixture(fx.MockPatch(
+            'nova.objects.ComputeNodeList.get_all_changed_since',
+            return_value=[])).mock
+        self.useFixture(fx.MockPatch(
+            'nova.objects.InstanceList.get_uuids_by_host', return_value=[]))
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _fake_target_cell(context, cell):
+        cctxt = copy.copy(context)
+        cctxt.cell_uuid = cell.uuid
+        yield cctxt
+
+    def _get_host_states(self, compute_uuids):
+        return {state.uuid: state for state in
+                self.host_manager.get_host_states_by_uuids(
+                    self.context, compute_uuids, None)}
+
+    def test_get_host_states_by_uuids(self):
+        host_states = self._get_host_states([uuids.cn1, uuids.cn2])
+        self.assertEqual({uuids.cn1, uuids.cn2}, set(host_states))
+        self.assertEqual(1, self.get_all.call_count)
+        self.get_changed.assert_not_called()
+
+        # The resources consumed by a request are kept until the compute
+        # node record changes.
+        host_states[uuids.cn1].free_ram_mb = 0
+        updated = fakes.COMPUTE_NODES[1].obj_clone()
+        updated.deleted = False
+        updated.free_ram_mb = 0
+        updated.updated_at = datetime.datetime(2015, 11, 11, 12, 0, 0)
+        self.get_changed.return_value = [updated]
+
+        new_host_states = self._get_host_states([uuids.cn1, uuids.cn2])
+
+        self.assertEqual(1, self.get_all.call_count)
+        self.assertEqual(1, self.get_changed.call_count)
+        self.assertEqual(2, self.get_by_binary.call_count)
+        self.assertIs(host_states[uuids.cn1], new_host_states[uuids.cn1])
+        self.assertEqual(0, new_host_states[uuids.cn1].free_ram_mb)
+        self.assertEqual(0, new_host_states[uuids.cn2].free_ram_mb)
+
+    def test_get_host_states_by_uuids_reload_drops_consumed(self):
+        host_states = self._get_host_states([uuids.cn1])
+        free_ram_mb = host_states[uuids.cn1].free_ram_mb
+        spec_obj = objects.RequestSpec(
+            flavor=objects.Flavor(root_gb=0, ephemeral_gb=0, memory_mb=512,
+                                  vcpus=1),
+            numa_topology=None, pci_requests=None)
+        host_states[uuids.cn1].consume_from_request(spec_obj)
+        host_states[uuids.cn1].limits['memory_mb'] = 1024
+        self.assertEqual(free_ram_mb - 512, host_states[uuids.cn1].free_ram_mb)
+
+        # The consumption is kept while the cell compute cache is fresh...
+        host_states = self._get_host_states([uuids.cn1])
+        self.assertEqual(free_ram_mb - 512, host_states[uuids.cn1].free_ram_mb)
+        self.assertEqual({}, host_states[uuids.cn1].limits)
+
+        # ...but not once it gets fully reloaded.
+        self.host_manager.cell_compute_caches[uuids.cell].loaded_at -= (
+            datetime.timedelta(seconds=601))
+        host_states = self._get_host_states([uuids.cn1])
+        self.assertEqual(2, self.get_all.call_count)
+        self.assertEqual(free_ram_mb, host_states[uuids.cn1].free_ram_mb)
+
+    def test_get_host_states_by_uuids_deleted(self):
+        self._get_host_states([uuids.cn1, uuids.cn2])
+        deleted = fakes.COMPUTE_NODES[1].obj_clone()
+        deleted.deleted = True
+        self.get_changed.return_value = [deleted]
+
+        host_states = self._get_host_states([uuids.cn1, uuids.cn2])
+
+        self.assertEqual({uuids.cn1}, set(host_states))
+
+    def test_reconcile_cell_compute_caches(self):
+        self.host_manager.reconcile_cell_compute_caches(self.context)
+        self.assertEqual(1, self.get_all.call_count)
+
+        # Not expired yet.
+        self.host_manager.reconcile_cell_compute_caches(self.context)
+        self.assertEqual(1, self.get_all.call_count)
+        self.get_changed.assert_not_called()
+
+        self.host_manager.cell_compute_caches[uuids.cell].loaded_at -= (
+            datetime.timedelta(seconds=601))
+        self.host_manager.reconcile_cell_compute_caches(self.context)
+        self.assertEqual(2, self.get_all.call_count)
+
+    def test_reconcile_cell_compute_caches_disabled(self):
+        self.flags(host_state_cache_max_age=0, group='filter_scheduler')
+        self.host_manager.reconcile_cell_compute_caches(self.context)
+        self.get_all.assert_not_called()
+        self.get_by_binary.assert_not_called()
+
+    def test_refresh_cells_caches_drops_computes(self):
+        self._get_host_states([uuids.cn1])
+        self.assertTrue(self.host_manager.host_state_map)
+        with mock.patch('nova.objects.CellMappingList.get_all',
+                        return_value=objects.CellMappingList(
+                            objects=[self.cell])):
+            self.host_manager.refresh_cells_caches()
+        self.assertEqual({}, self.host_manager.cell_compute_caches)
+        self.assertEqual({}, self.host_manager.host_state_map)
+
+
 class HostManagerChangedNodesTestCase(test.NoDBTestCase):
     """Test case for HostManager class."""
 
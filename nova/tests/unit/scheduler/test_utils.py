@@ -10,6 +10,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+
 import mock
 from oslo_utils.fixture import uuidsentinel as uuids
 
@@ -888,3 +890,38 @@ class TestUtils(test.NoDBTestCase):
         self.assertTrue(res)
         mock_is_rebuild.assert_called_once_with(mock.sentinel.spec_obj)
         self.assertFalse(mock_client.claim_resources.called)
+
+    def test_claim_resources_bulk(self):
+        """Tests that claim_resources_bulk() claims the resources of the
+        instances in batches of [filter_scheduler]/claim_batch_size instances.
+        """
+        self.flags(claim_batch_size=2, group='filter_scheduler')
+        ctx = nova_context.RequestContext(user_id=uuids.user_id)
+        spec_obj = objects.RequestSpec(project_id=uuids.project_id,
+                                       user_id=uuids.spec_user_id)
+        alloc_reqs_by_instance_uuid = collections.OrderedDict(
+            (instance_uuid, {'allocations': {uuids.cn1: instance_uuid}})
+            for instance_uuid in (uuids.instance1, uuids.instance2,
+                                  uuids.instance3))
+        mock_client = mock.Mock()
+        # The second batch can't reach placement.
+        mock_client.claim_resources_bulk.side_effect = [
+            set([uuids.instance2]), None]
+
+        res = utils.claim_resources_bulk(
+            ctx, mock_client, spec_obj, alloc_reqs_by_instance_uuid,
+            allocation_request_version='1.28')
+
+        self.assertEqual(set([uuids.instance2, uuids.instance3]), res)
+
+        def claim(instance_uuid):
+            return {'allocations': {uuids.cn1: instance_uuid},
+                    'project_id': uuids.project_id,
+                    'user_id': uuids.spec_user_id}
+
+        mock_client.claim_resources_bulk.assert_has_calls([
+            mock.call(ctx, {uuids.instance1: claim(uuids.instance1),
+                            uuids.instance2: claim(uuids.instance2)},
+                      '1.28'),
+            mock.call(ctx, {uuids.instance3: claim(uuids.instance3)},
+                      '1.28')])
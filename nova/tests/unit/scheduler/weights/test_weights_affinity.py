@@ -157,3 +157,20 @@ class SoftAntiAffinityWeigherTestCase(SoftWeigherTestBase):
                       expected_weight=0.0,
                       expected_host='host2')
         self.assertEqual(1, mock_log.warning.call_count)
+
+
+class SoftAffinityWeigherVectorizedTestCase(SoftAffinityWeigherTestCase):
+    """Run the same tests weighing all the hosts at once."""
+
+    def setUp(self):
+        super(SoftAffinityWeigherVectorizedTestCase, self).setUp()
+        self.flags(vectorized_weighers=True, group='filter_scheduler')
+
+
+class SoftAntiAffinityWeigherVectorizedTestCase(
+        SoftAntiAffinityWeigherTestCase):
+    """Run the same tests weighing all the hosts at once."""
+
+    def setUp(self):
+        super(SoftAntiAffinityWeigherVectorizedTestCase, self).setUp()
+        self.flags(vectorized_weighers=True, group='filter_scheduler')
@@ -55,3 +55,11 @@ class BuildFailureWeigherTestCase(test.NoDBTestCase):
         weighed_hosts = self._get_weighed_host(hosts)
         self.assertEqual([0, -10, -100, -1000],
                          [wh.weight for wh in weighed_hosts])
+
+
+class BuildFailureWeigherVectorizedTestCase(BuildFailureWeigherTestCase):
+    """Run the same tests weighing all the hosts at once."""
+
+    def setUp(self):
+        super(BuildFailureWeigherVectorizedTestCase, self).setUp()
+        self.flags(vectorized_weighers=True, group='filter_scheduler')
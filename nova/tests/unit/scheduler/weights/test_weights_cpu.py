@@ -127,3 +127,11 @@ class CPUWeigherTestCase(test.NoDBTestCase):
         weighed_host = weights[-1]
         self.assertEqual(0, weighed_host.weight)
         self.assertEqual('negative', weighed_host.obj.host)
+
+
+class CPUWeigherVectorizedTestCase(CPUWeigherTestCase):
+    """Run the same tests weighing all the hosts at once."""
+
+    def setUp(self):
+        super(CPUWeigherVectorizedTestCase, self).setUp()
+        self.flags(vectorized_weighers=True, group='filter_scheduler')
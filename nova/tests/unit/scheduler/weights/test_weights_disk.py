@@ -109,3 +109,11 @@ class DiskWeigherTestCase(test.NoDBTestCase):
         weighed_host = weights[-1]
         self.assertEqual(0, weighed_host.weight)
         self.assertEqual('negative', weighed_host.obj.host)
+
+
+class DiskWeigherVectorizedTestCase(DiskWeigherTestCase):
+    """Run the same tests weighing all the hosts at once."""
+
+    def setUp(self):
+        super(DiskWeigherVectorizedTestCase, self).setUp()
+        self.flags(vectorized_weighers=True, group='filter_scheduler')
@@ -16,6 +16,9 @@
 Tests For Scheduler weights.
 """
 
+import mock
+
+from nova import objects
 from nova.scheduler import weights
 from nova.scheduler.weights import affinity
 from nova.scheduler.weights import io_ops
@@ -41,3 +44,60 @@ class TestWeighedHost(test.NoDBTestCase):
         self.assertIn(io_ops.IoOpsWeigher, classes)
         self.assertIn(affinity.ServerGroupSoftAffinityWeigher, classes)
         self.assertIn(affinity.ServerGroupSoftAntiAffinityWeigher, classes)
+
+
+class TestVectorizedWeighing(test.NoDBTestCase):
+    def setUp(self):
+        super(TestVectorizedWeighing, self).setUp()
+        self.weight_handler = weights.HostWeightHandler()
+        self.hosts = [
+            fakes.FakeHostState('host%d' % i, 'node%d' % i,
+                                {'free_ram_mb': free_ram_mb,
+                                 'num_io_ops': num_io_ops,
+                                 'instances': {}})
+            for i, (free_ram_mb, num_io_ops) in enumerate(
+                [(512, 2), (8192, 8), (-1024, 0), (8192, 8), (3072, 1)])]
+        self.request_spec = objects.RequestSpec(instance_group=None)
+
+    def _get_weighed_hosts(self, weighers):
+        return self.weight_handler.get_weighed_objects(
+            weighers, self.hosts, self.request_spec)
+
+    def test_same_result_as_per_host(self):
+        self.flags(io_ops_weight_multiplier=2.0, group='filter_scheduler')
+        expected = self._get_weighed_hosts(
+            [ram.RAMWeigher(), io_ops.IoOpsWeigher(),
+             affinity.ServerGroupSoftAffinityWeigher()])
+        self.flags(vectorized_weighers=True, group='filter_scheduler')
+        result = self._get_weighed_hosts(
+            [ram.RAMWeigher(), io_ops.IoOpsWeigher(),
+             affinity.ServerGroupSoftAffinityWeigher()])
+        self.assertEqual([(w.obj, w.weight) for w in expected],
+                         [(w.obj, w.weight) for w in result])
+        # Hosts with equal weights keep their original order.
+        self.assertEqual(['host1', 'host3'],
+                         [w.obj.host for w in result[:2]])
+
+    @mock.patch.object(metrics.MetricsWeigher, 'weigh_objects')
+    def test_default_weigh_hosts(self, mock_weigh):
+        self.flags(vectorized_weighers=True, group='filter_scheduler')
+        weigher = metrics.MetricsWeigher()
+        weigher.minval = 1
+        weigher.maxval = 5
+        mock_weigh.return_value = [1, 5, 3, 2, 4]
+        result = self._get_weighed_hosts([weigher])
+        self.assertEqual(['host1', 'host4', 'host2', 'host3', 'host0'],
+                         [w.obj.host for w in result])
+        self.assertEqual([1.0, 0.75, 0.5, 0.25, 0.0],
+                         [w.weight for w in result])
+        weighed_objs = mock_weigh.call_args[0][0]
+        self.assertEqual(self.hosts, [w.obj for w in weighed_objs])
+
+    def test_one_host(self):
+        self.flags(vectorized_weighers=True, group='filter_scheduler')
+        with mock.patch.object(ram.RAMWeigher, 'weigh_hosts') as mock_weigh:
+            result = self.weight_handler.get_weighed_objects(
+                [ram.RAMWeigher()], self.hosts[:1], self.request_spec)
+        self.assertFalse(mock_weigh.called)
+        self.assertEqual([(self.hosts[0], 0.0)],
+                         [(w.obj, w.weight) for w in result])
@@ -67,3 +67,11 @@ class IoOpsWeigherTestCase(test.NoDBTestCase):
         self._do_test(io_ops_weight_multiplier=2.0,
                       expected_weight=2.0,
                       expected_host='host4')
+
+
+class IoOpsWeigherVectorizedTestCase(IoOpsWeigherTestCase):
+    """Run the same tests weighing all the hosts at once."""
+
+    def setUp(self):
+        super(IoOpsWeigherVectorizedTestCase, self).setUp()
+        self.flags(vectorized_weighers=True, group='filter_scheduler')
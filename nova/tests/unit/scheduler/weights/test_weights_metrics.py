@@ -181,3 +181,11 @@ class MetricsWeigherTestCase(test.NoDBTestCase):
         self.flags(required=False, group='metrics')
         setting = [idle + '=0.0001', user + '=-1']
         self._do_test(setting, 1.0, 'host5')
+
+
+class MetricsWeigherVectorizedTestCase(MetricsWeigherTestCase):
+    """Run the same tests weighing all the hosts at once."""
+
+    def setUp(self):
+        super(MetricsWeigherVectorizedTestCase, self).setUp()
+        self.flags(vectorized_weighers=True, group='filter_scheduler')
@@ -169,3 +169,11 @@ class PCIWeigherTestCase(test.NoDBTestCase):
         for weighed_host in weighed_hosts:
             # the weigher normalizes all weights to 0 if they're all equal
             self.assertEqual(0.0, weighed_host.weight)
+
+
+class PCIWeigherVectorizedTestCase(PCIWeigherTestCase):
+    """Run the same tests weighing all the hosts at once."""
+
+    def setUp(self):
+        super(PCIWeigherVectorizedTestCase, self).setUp()
+        self.flags(vectorized_weighers=True, group='filter_scheduler')
@@ -16,6 +16,8 @@
 """Unit Tests for network code."""
 
 import mock
+from oslo_concurrency.fixture import lockutils as lock_fixture
+from oslo_concurrency import processutils
 import six
 
 from nova.network import linux_net
@@ -87,6 +89,7 @@ class IptablesManagerTestCase(test.NoDBTestCase):
 
     def setUp(self):
         super(IptablesManagerTestCase, self).setUp()
+        self.useFixture(lock_fixture.ExternalLockFixture())
         self.manager = linux_net.IptablesManager()
 
     def test_duplicate_rules_no_dirty(self):
@@ -274,3 +277,153 @@ class IptablesManagerTestCase(test.NoDBTestCase):
                                                self.manager.ipv4['filter'],
                                                'filter')
         self.assertEqual(current_lines, new_lines)
+
+    def _apply_with_execute(self, execute):
+        self.flags(iptables_incremental_apply=True)
+        self.manager.execute = execute
+        self.manager.apply()
+
+    def _restore_calls(self, execute):
+        return [c for c in execute.call_args_list
+                if c[0][0] == 'iptables-restore']
+
+    def test_apply_incremental_first_apply_is_full(self):
+        execute = mock.Mock(return_value=('', ''))
+        self._apply_with_execute(execute)
+
+        execute.assert_any_call('iptables-save', '-c', run_as_root=True,
+                                attempts=5)
+        restores = self._restore_calls(execute)
+        self.assertEqual(1, len(restores))
+        self.assertEqual(('iptables-restore', '-c'), restores[0][0])
+        for table in six.itervalues(self.manager.ipv4):
+            self.assertFalse(table.dirty)
+            self.assertIsNotNone(table.applied)
+
+    def test_apply_incremental_changed_chains(self):
+        table = self.manager.ipv4['filter']
+        table.add_chain('inst-1')
+        table.add_rule('inst-1', '-j DROP')
+        self._apply_with_execute(mock.Mock(return_value=('', '')))
+
+        table.add_chain('inst-2')
+        table.add_rule('inst-2', '-j ACCEPT')
+        table.add_rule('local', '-d 10.0.0.2 -j $inst-2')
+        table.remove_chain('inst-1')
+        execute = mock.Mock(return_value=('', ''))
+        self._apply_with_execute(execute)
+
+        expected = ['*filter',
+                    ':%s-inst-2 - [0:0]' % self.binary_name,
+                    ':%s-local - [0:0]' % self.binary_name,
+                    ':%s-inst-1 - [0:0]' % self.binary_name,
+                    '[0:0] -A %s-inst-2 -j ACCEPT' % self.binary_name,
+                    '[0:0] -A %s-local -d 10.0.0.2 -j %s-inst-2' % (
+                        self.binary_name, self.binary_name),
+                    '-X %s-inst-1' % self.binary_name,
+                    'COMMIT']
+        execute.assert_called_once_with(
+            'iptables-restore', '-c', '--noflush', run_as_root=True,
+            process_input=six.b('\n'.join(expected)), attempts=5)
+        self.assertFalse(table.dirty)
+
+    def test_apply_incremental_nothing_changed(self):
+        self._apply_with_execute(mock.Mock(return_value=('', '')))
+
+        table = self.manager.ipv4['filter']
+        table.add_rule('INPUT', '-j DROP')
+        table.remove_rule('INPUT', '-j DROP')
+        execute = mock.Mock(return_value=('', ''))
+        self._apply_with_execute(execute)
+
+        self.assertFalse(execute.called)
+        self.assertFalse(table.dirty)
+
+    def test_apply_incremental_unwrapped_change_is_full(self):
+        self._apply_with_execute(mock.Mock(return_value=('', '')))
+
+        self.manager.ipv4['filter'].add_rule('FORWARD', '-j DROP',
+                                             wrap=False)
+        execute = mock.Mock(return_value=('', ''))
+        self._apply_with_execute(execute)
+
+        restores = self._restore_calls(execute)
+        self.assertEqual(1, len(restores))
+        self.assertEqual(('iptables-restore', '-c'), restores[0][0])
+
+    def test_apply_incremental_failure_falls_back_to_full(self):
+        self._apply_with_execute(mock.Mock(return_value=('', '')))
+
+        self.manager.ipv4['filter'].add_rule('INPUT', '-j DROP')
+
+        def fake_execute(*cmd, **kwargs):
+            if '--noflush' in cmd:
+                raise processutils.ProcessExecutionError()
+            return '', ''
+
+        execute = mock.Mock(side_effect=fake_execute)
+        self._apply_with_execute(execute)
+
+        restores = self._restore_calls(execute)
+        self.assertEqual(2, len(restores))
+        self.assertEqual(('iptables-restore', '-c'), restores[1][0])
+        self.assertFalse(self.manager.ipv4['filter'].dirty)
+
+
+class IpsetManagerTestCase(test.NoDBTestCase):
+
+    def setUp(self):
+        super(IpsetManagerTestCase, self).setUp()
+        self.execute = mock.Mock(return_value=('', ''))
+        self.manager = linux_net.IpsetManager(execute=self.execute)
+
+    def test_set_members_new_set(self):
+        self.manager.set_members('nova-sg1-v4', 4, ['10.0.0.2', '10.0.0.1'])
+
+        expected = ['create nova-sg1-v4 hash:ip family inet -exist',
+                    'create nova-sg1-v4-new hash:ip family inet -exist',
+                    'flush nova-sg1-v4-new',
+                    'add nova-sg1-v4-new 10.0.0.1',
+                    'add nova-sg1-v4-new 10.0.0.2',
+                    'swap nova-sg1-v4-new nova-sg1-v4',
+                    'destroy nova-sg1-v4-new']
+        self.execute.assert_called_once_with(
+            'ipset', 'restore', run_as_root=True,
+            process_input=six.b('\n'.join(expected) + '\n'))
+        self.assertEqual({'nova-sg1-v4': set(['10.0.0.1', '10.0.0.2'])},
+                         self.manager.sets)
+
+    def test_set_members_existing_set(self):
+        self.manager.sets['nova-sg1-v6'] = set(['fe80::1', 'fe80::2'])
+
+        self.manager.set_members('nova-sg1-v6', 6, ['fe80::2', 'fe80::3'])
+
+        expected = ['add nova-sg1-v6 fe80::3 -exist',
+                    'del nova-sg1-v6 fe80::1 -exist']
+        self.execute.assert_called_once_with(
+            'ipset', 'restore', run_as_root=True,
+            process_input=six.b('\n'.join(expected) + '\n'))
+
+    def test_set_members_unchanged(self):
+        self.manager.sets['nova-sg1-v4'] = set(['10.0.0.1'])
+
+        self.manager.set_members('nova-sg1-v4', 4, ['10.0.0.1'])
+
+        self.assertFalse(self.execute.called)
+
+    def test_destroy_set(self):
+        self.manager.sets['nova-sg1-v4'] = set()
+
+        self.assertTrue(self.manager.destroy_set('nova-sg1-v4'))
+
+        self.execute.assert_called_once_with('ipset', 'destroy',
+                                             'nova-sg1-v4', run_as_root=True)
+        self.assertEqual({}, self.manager.sets)
+
+    def test_destroy_set_in_use(self):
+        self.manager.sets['nova-sg1-v4'] = set()
+        self.execute.side_effect = processutils.ProcessExecutionError()
+
+        self.assertFalse(self.manager.destroy_set('nova-sg1-v4'))
+
+        self.assertIn('nova-sg1-v4', self.manager.sets)
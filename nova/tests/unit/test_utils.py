@@ -1323,6 +1323,37 @@ class GetEndpointTestCase(test.NoDBTestCase):
         self.assertEqual('public', self.adap.interface)
 
 
+class ConnectionPoolTestCase(test.NoDBTestCase):
+    def setUp(self):
+        super(ConnectionPoolTestCase, self).setUp()
+        self.sess = ks_session.Session()
+
+    def test_set_connection_pool_size(self):
+        utils.set_connection_pool_size(self.sess, 42)
+        for scheme in ('http://', 'https://'):
+            adapter = self.sess.session.adapters[scheme]
+            self.assertIsInstance(adapter, ks_session.TCPKeepAliveAdapter)
+            self.assertEqual(42, adapter._pool_maxsize)
+
+    def test_get_connection_pool_stats(self):
+        utils.set_connection_pool_size(self.sess, 5)
+        adapter = self.sess.session.adapters['https://']
+        pool = adapter.poolmanager.connection_from_url(
+            'https://neutron.example.com:9696')
+        # Open a connection, without connecting it, and return it to the
+        # pool as a request would.
+        pool._put_conn(pool._get_conn())
+        pool.num_requests = 4
+
+        self.assertEqual(
+            {'https://neutron.example.com:9696': {
+                'connections': 1, 'requests': 4, 'idle': 1, 'size': 5}},
+            utils.get_connection_pool_stats(self.sess))
+
+    def test_get_connection_pool_stats_no_session(self):
+        self.assertEqual({}, utils.get_connection_pool_stats(None))
+
+
 class RunOnceTests(test.NoDBTestCase):
 
     fake_logger = mock.MagicMock()
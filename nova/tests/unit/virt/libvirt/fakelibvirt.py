@@ -43,6 +43,14 @@ VIR_DOMAIN_SHUTDOWN = 4
 VIR_DOMAIN_SHUTOFF = 5
 VIR_DOMAIN_CRASHED = 6
 
+# virDomainStatsTypes
+VIR_DOMAIN_STATS_STATE = 1
+VIR_DOMAIN_STATS_CPU_TOTAL = 2
+VIR_DOMAIN_STATS_BALLOON = 4
+VIR_DOMAIN_STATS_VCPU = 8
+VIR_DOMAIN_STATS_INTERFACE = 16
+VIR_DOMAIN_STATS_BLOCK = 32
+
 # NOTE(mriedem): These values come from include/libvirt/libvirt-domain.h
 VIR_DOMAIN_XML_SECURE = 1
 VIR_DOMAIN_XML_INACTIVE = 2
@@ -701,6 +709,10 @@ class Domain(object):
                     elif nic_info['type'] == 'bridge':
                         nic_info['source'] = source.get('bridge')
 
+                target = nic.find('./target')
+                if target is not None:
+                    nic_info['target_dev'] = target.get('dev')
+
                 nics_info += [nic_info]
 
             devices['nics'] = nics_info
@@ -752,6 +764,38 @@ class Domain(object):
     def blockStats(self, device):
         return [2, 10000242400, 234, 2343424234, 34]
 
+    def _get_stats(self, stats):
+        record = {}
+        if stats & VIR_DOMAIN_STATS_STATE:
+            record['state.state'] = self._state
+            record['state.reason'] = 0
+        if stats & VIR_DOMAIN_STATS_CPU_TOTAL:
+            record['cpu.time'] = 123456789
+        if stats & VIR_DOMAIN_STATS_BALLOON:
+            record['balloon.current'] = int(self._def['memory'])
+            record['balloon.maximum'] = int(self._def['memory'])
+        devices = self._def['devices']
+        if stats & VIR_DOMAIN_STATS_INTERFACE:
+            nics = devices.get('nics', [])
+            record['net.count'] = len(nics)
+            for i, nic in enumerate(nics):
+                values = self.interfaceStats(nic.get('target_dev'))
+                record['net.%d.name' % i] = nic.get('target_dev')
+                for field, value in zip(('rx.bytes', 'rx.pkts', 'rx.errs',
+                                         'rx.drop', 'tx.bytes', 'tx.pkts',
+                                         'tx.errs', 'tx.drop'), values):
+                    record['net.%d.%s' % (i, field)] = value
+        if stats & VIR_DOMAIN_STATS_BLOCK:
+            disks = devices.get('disks', [])
+            record['block.count'] = len(disks)
+            for i, disk in enumerate(disks):
+                values = self.blockStats(disk.get('target_dev'))
+                record['block.%d.name' % i] = disk.get('target_dev')
+                for field, value in zip(('rd.reqs', 'rd.bytes', 'wr.reqs',
+                                         'wr.bytes', 'errors'), values):
+                    record['block.%d.%s' % (i, field)] = value
+        return record
+
     def setTime(self, time=None, flags=0):
         pass
 
@@ -1086,6 +1130,9 @@ class Connection(object):
                 error_code=VIR_ERR_NO_DOMAIN,
                 error_domain=VIR_FROM_QEMU)
 
+    def getAllDomainStats(self, stats=0, flags=0):
+        return [(vm, vm._get_stats(stats)) for vm in self._vms.values()]
+
     def listAllDomains(self, flags=None):
         vms = []
         for vm in self._vms.values():
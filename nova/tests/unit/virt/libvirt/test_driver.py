@@ -7328,6 +7328,21 @@ class LibvirtConnTestCase(test.NoDBTestCase,
         self.assertEqual(uuids[3], vm4.UUIDString())
         mock_list.assert_called_with(only_guests=True, only_running=False)
 
+    @mock.patch.object(host.Host, "get_all_domain_stats")
+    def test_get_power_states(self, mock_stats):
+        mock_stats.return_value = {
+            uuids.vm1: host.DomainStats(
+                {'state.state': libvirt_guest.VIR_DOMAIN_RUNNING}),
+            uuids.vm2: host.DomainStats(
+                {'state.state': libvirt_guest.VIR_DOMAIN_SHUTOFF}),
+        }
+        drvr = libvirt_driver.LibvirtDriver(fake.FakeVirtAPI(), False)
+        self.assertEqual({uuids.vm1: power_state.RUNNING,
+                          uuids.vm2: power_state.SHUTDOWN},
+                         drvr.get_power_states())
+        mock_stats.assert_called_once_with(
+            fakelibvirt.VIR_DOMAIN_STATS_STATE)
+
     @mock.patch('nova.virt.libvirt.host.Host.get_online_cpus',
                 return_value=None)
     @mock.patch('nova.virt.libvirt.host.Host.get_cpu_count',
@@ -21133,35 +21148,56 @@ class LibvirtVolumeUsageTestCase(test.NoDBTestCase):
                      {'volume_id': 2,
                       'device_name': 'vda'}]
 
-    def test_get_all_volume_usage(self):
-        with mock.patch.object(
-                self.drvr, 'block_stats',
-                return_value=(169, 688640, 0, 0, -1)) as mock_block_stats:
-            vol_usage = self.drvr.get_all_volume_usage(
-                self.c, [dict(instance=self.ins_ref, instance_bdms=self.bdms)])
+    @mock.patch.object(host.Host, 'get_all_domain_stats')
+    def test_get_all_volume_usage(self, mock_stats):
+        mock_stats.return_value = {
+            self.ins_ref.uuid: host.DomainStats({
+                'block.count': 2,
+                'block.0.name': 'vda',
+                'block.0.rd.reqs': 169,
+                'block.0.rd.bytes': 688640,
+                'block.0.wr.reqs': 0,
+                'block.0.wr.bytes': 0,
+                'block.1.name': 'vde',
+                'block.1.rd.reqs': 170,
+                'block.1.rd.bytes': 688641,
+                'block.1.wr.reqs': 1,
+                'block.1.wr.bytes': 2})}
+        vol_usage = self.drvr.get_all_volume_usage(
+            self.c, [dict(instance=self.ins_ref, instance_bdms=self.bdms)])
 
         expected_usage = [{'volume': 1,
                            'instance': self.ins_ref,
-                           'rd_bytes': 688640, 'wr_req': 0,
-                           'rd_req': 169, 'wr_bytes': 0},
+                           'rd_bytes': 688641, 'wr_req': 1,
+                           'rd_req': 170, 'wr_bytes': 2},
                            {'volume': 2,
                             'instance': self.ins_ref,
                             'rd_bytes': 688640, 'wr_req': 0,
                             'rd_req': 169, 'wr_bytes': 0}]
         self.assertEqual(vol_usage, expected_usage)
-        self.assertEqual(2, mock_block_stats.call_count)
-        mock_block_stats.assert_has_calls([
-            mock.call(self.ins_ref, 'vde'), mock.call(self.ins_ref, 'vda')])
+        mock_stats.assert_called_once_with(
+            fakelibvirt.VIR_DOMAIN_STATS_BLOCK)
 
-    @mock.patch.object(host.Host, '_get_domain',
-                       side_effect=exception.InstanceNotFound(
-                           instance_id='fakedom'))
-    def test_get_all_volume_usage_device_not_found(self, mock_get_domain):
+    @mock.patch.object(host.Host, 'get_all_domain_stats', return_value={})
+    def test_get_all_volume_usage_device_not_found(self, mock_stats):
         vol_usage = self.drvr.get_all_volume_usage(self.c,
               [dict(instance=self.ins_ref, instance_bdms=self.bdms)])
         self.assertEqual(vol_usage, [])
-        self.assertEqual(2, mock_get_domain.call_count)
-        mock_get_domain.assert_has_calls([mock.call(self.ins_ref)] * 2)
+        mock_stats.assert_called_once_with(
+            fakelibvirt.VIR_DOMAIN_STATS_BLOCK)
+
+    @mock.patch.object(host.Host, 'get_all_domain_stats',
+                       side_effect=fakelibvirt.libvirtError('error'))
+    def test_get_all_volume_usage_libvirt_error(self, mock_stats):
+        vol_usage = self.drvr.get_all_volume_usage(self.c,
+              [dict(instance=self.ins_ref, instance_bdms=self.bdms)])
+        self.assertEqual([], vol_usage)
+
+    @mock.patch.object(host.Host, 'get_all_domain_stats')
+    def test_get_all_volume_usage_no_bdms(self, mock_stats):
+        vol_usage = self.drvr.get_all_volume_usage(self.c, [])
+        self.assertEqual([], vol_usage)
+        mock_stats.assert_not_called()
 
 
 class LibvirtNonblockingTestCase(test.NoDBTestCase):
@@ -22,6 +22,7 @@ from oslo_utils import uuidutils
 import six
 import testtools
 
+from nova.compute import power_state
 from nova.compute import vm_states
 from nova import exception
 from nova import objects
@@ -508,6 +509,67 @@ class HostTestCase(test.NoDBTestCase):
 
         fake_lookup.assert_called_once_with(uuid)
 
+    @mock.patch.object(fakelibvirt.Connection, "getAllDomainStats")
+    def test_get_all_domain_stats(self, mock_get_stats):
+        vm0 = FakeVirtDomain(id=0, name="Domain-0")  # Xen dom-0
+        vm1 = FakeVirtDomain(id=3, name="instance00000001")
+        vm2 = FakeVirtDomain(name="instance00000002")
+        mock_get_stats.return_value = [
+            (vm0, {'state.state': fakelibvirt.VIR_DOMAIN_RUNNING}),
+            (vm1, {'state.state': fakelibvirt.VIR_DOMAIN_RUNNING,
+                   'block.count': 2,
+                   'block.0.name': 'vda',
+                   'block.0.rd.reqs': 1,
+                   'block.0.rd.bytes': 2,
+                   'block.0.wr.reqs': 3,
+                   'block.0.wr.bytes': 4,
+                   'block.0.errors': 0,
+                   'block.1.name': 'vdb',
+                   'block.1.rd.reqs': 5}),
+            (vm2, {'state.state': fakelibvirt.VIR_DOMAIN_SHUTOFF}),
+        ]
+
+        stats = self.host.get_all_domain_stats(
+            fakelibvirt.VIR_DOMAIN_STATS_STATE |
+            fakelibvirt.VIR_DOMAIN_STATS_BLOCK)
+
+        mock_get_stats.assert_called_once_with(
+            fakelibvirt.VIR_DOMAIN_STATS_STATE |
+            fakelibvirt.VIR_DOMAIN_STATS_BLOCK)
+        self.assertEqual(set([vm1.UUIDString(), vm2.UUIDString()]),
+                         set(stats))
+        vm1_stats = stats[vm1.UUIDString()]
+        self.assertEqual(power_state.RUNNING, vm1_stats.state)
+        self.assertEqual({'vda': (1, 2, 3, 4, 0),
+                          'vdb': (5, -1, -1, -1, -1)},
+                         vm1_stats.get_block_stats())
+        vm2_stats = stats[vm2.UUIDString()]
+        self.assertEqual(power_state.SHUTDOWN, vm2_stats.state)
+        self.assertEqual({}, vm2_stats.get_block_stats())
+
+    def test_get_all_domain_stats_fake_connection(self):
+        xml = """<domain type='kvm'>
+                   <name>instance00000001</name>
+                   <uuid>%s</uuid>
+                   <memory>2097152</memory>
+                   <devices>
+                     <disk type='file'>
+                       <source file='filename'/>
+                       <target dev='vda' bus='virtio'/>
+                     </disk>
+                   </devices>
+                 </domain>""" % uuids.instance
+        self.host.get_connection().defineXML(xml)
+
+        stats = self.host.get_all_domain_stats(
+            fakelibvirt.VIR_DOMAIN_STATS_STATE |
+            fakelibvirt.VIR_DOMAIN_STATS_BLOCK)
+
+        self.assertEqual([uuids.instance], list(stats))
+        self.assertEqual(power_state.SHUTDOWN, stats[uuids.instance].state)
+        self.assertEqual({'vda': (2, 10000242400, 234, 2343424234, 34)},
+                         stats[uuids.instance].get_block_stats())
+
     @mock.patch.object(fakelibvirt.Connection, "listAllDomains")
     def test_list_instance_domains(self, mock_list_all):
         vm0 = FakeVirtDomain(id=0, name="Domain-0")  # Xen dom-0
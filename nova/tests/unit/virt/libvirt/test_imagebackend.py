@@ -23,6 +23,7 @@ import fixtures
 import mock
 from oslo_concurrency import lockutils
 from oslo_config import fixture as config_fixture
+from oslo_utils.fixture import uuidsentinel as uuids
 from oslo_utils import imageutils
 from oslo_utils import units
 from oslo_utils import uuidutils
@@ -276,6 +277,36 @@ class FlatTestCase(_ImageTestCase, test.NoDBTestCase):
 
         mock_exists.assert_has_calls(exist_calls)
 
+    @mock.patch.object(imagebackend.imagecache, 'record_cache_lookup')
+    @mock.patch.object(os.path, 'exists')
+    def test_cache_records_lookup(self, mock_exists, mock_record):
+        self.stub_out('nova.virt.libvirt.imagebackend.Flat.correct_format',
+                      lambda _: None)
+        fn = mock.MagicMock()
+        image = self.image_class(self.INSTANCE, self.NAME)
+        self.mock_create_image(image)
+
+        # The template has to be fetched
+        mock_exists.side_effect = [True, False, False]
+        image.cache(fn, self.TEMPLATE, image_id=uuids.image)
+        fn.assert_called_once_with(target=self.TEMPLATE_PATH,
+                                   image_id=uuids.image)
+        mock_record.assert_called_once_with(hit=False)
+
+        # The template was fetched by a concurrent request
+        fn.reset_mock()
+        mock_record.reset_mock()
+        mock_exists.side_effect = [True, False, True]
+        image.cache(fn, self.TEMPLATE, image_id=uuids.image)
+        fn.assert_not_called()
+        mock_record.assert_called_once_with(hit=True)
+
+        # Generated templates are not counted
+        mock_record.reset_mock()
+        mock_exists.side_effect = [True, False, False]
+        image.cache(fn, self.TEMPLATE)
+        mock_record.assert_not_called()
+
     @mock.patch('os.path.exists')
     def test_cache_generating_resize(self, mock_path_exists):
         # Test for bug 1608934
@@ -16,6 +16,7 @@
 
 import contextlib
 import os
+import struct
 import time
 
 import mock
@@ -29,6 +30,7 @@ from six.moves import cStringIO
 from nova.compute import manager as compute_manager
 import nova.conf
 from nova import context
+from nova import exception
 from nova import objects
 from nova import test
 from nova.tests.unit import fake_instance
@@ -237,6 +239,141 @@ class ImageCacheManagerTestCase(test.NoDBTestCase):
         self.assertRaises(processutils.ProcessExecutionError,
                           image_cache_manager._list_backing_images)
 
+    @mock.patch('nova.virt.libvirt.utils.get_disk_backing_file')
+    def test_list_backing_images_index(self, mock_backing):
+        backing_files = {uuids.instance_1: 'e97222e91fc4241f49a7f520d1dcf4'
+                                           '46751129b3',
+                         uuids.instance_2: 'a9993e364706816aba3e25717850c2'
+                                           '6c9cd0d89d'}
+        mock_backing.side_effect = lambda path: backing_files[
+            os.path.basename(os.path.dirname(path))]
+
+        with utils.tempdir() as tmpdir:
+            self.flags(instances_path=tmpdir)
+            for instance_dir in backing_files:
+                os.mkdir(os.path.join(tmpdir, instance_dir))
+                with open(os.path.join(tmpdir, instance_dir, 'disk'), 'w'):
+                    pass
+            expected = sorted(
+                os.path.join(tmpdir, '_base', backing_file)
+                for backing_file in backing_files.values())
+
+            image_cache_manager = imagecache.ImageCacheManager()
+            image_cache_manager.instance_names = set(backing_files)
+            self.assertEqual(
+                expected, sorted(image_cache_manager._list_backing_images()))
+            self.assertEqual(2, mock_backing.call_count)
+
+            # A later pass, even from another host sharing the instances
+            # path, uses the index rather than inspecting the disks again.
+            mock_backing.reset_mock()
+            image_cache_manager = imagecache.ImageCacheManager()
+            image_cache_manager.instance_names = set(backing_files)
+            self.assertEqual(
+                expected, sorted(image_cache_manager._list_backing_images()))
+            mock_backing.assert_not_called()
+
+            # Only the disks which were recreated are inspected again.
+            image_cache_manager.invalidate_instance(
+                objects.Instance(uuid=uuids.instance_1))
+            self.assertEqual(
+                expected, sorted(image_cache_manager._list_backing_images()))
+            mock_backing.assert_called_once_with(
+                os.path.join(tmpdir, uuids.instance_1, 'disk'))
+
+            mock_backing.reset_mock()
+            image_cache_manager._list_backing_images()
+            mock_backing.assert_not_called()
+
+    @mock.patch('nova.virt.libvirt.utils.get_disk_backing_file',
+                return_value='e97222e91fc4241f49a7f520d1dcf446751129b3')
+    def test_list_backing_images_index_mismatch(self, mock_backing):
+        with utils.tempdir() as tmpdir:
+            self.flags(instances_path=tmpdir)
+            disk_path = os.path.join(tmpdir, uuids.instance, 'disk')
+            os.mkdir(os.path.dirname(disk_path))
+            with open(disk_path, 'w'):
+                pass
+            inode = os.stat(disk_path).st_ino
+
+            image_cache_manager = imagecache.ImageCacheManager()
+            image_cache_manager.instance_names = set([uuids.instance])
+            for entry in ([inode + 1, 'stale'],
+                          [inode, 0, 0, 'stale']):
+                mock_backing.reset_mock()
+                image_cache_manager._save_backing_index(
+                    {uuids.instance: entry})
+
+                self.assertEqual(
+                    [os.path.join(tmpdir, '_base',
+                                  mock_backing.return_value)],
+                    image_cache_manager._list_backing_images())
+                mock_backing.assert_called_once_with(disk_path)
+                self.assertEqual(
+                    {uuids.instance: [inode, mock_backing.return_value]},
+                    image_cache_manager._load_backing_index())
+
+    @staticmethod
+    def _write_qcow2(path, backing_file=None, version=3):
+        """Write the start of the header of a qcow2 image."""
+        with open(path, 'wb') as f:
+            if backing_file:
+                backing_file = backing_file.encode('utf-8')
+                f.write(struct.pack('>4sIQI', b'QFI\xfb', version, 512,
+                                    len(backing_file)))
+                f.seek(512)
+                f.write(backing_file)
+            else:
+                f.write(struct.pack('>4sIQI', b'QFI\xfb', version, 0, 0))
+
+    def test_read_qcow2_backing_file(self):
+        with utils.tempdir() as tmpdir:
+            path = os.path.join(tmpdir, 'disk')
+            self._write_qcow2(path, '/instances/_base/%s' % uuids.image)
+            self.assertEqual('/instances/_base/%s' % uuids.image,
+                             imagecache.read_qcow2_backing_file(path))
+
+            self._write_qcow2(path, 'relative', version=2)
+            self.assertEqual('relative',
+                             imagecache.read_qcow2_backing_file(path))
+
+            self._write_qcow2(path)
+            self.assertIsNone(imagecache.read_qcow2_backing_file(path))
+
+    def test_read_qcow2_backing_file_invalid(self):
+        with utils.tempdir() as tmpdir:
+            path = os.path.join(tmpdir, 'disk')
+            for data in (b'', b'raw disk' * 10,
+                         struct.pack('>4sIQI', b'QFI\xfb', 4, 0, 0),
+                         struct.pack('>4sIQI', b'QFI\xfb', 3, 512, 2048),
+                         struct.pack('>4sIQI', b'QFI\xfb', 3, 512, 10)):
+                with open(path, 'wb') as f:
+                    f.write(data)
+                self.assertRaises(ValueError,
+                                  imagecache.read_qcow2_backing_file, path)
+
+    @mock.patch('nova.virt.libvirt.utils.get_disk_backing_file')
+    def test_list_backing_images_qcow2(self, mock_backing):
+        with utils.tempdir() as tmpdir:
+            self.flags(instances_path=tmpdir)
+            disk_path = os.path.join(tmpdir, uuids.instance, 'disk')
+            os.mkdir(os.path.dirname(disk_path))
+            self._write_qcow2(disk_path, os.path.join(tmpdir, '_base', 'a'))
+
+            image_cache_manager = imagecache.ImageCacheManager()
+            image_cache_manager.instance_names = set([uuids.instance])
+            self.assertEqual([os.path.join(tmpdir, '_base', 'a')],
+                             image_cache_manager._list_backing_images())
+
+            # A disk rebased in place is seen by the next pass
+            self._write_qcow2(disk_path, os.path.join(tmpdir, '_base', 'b'))
+            self.assertEqual([os.path.join(tmpdir, '_base', 'b')],
+                             image_cache_manager._list_backing_images())
+
+            # qcow2 disks are neither inspected by qemu-img nor indexed
+            mock_backing.assert_not_called()
+            self.assertEqual({}, image_cache_manager._load_backing_index())
+
     def test_find_base_file_nothing(self):
         self.stub_out('os.path.exists', lambda x: False)
 
@@ -617,6 +754,100 @@ class ImageCacheManagerTestCase(test.NoDBTestCase):
         image_cache_manager = imagecache.ImageCacheManager()
         image_cache_manager.update(None, [])
 
+    @mock.patch('nova.virt.libvirt.utils.fetch_image')
+    def test_precache_images(self, mock_fetch):
+        def fake_fetch(context, target, image_id):
+            if image_id == uuids.bad_image:
+                raise exception.ImageNotFound(image_id=image_id)
+            with open(target, 'w'):
+                pass
+
+        mock_fetch.side_effect = fake_fetch
+        with utils.tempdir() as tmpdir:
+            self.flags(instances_path=tmpdir)
+            self.flags(precache_images=[uuids.cached, uuids.bad_image,
+                                        uuids.new_image])
+            base_dir = os.path.join(tmpdir, '_base')
+            os.mkdir(base_dir)
+            cached_file = os.path.join(
+                base_dir, imagecache.get_cache_fname(uuids.cached))
+            with open(cached_file, 'w'):
+                pass
+
+            image_cache_manager = imagecache.ImageCacheManager()
+            image_cache_manager._precaching = True
+            image_cache_manager._precache_images(mock.sentinel.ctxt, base_dir)
+            self.assertFalse(image_cache_manager._precaching)
+
+            mock_fetch.assert_has_calls([
+                mock.call(mock.sentinel.ctxt, os.path.join(
+                    base_dir, imagecache.get_cache_fname(image_id)),
+                    image_id)
+                for image_id in (uuids.bad_image, uuids.new_image)])
+            self.assertEqual(2, mock_fetch.call_count)
+            self.assertTrue(os.path.exists(os.path.join(
+                base_dir, imagecache.get_cache_fname(uuids.new_image))))
+
+    @mock.patch.object(imagecache.ImageCacheManager,
+                       '_age_and_verify_swap_images')
+    @mock.patch.object(imagecache.ImageCacheManager,
+                       '_age_and_verify_cached_images')
+    @mock.patch.object(imagecache.ImageCacheManager,
+                       '_list_running_instances',
+                       return_value={'used_images': {},
+                                     'instance_names': set(),
+                                     'used_swap_images': set()})
+    @mock.patch('nova.utils.spawn_n')
+    def test_update_precache_images(self, mock_spawn, mock_list,
+                                    mock_verify, mock_verify_swap):
+        self.flags(precache_images=[uuids.image])
+        with utils.tempdir() as tmpdir:
+            self.flags(instances_path=tmpdir)
+            image_cache_manager = imagecache.ImageCacheManager()
+            image_cache_manager.update(mock.sentinel.ctxt, [])
+
+        # The images are fetched in the background
+        mock_spawn.assert_called_once_with(
+            image_cache_manager._precache_images, mock.sentinel.ctxt,
+            os.path.join(tmpdir, '_base'))
+        self.assertTrue(image_cache_manager._precaching)
+        mock_verify.assert_called_once_with(mock.sentinel.ctxt, [], mock.ANY)
+        # Pre-cached images must not be aged out of the cache
+        self.assertEqual({uuids.image: (0, 0, [])},
+                         image_cache_manager.used_images)
+
+    @mock.patch('nova.utils.spawn_n')
+    def test_start_precaching_images_still_running(self, mock_spawn):
+        self.flags(precache_images=[uuids.image])
+        with utils.tempdir() as tmpdir:
+            self.flags(instances_path=tmpdir)
+            image_cache_manager = imagecache.ImageCacheManager()
+            image_cache_manager._start_precaching_images(mock.sentinel.ctxt)
+            image_cache_manager._start_precaching_images(mock.sentinel.ctxt)
+
+        mock_spawn.assert_called_once_with(
+            image_cache_manager._precache_images, mock.sentinel.ctxt,
+            os.path.join(tmpdir, '_base'))
+
+    @mock.patch('nova.utils.spawn_n')
+    def test_start_precaching_images_rbd(self, mock_spawn):
+        self.flags(precache_images=[uuids.image])
+        self.flags(images_type='rbd', group='libvirt')
+        with utils.tempdir() as tmpdir:
+            self.flags(instances_path=tmpdir)
+            image_cache_manager = imagecache.ImageCacheManager()
+            image_cache_manager._start_precaching_images(mock.sentinel.ctxt)
+
+            self.assertFalse(os.path.exists(os.path.join(tmpdir, '_base')))
+        mock_spawn.assert_not_called()
+
+    def test_cache_stats(self):
+        imagecache.record_cache_lookup(hit=True)
+        imagecache.record_cache_lookup(hit=False)
+        imagecache.record_cache_lookup(hit=True)
+        self.assertEqual((3, 1), imagecache.pop_cache_stats())
+        self.assertEqual((0, 0), imagecache.pop_cache_stats())
+
     def test_is_valid_info_file(self):
         hashed = 'e97222e91fc4241f49a7f520d1dcf446751129b3'
 
@@ -621,7 +621,16 @@ disk size: 4.4M
                  '674736e3-f25c-405c-8362-bbf991e0ce0a'])
         libvirt_utils.fetch_image(context, target, image_id, trusted_certs)
         mock_images.assert_called_once_with(
-            context, image_id, target, trusted_certs)
+            context, image_id, target, trusted_certs, force_raw=True)
+
+    @mock.patch('nova.virt.images.fetch_to_raw')
+    def test_fetch_image_lvm(self, mock_images):
+        self.flags(images_type='lvm', group='libvirt')
+        libvirt_utils.fetch_image(mock.sentinel.context, '/tmp/targetfile',
+                                  '4')
+        mock_images.assert_called_once_with(
+            mock.sentinel.context, '4', '/tmp/targetfile', None,
+            force_raw=False)
 
     @mock.patch('nova.virt.images.fetch')
     def test_fetch_initrd_image(self, mock_images):
@@ -711,6 +720,13 @@ disk size: 4.4M
         self.assertEqual(self.executes, expected_commands)
         mock_convert_image.assert_not_called()
 
+        target = 't.qcow2'
+        self.executes = []
+        expected_commands = [('mv', 't.qcow2.part', 't.qcow2')]
+        images.fetch_to_raw(context, image_id, target, force_raw=False)
+        self.assertEqual(self.executes, expected_commands)
+        mock_convert_image.assert_not_called()
+
         target = 'backing.qcow2'
         self.executes = []
         expected_commands = [('rm', '-f', 'backing.qcow2.part')]
@@ -12,6 +12,7 @@
 
 
 import mock
+from oslo_utils.fixture import uuidsentinel as uuids
 
 from nova import exception
 from nova import objects
@@ -542,6 +543,63 @@ class TestIptablesFirewallDriver(test.NoDBTestCase):
         self.assertEqual(expected, v4_rules)
         self.assertEqual(expected, v6_rules)
 
+    @mock.patch('nova.objects.InstanceList.get_by_security_group')
+    @mock.patch('nova.objects.SecurityGroupRuleList.get_by_instance')
+    @mock.patch.object(_IPT_DRIVER_CLS, _FN_DO_DHCP_RULES)
+    @mock.patch.object(_IPT_DRIVER_CLS, _FN_DO_BASIC_RULES)
+    def test_instance_rules_grantee_group_ipset(self, _do_basic_mock,
+            _do_dhcp_mock, rule_list_mock, ins_list_mock):
+        self.flags(firewall_use_ipset=True)
+        self.driver.ipset = mock.Mock()
+        grantee = objects.SecurityGroup(id=5)
+        rule_list_mock.return_value = [
+            objects.SecurityGroupRule(cidr=None, grantee_group=grantee,
+                                      protocol='tcp', from_port=22,
+                                      to_port=22)]
+        insts = []
+        for address in ('10.0.1.4', '10.0.1.5'):
+            inst = mock.Mock()
+            inst.info_cache.deleted = False
+            inst.get_network_info.return_value.fixed_ips.return_value = [
+                {'address': address, 'version': 4}]
+            insts.append(inst)
+        ins_list_mock.return_value = insts
+        instance = objects.Instance(id=1)
+
+        v4_rules, v6_rules = self.driver.instance_rules(instance, [])
+
+        self.driver.ipset.set_members.assert_called_once_with(
+            'nova-sg5-v4', 4, ['10.0.1.4', '10.0.1.5'])
+        self.assertEqual(['-j ACCEPT -p tcp --dport 22 '
+                          '-m set --match-set nova-sg5-v4 src',
+                          '-j $sg-fallback'], v4_rules)
+        self.assertEqual(['-j $sg-fallback'], v6_rules)
+        self.assertEqual({1: set(['nova-sg5-v4'])},
+                         self.driver.instance_ipsets)
+
+    def test_destroy_unused_ipsets(self):
+        self.driver.ipset = mock.Mock(sets={'nova-sg1-v4': set(),
+                                            'nova-sg2-v4': set()})
+        self.driver.instance_info = {1: (mock.sentinel.inst, [])}
+        self.driver.instance_ipsets = {1: set(['nova-sg1-v4']),
+                                       2: set(['nova-sg2-v4'])}
+
+        self.driver.destroy_unused_ipsets()
+
+        self.driver.ipset.destroy_set.assert_called_once_with('nova-sg2-v4')
+        self.assertEqual({1: set(['nova-sg1-v4'])},
+                         self.driver.instance_ipsets)
+
+    def test_destroy_unused_ipsets_apply_deferred(self):
+        self.driver.ipset = mock.Mock(sets={'nova-sg1-v4': set()})
+        self.driver.iptables.defer_apply_on()
+        self.addCleanup(setattr, self.driver.iptables,
+                        'iptables_apply_deferred', False)
+
+        self.driver.destroy_unused_ipsets()
+
+        self.assertFalse(self.driver.ipset.destroy_set.called)
+
     def test_refresh_security_group_rules(self):
         self.driver.do_refresh_security_group_rules = mock.Mock()
         self.driver.iptables.apply = mock.Mock()
@@ -557,6 +615,159 @@ class TestIptablesFirewallDriver(test.NoDBTestCase):
         self.driver.do_refresh_instance_rules.assert_called_with('myinstance')
         self.driver.iptables.apply.assert_called()
 
+    @mock.patch('nova.utils.spawn_n')
+    def test_refresh_instance_security_rules_queued(self, spawn_mock):
+        self.flags(firewall_refresh_delay=0.5)
+        self.driver.do_refresh_instance_rules = mock.Mock()
+        inst1 = objects.Instance(id=1, uuid=uuids.inst1)
+        inst2 = objects.Instance(id=2, uuid=uuids.inst2)
+
+        self.driver.refresh_instance_security_rules(inst1)
+        self.driver.refresh_instance_security_rules(inst2)
+        self.driver.refresh_instance_security_rules(inst1)
+
+        spawn_mock.assert_called_once_with(
+            self.driver._refresh_queued_instances)
+        self.assertEqual({1: inst1, 2: inst2}, self.driver._refresh_queue)
+        self.assertFalse(self.driver.do_refresh_instance_rules.called)
+
+    @mock.patch('eventlet.greenthread.sleep')
+    def test_refresh_queued_instances(self, sleep_mock):
+        self.flags(firewall_refresh_delay=0.5)
+        inst1 = objects.Instance(id=1, uuid=uuids.inst1)
+        inst2 = objects.Instance(id=2, uuid=uuids.inst2)
+        self.driver._refresh_queue = {1: inst1, 2: inst2}
+        self.driver._refresh_scheduled = True
+
+        with test.nested(
+            mock.patch.object(self.driver, 'do_refresh_instances',
+                              return_value=[]),
+            mock.patch.object(self.driver.iptables, 'apply'),
+        ) as (refresh_mock, apply_mock):
+            self.driver._refresh_queued_instances()
+
+        sleep_mock.assert_called_once_with(0.5)
+        refresh_mock.assert_called_once_with(mock.ANY)
+        self.assertEqual(set([inst1, inst2]),
+                         set(refresh_mock.call_args[0][0]))
+        apply_mock.assert_called_once_with()
+        self.assertEqual({}, self.driver._refresh_queue)
+        self.assertFalse(self.driver._refresh_scheduled)
+
+    def test_do_refresh_instances(self):
+        inst1 = objects.Instance(id=1, uuid=uuids.inst1)
+        inst2 = objects.Instance(id=2, uuid=uuids.inst2)
+        self.driver.instance_info = {1: (inst1, 'netinfo1')}
+        self.driver.instance_rules = \
+            mock.Mock(return_value=['myipv4rules', 'myipv6rules'])
+        self.driver._inner_do_refresh_rules = mock.Mock()
+
+        self.driver.do_refresh_instances([inst1, inst2])
+
+        self.driver.instance_rules.assert_called_once_with(
+            inst1, 'netinfo1', group_ips_cache={})
+        self.driver._inner_do_refresh_rules.assert_called_once_with(
+            inst1, 'netinfo1', 'myipv4rules', 'myipv6rules')
+
+    @mock.patch('eventlet.greenthread.sleep')
+    @mock.patch('nova.utils.spawn_n')
+    def test_refresh_queued_instances_requeues_failed(self, spawn_mock,
+                                                      sleep_mock):
+        inst1 = objects.Instance(id=1, uuid=uuids.inst1)
+        inst2 = objects.Instance(id=2, uuid=uuids.inst2)
+        self.driver._refresh_queue = {1: inst1, 2: inst2}
+        self.driver._refresh_scheduled = True
+
+        with test.nested(
+            mock.patch.object(self.driver, 'do_refresh_instances',
+                              return_value=[inst2]),
+            mock.patch.object(self.driver.iptables, 'apply'),
+        ) as (refresh_mock, apply_mock):
+            self.driver._refresh_queued_instances()
+
+        # The rules of the instances which were refreshed are still applied.
+        apply_mock.assert_called_once_with()
+        self.assertEqual({2: inst2}, self.driver._refresh_queue)
+        self.assertTrue(self.driver._refresh_scheduled)
+        spawn_mock.assert_called_once_with(
+            self.driver._refresh_queued_instances)
+
+    @mock.patch.object(firewall.LOG, 'error')
+    @mock.patch('eventlet.greenthread.sleep')
+    @mock.patch('nova.utils.spawn_n')
+    def _test_refresh_queued_instances_persistent_failure(
+            self, fail_apply, spawn_mock, sleep_mock, error_mock):
+        inst1 = objects.Instance(id=1, uuid=uuids.inst1)
+        inst2 = objects.Instance(id=2, uuid=uuids.inst2)
+        self.driver._refresh_queue = {1: inst1, 2: inst2}
+        self.driver._refresh_scheduled = True
+
+        with test.nested(
+            mock.patch.object(self.driver, 'do_refresh_instances',
+                              return_value=[] if fail_apply else [inst2]),
+            mock.patch.object(self.driver.iptables, 'apply',
+                              side_effect=(test.TestingException
+                                           if fail_apply else None)),
+        ) as (refresh_mock, apply_mock):
+            failed = [inst1, inst2] if fail_apply else [inst2]
+            self.driver._refresh_queued_instances()
+            self.assertEqual(set(i.id for i in failed),
+                             set(self.driver._refresh_queue))
+            error_mock.assert_not_called()
+
+            # The failure never clears: the instances are retried once
+            self.driver._refresh_queued_instances()
+
+        self.assertEqual({}, self.driver._refresh_queue)
+        self.assertFalse(self.driver._refresh_scheduled)
+        self.assertEqual(set(), self.driver._refresh_retried)
+        self.assertEqual(2, refresh_mock.call_count)
+        self.assertEqual(failed, refresh_mock.call_args[0][0])
+        spawn_mock.assert_called_once_with(
+            self.driver._refresh_queued_instances)
+        self.assertEqual(len(failed), error_mock.call_count)
+
+    def test_refresh_queued_instances_persistent_failure(self):
+        self._test_refresh_queued_instances_persistent_failure(False)
+
+    def test_refresh_queued_instances_persistent_apply_failure(self):
+        self._test_refresh_queued_instances_persistent_failure(True)
+
+    def test_do_refresh_instances_failure(self):
+        inst1 = objects.Instance(id=1, uuid=uuids.inst1)
+        inst2 = objects.Instance(id=2, uuid=uuids.inst2)
+        self.driver.instance_info = {1: (inst1, 'netinfo1'),
+                                     2: (inst2, 'netinfo2')}
+        self.driver.instance_rules = mock.Mock(
+            side_effect=[test.TestingException(),
+                         ['myipv4rules', 'myipv6rules']])
+        self.driver._inner_do_refresh_rules = mock.Mock()
+
+        failed = self.driver.do_refresh_instances([inst1, inst2])
+
+        self.assertEqual([inst1], failed)
+        self.driver._inner_do_refresh_rules.assert_called_once_with(
+            inst2, 'netinfo2', 'myipv4rules', 'myipv6rules')
+
+    @mock.patch('nova.objects.InstanceList.get_by_security_group')
+    def test_grantee_group_ips_cached(self, ins_list_mock):
+        inst = mock.Mock()
+        inst.info_cache.deleted = False
+        inst.get_network_info.return_value.fixed_ips.return_value = [
+            {'address': '10.0.1.4', 'version': 4},
+            {'address': 'fe80::4', 'version': 6}]
+        ins_list_mock.return_value = [inst]
+        group = objects.SecurityGroup(id=5)
+        cache = {}
+
+        for i in range(2):
+            ips = self.driver._grantee_group_ips(mock.sentinel.ctx, group, 4,
+                                                 cache=cache)
+            self.assertEqual(['10.0.1.4'], ips)
+
+        ins_list_mock.assert_called_once_with(mock.sentinel.ctx, group)
+        self.assertEqual({(5, 4): ['10.0.1.4']}, cache)
+
     def test_do_refresh_security_group_rules(self):
         self.driver.instance_info = \
             {'1': ['myinstance1', 'netinfo1'],
@@ -13,14 +13,17 @@
 #    under the License.
 
 import os
+import stat
 
 import mock
 from oslo_concurrency import processutils
+from oslo_utils import imageutils
 import six
 
 from nova.compute import utils as compute_utils
 from nova import exception
 from nova import test
+from nova import utils
 from nova.virt import images
 
 
@@ -49,6 +52,79 @@ class QemuTestCase(test.NoDBTestCase):
         self.assertTrue(image_info)
         self.assertTrue(str(image_info))
 
+    @mock.patch.object(images, '_qemu_img_info')
+    def test_qemu_img_info_cached(self, mock_exec):
+        def fake_qemu_img_info(path, format):
+            info = imageutils.QemuImgInfo()
+            info.file_format = 'qcow2'
+            return info
+
+        mock_exec.side_effect = fake_qemu_img_info
+        with utils.tempdir() as tmpdir:
+            path = os.path.join(tmpdir, 'disk')
+            with open(path, 'w') as f:
+                f.write('foo')
+
+            info = images.qemu_img_info(path)
+            self.assertEqual('qcow2', info.file_format)
+            info.file_format = 'raw'
+            self.assertEqual('qcow2', images.qemu_img_info(path).file_format)
+            self.assertEqual(1, mock_exec.call_count)
+            self.assertEqual(1, images.QEMU_IMG_INFO_CACHE.hits)
+
+            # A different format is a different result
+            images.qemu_img_info(path, format='qcow2')
+            self.assertEqual(2, mock_exec.call_count)
+
+            # A modified file is inspected again
+            with open(path, 'a') as f:
+                f.write('bar')
+            images.qemu_img_info(path)
+            self.assertEqual(3, mock_exec.call_count)
+
+            # As is a file we have been told was written to
+            images.invalidate_qemu_img_info(path)
+            images.qemu_img_info(path)
+            self.assertEqual(4, mock_exec.call_count)
+            images.qemu_img_info(path)
+            self.assertEqual(4, mock_exec.call_count)
+
+    @mock.patch.object(os, 'stat')
+    @mock.patch.object(images, '_qemu_img_info')
+    @mock.patch.object(os.path, 'exists', return_value=True)
+    def test_qemu_img_info_not_cached_for_block_device(self, mock_exists,
+                                                        mock_info, mock_stat):
+        mock_stat.return_value = mock.Mock(st_mode=stat.S_IFBLK | 0o660,
+                                           st_dev=5, st_ino=42, st_size=0,
+                                           st_mtime=0, st_mtime_ns=0)
+        mock_info.return_value = mock.sentinel.info
+        path = '/dev/vg/disk'
+        for _ in range(2):
+            self.assertEqual(mock.sentinel.info, images.qemu_img_info(path))
+        self.assertEqual(2, mock_info.call_count)
+        self.assertEqual(0, images.QEMU_IMG_INFO_CACHE.hits)
+        self.assertEqual(0, images.QEMU_IMG_INFO_CACHE.misses)
+
+    def test_qemu_img_info_cache_lru(self):
+        cache = images.QemuImgInfoCache(size=2)
+        with utils.tempdir() as tmpdir:
+            paths = []
+            for name in ('a', 'b', 'c'):
+                paths.append(os.path.join(tmpdir, name))
+                with open(paths[-1], 'w'):
+                    pass
+            for path in paths[:2]:
+                key, info = cache.get(path, None)
+                self.assertIsNone(info)
+                cache.put(key, path)
+            # Use 'a', so that 'b' is the least recently used
+            self.assertEqual(paths[0], cache.get(paths[0], None)[1])
+            cache.put(cache.get(paths[2], None)[0], paths[2])
+
+            self.assertEqual(paths[0], cache.get(paths[0], None)[1])
+            self.assertIsNone(cache.get(paths[1], None)[1])
+            self.assertEqual(paths[2], cache.get(paths[2], None)[1])
+
     @mock.patch.object(compute_utils, 'disk_ops_semaphore')
     @mock.patch('nova.privsep.utils.supports_direct_io', return_value=True)
     @mock.patch.object(processutils, 'execute',
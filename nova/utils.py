@@ -33,6 +33,7 @@ import time
 import eventlet
 from keystoneauth1 import exceptions as ks_exc
 from keystoneauth1 import loading as ks_loading
+from keystoneauth1 import session as ks_session
 import netaddr
 from os_service_types import service_types
 from oslo_concurrency import lockutils
@@ -1224,6 +1225,50 @@ def get_ksa_adapter(service_type, ksa_auth=None, ksa_session=None,
         min_version=min_version, max_version=max_version, raise_exc=False)
 
 
+def set_connection_pool_size(ksa_session, pool_size):
+    """Size the HTTP connection pools of a keystoneauth1 Session.
+
+    requests keeps at most 10 connections per host, and closes those of any
+    request beyond that made concurrently once it completes, so a busy
+    service keeps paying for new TCP and TLS connections. The connections
+    are pooled by the session, independently of the auth plugin used for
+    each request, so one session can be shared by all requests of a process.
+
+    :param ksa_session: keystoneauth1 Session whose pools to size.
+    :param pool_size: Number of connections kept open per host.
+    """
+    for scheme in ('https://', 'http://'):
+        ksa_session.session.mount(
+            scheme, ks_session.TCPKeepAliveAdapter(pool_maxsize=pool_size))
+
+
+def get_connection_pool_stats(ksa_session):
+    """Return usage statistics of the HTTP connection pools of a session.
+
+    :param ksa_session: keystoneauth1 Session, or None.
+    :returns: dict, keyed by 'scheme://host:port', of dicts with the number
+              of connections opened, the number of requests made, the number
+              of idle connections and the maximum size of each pool.
+    """
+    stats = {}
+    if ksa_session is None:
+        return stats
+    for adapter in set(ksa_session.session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            # A pool is closed when it is evicted from the pool manager
+            if pool is None or pool.pool is None:
+                continue
+            stats['%s://%s:%s' % (pool.scheme, pool.host, pool.port)] = {
+                'connections': pool.num_connections,
+                'requests': pool.num_requests,
+                'idle': len([conn for conn in list(pool.pool.queue) if conn]),
+                'size': pool.pool.maxsize,
+            }
+    return stats
+
+
 def get_endpoint(ksa_adapter):
     """Get the endpoint URL represented by a keystoneauth1 Adapter.
 
@@ -228,6 +228,18 @@ class ComputeDriver(object):
         """
         raise NotImplementedError()
 
+    def get_power_states(self):
+        """Return the power states of all the instances known to the
+        virtualization layer.
+
+        Drivers should implement this with as few calls to the hypervisor as
+        possible, since it is used to avoid calling get_info() per instance.
+
+        :returns: A dict, keyed by instance UUID, of nova.compute.power_state
+                  values
+        """
+        raise NotImplementedError()
+
     def rebuild(self, context, instance, image_meta, injected_files,
                 admin_password, allocations, bdms, detach_block_devices,
                 attach_block_devices, network_info=None,
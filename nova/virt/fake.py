@@ -180,6 +180,9 @@ class FakeDriver(driver.ComputeDriver):
     def list_instance_uuids(self):
         return list(self.instances.keys())
 
+    def get_power_states(self):
+        return {uuid: i.state for uuid, i in self.instances.items()}
+
     def plug_vifs(self, instance, network_info):
         """Plug VIFs into networks."""
         pass
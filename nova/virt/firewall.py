@@ -15,6 +15,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from eventlet import greenthread
 from oslo_log import log as logging
 from oslo_utils import importutils
 
@@ -106,7 +107,15 @@ class IptablesFirewallDriver(FirewallDriver):
 
     def __init__(self, **kwargs):
         self.iptables = linux_net.iptables_manager
+        self.ipset = linux_net.IpsetManager()
         self.instance_info = {}
+        # ipsets referenced by the rules of each instance
+        self.instance_ipsets = {}
+        # instances waiting for their rules to be refreshed, by id
+        self._refresh_queue = {}
+        self._refresh_scheduled = False
+        # ids of the queued instances whose refresh already failed once
+        self._refresh_retried = set()
 
         # Flags for DHCP request rule
         self.dhcp_create = False
@@ -129,11 +138,13 @@ class IptablesFirewallDriver(FirewallDriver):
 
     def filter_defer_apply_off(self):
         self.iptables.defer_apply_off()
+        self.destroy_unused_ipsets()
 
     def unfilter_instance(self, instance, network_info):
         if self.instance_info.pop(instance.id, None):
             self.remove_filters_for_instance(instance)
             self.iptables.apply()
+            self.destroy_unused_ipsets()
         else:
             LOG.info('Attempted to unfilter instance which is not filtered',
                      instance=instance)
@@ -285,7 +296,38 @@ class IptablesFirewallDriver(FirewallDriver):
                     '--dports', '%s:%s' % (rule.from_port,
                                            rule.to_port)]
 
-    def instance_rules(self, instance, network_info):
+    def _grantee_group_ips(self, ctxt, security_group, version,
+                           cache=None):
+        """Return the fixed IPs of the members of a security group.
+
+        :param cache: optional dict used to look up the members of each
+                      group only once when building the rules of several
+                      instances
+        """
+        if cache is not None:
+            key = (security_group.id, version)
+            if key not in cache:
+                cache[key] = self._grantee_group_ips(ctxt, security_group,
+                                                     version)
+            return cache[key]
+
+        insts = objects.InstanceList.get_by_security_group(
+                ctxt, security_group)
+        group_ips = []
+        for inst in insts:
+            if inst.info_cache.deleted:
+                LOG.debug('ignoring deleted cache')
+                continue
+            nw_info = inst.get_network_info()
+
+            ips = [ip['address'] for ip in nw_info.fixed_ips()
+                   if ip['version'] == version]
+
+            LOG.debug('ips: %r', ips, instance=inst)
+            group_ips += ips
+        return group_ips
+
+    def instance_rules(self, instance, network_info, group_ips_cache=None):
         ctxt = context.get_admin_context()
         if isinstance(instance, dict):
             # NOTE(danms): allow old-world instance objects from
@@ -314,6 +356,7 @@ class IptablesFirewallDriver(FirewallDriver):
 
         # then, security group chains and rules
         rules = objects.SecurityGroupRuleList.get_by_instance(ctxt, instance)
+        ipsets = set()
 
         for rule in rules:
             if not rule.cidr:
@@ -347,22 +390,24 @@ class IptablesFirewallDriver(FirewallDriver):
                 fw_rules += [' '.join(args)]
             else:
                 if rule.grantee_group:
-                    insts = objects.InstanceList.get_by_security_group(
-                            ctxt, rule.grantee_group)
-                    for inst in insts:
-                        if inst.info_cache.deleted:
-                            LOG.debug('ignoring deleted cache')
-                            continue
-                        nw_info = inst.get_network_info()
-
-                        ips = [ip['address'] for ip in nw_info.fixed_ips()
-                               if ip['version'] == version]
-
-                        LOG.debug('ips: %r', ips, instance=inst)
-                        for ip in ips:
+                    group_ips = self._grantee_group_ips(
+                        ctxt, rule.grantee_group, version,
+                        cache=group_ips_cache)
+
+                    if CONF.firewall_use_ipset:
+                        set_name = self._ipset_name(rule.grantee_group,
+                                                    version)
+                        self.ipset.set_members(set_name, version, group_ips)
+                        ipsets.add(set_name)
+                        subrule = args + ['-m set --match-set %s src' %
+                                          set_name]
+                        fw_rules += [' '.join(subrule)]
+                    else:
+                        for ip in group_ips:
                             subrule = args + ['-s %s' % ip]
                             fw_rules += [' '.join(subrule)]
 
+        self.instance_ipsets[instance.id] = ipsets
         ipv4_rules += ['-j $sg-fallback']
         ipv6_rules += ['-j $sg-fallback']
         LOG.debug('Security Group Rules %s translated to ipv4: %r, ipv6: %r',
@@ -370,16 +415,84 @@ class IptablesFirewallDriver(FirewallDriver):
                   instance=instance)
         return ipv4_rules, ipv6_rules
 
+    @staticmethod
+    def _ipset_name(security_group, version):
+        return 'nova-sg%s-v%d' % (security_group.id, version)
+
+    def destroy_unused_ipsets(self):
+        """Destroy the ipsets which no instance rules refer to anymore.
+
+        This is a no-op while applying iptables rules is deferred, as the
+        rules using the sets may still be in place.
+        """
+        if self.iptables.iptables_apply_deferred:
+            return
+        in_use = set()
+        for instance_id in list(self.instance_ipsets):
+            if instance_id in self.instance_info:
+                in_use |= self.instance_ipsets[instance_id]
+            else:
+                del self.instance_ipsets[instance_id]
+        for name in set(self.ipset.sets) - in_use:
+            self.ipset.destroy_set(name)
+
     def instance_filter_exists(self, instance, network_info):
         pass
 
     def refresh_security_group_rules(self, security_group):
         self.do_refresh_security_group_rules(security_group)
         self.iptables.apply()
+        self.destroy_unused_ipsets()
 
     def refresh_instance_security_rules(self, instance):
+        if CONF.firewall_refresh_delay > 0:
+            self._queue_instance_refresh(instance)
+            return
         self.do_refresh_instance_rules(instance)
         self.iptables.apply()
+        self.destroy_unused_ipsets()
+
+    def _queue_instance_refresh(self, instance):
+        """Queue a refresh of the rules of an instance.
+
+        All the refreshes queued within CONF.firewall_refresh_delay seconds
+        of the first one are done together by _refresh_queued_instances.
+        """
+        self._refresh_queue[instance.id] = instance
+        if not self._refresh_scheduled:
+            self._refresh_scheduled = True
+            utils.spawn_n(self._refresh_queued_instances)
+
+    def _refresh_queued_instances(self):
+        greenthread.sleep(CONF.firewall_refresh_delay)
+        instances = list(self._refresh_queue.values())
+        self._refresh_queue = {}
+        self._refresh_scheduled = False
+
+        LOG.debug('Refreshing security group rules of %d instances',
+                  len(instances))
+        failed = self.do_refresh_instances(instances)
+        try:
+            self.iptables.apply()
+            self.destroy_unused_ipsets()
+        except Exception:
+            LOG.exception('Failed to apply the security group rules of '
+                          'instances %s', [i.uuid for i in instances])
+            failed = instances
+
+        # Retry the instances which failed once, with the next batch. A
+        # failure which persists would otherwise be retried forever.
+        failed_ids = set(instance.id for instance in failed)
+        self._refresh_retried -= set(instance.id for instance in instances
+                                     if instance.id not in failed_ids)
+        for instance in failed:
+            if instance.id in self._refresh_retried:
+                self._refresh_retried.discard(instance.id)
+                LOG.error('Failed to refresh the security group rules '
+                          'twice, giving up', instance=instance)
+                continue
+            self._refresh_retried.add(instance.id)
+            self._queue_instance_refresh(instance)
 
     @utils.synchronized('iptables', external=True)
     def _inner_do_refresh_rules(self, instance, network_info, ipv4_rules,
@@ -407,6 +520,36 @@ class IptablesFirewallDriver(FirewallDriver):
             self._inner_do_refresh_rules(instance, network_info, ipv4_rules,
                                          ipv6_rules)
 
+    def do_refresh_instances(self, instances):
+        """Refresh the rules of several instances.
+
+        The members of each security group referenced by the rules are only
+        looked up once. Instances which are not filtered (anymore) are
+        skipped. A failure to refresh an instance is logged and does not
+        prevent the other instances from being refreshed.
+
+        :returns: the list of instances which failed to be refreshed
+        """
+        group_ips_cache = {}
+        failed = []
+        for instance in instances:
+            try:
+                _instance, network_info = self.instance_info[instance.id]
+            except KeyError:
+                LOG.debug('Skipping refresh of instance which is not '
+                          'filtered', instance=instance)
+                continue
+            try:
+                ipv4_rules, ipv6_rules = self.instance_rules(
+                    instance, network_info, group_ips_cache=group_ips_cache)
+                self._inner_do_refresh_rules(instance, network_info,
+                                             ipv4_rules, ipv6_rules)
+            except Exception:
+                LOG.exception('Failed to refresh security group rules',
+                              instance=instance)
+                failed.append(instance)
+        return failed
+
     def do_refresh_instance_rules(self, instance):
         _instance, network_info = self.instance_info[instance.id]
         ipv4_rules, ipv6_rules = self.instance_rules(instance, network_info)
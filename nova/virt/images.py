@@ -19,8 +19,11 @@
 Handling of VM disk images.
 """
 
+import collections
+import copy
 import operator
 import os
+import stat
 
 from oslo_concurrency import processutils
 from oslo_log import log as logging
@@ -34,6 +37,7 @@ from nova import exception
 from nova.i18n import _
 from nova import image
 import nova.privsep.qemu
+from nova import profiler
 
 LOG = logging.getLogger(__name__)
 
@@ -50,6 +54,79 @@ QEMU_VERSION = None
 QEMU_VERSION_REQ_SHARED = 2010000
 
 
+class QemuImgInfoCache(object):
+    """A least recently used cache of qemu-img info results.
+
+    Results are keyed on the path and format that were inspected, along
+    with the inode, modification time and size of the file at the time, so
+    that a file which has been modified or replaced is inspected again.
+    Block devices, such as LVM volumes, are never cached as neither their
+    size nor their modification time reflect changes to their contents.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+
+    @staticmethod
+    def _get_key(path, format):
+        try:
+            st = os.stat(path)
+        except OSError:
+            # Not a local file, e.g. an rbd volume
+            return None
+        if stat.S_ISBLK(st.st_mode):
+            return None
+        mtime = getattr(st, 'st_mtime_ns', st.st_mtime)
+        return (path, format, st.st_dev, st.st_ino, mtime, st.st_size)
+
+    def get(self, path, format):
+        """Return a tuple of the cache key and the cached result, if any."""
+        key = self._get_key(path, format)
+        if key is None:
+            return None, None
+        info = self._entries.pop(key, None)
+        if info is None:
+            self.misses += 1
+            return key, None
+        self.hits += 1
+        self._entries[key] = info
+        return key, copy.deepcopy(info)
+
+    def put(self, key, info):
+        if key is None:
+            return
+        self._entries[key] = copy.deepcopy(info)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, path):
+        """Drop any cached result for a file which has been written to."""
+        for key in list(self._entries):
+            if key[0] == path:
+                del self._entries[key]
+
+    def clear(self):
+        self.hits = 0
+        self.misses = 0
+        self._entries.clear()
+
+
+QEMU_IMG_INFO_CACHE = QemuImgInfoCache(size=1024)
+
+
+def invalidate_qemu_img_info(path):
+    """Drop any cached qemu-img info result for path.
+
+    The cache notices files which have been modified or replaced, but this
+    should still be called after writing to a disk image, in case the
+    modification time of the file did not change.
+    """
+    QEMU_IMG_INFO_CACHE.invalidate(path)
+
+
 def qemu_img_info(path, format=None):
     """Return an object containing the parsed output from qemu-img info."""
     # TODO(mikal): this code should not be referring to a libvirt specific
@@ -57,13 +134,27 @@ def qemu_img_info(path, format=None):
     if not os.path.exists(path) and CONF.libvirt.images_type != 'rbd':
         raise exception.DiskNotFound(location=path)
 
-    try:
-        # The following check is about ploop images that reside within
-        # directories and always have DiskDescriptor.xml file beside them
-        if (os.path.isdir(path) and
-            os.path.exists(os.path.join(path, "DiskDescriptor.xml"))):
-            path = os.path.join(path, "root.hds")
+    # The following check is about ploop images that reside within
+    # directories and always have DiskDescriptor.xml file beside them
+    if (os.path.isdir(path) and
+        os.path.exists(os.path.join(path, "DiskDescriptor.xml"))):
+        path = os.path.join(path, "root.hds")
 
+    key, info = QEMU_IMG_INFO_CACHE.get(path, format)
+    if info is not None:
+        return info
+
+    with profiler.trace('qemu_img_info',
+                        info={'path': path,
+                              'cache_hits': QEMU_IMG_INFO_CACHE.hits,
+                              'cache_misses': QEMU_IMG_INFO_CACHE.misses}):
+        info = _qemu_img_info(path, format)
+    QEMU_IMG_INFO_CACHE.put(key, info)
+    return info
+
+
+def _qemu_img_info(path, format):
+    try:
         cmd = ('env', 'LC_ALL=C', 'LANG=C', 'qemu-img', 'info', path)
         if format is not None:
             cmd = cmd + ('-f', format)
@@ -143,7 +234,17 @@ def get_info(context, image_href):
     return IMAGE_API.get(context, image_href)
 
 
-def fetch_to_raw(context, image_href, path, trusted_certs=None):
+def fetch_to_raw(context, image_href, path, trusted_certs=None,
+                 force_raw=None):
+    """Fetch an image to path, converting it to raw.
+
+    :param force_raw: Whether to convert non-raw images to raw. Defaults to
+                      CONF.force_raw_images. Callers which convert the image
+                      themselves anyway may pass False to avoid a redundant
+                      conversion.
+    """
+    if force_raw is None:
+        force_raw = CONF.force_raw_images
     path_tmp = "%s.part" % path
     fetch(context, image_href, path_tmp, trusted_certs)
 
@@ -162,7 +263,7 @@ def fetch_to_raw(context, image_href, path, trusted_certs=None):
                 reason=(_("fmt=%(fmt)s backed by: %(backing_file)s") %
                         {'fmt': fmt, 'backing_file': backing_file}))
 
-        if fmt != "raw" and CONF.force_raw_images:
+        if fmt != "raw" and force_raw:
             staged = "%s.converted" % path
             LOG.debug("%s was %s, converting to raw", image_href, fmt)
             with fileutils.remove_path_on_error(staged):
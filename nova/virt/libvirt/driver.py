@@ -840,6 +840,11 @@ class LibvirtDriver(driver.ComputeDriver):
 
         return uuids
 
+    def get_power_states(self):
+        domain_stats = self._host.get_all_domain_stats(
+            libvirt.VIR_DOMAIN_STATS_STATE)
+        return {uuid: stats.state for uuid, stats in domain_stats.items()}
+
     def plug_vifs(self, instance, network_info):
         """Plug VIFs into networks."""
         for vif in network_info:
@@ -3412,6 +3417,7 @@ class LibvirtDriver(driver.ComputeDriver):
 
         # ensure directories exist and are writable
         fileutils.ensure_tree(libvirt_utils.get_instance_path(instance))
+        self.image_cache_manager.invalidate_instance(instance)
 
         LOG.info('Creating image', instance=instance)
 
@@ -6406,9 +6412,26 @@ class LibvirtDriver(driver.ComputeDriver):
            a given host.
         """
         vol_usage = []
+        if not compute_host_bdms:
+            return vol_usage
+
+        # Fetch the block stats of all the guests at once, rather than
+        # looking up every guest and device in turn.
+        try:
+            domain_stats = self._host.get_all_domain_stats(
+                libvirt.VIR_DOMAIN_STATS_BLOCK)
+        except libvirt.libvirtError as e:
+            LOG.warning('Getting the block stats of the guests failed: %s',
+                        e)
+            return vol_usage
 
         for instance_bdms in compute_host_bdms:
             instance = instance_bdms['instance']
+            if instance.uuid not in domain_stats:
+                LOG.info('Getting block stats failed, the instance might '
+                         'have been deleted.', instance=instance)
+                continue
+            block_stats = domain_stats[instance.uuid].get_block_stats()
 
             for bdm in instance_bdms['instance_bdms']:
                 mountpoint = bdm['device_name']
@@ -6418,7 +6441,11 @@ class LibvirtDriver(driver.ComputeDriver):
 
                 LOG.debug("Trying to get stats for the volume %s",
                           volume_id, instance=instance)
-                vol_stats = self.block_stats(instance, mountpoint)
+                vol_stats = block_stats.get(mountpoint)
+                if vol_stats is None:
+                    LOG.info('Getting block stats failed, device might have '
+                             'been detached. Disk=%s', mountpoint,
+                             instance=instance)
 
                 if vol_stats:
                     stats = dict(volume=volume_id,
@@ -7888,6 +7915,7 @@ class LibvirtDriver(driver.ComputeDriver):
         if not disk_info:
             disk_info = []
 
+        self.image_cache_manager.invalidate_instance(instance)
         for info in disk_info:
             base = os.path.basename(info['path'])
             # Get image type and create empty disk image, and
@@ -8910,6 +8938,7 @@ class LibvirtDriver(driver.ComputeDriver):
         self.firewall_driver.setup_basic_filtering(instance, nw_info)
 
     def delete_instance_files(self, instance):
+        self.image_cache_manager.invalidate_instance(instance)
         target = libvirt_utils.get_instance_path(instance)
         # A resize may be in progress
         target_resize = target + '_resize'
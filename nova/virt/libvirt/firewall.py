@@ -343,6 +343,7 @@ class IptablesFirewallDriver(base_firewall.IptablesFirewallDriver):
         if self.instance_info.pop(instance.id, None):
             self.remove_filters_for_instance(instance)
             self.iptables.apply()
+            self.destroy_unused_ipsets()
             self.nwfilter.unfilter_instance(instance, network_info)
         else:
             LOG.info('Attempted to unfilter instance which is not filtered',
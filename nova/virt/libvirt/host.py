@@ -73,6 +73,42 @@ CONF = nova.conf.CONF
 HV_DRIVER_QEMU = "QEMU"
 HV_DRIVER_XEN = "Xen"
 
+# Names of the block statistics returned by virConnectGetAllDomainStats, in
+# the order of the tuples returned by virDomainBlockStats.
+_BLOCK_STATS_FIELDS = ('rd.reqs', 'rd.bytes', 'wr.reqs', 'wr.bytes', 'errors')
+
+
+class DomainStats(object):
+    """The statistics of a domain, as returned by Host.get_all_domain_stats.
+
+    Only the groups of statistics which were requested are available.
+    """
+
+    def __init__(self, record):
+        self._record = record
+
+    @property
+    def state(self):
+        """The power state of the domain (from nova.compute.power_state)."""
+        return libvirt_guest.LIBVIRT_POWER_STATE[self._record['state.state']]
+
+    def get_block_stats(self):
+        """Returns a dict, keyed by target device name (e.g. 'vda'), of
+        (rd_req, rd_bytes, wr_req, wr_bytes, errs) tuples, as would be returned
+        by virDomainBlockStats.
+        """
+        devices = {}
+        for i in range(self._record.get('block.count', 0)):
+            prefix = 'block.%d.' % i
+            name = self._record.get(prefix + 'name')
+            if name is None:
+                continue
+            # Statistics the hypervisor doesn't support are omitted, which
+            # virDomainBlockStats reports as -1.
+            devices[name] = tuple(self._record.get(prefix + field, -1)
+                                  for field in _BLOCK_STATS_FIELDS)
+        return devices
+
 
 class Host(object):
 
@@ -615,6 +651,28 @@ class Host(object):
 
         return doms
 
+    def get_all_domain_stats(self, stats, only_guests=True):
+        """Get the statistics of all domains in a single call to libvirt.
+
+        This is much cheaper than querying every domain in turn, which takes
+        at least one round trip to libvirtd per domain.
+
+        :param stats: Bitwise OR of the libvirt.VIR_DOMAIN_STATS_* groups of
+                      statistics to fetch, e.g. VIR_DOMAIN_STATS_STATE
+        :param only_guests: True to filter out any host domain (eg Dom-0)
+
+        :returns: dict, keyed by domain UUID, of DomainStats objects
+        """
+        records = self.get_connection().getAllDomainStats(stats)
+
+        domain_stats = {}
+        for dom, record in records:
+            if only_guests and dom.ID() == 0:
+                continue
+            domain_stats[dom.UUIDString()] = DomainStats(record)
+
+        return domain_stats
+
     def get_online_cpus(self):
         """Get the set of CPUs that are online on the host
 
@@ -41,6 +41,7 @@ from nova.virt.disk import api as disk
 from nova.virt.image import model as imgmodel
 from nova.virt import images
 from nova.virt.libvirt import config as vconfig
+from nova.virt.libvirt import imagecache
 from nova.virt.libvirt.storage import dmcrypt
 from nova.virt.libvirt.storage import lvm
 from nova.virt.libvirt.storage import rbd_utils
@@ -236,17 +237,26 @@ class Image(object):
             # call fetch_func. The lock we're holding is also unnecessary in
             # that case, but it will not result in incorrect behaviour.
             if target != base or not os.path.exists(target):
+                if target == base:
+                    fetched.append(target)
                 fetch_func(target=target, *args, **kwargs)
 
         if not self.exists() or not os.path.exists(base):
+            fetched = []
             self.create_image(fetch_func_sync, base, size,
                               *args, **kwargs)
+            images.invalidate_qemu_img_info(self.path)
+            # Only images from the image service count towards the image
+            # cache hit rate, not generated ephemeral and swap disks.
+            if 'image_id' in kwargs:
+                imagecache.record_cache_lookup(hit=not fetched)
 
         if size:
             # create_image() only creates the base image if needed, so
             # we cannot rely on it to exist here
             if os.path.exists(base) and size > self.get_disk_size(base):
                 self.resize_image(size)
+                images.invalidate_qemu_img_info(self.path)
 
             if (self.preallocate and self._can_fallocate() and
                     os.access(self.path, os.W_OK)):
@@ -20,15 +20,20 @@ http://wiki.openstack.org/nova-image-cache-management.
 
 """
 
+import collections
+import errno
 import hashlib
 import os
 import re
+import struct
 import time
 
 from oslo_concurrency import lockutils
 from oslo_concurrency import processutils
 from oslo_log import log as logging
+from oslo_serialization import jsonutils
 from oslo_utils import encodeutils
+from oslo_utils import fileutils
 import six
 
 import nova.conf
@@ -41,6 +46,49 @@ LOG = logging.getLogger(__name__)
 
 CONF = nova.conf.CONF
 
+# Values of [libvirt]/images_type whose image backend keeps a copy of the
+# image in the image cache. Only these can use pre-cached images.
+_CACHING_IMAGES_TYPES = ('default', 'raw', 'flat', 'qcow2', 'lvm', 'ploop')
+
+# The start of the header of a qcow2 image: magic, version, and the offset and
+# size of the name of the backing file.
+_QCOW2_HEADER = struct.Struct('>4sIQI')
+_QCOW2_MAGIC = b'QFI\xfb'
+# qemu does not accept longer backing file names
+_QCOW2_MAX_BACKING_FILE_SIZE = 1023
+
+# Number of image lookups in the image cache since the last image cache
+# manager pass, and how many of them had to fetch the image.
+_CACHE_STATS = collections.Counter()
+
+
+def read_qcow2_backing_file(path):
+    """Return the backing file of a qcow2 image, as recorded in its header.
+
+    This is much cheaper than running qemu-img info, and the header is not
+    changed by the writes of the guest.
+
+    :param path: Path to the disk image
+    :returns: the name of the backing file, or None if there is none
+    :raises: ValueError if the file is not a qcow2 image
+    """
+    with open(path, 'rb') as f:
+        header = f.read(_QCOW2_HEADER.size)
+        if len(header) != _QCOW2_HEADER.size:
+            raise ValueError('%s is not a qcow2 image' % path)
+        magic, version, offset, size = _QCOW2_HEADER.unpack(header)
+        if magic != _QCOW2_MAGIC or version not in (2, 3):
+            raise ValueError('%s is not a qcow2 image' % path)
+        if not offset:
+            return None
+        if size > _QCOW2_MAX_BACKING_FILE_SIZE:
+            raise ValueError('Invalid backing file name size in %s' % path)
+        f.seek(offset)
+        backing_file = f.read(size)
+        if len(backing_file) != size:
+            raise ValueError('Truncated qcow2 image %s' % path)
+    return encodeutils.safe_decode(backing_file)
+
 
 def get_cache_fname(image_id):
     """Return a filename based on the SHA1 hash of a given image ID.
@@ -65,6 +113,27 @@ def get_info_filename(base_path):
             % {'image': base_file})
 
 
+def record_cache_lookup(hit):
+    """Record a lookup of an image in the image cache.
+
+    :param hit: True if the image was already cached, False if it had to be
+                fetched from the image service
+    """
+    _CACHE_STATS['lookups'] += 1
+    if not hit:
+        _CACHE_STATS['misses'] += 1
+
+
+def pop_cache_stats():
+    """Return the image cache lookup statistics and reset them.
+
+    Returns a tuple of the number of lookups and the number of misses.
+    """
+    lookups, misses = _CACHE_STATS['lookups'], _CACHE_STATS['misses']
+    _CACHE_STATS.clear()
+    return lookups, misses
+
+
 def is_valid_info_file(path):
     """Test if a given path matches the pattern for info files."""
 
@@ -87,6 +156,11 @@ class ImageCacheManager(imagecache.ImageCacheManager):
     def __init__(self):
         super(ImageCacheManager, self).__init__()
         self.lock_path = os.path.join(CONF.instances_path, 'locks')
+        # Names of instance directories whose disk was created or deleted
+        # since the last pass, and whose backing file index entry is stale.
+        self._stale_instance_dirs = set()
+        # Whether a greenthread is pre-caching images.
+        self._precaching = False
         self._reset_state()
 
     def _reset_state(self):
@@ -161,9 +235,95 @@ class ImageCacheManager(imagecache.ImageCacheManager):
             else:
                 self._store_swap_image(ent)
 
+    def invalidate_instance(self, instance):
+        """Forget the backing file of an instance's disk.
+
+        This must be called whenever the disk of an instance is created or
+        deleted, so that the next pass looks up its backing file again
+        rather than trusting the backing file index.
+        """
+        instance_dir = libvirt_utils.get_instance_path(instance,
+                                                       relative=True)
+        self._stale_instance_dirs.add(instance_dir)
+        self._stale_instance_dirs.add(instance_dir + '_resize')
+
+    @staticmethod
+    def _get_backing_index_path():
+        return os.path.join(CONF.instances_path, 'backing_files')
+
+    def _load_backing_index(self):
+        """Load the index of instance disk backing files.
+
+        The index maps the name of an instance directory to the inode of its
+        disk and the backing file of that disk, as found by a previous pass
+        on any of the compute hosts sharing the instances path. Only the
+        disks which are not qcow2 images are indexed.
+        """
+        index_path = self._get_backing_index_path()
+        try:
+            with open(index_path) as f:
+                return jsonutils.loads(f.read())
+        except (IOError, ValueError) as e:
+            if getattr(e, 'errno', None) != errno.ENOENT:
+                LOG.warning('Cannot read backing file index %(path)s: '
+                            '%(error)s', {'path': index_path, 'error': e})
+            return {}
+
+    def _save_backing_index(self, index):
+        index_path = self._get_backing_index_path()
+        tmp_path = '%s.%s.tmp' % (index_path, CONF.host)
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(jsonutils.dumps(index))
+            # Other compute hosts sharing the instances path may be reading
+            # the index, so replace it atomically.
+            os.rename(tmp_path, index_path)
+        except (IOError, OSError) as e:
+            LOG.warning('Cannot write backing file index %(path)s: %(error)s',
+                        {'path': index_path, 'error': e})
+
+    def _get_disk_backing_file(self, ent, disk_path, index, new_index,
+                               stale_instance_dirs):
+        """Return the backing file of an instance disk.
+
+        Running qemu-img on every instance disk is the bulk of the cost of a
+        pass. The backing file of a qcow2 disk is read from its header
+        instead. That of any other disk is taken from the index if the disk
+        is the same file as when it was indexed and has not been recreated
+        since: only qcow2 disks can be rebased in place.
+        """
+        try:
+            backing_file = read_qcow2_backing_file(disk_path)
+        except (IOError, OSError, ValueError):
+            pass
+        else:
+            if backing_file:
+                backing_file = os.path.basename(backing_file)
+            return backing_file
+
+        try:
+            inode = os.stat(disk_path).st_ino
+        except OSError:
+            inode = None
+
+        entry = index.get(ent)
+        if (inode is not None and entry is not None and
+                ent not in stale_instance_dirs and entry[:-1] == [inode]):
+            backing_file = entry[-1]
+        else:
+            backing_file = libvirt_utils.get_disk_backing_file(disk_path)
+
+        if inode is not None:
+            new_index[ent] = [inode, backing_file]
+        return backing_file
+
     def _list_backing_images(self):
         """List the backing images currently in use."""
         inuse_images = []
+        stale_instance_dirs = self._stale_instance_dirs
+        self._stale_instance_dirs = set()
+        index = self._load_backing_index()
+        new_index = {}
         for ent in os.listdir(CONF.instances_path):
             if ent in self.instance_names:
                 LOG.debug('%s is a valid instance name', ent)
@@ -171,8 +331,9 @@ class ImageCacheManager(imagecache.ImageCacheManager):
                 if os.path.exists(disk_path):
                     LOG.debug('%s has a disk file', ent)
                     try:
-                        backing_file = libvirt_utils.get_disk_backing_file(
-                            disk_path)
+                        backing_file = self._get_disk_backing_file(
+                            ent, disk_path, index, new_index,
+                            stale_instance_dirs)
                     except processutils.ProcessExecutionError:
                         # (for bug 1261442)
                         if not os.path.exists(disk_path):
@@ -201,6 +362,9 @@ class ImageCacheManager(imagecache.ImageCacheManager):
                                         {'instance': ent,
                                          'backing': backing_file})
                             self.unexplained_images.remove(backing_path)
+
+        if new_index != index:
+            self._save_backing_index(new_index)
         return inuse_images
 
     def _find_base_file(self, base_dir, fingerprint):
@@ -403,7 +567,77 @@ class ImageCacheManager(imagecache.ImageCacheManager):
             return
         return base_dir
 
+    def _precache_image(self, context, base_dir, image_id):
+        """Fetch a single image into the image cache unless already there."""
+        filename = get_cache_fname(image_id)
+        base_file = os.path.join(base_dir, filename)
+
+        # NOTE: This is the same lock that is held by the image backends
+        # while they fetch an image into the cache, so concurrent builds
+        # using this image wait for us rather than fetching it again.
+        @utils.synchronized(filename, external=True, lock_path=self.lock_path)
+        def _fetch_image():
+            if os.path.exists(base_file):
+                return False
+            LOG.info('Pre-caching image %(id)s at %(base_file)s',
+                     {'id': image_id, 'base_file': base_file})
+            libvirt_utils.fetch_image(context, base_file, image_id)
+            return True
+
+        return _fetch_image()
+
+    def _precache_images(self, context, base_dir):
+        """Fetch the images in CONF.precache_images into the image cache."""
+        fetched = 0
+        try:
+            for image_id in CONF.precache_images:
+                try:
+                    if self._precache_image(context, base_dir, image_id):
+                        fetched += 1
+                except Exception as e:
+                    # NOTE: A bad image must not stop the other images from
+                    # being cached.
+                    LOG.warning('Failed to pre-cache image %(id)s: %(error)s',
+                                {'id': image_id, 'error': e})
+        finally:
+            self._precaching = False
+        LOG.debug('Pre-cached %(fetched)d of %(total)d images',
+                  {'fetched': fetched, 'total': len(CONF.precache_images)})
+
+    def _start_precaching_images(self, context):
+        """Pre-cache the images in CONF.precache_images in a greenthread.
+
+        Downloading the images can take much longer than the image cache
+        manager pass, so they are fetched in the background. Nothing is done
+        while the images of a previous pass are still being fetched, or if
+        the image backend does not use the image cache.
+        """
+        if CONF.libvirt.images_type not in _CACHING_IMAGES_TYPES:
+            LOG.debug('Not pre-caching images, the %s image backend does '
+                      'not use the image cache', CONF.libvirt.images_type)
+            return
+        if self._precaching:
+            LOG.debug('Images of a previous pass are still being pre-cached')
+            return
+
+        base_dir = os.path.join(CONF.instances_path,
+                                CONF.image_cache_subdirectory_name)
+        fileutils.ensure_tree(base_dir)
+        self._precaching = True
+        utils.spawn_n(self._precache_images, context, base_dir)
+
+    def _log_cache_stats(self):
+        lookups, misses = pop_cache_stats()
+        if lookups:
+            LOG.info('Image cache hit rate since the last pass: %(rate)d%% '
+                     '(%(hits)d hits, %(misses)d misses)',
+                     {'rate': 100 * (lookups - misses) // lookups,
+                      'hits': lookups - misses, 'misses': misses})
+
     def update(self, context, all_instances):
+        self._log_cache_stats()
+        if CONF.precache_images:
+            self._start_precaching_images(context)
         base_dir = self._get_base()
         if not base_dir:
             return
@@ -414,6 +648,9 @@ class ImageCacheManager(imagecache.ImageCacheManager):
         # read running instances data
         running = self._list_running_instances(context, all_instances)
         self.used_images = running['used_images']
+        # pre-cached images are in use even if no instance uses them yet
+        for image_id in CONF.precache_images:
+            self.used_images.setdefault(image_id, (0, 0, []))
         self.instance_names = running['instance_names']
         self.used_swap_images = running['used_swap_images']
         # perform the aging and image verification
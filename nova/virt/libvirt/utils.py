@@ -424,7 +424,14 @@ def fetch_image(context, target, image_id, trusted_certs=None):
     :param image_id: id of the image to fetch
     :param trusted_certs: optional objects.TrustedCerts for image validation
     """
-    images.fetch_to_raw(context, image_id, target, trusted_certs)
+    # NOTE: The Lvm image backend converts the cached image as it copies it
+    # into the logical volume of each instance, so converting it to a raw
+    # file in the image cache first would only double the disk I/O and the
+    # space needed for the image.
+    force_raw = (CONF.force_raw_images and
+                 CONF.libvirt.images_type != 'lvm')
+    images.fetch_to_raw(context, image_id, target, trusted_certs,
+                        force_raw=force_raw)
 
 
 def fetch_raw_image(context, target, image_id, trusted_certs=None):
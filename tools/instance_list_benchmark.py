@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+Micro-benchmark for listing pages of instances with their joined attributes.
+
+Fills an in-memory sqlite database with synthetic instances, along with their
+metadata, system metadata, info caches, security groups, tags and faults, then
+loads pages of them with InstanceList.get_by_filters(), reporting the number of
+SQL statements issued and the best wall time for each set of expected_attrs.
+No other service is needed.
+
+Usage:
+
+    python tools/instance_list_benchmark.py [--instances 1000]
+                                            [--page-size 1000] [--repeat 5]
+"""
+import argparse
+import logging
+import timeit
+
+from oslo_utils import timeutils
+from oslo_utils import uuidutils
+import sqlalchemy
+
+from nova import context as nova_context
+from nova.db.sqlalchemy import api as db_api
+from nova.db.sqlalchemy import models
+import nova.conf
+from nova import objects
+
+CONF = nova.conf.CONF
+
+PROJECT_ID = 'benchmark-project'
+EXPECTED_ATTRS = [
+    ('default', None),
+    ('metadata', ['metadata', 'system_metadata']),
+    ('groups+tags', ['info_cache', 'security_groups', 'tags']),
+    ('fault', ['fault']),
+    ('all', ['metadata', 'system_metadata', 'info_cache',
+             'security_groups', 'tags', 'fault']),
+]
+
+
+def _insert(conn, model, rows):
+    if rows:
+        conn.execute(model.__table__.insert(), rows)
+
+
+def populate(engine, count):
+    now = timeutils.utcnow()
+    common = {'created_at': now, 'deleted': 0}
+    with engine.begin() as conn:
+        groups = [dict(common, id=i + 1, name='group%d' % i, description='',
+                       project_id=PROJECT_ID, user_id='user')
+                  for i in range(4)]
+        _insert(conn, models.SecurityGroup, groups)
+        instances, metadata, system_metadata = [], [], []
+        info_caches, associations, tags, faults = [], [], [], []
+        for i in range(count):
+            uuid = uuidutils.generate_uuid()
+            instances.append(dict(common, uuid=uuid, project_id=PROJECT_ID,
+                                  user_id='user', hostname='inst%d' % i,
+                                  display_name='inst%d' % i, vm_state='active',
+                                  power_state=1, host='host%d' % (i % 50),
+                                  node='node%d' % (i % 50),
+                                  memory_mb=2048, vcpus=2, root_gb=20,
+                                  ephemeral_gb=0, instance_type_id=1,
+                                  launched_at=now))
+            metadata.extend(dict(common, instance_uuid=uuid,
+                                 key='key%d' % j, value='value%d' % j)
+                            for j in range(3))
+            system_metadata.extend(dict(common, instance_uuid=uuid,
+                                        key='image_key%d' % j,
+                                        value='value%d' % j)
+                                   for j in range(15))
+            info_caches.append(dict(common, instance_uuid=uuid,
+                                    network_info='[]'))
+            associations.extend(dict(common, instance_uuid=uuid,
+                                     security_group_id=group['id'])
+                                for group in groups[i % 3:i % 3 + 2])
+            tags.extend(dict(resource_id=uuid, tag='tag%d' % j)
+                        for j in range(3))
+            faults.extend(dict(common, instance_uuid=uuid, code=500,
+                               message='fault%d' % j, details='', host='host')
+                          for j in range(2 if i % 10 == 0 else 0))
+        _insert(conn, models.Instance, instances)
+        _insert(conn, models.InstanceMetadata, metadata)
+        _insert(conn, models.InstanceSystemMetadata, system_metadata)
+        _insert(conn, models.InstanceInfoCache, info_caches)
+        _insert(conn, models.SecurityGroupInstanceAssociation, associations)
+        _insert(conn, models.Tag, tags)
+        _insert(conn, models.InstanceFault, faults)
+
+
+class StatementCounter(object):
+    def __init__(self, engine):
+        self.count = 0
+        sqlalchemy.event.listen(engine, 'before_cursor_execute', self)
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--instances', type=int, default=1000,
+                        help='number of instances in the database')
+    parser.add_argument('--page-size', type=int, default=1000,
+                        help='number of instances listed per page')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='number of timed runs, the best one is reported')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    objects.register_all()
+    CONF([], project='nova')
+    db_api.main_context_manager.configure(connection='sqlite://')
+    engine = db_api.get_engine()
+    models.BASE.metadata.create_all(engine)
+    populate(engine, args.instances)
+    counter = StatementCounter(engine)
+    ctxt = nova_context.RequestContext('user', PROJECT_ID)
+
+    print('%12s %10s %10s %12s' % ('attrs', 'instances', 'statements',
+                                   'best (s)'))
+    for name, expected_attrs in EXPECTED_ATTRS:
+        def list_page():
+            return objects.InstanceList.get_by_filters(
+                ctxt, {'deleted': False}, limit=args.page_size,
+                sort_keys=['created_at', 'id'], sort_dirs=['desc', 'desc'],
+                expected_attrs=(list(expected_attrs)
+                                if expected_attrs is not None else None))
+
+        counter.count = 0
+        page = list_page()
+        statements = counter.count
+        best = min(timeit.Timer(list_page).repeat(repeat=args.repeat,
+                                                  number=1))
+        print('%12s %10d %10d %12.4f' % (name, len(page), statements, best))
+
+
+if __name__ == '__main__':
+    main()